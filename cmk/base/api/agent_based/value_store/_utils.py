@@ -4,6 +4,7 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import json
+import os
 from ast import literal_eval
 from collections.abc import (
     Callable,
@@ -37,6 +38,12 @@ _TDefault = TypeVar("_TDefault")
 # In practice this will be Checkplugin/Item, but the value_store doesn't care, really.
 _ServiceID = tuple[object, _Item]
 
+# Changes are appended to the file of a value store at least up to this size.
+_MIN_APPENDED_SIZE: Final = 16384
+
+# The first line of a value store file, followed by the random generation of the file
+_GENERATION_HEADER: Final = b"# generation "
+
 
 class _DynamicDiskSyncedMapping(dict[_TKey, _TValue]):
     """Represents the values that have been changed in a session
@@ -74,6 +81,15 @@ class _StaticDiskSyncedMapping(Mapping[_TKey, _TValue]):
     on disk.
 
     The only way to modify the values is the disksync method.
+
+    The first line of the file holds all values. Every sync appends a line
+    with the changed values only, a value of None meaning the key has been
+    removed. Once the appended lines need more space than the first one, the
+    file is rewritten with a single line again.
+
+    The header line in front of it holds a new generation for every rewrite.
+    Only the changes of the file are read if it still has the generation read
+    before, its inode may be the one of a file which has been replaced.
     """
 
     def __init__(
@@ -81,12 +97,17 @@ class _StaticDiskSyncedMapping(Mapping[_TKey, _TValue]):
         *,
         path: Path,
         log_debug: Callable[[str], None],
-        serializer: Callable[[Mapping[_TKey, _TValue]], str],
-        deserializer: Callable[[str], Mapping[_TKey, _TValue]],
+        serializer: Callable[[Mapping[_TKey, _TValue | None]], str],
+        deserializer: Callable[[str], Mapping[_TKey, _TValue | None]],
     ) -> None:
         self._path: Final = path
-        self._last_sync: float | None = None
+        # Inode, mtime and size of the file as far as it has been read
+        self._last_sync: tuple[int, int, int] | None = None
+        self._generation: bytes | None = None
         self._data: Mapping[_TKey, _TValue] = {}
+        self._snapshot_size = 0
+        # Changes can only be appended after a complete line.
+        self._appendable = False
         self._log_debug = log_debug
         self._serializer: Final = serializer
         self._deserializer: Final = deserializer
@@ -110,7 +131,7 @@ class _StaticDiskSyncedMapping(Mapping[_TKey, _TValue]):
         """Re-load and write the changes of the stored values
 
         This method will reload the values from disk, apply the changes (remove keys
-        and update values) as specified by the arguments, and then write the result to disk.
+        and update values) as specified by the arguments, and then write the changes to disk.
 
         When this method returns, the data provided via the Mapping-interface and
         the data stored on disk must be in sync.
@@ -121,27 +142,117 @@ class _StaticDiskSyncedMapping(Mapping[_TKey, _TValue]):
 
         with store.locked(self._path):
             try:
-                if self._path.stat().st_mtime == self._last_sync:
-                    self._log_debug("already loaded")
-                else:
-                    self._log_debug("loading from disk")
-                    self._data = (
-                        self._deserializer(content)
-                        if (content := store.load_text_from_file(self._path, lock=False).strip())
-                        else {}
-                    )
-
-                if removed or updated:
-                    data = {k: v for k, v in self._data.items() if k not in removed}
-                    data.update(updated)
-                    self._log_debug("writing to disk")
-                    store.save_text_to_file(self._path, self._serializer(data))
-                    self._data = data
-
-                self._last_sync = self._path.stat().st_mtime
+                self._load()
+                changes: dict[_TKey, _TValue | None] = {k: None for k in removed if k in self._data}
+                changes.update((k, v) for k, v in updated if self._data.get(k) != v)
+                if changes:
+                    self._write(changes)
             except Exception as exc:
                 raise MKGeneralException from exc
 
+    def _load(self) -> None:
+        stat = self._path.stat()
+        if self._last_sync == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            self._log_debug("already loaded")
+            return
+
+        if (
+            self._last_sync is not None
+            and self._last_sync[0] == stat.st_ino
+            and self._last_sync[2] < stat.st_size
+            and self._generation is not None
+            and self._read_header() == self._generation
+        ):
+            self._log_debug("loading changes from disk")
+            offset = self._last_sync[2]
+            data = dict(self._data)
+        else:
+            self._log_debug("loading from disk")
+            offset = 0
+            data = {}
+
+        if offset:
+            with self._path.open("rb") as file:
+                file.seek(offset)
+                raw = file.read()
+        else:
+            raw = store.load_text_from_file(self._path, lock=False).encode("utf-8")
+
+        *lines, rest = raw.split(b"\n")
+        if offset == 0:
+            header_size = 0
+            self._generation = None
+            if lines and lines[0].startswith(_GENERATION_HEADER):
+                header = lines.pop(0)
+                header_size = len(header) + 1
+                self._generation = header.removeprefix(_GENERATION_HEADER)
+            self._snapshot_size = header_size + (len(lines[0]) + 1 if lines else len(rest))
+        for line in lines:
+            self._apply(data, line)
+
+        # A file written by an older version or the end of an interrupted write
+        self._appendable = not rest.strip()
+        if not self._appendable:
+            try:
+                self._apply(data, rest)
+            except (ValueError, SyntaxError):
+                self._log_debug("ignoring incomplete line")
+                raw = raw[: -len(rest)]
+
+        self._data = data
+        self._last_sync = (stat.st_ino, stat.st_mtime_ns, offset + len(raw))
+
+    def _read_header(self) -> bytes | None:
+        with self._path.open("rb") as file:
+            header = file.readline().rstrip(b"\n")
+        return (
+            header.removeprefix(_GENERATION_HEADER)
+            if header.startswith(_GENERATION_HEADER)
+            else None
+        )
+
+    def _apply(self, data: dict[_TKey, _TValue], line: bytes) -> None:
+        if not line.strip():
+            return
+        for key, value in self._deserializer(line.decode("utf-8")).items():
+            if value is None:
+                data.pop(key, None)
+            else:
+                data[key] = value
+
+    def _write(self, changes: Mapping[_TKey, _TValue | None]) -> None:
+        data = {k: v for k, v in self._data.items() if changes.get(k, v) is not None}
+        data.update((k, v) for k, v in changes.items() if v is not None)
+
+        line = (self._serializer(changes) + "\n").encode("utf-8")
+        assert self._last_sync is not None
+        appended_size = self._last_sync[2] - self._snapshot_size
+        # Files of older versions are rewritten to get a generation.
+        if (
+            self._appendable
+            and self._generation is not None
+            and appended_size + len(line) <= max(self._snapshot_size, _MIN_APPENDED_SIZE)
+        ):
+            self._log_debug("appending changes to disk")
+            with self._path.open("ab") as file:
+                file.write(line)
+                stat = os.fstat(file.fileno())
+            self._last_sync = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        else:
+            self._log_debug("writing to disk")
+            content = (
+                _GENERATION_HEADER
+                + os.urandom(8).hex().encode()
+                + b"\n"
+                + (self._serializer(data) + "\n").encode("utf-8")
+            )
+            store.save_bytes_to_file(self._path, content)
+            self._snapshot_size = len(content)
+            self._appendable = True
+            # The lock is gone after writing, read the file again next time.
+            self._last_sync = None
+        self._data = data
+
 
 class _DiskSyncedMapping(MutableMapping[_TKey, _TValue]):  # pylint: disable=too-many-ancestors
     """Implements the overlay logic between dynamic and static value store"""
@@ -152,8 +263,8 @@ class _DiskSyncedMapping(MutableMapping[_TKey, _TValue]):  # pylint: disable=too
         *,
         path: Path,
         log_debug: Callable[[str], None],
-        serializer: Callable[[Mapping[_TKey, _TValue]], str],
-        deserializer: Callable[[str], Mapping[_TKey, _TValue]],
+        serializer: Callable[[Mapping[_TKey, _TValue | None]], str],
+        deserializer: Callable[[str], Mapping[_TKey, _TValue | None]],
     ) -> "_DiskSyncedMapping":
         return cls(
             dynamic=_DynamicDiskSyncedMapping(),
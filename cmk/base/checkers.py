@@ -7,9 +7,13 @@
 
 from __future__ import annotations
 
+import contextlib
 import functools
 import itertools
 import logging
+import posix
+import queue
+import threading
 import time
 from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass
@@ -17,8 +21,6 @@ from functools import partial
 from pathlib import Path
 from typing import Final, Literal
 
-import livestatus
-
 import cmk.ccc.debug
 from cmk.ccc.exceptions import MKTimeout, OnError
 
@@ -122,7 +124,12 @@ __all__ = [
 
 
 def _fetch_all(
-    sources: Iterable[Source], *, simulation: bool, file_cache_options: FileCacheOptions, mode: Mode
+    sources: Iterable[Source],
+    *,
+    simulation: bool,
+    file_cache_options: FileCacheOptions,
+    mode: Mode,
+    max_concurrent_fetches: int = 1,
 ) -> Sequence[
     tuple[
         SourceInfo,
@@ -131,6 +138,19 @@ def _fetch_all(
     ]
 ]:
     console.verbose(f"{tty.yellow}+{tty.normal} FETCHING DATA")
+    if max_concurrent_fetches > 1:
+        return _fetch_concurrently(
+            [
+                (
+                    source.source_info(),
+                    source.file_cache(simulation=simulation, file_cache_options=file_cache_options),
+                    source.fetcher(),
+                )
+                for source in sources
+            ],
+            mode=mode,
+            max_workers=max_concurrent_fetches,
+        )
     return [
         _do_fetch(
             source.source_info(),
@@ -142,6 +162,94 @@ def _fetch_all(
     ]
 
 
+def _fetch_concurrently(
+    jobs: Sequence[tuple[SourceInfo, FileCache, Fetcher]],
+    *,
+    mode: Mode,
+    max_workers: int,
+) -> Sequence[
+    tuple[
+        SourceInfo,
+        result.Result[AgentRawData | SNMPRawData, Exception],
+        Snapshot,
+    ]
+]:
+    """Fetch the sources in daemon threads, keeping their order
+
+    The CPU times of a process can't be told apart per thread, and the fetches
+    overlap in time. The times of the whole fetching are therefore shared out to
+    the sources in proportion to their latency, so that they still add up to the
+    execution time of the check.
+
+    After a timeout the fetches still running are left behind: Unlike the workers
+    of a ThreadPoolExecutor, daemon threads don't keep the interpreter from exiting.
+    """
+    if len(jobs) <= 1:
+        return [_do_fetch(*job, mode=mode) for job in jobs]
+
+    pending: queue.SimpleQueue[tuple[int, tuple[SourceInfo, FileCache, Fetcher]]] = (
+        queue.SimpleQueue()
+    )
+    for item in enumerate(jobs):
+        pending.put(item)
+    done: queue.SimpleQueue[
+        tuple[
+            int,
+            tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot]
+            | BaseException,
+        ]
+    ] = queue.SimpleQueue()
+
+    def work() -> None:
+        while True:
+            try:
+                index, job = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                done.put((index, _do_fetch(*job, mode=mode)))
+            except BaseException as e:
+                done.put((index, e))
+
+    try:
+        with CPUTracker(console.debug) as tracker:
+            for num in range(min(max_workers, len(jobs))):
+                threading.Thread(target=work, name=f"fetcher_{num}", daemon=True).start()
+            by_index = {}
+            for _job in jobs:
+                index, outcome = done.get()
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                by_index[index] = outcome
+    finally:
+        # Don't start any further fetches after a timeout or an error.
+        while not pending.empty():
+            with contextlib.suppress(queue.Empty):
+                pending.get_nowait()
+
+    fetched = [by_index[index] for index in range(len(jobs))]
+    return [
+        (source_info, raw_data, duration)
+        for (source_info, raw_data, _latency), duration in zip(
+            fetched,
+            _share_duration(tracker.duration, [latency for _info, _data, latency in fetched]),
+        )
+    ]
+
+
+def _share_duration(total: Snapshot, latencies: Sequence[Snapshot]) -> Sequence[Snapshot]:
+    elapsed = sum(latency.process.elapsed for latency in latencies)
+    return [
+        Snapshot(
+            posix.times_result(
+                value * (latency.process.elapsed / elapsed if elapsed else 1 / len(latencies))
+                for value in total.process
+            )
+        )
+        for latency in latencies
+    ]
+
+
 def _do_fetch(
     source_info: SourceInfo,
     file_cache: FileCache,
@@ -466,6 +574,7 @@ class CMKFetcher:
             simulation=self.simulation_mode,
             file_cache_options=self.file_cache_options,
             mode=self.mode,
+            max_concurrent_fetches=self.config_cache.max_concurrent_fetches(host_name),
         )
 
 
@@ -609,21 +718,11 @@ def _compute_final_check_parameters(
         prediction_store = PredictionStore(
             cmk.utils.paths.predictions_dir / host_name / pnp_cleanup(service.description)
         )
-        # In the past the creation of predictions (and the livestatus query needed)
-        # was performed inside the check plug-ins context.
-        # We should consider moving this side effect even further up the stack
+        # The predictions are computed by "cmk --precompute-predictions", the checks
+        # only read them and never query the RRDs themselves.
         return InjectedParameters(
             meta_file_path_template=prediction_store.meta_file_path_template,
-            predictions=make_updated_predictions(
-                prediction_store,
-                partial(
-                    livestatus.get_rrd_data,
-                    livestatus.LocalConnection(),
-                    host_name,
-                    service.description,
-                ),
-                time.time(),
-            ),
+            predictions=make_updated_predictions(prediction_store, time.time()),
         )
 
     config = PostprocessingConfig(
@@ -12,10 +12,12 @@ import enum
 import ipaddress
 import itertools
 import logging
+import mmap
 import numbers
 import os
 import pickle
 import socket
+import struct
 import sys
 import time
 from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
@@ -31,6 +33,7 @@ from typing import (
     Literal,
     NamedTuple,
     overload,
+    SupportsIndex,
     TypeAlias,
     TypeVar,
 )
@@ -525,24 +528,30 @@ def load(
     *,
     changed_vars_handler: Callable[[set[str]], None] | None = None,
 ) -> None:
-    _initialize_config()
+    with _load_phase("defaults"):
+        _initialize_config()
 
-    changed_var_names = _load_config(with_conf_d)
+    with _load_phase("configuration files"):
+        changed_var_names = _load_config(with_conf_d)
     if changed_vars_handler is not None:
         changed_vars_handler(changed_var_names)
 
-    _initialize_derived_config_variables()
+    with _load_phase("derived variables"):
+        _initialize_derived_config_variables()
 
-    _perform_post_config_loading_actions()
+    with _load_phase("post loading actions"):
+        _perform_post_config_loading_actions()
 
     if validate_hosts:
         config_cache = get_config_cache()
         hosts_config = config_cache.hosts_config
-        if duplicates := sorted(
-            hosts_config.duplicates(
-                lambda hn: config_cache.is_active(hn) and config_cache.is_online(hn)
+        with _load_phase("host validation"):
+            duplicates = sorted(
+                hosts_config.duplicates(
+                    lambda hn: config_cache.is_active(hn) and config_cache.is_online(hn)
+                )
             )
-        ):
+        if duplicates:
             # TODO: Raise an exception
             console.error(
                 f"Error in configuration: duplicate hosts: {', '.join(duplicates)}",
@@ -551,6 +560,15 @@ def load(
             sys.exit(3)
 
 
+@contextlib.contextmanager
+def _load_phase(phase: str) -> Iterator[None]:
+    """Show the time a phase of loading the configuration takes (with -vv)"""
+    start = time.perf_counter()
+    with tracer.start_as_current_span(f"load_config[{phase}]"):
+        yield
+    console.debug(f"Loading configuration: {phase} took {time.perf_counter() - start:.3f}s")
+
+
 def load_packed_config(config_path: ConfigPath) -> None:
     """Load the configuration for the CMK helpers of CMC
 
@@ -639,7 +657,10 @@ class SetFolderPathDict(SetFolderPathAbstract, dict):
 
 
 def _load_config_file(file_to_load: Path, into_dict: dict[str, Any]) -> None:
-    exec(compile(file_to_load.read_text(), file_to_load, "exec"), into_dict, into_dict)  # nosec B102 # BNS:aee528
+    code = store.load_code_from_file(
+        file_to_load, temp_dir=cmk.utils.paths.tmp_dir, root_dir=cmk.utils.paths.omd_root
+    )
+    exec(code, into_dict, into_dict)  # nosec B102 # BNS:aee528
 
 
 def _load_config(with_conf_d: bool) -> set[str]:
@@ -665,6 +686,8 @@ def _load_config(with_conf_d: bool) -> set[str]:
 
     host_storage_loaders = get_host_storage_loaders(config_storage_format)
     config_dir_path = Path(cmk.utils.paths.check_mk_config_dir)
+    # Number of files and seconds spent loading them, by kind of file
+    load_times: dict[str, tuple[int, float]] = {}
     for path in get_config_file_paths(with_conf_d):
         try:
             # Make the config path available as a global variable to be used
@@ -682,10 +705,13 @@ def _load_config(with_conf_d: bool) -> set[str]:
             all_hosts.set_current_path(current_path)
             clusters.set_current_path(current_path)
 
+            start = time.perf_counter()
             if path.name == "hosts.mk":
                 apply_hosts_file_to_object(path.with_suffix(""), host_storage_loaders, global_dict)
             else:
                 _load_config_file(path, global_dict)
+            num_files, seconds = load_times.get(path.name, (0, 0.0))
+            load_times[path.name] = (num_files + 1, seconds + time.perf_counter() - start)
 
             if not isinstance(all_hosts, SetFolderPathList):
                 raise MKGeneralException(
@@ -704,6 +730,9 @@ def _load_config(with_conf_d: bool) -> set[str]:
                 console.error(f"Cannot read in configuration file {path}: {e}", file=sys.stderr)
             sys.exit(1)
 
+    for name, (num_files, seconds) in sorted(load_times.items(), key=lambda item: -item[1][1]):
+        console.debug(f"  {num_files} x {name}: {seconds:.3f}s")
+
     # Cleanup global helper vars
     for helper_var in helper_vars:
         del global_dict[helper_var]
@@ -806,6 +835,20 @@ class PackedConfigGenerator:
         "extra_nagios_conf",
     ]
 
+    # The values of these variables are rulesets, which are only used by the
+    # ruleset matcher. They are unpickled when they are used for the first time.
+    _packed_ruleset_variable_names = frozenset(
+        {
+            "checkgroup_parameters",
+            "static_checks",
+            "inv_parameters",
+            "active_checks",
+            "special_agents",
+            "extra_host_conf",
+            "extra_service_conf",
+        }
+    )
+
     def __init__(self, config_cache: ConfigCache) -> None:
         self._config_cache = config_cache
 
@@ -890,6 +933,9 @@ class PackedConfigGenerator:
             if varname in filter_var_functions:
                 val = filter_var_functions[varname](val)
 
+            if varname in self._packed_ruleset_variable_names:
+                val = {name: _PackedRuleset.pack(ruleset) for name, ruleset in val.items()}
+
             helper_config[varname] = val
 
         #
@@ -901,11 +947,72 @@ class PackedConfigGenerator:
             if not value:
                 continue
 
-            helper_config[str(ruleset_name)] = value
+            helper_config[str(ruleset_name)] = _PackedRuleset.pack(value)
 
         return helper_config
 
 
+class _PackedRuleset(Sequence[RuleSpec[Any]]):
+    """A ruleset of the packed configuration which is unpickled when it is used
+
+    A helper only needs the rulesets of the checks it executes. The others stay
+    in the memory mapped packed configuration and are never read from disk.
+    """
+
+    __slots__ = ("_packed", "_length", "_rules")
+
+    def __init__(self, packed: bytes | memoryview, length: int) -> None:
+        self._packed = packed
+        self._length: Final = length
+        self._rules: Sequence[RuleSpec[Any]] | None = None
+
+    @classmethod
+    def pack(cls, rules: Sequence[RuleSpec[Any]]) -> _PackedRuleset:
+        return cls(pickle.dumps(list(rules), protocol=5), len(rules))
+
+    def _unpack(self) -> Sequence[RuleSpec[Any]]:
+        if self._rules is None:
+            self._rules = pickle.loads(self._packed)  # nosec B301 # BNS:c3c5e9
+            self._packed = b""
+        return self._rules
+
+    @overload
+    def __getitem__(self, index: int) -> RuleSpec[Any]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[RuleSpec[Any]]: ...
+
+    def __getitem__(self, index: int | slice) -> RuleSpec[Any] | Sequence[RuleSpec[Any]]:
+        return self._unpack()[index]
+
+    def __iter__(self) -> Iterator[RuleSpec[Any]]:
+        return iter(self._unpack())
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _PackedRuleset | list | tuple):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(self._unpack())
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> tuple[object, ...]:
+        if self._rules is None and int(protocol) >= 5:
+            # Written out of band by PackedConfigStore, so that it can be mapped lazily
+            return _PackedRuleset, (pickle.PickleBuffer(self._packed), self._length)
+        return list, (list(self._unpack()),)
+
+
+_PACKED_CONFIG_MAGIC: Final = b"CMKPACK1"
+# The magic and the number of out of band buffers, followed by their lengths
+_PACKED_CONFIG_HEADER: Final = struct.Struct("<8sQ")
+
+
 class PackedConfigStore:
     """Caring about persistence of the packed configuration"""
 
@@ -923,13 +1030,43 @@ class PackedConfigStore:
     def write(self, helper_config: Mapping[str, Any]) -> None:
         self.path.parent.mkdir(parents=True, exist_ok=True)
         tmp_path = self.path.with_suffix(f"{self.path.suffix}.compiled")
+        buffers: list[pickle.PickleBuffer] = []
+        data = pickle.dumps(helper_config, protocol=5, buffer_callback=buffers.append)
+        lengths = [buffer.raw().nbytes for buffer in buffers]
         with tmp_path.open("wb") as compiled_file:
-            pickle.dump(helper_config, compiled_file)
+            compiled_file.write(_PACKED_CONFIG_HEADER.pack(_PACKED_CONFIG_MAGIC, len(lengths)))
+            compiled_file.write(struct.pack(f"<{len(lengths)}Q", *lengths))
+            compiled_file.write(data)
+            for buffer in buffers:
+                compiled_file.write(buffer.raw())
         tmp_path.rename(self.path)
 
     def read(self) -> Mapping[str, Any]:
+        """Read the packed configuration
+
+        The rulesets are written behind the main part of the file. They are
+        not copied, but refer to the memory mapped file until they are used.
+        """
         with self.path.open("rb") as f:
-            return pickle.load(f)  # nosec B301 # BNS:c3c5e9
+            if os.fstat(f.fileno()).st_size < _PACKED_CONFIG_HEADER.size:
+                return pickle.load(f)  # nosec B301 # BNS:c3c5e9
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(mapped)
+        magic, num_buffers = _PACKED_CONFIG_HEADER.unpack_from(view)
+        if magic != _PACKED_CONFIG_MAGIC:
+            # Written by a previous version
+            return pickle.loads(view)  # nosec B301 # BNS:c3c5e9
+
+        lengths = struct.unpack_from(f"<{num_buffers}Q", view, _PACKED_CONFIG_HEADER.size)
+        start = _PACKED_CONFIG_HEADER.size + 8 * num_buffers
+        end = len(view) - sum(lengths)
+        data = view[start:end]
+        buffers = []
+        for length in lengths:
+            buffers.append(view[end : end + length])
+            end += length
+        return pickle.loads(data, buffers=buffers)  # nosec B301 # BNS:c3c5e9
 
 
 @contextlib.contextmanager
@@ -2908,6 +3045,10 @@ class ConfigCache:
             inventory=1.5 * check_interval,
         )
 
+    def max_concurrent_fetches(self, host_name: HostName) -> int:
+        values = self.ruleset_matcher.get_host_values(host_name, max_concurrent_fetches_per_host)
+        return max(1, values[0] if values else max_concurrent_fetches)
+
     def exit_code_spec(self, hostname: HostName, data_source_id: str | None = None) -> ExitSpec:
         spec: _NestedExitSpec = {}
         # TODO: Can we use get_host_merged_dict?
@@ -3022,12 +3163,16 @@ class ConfigCache:
                 return SNMPBackendEnum.INLINE
             if host_backend == "classic":
                 return SNMPBackendEnum.CLASSIC
+            if host_backend == "native":
+                return SNMPBackendEnum.NATIVE
             raise MKGeneralException(f"Bad Host SNMP Backend configuration: {host_backend}")
 
         if with_inline_snmp and snmp_backend_default == "inline":
             return SNMPBackendEnum.INLINE
         if snmp_backend_default == "classic":
             return SNMPBackendEnum.CLASSIC
+        if snmp_backend_default == "native":
+            return SNMPBackendEnum.NATIVE
         # Note: in the above case we raise here.
         # I am not sure if this different behavior is intentional.
         return SNMPBackendEnum.CLASSIC
@@ -4546,6 +4691,7 @@ def get_ruleset_id_mapping() -> Mapping[int, str]:
         id(agent_exclude_sections): "agent_exclude_sections",
         id(snmp_ports): "snmp_ports",
         id(tcp_connect_timeouts): "tcp_connect_timeouts",
+        id(max_concurrent_fetches_per_host): "max_concurrent_fetches_per_host",
         id(piggyback_translation): "piggyback_translation",
         id(service_description_translation): "service_description_translation",
         id(snmp_backend_hosts): "snmp_backend_hosts",
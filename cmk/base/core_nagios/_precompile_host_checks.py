@@ -11,31 +11,39 @@ all saves substantial CPU resources as opposed to running Checkmk
 in adhoc mode (about 75%).
 """
 
+import dataclasses
 import enum
+import hashlib
+import importlib.util
 import itertools
+import multiprocessing
 import os
+import pickle
 import py_compile
 import re
 import socket
 import sys
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from pathlib import Path
-from typing import assert_never
+from types import ModuleType
+from typing import assert_never, Final, NamedTuple
 
 import cmk.ccc.debug
+import cmk.ccc.version as cmk_version
 from cmk.ccc import store
 
 import cmk.utils.config_path
 import cmk.utils.password_store
 import cmk.utils.paths
 from cmk.utils import tty
-from cmk.utils.config_path import VersionedConfigPath
+from cmk.utils.config_path import LATEST_CONFIG, VersionedConfigPath
 from cmk.utils.hostaddress import HostAddress, HostName
 from cmk.utils.ip_lookup import IPStackConfig
 from cmk.utils.log import console
 
 import cmk.base.api.agent_based.register as agent_based_register
 import cmk.base.utils
+from cmk.base import config
 from cmk.base.api.agent_based.plugin_classes import (
     CheckPlugin,
     InventoryPlugin,
@@ -56,6 +64,26 @@ _INSTANTIATION_PATTERN = re.compile(
     re.DOTALL,
 )
 
+# Fewer hosts are not worth starting another process for
+_HOSTS_PER_WORKER: Final = 200
+
+# These configuration variables map the hosts to their settings. Together with
+# "all_hosts" and "explicit_host_conf" they make up the fingerprint of a single
+# host, all the other variables go into the fingerprint of every host.
+_HOST_VARIABLES: Final = (
+    "host_attributes",
+    "host_labels",
+    "host_paths",
+    "host_tags",
+    "ipaddresses",
+    "ipv6addresses",
+    "explicit_snmp_communities",
+)
+
+# We need `list` for the weird template replacement technique.
+# TODO: change the legacy files to `LegacyPluginLocation` once the special agents are migrated
+_NeededPlugins = tuple[list[PluginLocation], list[str]]
+
 
 class PrecompileMode(enum.Enum):
     DELAYED = enum.auto()
@@ -66,15 +94,41 @@ class HostCheckStore:
     """Caring about persistence of the precompiled host check files"""
 
     @staticmethod
-    def host_check_file_path(config_path: VersionedConfigPath, hostname: HostName) -> Path:
+    def host_check_file_path(
+        config_path: cmk.utils.config_path.ConfigPath, hostname: HostName
+    ) -> Path:
         return Path(config_path) / "host_checks" / hostname
 
     @staticmethod
-    def host_check_source_file_path(config_path: VersionedConfigPath, hostname: HostName) -> Path:
+    def host_check_source_file_path(
+        config_path: cmk.utils.config_path.ConfigPath, hostname: HostName
+    ) -> Path:
         # TODO: Use append_suffix(".py") once we are on Python 3.10
         path = HostCheckStore.host_check_file_path(config_path, hostname)
         return path.with_suffix(path.suffix + ".py")
 
+    @staticmethod
+    def needed_plugins_file_path(config_path: cmk.utils.config_path.ConfigPath) -> Path:
+        return Path(config_path) / "host_check_plugins.pkl"
+
+    def read_needed_plugins(
+        self, config_path: cmk.utils.config_path.ConfigPath
+    ) -> Mapping[HostName, tuple[str, _NeededPlugins]]:
+        """The plug-ins needed by the hosts, with the fingerprints they were determined for"""
+        try:
+            return store.load_object_from_pickle_file(
+                self.needed_plugins_file_path(config_path), default={}
+            )
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return {}
+
+    def write_needed_plugins(
+        self,
+        config_path: VersionedConfigPath,
+        needed_plugins: Mapping[HostName, tuple[str, _NeededPlugins]],
+    ) -> None:
+        store.save_object_to_pickle_file(self.needed_plugins_file_path(config_path), needed_plugins)
+
     def write(
         self,
         config_path: VersionedConfigPath,
@@ -95,17 +149,43 @@ class HostCheckStore:
             case PrecompileMode.DELAYED:
                 compiled_filename.symlink_to(hostname + ".py")
             case PrecompileMode.INSTANT:
+                # Refer to the latest configuration, so the file can be reused by the next one.
                 py_compile.compile(
                     file=str(source_filename),
                     cfile=str(compiled_filename),
-                    dfile=str(compiled_filename),
+                    dfile=str(self.host_check_file_path(LATEST_CONFIG, hostname)),
                     doraise=True,
                 )
                 os.chmod(compiled_filename, 0o750)  # nosec B103 # BNS:c29b0e
             case other:
                 assert_never(other)
 
-        console.verbose(f" ==> {compiled_filename}.", file=sys.stderr)
+    def reuse(
+        self,
+        previous_config_path: cmk.utils.config_path.ConfigPath,
+        config_path: VersionedConfigPath,
+        hostname: HostName,
+        host_check: str,
+    ) -> bool:
+        """Link the compiled host check of the previous configuration, if it has the same source
+
+        Host checks that compile themselves on their first execution are never
+        reused, their source refers to the configuration they are part of.
+        """
+        previous_compiled = self.host_check_file_path(previous_config_path, hostname)
+        previous_source = self.host_check_source_file_path(previous_config_path, hostname)
+        compiled_filename = self.host_check_file_path(config_path, hostname)
+        source_filename = self.host_check_source_file_path(config_path, hostname)
+        try:
+            if previous_compiled.is_symlink() or previous_source.read_text() != host_check:
+                return False
+            store.makedirs(compiled_filename.parent)
+            os.link(previous_source, source_filename)
+            os.link(previous_compiled, compiled_filename)
+        except OSError:
+            source_filename.unlink(missing_ok=True)
+            return False
+        return True
 
 
 def precompile_hostchecks(
@@ -123,38 +203,308 @@ def precompile_hostchecks(
     console.verbose("Precompiling host checks...")
 
     host_check_store = HostCheckStore()
-    for hostname in {
+    hostnames = sorted(
         # Inconsistent with `create_config` above.
         hn
         for hn in itertools.chain(hosts_config.hosts, hosts_config.clusters)
         if config_cache.is_active(hn) and config_cache.is_online(hn)
-    }:
-        try:
-            console.verbose_no_lf(
-                f"{tty.bold}{tty.blue}{hostname:<16}{tty.normal}:", file=sys.stderr
+    )
+    job = _PrecompileJob(
+        config_cache=config_cache,
+        config_path=config_path,
+        plugins=plugins,
+        precompile_mode=precompile_mode,
+        fingerprints=_HostCheckFingerprints(config_cache, plugins),
+        previous_needed_plugins=host_check_store.read_needed_plugins(LATEST_CONFIG),
+    )
+
+    needed_plugins: dict[HostName, tuple[str, _NeededPlugins]] = {}
+    num_reused = 0
+    for result in _run_precompile_job(job, hostnames):
+        console.verbose_no_lf(
+            f"{tty.bold}{tty.blue}{result.hostname:<16}{tty.normal}:", file=sys.stderr
+        )
+        if result.error is not None:
+            console.error(
+                f"Error precompiling checks for host {result.hostname}: {result.error}",
+                file=sys.stderr,
             )
-            host_check = dump_precompiled_hostcheck(
-                config_cache,
-                config_path,
+            sys.exit(5)
+
+        if result.needed_plugins is not None:
+            needed_plugins[result.hostname] = result.needed_plugins
+        num_reused += result.reused
+
+        if not result.written:
+            console.verbose("(no Checkmk checks)")
+            continue
+
+        console.verbose(
+            f" ==> {HostCheckStore.host_check_file_path(config_path, result.hostname)}.",
+            file=sys.stderr,
+        )
+
+    host_check_store.write_needed_plugins(config_path, needed_plugins)
+    console.verbose(
+        f"Determined the needed plug-ins of {len(hostnames) - num_reused} hosts"
+        f" (unchanged: {num_reused})"
+    )
+
+
+class _HostCheckFingerprints:
+    """Fingerprints of everything the needed plug-ins of a host depend on
+
+    The global settings and the available plug-ins including the state of their
+    source files make up a common part of all fingerprints. A rule only goes
+    into the fingerprints of the hosts matching its host conditions. Changing
+    the attributes, the autochecks or the discovered labels of a host, or a
+    rule matching it, thus only changes its own fingerprint.
+    """
+
+    def __init__(
+        self, config_cache: ConfigCache, plugins: agent_based_register.AgentBasedPlugins
+    ) -> None:
+        self._config_cache: Final = config_cache
+        self._all_hosts: Final = {entry.split("|", 1)[0]: entry for entry in config.all_hosts}
+        self._common: Final = self._common_fingerprint(plugins)
+        self._rules: Final = self._rule_fingerprints(config_cache)
+
+    @staticmethod
+    def _common_fingerprint(plugins: agent_based_register.AgentBasedPlugins) -> bytes | None:
+        config_variables = vars(config)
+        all_plugins: Iterable[SectionPlugin | CheckPlugin | InventoryPlugin] = itertools.chain(
+            plugins.agent_sections.values(),
+            plugins.snmp_sections.values(),
+            plugins.check_plugins.values(),
+            plugins.inventory_plugins.values(),
+        )
+        try:
+            return hashlib.sha256(
+                pickle.dumps(
+                    (
+                        cmk_version.__version__,
+                        [
+                            (name, value)
+                            for name in config.get_variable_names()
+                            if name not in _HOST_VARIABLES
+                            and name not in ("all_hosts", "explicit_host_conf")
+                            and not isinstance(value := config_variables[name], ModuleType)
+                            and not _is_rulesets(value)
+                        ],
+                        sorted(
+                            (str(p.name), repr(p.location), _source_file_stat(p.location))
+                            for p in all_plugins
+                        ),
+                    )
+                )
+            ).digest()
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Without a fingerprint the plug-ins of all hosts are determined again.
+            return None
+
+    @staticmethod
+    def _rule_fingerprints(config_cache: ConfigCache) -> Mapping[HostName, bytes] | None:
+        """Fingerprints of the rules matching the hosts, in the order of the rules
+
+        Only the host conditions are evaluated, so a host may get rules which
+        do not apply to any of its services, but never misses one.
+        """
+        ruleset_optimizer = config_cache.ruleset_matcher.ruleset_optimizer
+        config_variables = vars(config)
+        fingerprints: dict[HostName, hashlib._Hash] = {}
+        try:
+            for name in config.get_variable_names():
+                if not _is_rulesets(value := config_variables[name]):
+                    continue
+                for key, ruleset in value.items() if isinstance(value, dict) else [(None, value)]:
+                    for rule in ruleset:
+                        digest = hashlib.sha256(pickle.dumps((name, key, rule))).digest()
+                        for hostname in ruleset_optimizer.matching_hosts(
+                            rule, with_foreign_hosts=True
+                        ):
+                            fingerprints.setdefault(hostname, hashlib.sha256()).update(digest)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+        return {hostname: fingerprint.digest() for hostname, fingerprint in fingerprints.items()}
+
+    def of_host(self, hostname: HostName) -> str | None:
+        if self._common is None or self._rules is None:
+            return None
+        fingerprint = hashlib.sha256(self._common)
+        hostnames = [hostname]
+        if hostname in self._config_cache.hosts_config.clusters:
+            hostnames.extend(self._config_cache.nodes(hostname))
+        for name in hostnames:
+            fingerprint.update(self._host_settings(name))
+            fingerprint.update(self._rules.get(name, b"\0"))
+            for path in (
+                Path(cmk.utils.paths.autochecks_dir, f"{name}.mk"),
+                cmk.utils.paths.discovered_host_labels_dir / f"{name}.mk",
+            ):
+                fingerprint.update(store.load_bytes_from_file(path))
+                fingerprint.update(b"\0")
+        return fingerprint.hexdigest()
+
+    def _host_settings(self, hostname: HostName) -> bytes:
+        config_variables = vars(config)
+        return pickle.dumps(
+            (
                 hostname,
-                plugins,
-                precompile_mode=precompile_mode,
+                self._all_hosts.get(hostname),
+                [config_variables[name].get(hostname) for name in _HOST_VARIABLES],
+                {key: values.get(hostname) for key, values in config.explicit_host_conf.items()},
             )
-            if host_check is None:
-                console.verbose("(no Checkmk checks)")
-                continue
+        )
 
-            host_check_store.write(
-                config_path, hostname, host_check, precompile_mode=precompile_mode
-            )
+
+def _is_rulesets(value: object) -> bool:
+    """Whether the configuration variable is a ruleset or maps keys to rulesets
+
+    Empty lists and dictionaries count as rulesets, they match no host anyway.
+    """
+    if isinstance(value, dict):
+        return all(map(_is_ruleset, value.values()))
+    return _is_ruleset(value)
+
+
+def _is_ruleset(value: object) -> bool:
+    return isinstance(value, list) and all(
+        isinstance(rule, dict) and "condition" in rule and "value" in rule for rule in value
+    )
+
+
+def _source_file_stat(
+    location: PluginLocation | LegacyPluginLocation | None,
+) -> tuple[int, int] | None:
+    """Modification time and size of the file a plug-in is implemented in
+
+    This lets an edited plug-in, e.g. a local one, change the fingerprints even
+    though its name and location stay the same.
+    """
+    if location is None:
+        return None
+    if isinstance(location, LegacyPluginLocation):
+        path: str | None = location.file_name
+    elif (module := sys.modules.get(location.module)) is not None:
+        path = getattr(module, "__file__", None)
+    else:
+        try:
+            spec = importlib.util.find_spec(location.module)
+        except (ImportError, ValueError):
+            spec = None
+        path = None if spec is None else spec.origin
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _HostCheckResult(NamedTuple):
+    hostname: HostName
+    written: bool
+    reused: bool
+    needed_plugins: tuple[str, _NeededPlugins] | None
+    error: str | None
+
+
+@dataclasses.dataclass(frozen=True)
+class _PrecompileJob:
+    """Precompile the host check of one host after the other
+
+    Determining the plug-ins needed by a host is the expensive part, because it
+    needs the check table of the host. It is skipped, if the fingerprint of the
+    host did not change since the last configuration. An instantly compiled host
+    check with the same source is then linked instead of compiled again.
+    """
+
+    config_cache: ConfigCache
+    config_path: VersionedConfigPath
+    plugins: agent_based_register.AgentBasedPlugins
+    precompile_mode: PrecompileMode
+    fingerprints: _HostCheckFingerprints
+    previous_needed_plugins: Mapping[HostName, tuple[str, _NeededPlugins]]
+
+    def __call__(self, hostname: HostName) -> _HostCheckResult:
+        try:
+            return self._precompile(hostname)
         except Exception as e:
             if cmk.ccc.debug.enabled():
                 raise
-            console.error(f"Error precompiling checks for host {hostname}: {e}", file=sys.stderr)
-            sys.exit(5)
+            return _HostCheckResult(hostname, False, False, None, str(e))
+
+    def _precompile(self, hostname: HostName) -> _HostCheckResult:
+        fingerprint = self.fingerprints.of_host(hostname)
+        previous = self.previous_needed_plugins.get(hostname)
+        if fingerprint is not None and previous is not None and previous[0] == fingerprint:
+            needed_plugins, reused = previous[1], True
+        else:
+            needed_plugins = _make_needed_plugins_locations(
+                self.config_cache, hostname, self.plugins
+            )
+            reused = False
+
+        host_check = _dump_precompiled_hostcheck(
+            self.config_cache,
+            self.config_path,
+            hostname,
+            needed_plugins,
+            verify_site_python=True,
+            precompile_mode=self.precompile_mode,
+        )
+        if host_check is not None and not (
+            reused
+            and self.precompile_mode is PrecompileMode.INSTANT
+            and HostCheckStore().reuse(LATEST_CONFIG, self.config_path, hostname, host_check)
+        ):
+            HostCheckStore().write(
+                self.config_path, hostname, host_check, precompile_mode=self.precompile_mode
+            )
+        return _HostCheckResult(
+            hostname,
+            host_check is not None,
+            reused,
+            None if fingerprint is None else (fingerprint, needed_plugins),
+            None,
+        )
+
+
+# The job of the worker processes, inherited when they are forked
+_worker_job: _PrecompileJob | None = None
+
+
+def _run_in_worker(hostname: HostName) -> _HostCheckResult:
+    assert _worker_job is not None
+    return _worker_job(hostname)
+
+
+def _run_precompile_job(
+    job: _PrecompileJob, hostnames: Sequence[HostName]
+) -> Iterator[_HostCheckResult]:
+    """Precompile the host checks of the hosts, in parallel for many hosts
+
+    The worker processes are forked, so they share the configuration cache,
+    which is only read, with this process.
+    """
+    num_workers = min(os.cpu_count() or 1, len(hostnames) // _HOSTS_PER_WORKER)
+    if num_workers < 2 or cmk.ccc.debug.enabled():
+        yield from map(job, hostnames)
+        return
+
+    global _worker_job
+    _worker_job = job
+    try:
+        with multiprocessing.get_context("fork").Pool(num_workers) as pool:
+            yield from pool.imap_unordered(
+                _run_in_worker, hostnames, chunksize=max(1, len(hostnames) // (num_workers * 8))
+            )
+    finally:
+        _worker_job = None
 
 
-def dump_precompiled_hostcheck(  # pylint: disable=too-many-branches
+def dump_precompiled_hostcheck(
     config_cache: ConfigCache,
     config_path: VersionedConfigPath,
     hostname: HostName,
@@ -163,9 +513,26 @@ def dump_precompiled_hostcheck(  # pylint: disable=too-many-branches
     verify_site_python: bool = True,
     precompile_mode: PrecompileMode,
 ) -> str | None:
-    locations, legacy_checks_to_load = _make_needed_plugins_locations(
-        config_cache, hostname, plugins
+    return _dump_precompiled_hostcheck(
+        config_cache,
+        config_path,
+        hostname,
+        _make_needed_plugins_locations(config_cache, hostname, plugins),
+        verify_site_python=verify_site_python,
+        precompile_mode=precompile_mode,
     )
+
+
+def _dump_precompiled_hostcheck(  # pylint: disable=too-many-branches
+    config_cache: ConfigCache,
+    config_path: VersionedConfigPath,
+    hostname: HostName,
+    needed_plugins: _NeededPlugins,
+    *,
+    verify_site_python: bool,
+    precompile_mode: PrecompileMode,
+) -> str | None:
+    locations, legacy_checks_to_load = needed_plugins
     if not locations and not legacy_checks_to_load:
         return None
 
@@ -218,12 +585,24 @@ def dump_precompiled_hostcheck(  # pylint: disable=too-many-branches
                 config_cache, hostname, family=socket.AddressFamily.AF_INET6
             )
 
-    # assign the values here, just to let the type checker do its job
+    # propagation of enum would break b/c of the repr() below :-(
+    delay_precompile = precompile_mode is PrecompileMode.DELAYED
+
+    # assign the values here, just to let the type checker do its job.
+    # Only the delayed precompilation needs the paths, without them the host check does not
+    # depend on the configuration it is part of.
     host_check_config = HostCheckConfig(
-        delay_precompile=precompile_mode
-        is PrecompileMode.DELAYED,  # propagation of enum would break b/c of the repr() below :-(
-        src=str(HostCheckStore.host_check_source_file_path(config_path, hostname)),
-        dst=str(HostCheckStore.host_check_file_path(config_path, hostname)),
+        delay_precompile=delay_precompile,
+        src=(
+            str(HostCheckStore.host_check_source_file_path(config_path, hostname))
+            if delay_precompile
+            else ""
+        ),
+        dst=(
+            str(HostCheckStore.host_check_file_path(config_path, hostname))
+            if delay_precompile
+            else ""
+        ),
         verify_site_python=verify_site_python,
         locations=locations,
         checks_to_load=legacy_checks_to_load,
@@ -246,10 +625,7 @@ def _make_needed_plugins_locations(
     config_cache: ConfigCache,
     hostname: HostName,
     plugins: agent_based_register.AgentBasedPlugins,
-) -> tuple[  # we need `list` for the weird template replacement technique
-    list[PluginLocation],
-    list[str],  # TODO: change this to `LegacyPluginLocation` once the special agents are migrated
-]:
+) -> _NeededPlugins:
     needed_agent_based_plugins = _get_needed_plugins(config_cache, hostname, plugins)
 
     if hostname in config_cache.hosts_config.clusters:
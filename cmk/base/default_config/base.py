@@ -61,6 +61,11 @@ default_host_group = "check_mk"
 check_max_cachefile_age = 0  # per default do not use cache files when checking
 cluster_max_cachefile_age = 90  # secs.
 piggyback_max_cachefile_age = 3600  # secs
+# Compression of the cache files of the data sources
+file_cache_encoding: Literal["none", "zlib"] = "none"
+# Number of data sources of a host (or the nodes of a cluster) fetched at the same time
+max_concurrent_fetches = 1
+max_concurrent_fetches_per_host: list[RuleSpec[int]] = []
 # Ruleset for translating piggyback host names
 piggyback_translation: list[RuleSpec[TranslationOptions]] = []
 # Ruleset for translating service names
@@ -85,7 +90,7 @@ http_proxies: dict[str, dict[str, str]] = {}
 # SNMP communities and encoding
 
 # Global config for SNMP Backend
-snmp_backend_default: Literal["inline", "classic"] = "inline"
+snmp_backend_default: Literal["inline", "classic", "native"] = "inline"
 # Deprecated: Replaced by snmp_backend_hosts
 use_inline_snmp: bool = True
 
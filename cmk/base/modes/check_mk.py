@@ -47,6 +47,7 @@ from cmk.utils.everythingtype import EVERYTHING
 from cmk.utils.hostaddress import HostAddress, HostName, Hosts
 from cmk.utils.log import console, section
 from cmk.utils.paths import configuration_lockfile
+from cmk.utils.prediction import precompute_predictions
 from cmk.utils.resulttype import Result
 from cmk.utils.rulesets.ruleset_matcher import RulesetMatcher
 from cmk.utils.rulesets.tuple_rulesets import hosttags_match_taglist
@@ -79,7 +80,7 @@ import cmk.fetchers.snmp as snmp_factory
 from cmk.fetchers import get_raw_data, SNMPScanConfig, TLSConfig
 from cmk.fetchers import Mode as FetchMode
 from cmk.fetchers.config import make_persisted_section_dir
-from cmk.fetchers.filecache import FileCacheOptions, MaxAge
+from cmk.fetchers.filecache import FileCacheEncoding, FileCacheOptions, MaxAge
 
 from cmk.checkengine import inventory
 from cmk.checkengine.checking import (
@@ -90,6 +91,7 @@ from cmk.checkengine.checking import (
 from cmk.checkengine.checkresults import ActiveCheckResult
 from cmk.checkengine.discovery import (
     commandline_discovery,
+    convert_autochecks,
     execute_check_discovery,
     remove_autochecks_of_host,
 )
@@ -192,6 +194,8 @@ def parse_snmp_backend(backend: object) -> SNMPBackendEnum | None:
             return SNMPBackendEnum.INLINE
         case "classic":
             return SNMPBackendEnum.CLASSIC
+        case "native":
+            return SNMPBackendEnum.NATIVE
         case "stored-walk":
             return SNMPBackendEnum.STORED_WALK
         case _:
@@ -281,7 +285,10 @@ modes.register_general_option(
 def _handle_fetcher_options(
     options: Mapping[str, object], *, defaults: FileCacheOptions | None = None
 ) -> FileCacheOptions:
-    file_cache_options = defaults or FileCacheOptions()
+    file_cache_options = dataclasses.replace(
+        defaults or FileCacheOptions(),
+        encoding=FileCacheEncoding(config.file_cache_encoding),
+    )
 
     if options.get("cache", False):
         file_cache_options = dataclasses.replace(
@@ -328,7 +335,7 @@ _SNMP_BACKEND_OPTION: Final = Option(
     long_option="snmp-backend",
     short_help="Override default SNMP backend",
     argument=True,
-    argument_descr="inline|classic|stored-walk",
+    argument_descr="inline|classic|native|stored-walk",
 )
 
 # .
@@ -912,6 +919,48 @@ modes.register(
     )
 )
 
+# .
+#   .--autochecks----------------------------------------------------------.
+#   |                   _                 _                  _             |
+#   |      __ _  _   _ | |_   ___    ___ | |__    ___   ___ | | __ ___     |
+#   |     / _` || | | || __| / _ \  / __|| '_ \  / _ \ / __|| |/ // __|    |
+#   |    | (_| || |_| || |_ | (_) || (__ | | | ||  __/| (__ |   < \__ \    |
+#   |     \__,_| \__,_| \__| \___/  \___||_| |_| \___| \___||_|\_\|___/    |
+#   |                                                                      |
+#   '----------------------------------------------------------------------'
+
+
+def mode_convert_autochecks(autochecks_format: str) -> None:
+    match autochecks_format:
+        case "marshal":
+            marshalled = True
+        case "readable":
+            marshalled = False
+        case _:
+            raise MKBailOut("Please specify the format: 'marshal' or 'readable'")
+    num_hosts = convert_autochecks(marshalled=marshalled)
+    sys.stdout.write(f"Converted the autochecks of {num_hosts} hosts.\n")
+
+
+modes.register(
+    Mode(
+        long_option="convert-autochecks",
+        handler_function=mode_convert_autochecks,
+        needs_config=False,
+        needs_checks=False,
+        argument=True,
+        argument_descr="FORMAT",
+        short_help="Convert the autochecks of all hosts",
+        long_help=[
+            "Converts the autochecks files of all hosts to the given format. "
+            "'marshal' is fast to load, even for hosts with thousands of services, "
+            "and also creates an index of the autochecks of all hosts. New autochecks "
+            "files are written in this format, as long as the index exists. "
+            "'readable' converts them back to Python literals and removes the index."
+        ],
+    )
+)
+
 # .
 #   .--clean.-piggyb.------------------------------------------------------.
 #   |        _                               _                   _         |
@@ -938,6 +987,43 @@ modes.register(
     )
 )
 
+# .
+#   .--predictions---------------------------------------------------------.
+#   |                            _  _        _    _                        |
+#   |     _ __   _ __   ___   __| |(_)  ___ | |_ (_)  ___   _ __   ___     |
+#   |    | '_ \ | '__| / _ \ / _` || | / __|| __|| | / _ \ | '_ \ / __|    |
+#   |    | |_) || |   |  __/| (_| || || (__ | |_ | || (_) || | | |\__ \    |
+#   |    | .__/ |_|    \___| \__,_||_| \___| \__||_| \___/ |_| |_||___/    |
+#   |    |_|                                                               |
+#   |                                                                      |
+#   '----------------------------------------------------------------------'
+
+
+def mode_precompute_predictions() -> None:
+    num_computed = precompute_predictions(
+        cmk.utils.paths.predictions_dir,
+        livestatus.LocalConnection,
+        time.time(),
+        max_workers=os.cpu_count() or 1,
+    )
+    console.verbose(f"Computed {num_computed} predictions.")
+
+
+modes.register(
+    Mode(
+        long_option="precompute-predictions",
+        handler_function=mode_precompute_predictions,
+        needs_config=False,
+        needs_checks=False,
+        short_help="Compute the predictions for predictive levels",
+        long_help=[
+            "Computes the predictions the checks with predictive levels are missing "
+            "and, spread over the last hours of the day, the ones of the next day. "
+            "The checks only read the stored predictions. This is run by a cron job."
+        ],
+    )
+)
+
 # .
 #   .--snmptranslate-------------------------------------------------------.
 #   |                            _                       _       _         |
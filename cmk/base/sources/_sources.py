@@ -170,6 +170,7 @@ class SNMPSource(Source[SNMPRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            encoding=file_cache_options.encoding,
         )
 
 
@@ -226,6 +227,7 @@ class MgmtSNMPSource(Source[SNMPRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            encoding=file_cache_options.encoding,
         )
 
 
@@ -272,6 +274,7 @@ class IPMISource(Source[AgentRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            encoding=file_cache_options.encoding,
         )
 
 
@@ -320,6 +323,7 @@ class ProgramSource(Source[AgentRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            encoding=file_cache_options.encoding,
         )
 
 
@@ -423,6 +427,7 @@ class TCPSource(Source[AgentRawData]):
                 file_cache_options.tcp_use_only_cache or file_cache_options.use_only_cache
             ),
             file_cache_mode=file_cache_options.file_cache_mode(),
+            encoding=file_cache_options.encoding,
         )
 
 
@@ -478,6 +483,7 @@ class SpecialAgentSource(Source[AgentRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            encoding=file_cache_options.encoding,
         )
 
 
@@ -302,6 +302,22 @@ class BICompiler:
         # Check BI configuration changes
         return current_configstatus["configfile_timestamp"] > self._get_compilation_timestamp()
 
+    def compilation_generation(self) -> tuple[int, int]:
+        """Changes whenever the compiled or frozen aggregations change
+
+        Both are replaced atomically, which changes the modification time of the
+        timestamp file of the compilation and of the directory of frozen aggregations.
+        """
+        try:
+            compilation = self._path_compilation_timestamp.stat().st_mtime_ns
+        except FileNotFoundError:
+            compilation = 0
+        try:
+            frozen = frozen_aggregations_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            frozen = 0
+        return compilation, frozen
+
     def _get_compilation_timestamp(self) -> float:
         compilation_timestamp = 0.0
         try:
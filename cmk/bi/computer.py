@@ -4,16 +4,25 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import copy
-from collections.abc import Iterator
+from collections.abc import Hashable, Iterator, Mapping, Sequence
 from typing import NamedTuple
 
 from cmk.ccc.plugin_registry import Registry
 
 from cmk.utils.hostaddress import HostName
+from cmk.utils.log import logger
 from cmk.utils.servicename import ServiceName
 
 from cmk.bi.data_fetcher import BIStatusFetcher
-from cmk.bi.lib import NodeResultBundle, RequiredBIElement
+from cmk.bi.lib import (
+    ABCBICompiledNode,
+    ABCBIStatusFetcher,
+    BIAggregationComputationOptions,
+    BIHostSpec,
+    BIHostStatusInfoRow,
+    NodeResultBundle,
+    RequiredBIElement,
+)
 from cmk.bi.trees import BICompiledAggregation, BICompiledRule
 
 
@@ -54,15 +63,175 @@ class BIComputerPostprocessingRegistry(Registry[ABCPostprocessComputeResult]):
 bi_computer_postprocessing_registry = BIComputerPostprocessingRegistry()
 
 
+class _ComputedNode(NamedTuple):
+    result: NodeResultBundle | None
+    # The computed nodes of a rule, in the order of its nodes
+    nested: Sequence["_ComputedNode"]
+
+
+class _ComputedBranch(NamedTuple):
+    host_states: Mapping[BIHostSpec, Hashable]
+    computed: _ComputedNode
+
+
+def _state_of_host(row: BIHostStatusInfoRow | None) -> Hashable:
+    """The parts of the status of a host and its services which make up their BI states
+
+    The plug-in outputs are left out: They change with almost every check.
+    """
+    if row is None:
+        return None
+    return (
+        row.state,
+        row.has_been_checked,
+        row.hard_state,
+        row.scheduled_downtime_depth,
+        row.in_service_period,
+        row.acknowledged,
+        frozenset(
+            (service_name, service._replace(plugin_output=""))
+            for service_name, service in row.services_with_fullstate.items()
+        ),
+    )
+
+
+class BIComputationCache:
+    """The results of aggregation branches, kept from one computation to the next
+
+    The result of a node only depends on the compiled node and on the status of the
+    hosts it requires, including their services. Branches whose hosts did not change
+    their states, acknowledgements, downtimes or service periods since their last
+    computation are not computed again, in the other branches only the subtrees with
+    changed hosts are. A changed plug-in output alone doesn't count as a change, so
+    the outputs of reused results may be outdated. Results with assumed states are
+    not cached.
+
+    The branches are told apart by their position in their compiled aggregation. The
+    cache has to be invalidated whenever the compiled aggregations change, see
+    invalidate_on_change(). The reused results refer to the nodes of the compiled
+    aggregations they were computed with, which are equal to the current ones.
+    """
+
+    def __init__(self) -> None:
+        self._generation: Hashable = None
+        self._branches: dict[tuple[str, int], _ComputedBranch] = {}
+        # Branches taken from the cache / computed, at least partially
+        self.hits = 0
+        self.misses = 0
+        # Subtrees of computed branches taken from the cache
+        self.reused_subtrees = 0
+
+    def statistics(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reused_subtrees": self.reused_subtrees,
+        }
+
+    def invalidate_on_change(self, generation: Hashable) -> None:
+        if generation != self._generation:
+            self._branches.clear()
+            self._generation = generation
+
+    def compute_branches(
+        self,
+        compiled_aggregation: BICompiledAggregation,
+        branches: list[BICompiledRule],
+        bi_status_fetcher: ABCBIStatusFetcher,
+    ) -> list[NodeResultBundle]:
+        """Same as BICompiledAggregation.compute_branches, reusing unchanged results"""
+        computation_options = compiled_aggregation.computation_options
+        assumed_state_ids = set(bi_status_fetcher.assumed_states)
+        positions = {id(branch): pos for pos, branch in enumerate(compiled_aggregation.branches)}
+        aggregation_results = []
+        for branch in branches:
+            use_assumed = bool(assumed_state_ids.intersection(branch.required_elements()))
+            if use_assumed or (position := positions.get(id(branch))) is None:
+                result = branch.compute(
+                    computation_options, bi_status_fetcher, use_assumed=use_assumed
+                )
+            else:
+                result = self._compute_branch(
+                    (compiled_aggregation.id, position),
+                    branch,
+                    computation_options,
+                    bi_status_fetcher,
+                )
+            if result is not None:
+                aggregation_results.append(result)
+        return aggregation_results
+
+    def _compute_branch(
+        self,
+        key: tuple[str, int],
+        branch: BICompiledRule,
+        computation_options: BIAggregationComputationOptions,
+        bi_status_fetcher: ABCBIStatusFetcher,
+    ) -> NodeResultBundle | None:
+        host_states = {
+            host: _state_of_host(bi_status_fetcher.states.get(host))
+            for host in branch.get_required_hosts()
+        }
+        if (cached := self._branches.get(key)) is None:
+            previous = None
+            changed_hosts = set(host_states)
+        elif cached.host_states == host_states:
+            self.hits += 1
+            return cached.computed.result
+        else:
+            previous = cached.computed
+            changed_hosts = {
+                host for host, state in host_states.items() if cached.host_states.get(host) != state
+            }
+
+        self.misses += 1
+        computed = self._compute_node(
+            branch, previous, changed_hosts, computation_options, bi_status_fetcher
+        )
+        self._branches[key] = _ComputedBranch(host_states, computed)
+        return computed.result
+
+    def _compute_node(
+        self,
+        node: ABCBICompiledNode,
+        previous: _ComputedNode | None,
+        changed_hosts: set[BIHostSpec],
+        computation_options: BIAggregationComputationOptions,
+        bi_status_fetcher: ABCBIStatusFetcher,
+    ) -> _ComputedNode:
+        if not isinstance(node, BICompiledRule):
+            return _ComputedNode(node.compute(computation_options, bi_status_fetcher), [])
+
+        if previous is not None and node.get_required_hosts().isdisjoint(changed_hosts):
+            self.reused_subtrees += 1
+            return previous
+
+        previous_nested: Sequence[_ComputedNode | None] = [None] * len(node.nodes)
+        if previous is not None and len(previous.nested) == len(node.nodes):
+            previous_nested = previous.nested
+        nested = [
+            self._compute_node(
+                nested_node, previous_node, changed_hosts, computation_options, bi_status_fetcher
+            )
+            for nested_node, previous_node in zip(node.nodes, previous_nested)
+        ]
+        return _ComputedNode(
+            node.aggregate_results([x.result for x in nested], computation_options), nested
+        )
+
+
 class BIComputer:
     def __init__(
         self,
         compiled_aggregations: dict[str, BICompiledAggregation],
         bi_status_fetcher: BIStatusFetcher,
+        computation_cache: BIComputationCache | None = None,
     ) -> None:
         self._compiled_aggregations = compiled_aggregations
         self._bi_status_fetcher = bi_status_fetcher
+        self._computation_cache = computation_cache
         self._legacy_branch_cache: dict = {}
+        self._logger = logger.getChild("bi.computer")
 
     def compute_aggregation_result(
         self,
@@ -114,9 +283,12 @@ class BIComputer:
     ) -> list[tuple[BICompiledAggregation, list[NodeResultBundle]]]:
         results = []
         for compiled_aggregation, branches in required_aggregations:
-            node_result_bundles = compiled_aggregation.compute_branches(
-                branches,
-                self._bi_status_fetcher,
+            node_result_bundles = (
+                compiled_aggregation.compute_branches(branches, self._bi_status_fetcher)
+                if self._computation_cache is None
+                else self._computation_cache.compute_branches(
+                    compiled_aggregation, branches, self._bi_status_fetcher
+                )
             )
 
             # Postprocess results. Custom user plugins may add additional information for each node
@@ -128,6 +300,13 @@ class BIComputer:
             )
 
             results.append((compiled_aggregation, node_result_bundles))
+
+        if self._computation_cache is not None:
+            self._logger.debug(
+                "Computation cache: %(hits)d hits, %(misses)d misses,"
+                " %(reused_subtrees)d reused subtrees",
+                self._computation_cache.statistics(),
+            )
         return results
 
     def get_filtered_aggregation_branches(
@@ -7,8 +7,10 @@ from ._active_check import execute_check_discovery
 from ._autochecks import (
     AutocheckEntry,
     AutocheckServiceWithNodes,
+    AutochecksIndex,
     AutochecksManager,
     AutochecksStore,
+    convert_autochecks,
     DiscoveredLabelsCache,
     merge_cluster_autochecks,
     remove_autochecks_of_host,
@@ -36,8 +38,10 @@ __all__ = [
     "analyse_services",
     "AutocheckServiceWithNodes",
     "AutocheckEntry",
+    "AutochecksIndex",
     "AutochecksManager",
     "AutochecksStore",
+    "convert_autochecks",
     "autodiscovery",
     "automation_discovery",
     "CheckPreview",
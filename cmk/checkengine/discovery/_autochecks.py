@@ -5,13 +5,17 @@
 from __future__ import annotations
 
 import ast
+import marshal
+import mmap
+import os
+import struct
 from collections import defaultdict
 from collections.abc import Callable, Iterable, Mapping, Sequence
 from pathlib import Path
-from typing import NamedTuple, TypedDict
+from typing import Final, NamedTuple, TypedDict
 
 from cmk.ccc.exceptions import MKGeneralException
-from cmk.ccc.store import ObjectStore
+from cmk.ccc.store import ObjectStore, save_bytes_to_file
 
 import cmk.utils.paths
 from cmk.utils.hostaddress import HostName
@@ -25,7 +29,9 @@ __all__ = [
     "AutocheckServiceWithNodes",
     "AutocheckEntry",
     "AutochecksStore",
+    "AutochecksIndex",
     "AutochecksManager",
+    "convert_autochecks",
     "DiscoveredService",
     "remove_autochecks_of_host",
     "set_autochecks_for_effective_host",
@@ -109,32 +115,244 @@ class _AutochecksSerializer:
         return [AutocheckEntry.load(d) for d in ast.literal_eval(raw.decode("utf-8"))]
 
 
+# Never the start of a Python literal
+_MARSHAL_MAGIC: Final = b"\0autochecks-marshal-1\n"
+
+_RawAutocheck = tuple[str, str | None, dict[str, object], dict[str, str]]
+
+
+class _AutochecksMarshalSerializer:
+    """The autochecks in the marshal format of Python
+
+    Loading them is bounded by I/O, while parsing the Python literals of the
+    readable format is slow for hosts with thousands of services. The data is
+    written by ourselves, so it is not validated again.
+    """
+
+    @staticmethod
+    def dump(entries: Sequence[AutocheckEntry]) -> bytes:
+        return marshal.dumps(
+            [
+                (str(e.check_plugin_name), e.item, dict(e.parameters), dict(e.service_labels))
+                for e in entries
+            ]
+        )
+
+    @staticmethod
+    def load(raw: bytes | memoryview) -> Sequence[AutocheckEntry]:
+        raw_autochecks: list[_RawAutocheck] = marshal.loads(raw)
+        return [
+            AutocheckEntry(CheckPluginName(name), item, parameters, labels)
+            for name, item, parameters, labels in raw_autochecks
+        ]
+
+    @classmethod
+    def serialize(cls, entries: Sequence[AutocheckEntry]) -> bytes:
+        return _MARSHAL_MAGIC + cls.dump(entries)
+
+    @classmethod
+    def deserialize(cls, raw: bytes) -> Sequence[AutocheckEntry]:
+        return cls.load(memoryview(raw)[len(_MARSHAL_MAGIC) :])
+
+
+class _AutochecksFileSerializer:
+    """Read both formats, write the one chosen for the site"""
+
+    def __init__(self, *, marshalled: bool | None) -> None:
+        self._marshalled: Final = marshalled
+
+    def serialize(self, entries: Sequence[AutocheckEntry]) -> bytes:
+        if self._marshalled or (self._marshalled is None and AutochecksIndex().path.exists()):
+            try:
+                return _AutochecksMarshalSerializer.serialize(entries)
+            except ValueError:
+                pass  # unmarshallable parameters, keep them readable
+        return _AutochecksSerializer.serialize(entries)
+
+    @staticmethod
+    def deserialize(raw: bytes) -> Sequence[AutocheckEntry]:
+        if raw.startswith(_MARSHAL_MAGIC):
+            return _AutochecksMarshalSerializer.deserialize(raw)
+        return _AutochecksSerializer.deserialize(raw)
+
+
 class AutochecksStore:
-    def __init__(self, host_name: HostName) -> None:
+    def __init__(self, host_name: HostName, *, marshalled: bool | None = None) -> None:
+        """Store the autochecks of a host
+
+        By default they are written in the marshal format once the site has an
+        autochecks index, see convert_autochecks().
+        """
         self._host_name = host_name
         self._store = ObjectStore(
             Path(cmk.utils.paths.autochecks_dir, f"{host_name}.mk"),
-            serializer=_AutochecksSerializer(),
+            serializer=_AutochecksFileSerializer(marshalled=marshalled),
         )
 
+    @property
+    def path(self) -> Path:
+        return self._store.path
+
     def read(self) -> Sequence[AutocheckEntry]:
         try:
             return self._store.read_obj(default=[])
-        except (ValueError, TypeError, KeyError, AttributeError, SyntaxError) as exc:
+        except (ValueError, TypeError, KeyError, AttributeError, SyntaxError, EOFError) as exc:
             raise MKGeneralException(
                 f"Unable to parse autochecks of host {self._host_name}"
             ) from exc
 
     def write(self, entries: Sequence[AutocheckEntry]) -> None:
-        self._store.write_obj(
-            sorted(entries, key=lambda e: (str(e.check_plugin_name), str(e.item)))
-        )
+        sorted_entries = sorted(entries, key=lambda e: (str(e.check_plugin_name), str(e.item)))
+        self._store.write_obj(sorted_entries)
+        AutochecksIndex().update(self._host_name, sorted_entries)
 
     def clear(self):
         try:
             self._store.path.unlink()
         except OSError:
             pass
+        AutochecksIndex().update(self._host_name, None)
+
+
+# The magic, the length of the table of contents and the number of hosts
+_INDEX_HEADER: Final = struct.Struct("<8sQQ")
+_INDEX_MAGIC: Final = b"ACINDEX1"
+
+
+class AutochecksIndex:
+    """The autochecks of all hosts in one file
+
+    A table of contents maps the hosts to the size and the modification time of
+    their autochecks files and to the position of their marshalled autochecks
+    in the index. Only the autochecks of the requested hosts are unmarshalled,
+    and hosts whose file changed since their entry was written are read from
+    their file. Writing the autochecks of a host updates its entry. An update
+    lost to a concurrent one only makes the autochecks be read from the file.
+    """
+
+    def __init__(self) -> None:
+        self.path: Final = Path(cmk.utils.paths.autochecks_dir, ".autochecks.idx")
+        self._toc: Mapping[str, tuple[int, int, int, int]] | None = None
+        self._data: memoryview | None = None
+
+    def _load(self) -> Mapping[str, tuple[int, int, int, int]]:
+        if self._toc is not None:
+            return self._toc
+        self._toc = {}
+        try:
+            with self.path.open("rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # missing or empty
+            return self._toc
+
+        data = memoryview(mapped)
+        try:
+            magic, toc_length, _num_hosts = _INDEX_HEADER.unpack_from(data)
+            if magic == _INDEX_MAGIC:
+                toc_end = _INDEX_HEADER.size + toc_length
+                self._toc = marshal.loads(data[_INDEX_HEADER.size : toc_end])
+                self._data = data[toc_end:]
+        except (struct.error, ValueError, EOFError, TypeError):
+            pass  # broken index, read the autochecks files
+        return self._toc
+
+    def get(self, host_name: HostName, stat: os.stat_result) -> Sequence[AutocheckEntry] | None:
+        """The indexed autochecks of the host, if its file did not change since"""
+        if (entry := self._load().get(host_name)) is None or self._data is None:
+            return None
+        size, mtime_ns, offset, length = entry
+        if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            return None
+        try:
+            return _AutochecksMarshalSerializer.load(self._data[offset : offset + length])
+        except (ValueError, EOFError, TypeError):
+            return None
+
+    def write(self, host_names: Iterable[HostName]) -> None:
+        toc: dict[str, tuple[int, int, int, int]] = {}
+        chunks: list[bytes] = []
+        offset = 0
+        for host_name in host_names:
+            autochecks_store = AutochecksStore(host_name)
+            try:
+                stat = autochecks_store.path.stat()
+                entries = autochecks_store.read()
+                chunk = _AutochecksMarshalSerializer.dump(entries)
+            except (OSError, MKGeneralException, ValueError):
+                continue  # not indexed, the file is read when needed
+            toc[str(host_name)] = (stat.st_size, stat.st_mtime_ns, offset, len(chunk))
+            chunks.append(chunk)
+            offset += len(chunk)
+
+        raw_toc = marshal.dumps(toc)
+        save_bytes_to_file(
+            self.path,
+            b"".join([_INDEX_HEADER.pack(_INDEX_MAGIC, len(raw_toc), len(toc)), raw_toc, *chunks]),
+        )
+        self._toc = None
+        self._data = None
+
+    def update(self, host_name: HostName, entries: Sequence[AutocheckEntry] | None) -> None:
+        """Replace the entry of the host, or drop it if the entries are None
+
+        The chunks of the other hosts are copied without unmarshalling them.
+        Sites without an index are left alone.
+        """
+        if not self.path.exists():
+            return
+        toc = self._load()
+        chunks: list[bytes] = []
+        new_toc: dict[str, tuple[int, int, int, int]] = {}
+        offset = 0
+        if self._data is not None:
+            for other, (size, mtime_ns, old_offset, length) in toc.items():
+                if other == host_name:
+                    continue
+                new_toc[other] = (size, mtime_ns, offset, length)
+                chunks.append(bytes(self._data[old_offset : old_offset + length]))
+                offset += length
+
+        if entries is not None:
+            try:
+                stat = AutochecksStore(host_name).path.stat()
+                chunk = _AutochecksMarshalSerializer.dump(entries)
+            except (OSError, ValueError):
+                pass  # not indexed, the file is read when needed
+            else:
+                new_toc[str(host_name)] = (stat.st_size, stat.st_mtime_ns, offset, len(chunk))
+                chunks.append(chunk)
+
+        raw_toc = marshal.dumps(new_toc)
+        save_bytes_to_file(
+            self.path,
+            b"".join(
+                [_INDEX_HEADER.pack(_INDEX_MAGIC, len(raw_toc), len(new_toc)), raw_toc, *chunks]
+            ),
+        )
+        self._toc = None
+        self._data = None
+
+
+def convert_autochecks(*, marshalled: bool) -> int:
+    """Convert the autochecks of all hosts to the marshal or the readable format
+
+    Converting to the marshal format also builds the index of all autochecks,
+    which then makes new autochecks files use the marshal format, too.
+    Converting back removes the index. Returns the number of converted hosts.
+    """
+    host_names = sorted(
+        HostName(path.stem) for path in Path(cmk.utils.paths.autochecks_dir).glob("*.mk")
+    )
+    # Not updated for every single host, it is rebuilt at once below.
+    index = AutochecksIndex()
+    index.path.unlink(missing_ok=True)
+    for host_name in host_names:
+        autochecks_store = AutochecksStore(host_name, marshalled=marshalled)
+        autochecks_store.write(autochecks_store.read())
+
+    if marshalled:
+        index.write(host_names)
+    return len(host_names)
 
 
 def merge_cluster_autochecks(
@@ -179,15 +397,28 @@ class AutochecksManager:
         super().__init__()
         self._configured_services_cache: dict[HostName, Sequence[ConfiguredService]] = {}
         self._raw_autochecks_cache: dict[HostName, Sequence[AutocheckEntry]] = {}
+        self._index: AutochecksIndex | None = None
 
     def get_autochecks(
         self,
         hostname: HostName,
     ) -> Sequence[AutocheckEntry]:
         if hostname not in self._raw_autochecks_cache:
-            self._raw_autochecks_cache[hostname] = AutochecksStore(hostname).read()
+            self._raw_autochecks_cache[hostname] = self._read_autochecks(hostname)
         return self._raw_autochecks_cache[hostname]
 
+    def _read_autochecks(self, hostname: HostName) -> Sequence[AutocheckEntry]:
+        autochecks_store = AutochecksStore(hostname)
+        if self._index is None:
+            self._index = AutochecksIndex()
+        try:
+            stat = autochecks_store.path.stat()
+        except FileNotFoundError:
+            return []
+        if (indexed := self._index.get(hostname, stat)) is not None:
+            return indexed
+        return autochecks_store.read()
+
 
 def set_autochecks_of_real_hosts(
     hostname: HostName,
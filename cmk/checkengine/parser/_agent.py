@@ -8,7 +8,7 @@ from __future__ import annotations
 import abc
 import logging
 import time
-from collections.abc import Iterator, Mapping, MutableMapping, Sequence
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping, Sequence
 from typing import Final, final, NamedTuple
 
 import cmk.ccc.debug
@@ -29,16 +29,85 @@ from ._parser import (
 )
 from ._sectionstore import SectionStore
 
+# What bytes.strip() and bytes.isspace() consider whitespace
+_ASCII_WHITESPACE: Final = " \t\n\r\x0b\x0c"
+
 
 class SectionWithHeader(NamedTuple):
     header: SectionMarker
-    section: list[AgentRawData]
+    # Lines of the agent output, split only when the section is used
+    chunks: list[bytes | memoryview]
 
 
 MutableSection = list[SectionWithHeader]
 ImmutableSection = Sequence[SectionWithHeader]
 
 
+def _iter_markers(raw_data: bytes) -> Iterator[tuple[int, int, bytes]]:
+    """The lines starting with "<<<" and ending with ">>>", with their start and end
+
+    Carriage returns at the end of the lines are removed.
+    """
+    if raw_data.startswith(b"<<<"):
+        start = 0
+    elif (start := raw_data.find(b"\n<<<") + 1) == 0:
+        return
+    while True:
+        if (end := raw_data.find(b"\n", start)) == -1:
+            end = len(raw_data)
+        if (line := raw_data[start:end].rstrip(b"\r")).endswith(b">>>"):
+            yield start, end, line
+        if (start := raw_data.find(b"\n<<<", end) + 1) == 0:
+            return
+
+
+def _iter_lines(chunks: Iterable[bytes | memoryview], *, strip: bool) -> Iterator[AgentRawData]:
+    """The non-empty lines of the chunks, without carriage returns at the end"""
+    for chunk in chunks:
+        lines = bytes(chunk).split(b"\n")
+        if strip:
+            yield from (AgentRawData(stripped) for line in lines if (stripped := line.strip()))
+        else:
+            yield from (
+                AgentRawData(line)
+                for raw_line in lines
+                if (line := raw_line.rstrip(b"\r")) and not line.isspace()
+            )
+
+
+def _parse_lines(
+    header: SectionMarker, chunks: Iterable[bytes | memoryview]
+) -> Iterator[AgentRawDataSectionElem]:
+    """Like `header.parse_line` for every line, but decodes whole chunks if possible"""
+    if header.encoding != "utf-8":
+        yield from (
+            header.parse_line(line) for line in _iter_lines(chunks, strip=not header.nostrip)
+        )
+        return
+
+    for chunk in chunks:
+        try:
+            lines = str(chunk, "utf-8").split("\n")
+        except UnicodeDecodeError:
+            yield from (
+                header.parse_line(line) for line in _iter_lines([chunk], strip=not header.nostrip)
+            )
+            continue
+        # Lines with nothing but ASCII whitespace are skipped as in `_iter_lines`.
+        if header.nostrip:
+            yield from (
+                line.split(header.separator)
+                for raw_line in lines
+                if (line := raw_line.rstrip("\r")).strip(_ASCII_WHITESPACE)
+            )
+        else:
+            yield from (
+                line.strip().split(header.separator)
+                for line in lines
+                if line.strip(_ASCII_WHITESPACE)
+            )
+
+
 class ParserState(abc.ABC):
     """Base class for the state machine.
 
@@ -104,6 +173,13 @@ class ParserState(abc.ABC):
     def do_action(self, line: bytes) -> ParserState:
         raise NotImplementedError()
 
+    def do_chunk_action(self, chunk: memoryview) -> ParserState:
+        """Handle all lines between two markers at once
+
+        Lines outside of the sections are ignored.
+        """
+        return self
+
     @abc.abstractmethod
     def on_section_header(self, section_header: SectionMarker) -> ParserState:
         raise NotImplementedError()
@@ -361,7 +437,11 @@ class PiggybackSectionParser(ParserState):
         self.current_section: Final = current_section
 
     def do_action(self, line: bytes) -> ParserState:
-        self.piggyback_sections[self.current_host][-1].section.append(AgentRawData(line))
+        self.piggyback_sections[self.current_host][-1].chunks.append(line)
+        return self
+
+    def do_chunk_action(self, chunk: memoryview) -> ParserState:
+        self.piggyback_sections[self.current_host][-1].chunks.append(chunk)
         return self
 
     def on_piggyback_header(self, piggyback_header: PiggybackMarker) -> ParserState:
@@ -469,9 +549,11 @@ class HostSectionParser(ParserState):
         self.current_section: Final = current_section
 
     def do_action(self, line: bytes) -> ParserState:
-        self.sections[-1].section.append(
-            AgentRawData(line if self.current_section.nostrip else line.strip())
-        )
+        self.sections[-1].chunks.append(line)
+        return self
+
+    def do_chunk_action(self, chunk: memoryview) -> ParserState:
+        self.sections[-1].chunks.append(chunk)
         return self
 
     def on_piggyback_header(self, piggyback_header: PiggybackMarker) -> ParserState:
@@ -536,8 +618,10 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
             sections: ImmutableSection,
         ) -> MutableSectionMap[list[AgentRawDataSectionElem]]:
             out: MutableSectionMap[list[AgentRawDataSectionElem]] = {}
-            for header, content in sections:
-                out.setdefault(header.name, []).extend(header.parse_line(line) for line in content)
+            for header, chunks in sections:
+                if not (selection is NO_SELECTION or header.name in selection):
+                    continue
+                out.setdefault(header.name, []).extend(_parse_lines(header, chunks))
             return out
 
         def flatten_piggyback_section(
@@ -547,7 +631,7 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
             cache_for: int,
             selection: SectionNameCollection,
         ) -> Iterator[bytes]:
-            for header, content in sections:
+            for header, chunks in sections:
                 if not (selection is NO_SELECTION or header.name in selection):
                     continue
 
@@ -565,13 +649,9 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
                             header.separator,
                         )
                     ).encode(header.encoding)
-                yield from (bytes(line) for line in content)
+                yield from _iter_lines(chunks, strip=False)
 
-        sections = {
-            name: content
-            for name, content in decode_sections(raw_sections).items()
-            if selection is NO_SELECTION or name in selection
-        }
+        sections = decode_sections(raw_sections)
         piggybacked_raw_data = {
             header.hostname: list(
                 flatten_piggyback_section(
@@ -614,7 +694,11 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
         self,
         raw_data: AgentRawData,
     ) -> tuple[ImmutableSection, Mapping[PiggybackMarker, ImmutableSection]]:
-        """Split agent output in chunks, splits lines by whitespaces."""
+        """Split agent output in chunks between the markers
+
+        Only the marker lines go through the state machine, the lines in between are
+        kept as slices of the agent output and only split when the section is used.
+        """
         parser: ParserState = NOOPParser(
             self.hostname,
             [],
@@ -623,7 +707,14 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
             encoding_fallback=self.encoding_fallback,
             logger=self._logger,
         )
-        for line in raw_data.split(b"\n"):
-            parser = parser(line.rstrip(b"\r"))
+        view = memoryview(raw_data)
+        start = 0
+        for marker_start, marker_end, marker in _iter_markers(raw_data):
+            if marker_start > start:
+                parser = parser.do_chunk_action(view[start:marker_start])
+            parser = parser(marker)
+            start = marker_end
+        if start < len(raw_data):
+            parser = parser.do_chunk_action(view[start:])
 
         return parser.sections, parser.piggyback_sections
@@ -4,7 +4,10 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import logging
-from collections.abc import Callable
+import pickle
+import shutil
+import struct
+from collections.abc import Callable, Iterator, Mapping, MutableMapping
 from pathlib import Path
 from typing import Final, Generic, TypeVar
 
@@ -16,8 +19,74 @@ __all__ = ["SectionStore"]
 
 _T = TypeVar("_T")
 
+# The time a section was created at and the time it is valid until
+_SECTION_HEADER: Final = struct.Struct("<qq")
+
+
+class _PersistedSections(MutableMapping[SectionName, tuple[int, int, _T]]):
+    """The persisted sections of a host, each one read when it is accessed"""
+
+    def __init__(
+        self,
+        persist_info: Mapping[SectionName, tuple[int, int]],
+        read_section: Callable[[SectionName], tuple[int, int, _T]],
+    ) -> None:
+        self.persist_info: Final = dict(persist_info)
+        self._read_section: Final = read_section
+        self._sections: Final[dict[SectionName, tuple[int, int, _T]]] = {}
+
+    def __getitem__(self, section_name: SectionName) -> tuple[int, int, _T]:
+        if section_name in self._sections:
+            return self._sections[section_name]
+        if section_name not in self.persist_info:
+            raise KeyError(section_name)
+        try:
+            self._sections[section_name] = self._read_section(section_name)
+        except FileNotFoundError:
+            # Removed in the meantime, e.g. by another check of the host.
+            del self.persist_info[section_name]
+            raise KeyError(section_name) from None
+        return self._sections[section_name]
+
+    def __setitem__(self, section_name: SectionName, entry: tuple[int, int, _T]) -> None:
+        self._sections[section_name] = entry
+        self.persist_info[section_name] = entry[:2]
+
+    def __delitem__(self, section_name: SectionName) -> None:
+        del self.persist_info[section_name]
+        self._sections.pop(section_name, None)
+
+    def __iter__(self) -> Iterator[SectionName]:
+        return iter(self.persist_info)
+
+    def __len__(self) -> int:
+        return len(self.persist_info)
+
+
+def _persist_info(
+    sections: MutableSectionMap[tuple[int, int, _T]],
+) -> Mapping[SectionName, tuple[int, int]]:
+    if isinstance(sections, _PersistedSections):
+        return sections.persist_info
+    return {
+        section_name: (entry[0], entry[1])
+        for section_name, entry in sections.items()
+        if len(entry) == 3  # Skip entries of "old" format
+    }
+
 
 class SectionStore(Generic[_T]):
+    """Store the persisted sections of a host
+
+    Every section is written to a file of its own in the directory at `path`, and
+    only if the time it was created at or the time it is valid until changed.
+    The sections are only read when they are used. The number of bytes read and
+    written is counted per instance, that is per check of the host.
+
+    Older versions stored all sections in one pickled file at `path`. It is read
+    as before and replaced by the directory when the sections are stored again.
+    """
+
     def __init__(
         self,
         path: str | Path,
@@ -27,6 +96,10 @@ class SectionStore(Generic[_T]):
         super().__init__()
         self.path: Final = Path(path)
         self._logger: Final = logger
+        self.bytes_read = 0
+        self.bytes_written = 0
+        # The sections on disk as of the last load or store
+        self._stored: dict[SectionName, tuple[int, int]] | None = None
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self.path!r}, logger={self._logger!r})"
@@ -34,20 +107,91 @@ class SectionStore(Generic[_T]):
     def store(self, sections: MutableSectionMap[tuple[int, int, _T]]) -> None:
         if not sections:
             self._logger.debug("No persisted sections")
-            self.path.unlink(missing_ok=True)
+            self._remove()
             return
 
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        _store.save_object_to_pickle_file(
-            self.path,
-            {str(k): v for k, v in sections.items()},
-        )
-        self._logger.debug("Stored persisted sections: %s", ", ".join(str(s) for s in sections))
+        if self.path.is_file():
+            self.path.unlink()
+            self._stored = {}
+        stored = self.load_persist_info() if self._stored is None else self._stored
+        persist_info = _persist_info(sections)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        for section_name in stored.keys() - persist_info.keys():
+            (self.path / str(section_name)).unlink(missing_ok=True)
+        written = [
+            section_name
+            for section_name, info in persist_info.items()
+            if stored.get(section_name) != info
+        ]
+        for section_name in written:
+            self._write_section(section_name, sections[section_name])
+        self._stored = dict(persist_info)
+        self._logger.debug("Stored persisted sections: %s", ", ".join(str(s) for s in written))
 
     def load(self) -> MutableSectionMap[tuple[int, int, _T]]:
+        if self.path.is_file():
+            return self._load_previous_format()
+        return _PersistedSections(self.load_persist_info(), self._read_section)
+
+    def load_persist_info(self) -> MutableSectionMap[tuple[int, int]]:
+        """The time the sections were created at and the time they are valid until
+
+        Only the start of the files of the sections is read for this.
+        """
+        if self.path.is_file():
+            return {
+                section_name: (created_at, valid_until)
+                for section_name, (
+                    created_at,
+                    valid_until,
+                    *_rest,
+                ) in self._load_previous_format().items()
+            }
+
+        try:
+            section_files = [p for p in self.path.iterdir() if not p.name.startswith(".")]
+        except (FileNotFoundError, NotADirectoryError):
+            section_files = []
+
+        persist_info: dict[SectionName, tuple[int, int]] = {}
+        for section_file in section_files:
+            try:
+                with section_file.open("rb") as f:
+                    header = f.read(_SECTION_HEADER.size)
+            except FileNotFoundError:
+                continue
+            self.bytes_read += len(header)
+            if len(header) == _SECTION_HEADER.size:
+                persist_info[SectionName(section_file.name)] = _SECTION_HEADER.unpack(header)
+        self._stored = dict(persist_info)
+        return persist_info
+
+    def _load_previous_format(self) -> MutableSectionMap[tuple[int, int, _T]]:
         raw_sections_data = _store.load_object_from_pickle_file(self.path, default={})
+        self.bytes_read += self.path.stat().st_size
+        self._stored = None
         return {SectionName(k): v for k, v in raw_sections_data.items()}
 
+    def _read_section(self, section_name: SectionName) -> tuple[int, int, _T]:
+        raw = (self.path / str(section_name)).read_bytes()
+        self.bytes_read += len(raw)
+        created_at, valid_until = _SECTION_HEADER.unpack_from(raw)
+        return created_at, valid_until, pickle.loads(raw[_SECTION_HEADER.size :])
+
+    def _write_section(self, section_name: SectionName, entry: tuple[int, int, _T]) -> None:
+        created_at, valid_until, section_content = entry
+        raw = _SECTION_HEADER.pack(created_at, valid_until) + pickle.dumps(section_content)
+        _store.save_bytes_to_file(self.path / str(section_name), raw)
+        self.bytes_written += len(raw)
+
+    def _remove(self) -> None:
+        if self.path.is_dir():
+            shutil.rmtree(self.path, ignore_errors=True)
+        else:
+            self.path.unlink(missing_ok=True)
+        self._stored = {}
+
     def update(
         self,
         sections: SectionMap[_T],
@@ -64,11 +208,17 @@ class SectionStore(Generic[_T]):
             now=now,
             keep_outdated=keep_outdated,
         )
-        return self._add_persisted_sections(
+        result = self._add_persisted_sections(
             sections,
             cache_info,
             persisted_sections,
         )
+        self._logger.debug(
+            "Persisted sections: %d bytes read, %d bytes written",
+            self.bytes_read,
+            self.bytes_written,
+        )
+        return result
 
     def _update(
         self,
@@ -93,8 +243,10 @@ class SectionStore(Generic[_T]):
         persisted_sections.update(new_sections)
 
         if not keep_outdated:
-            for section_name in tuple(persisted_sections):
-                (_created_at, valid_until, _section_content) = persisted_sections[section_name]
+            # The outdated sections are told by their header, without reading them.
+            for section_name, (_created_at, valid_until) in tuple(
+                _persist_info(persisted_sections).items()
+            ):
                 if section_outdated(valid_until, now):
                     store_sections = True
                     del persisted_sections[section_name]
@@ -109,18 +261,8 @@ class SectionStore(Generic[_T]):
         cache_info: MutableSectionMap[tuple[int, int]],
         persisted_sections: MutableSectionMap[tuple[int, int, _T]],
     ) -> SectionMap[_T]:
-        cache_info.update(
-            {
-                section_name: (created_at, valid_until - created_at)
-                for section_name, (created_at, valid_until, *_rest) in persisted_sections.items()
-                if section_name not in sections
-            }
-        )
         result: MutableSectionMap[_T] = dict(sections.items())
-        for section_name, entry in persisted_sections.items():
-            if len(entry) == 2:
-                continue  # Skip entries of "old" format
-
+        for section_name in tuple(persisted_sections):
             # Don't overwrite sections that have been received from the source with this call
             if section_name in sections:
                 self._logger.debug(
@@ -129,6 +271,14 @@ class SectionStore(Generic[_T]):
                 )
                 continue
 
+            if (entry := persisted_sections.get(section_name)) is None:
+                continue  # Removed in the meantime
+
+            created_at, valid_until, *_rest = entry
+            cache_info[section_name] = (created_at, valid_until - created_at)
+            if len(entry) == 2:
+                continue  # Skip entries of "old" format
+
             self._logger.debug("Using persisted section %r", section_name)
             result[section_name] = entry[-1]
         return result
@@ -157,6 +157,7 @@ class Rule(TypedDict, total=False):
     contact_groups: ContactGroups
     count: Count
     customer: str  # TODO: This is a GUI-only feature, which doesn't belong here at all.
+    delay: int
     description: str
     docu_url: str
     disabled: bool
@@ -321,6 +322,7 @@ class ConfigFromWATO(TypedDict):
     archive_orphans: bool
     debug_rules: bool
     event_limit: EventLimits
+    event_processing_workers: int
     eventsocket_queue_len: int
     history_lifetime: int
     history_rotation: Literal["daily", "weekly"]
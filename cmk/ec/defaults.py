@@ -63,6 +63,7 @@ def default_config() -> ConfigFromWATO:
         remote_status=None,
         socket_queue_len=10,
         eventsocket_queue_len=10,
+        event_processing_workers=0,
         hostname_translation=TranslationOptions(),
         archive_orphans=False,
         archive_mode="sqlite",
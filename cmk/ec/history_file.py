@@ -4,14 +4,14 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import itertools
-import shlex
-import subprocess
+import json
+import os
 import threading
 import time
-from collections.abc import Callable, Iterable, Sequence
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from logging import Logger
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Final, NamedTuple
 
 from cmk.utils.log import VERBOSE
 from cmk.utils.render import date_and_time
@@ -22,6 +22,11 @@ from .history import _log_event, ActiveHistoryPeriod, get_logfile, History, Hist
 from .query import Columns, OperatorName, QueryFilter, QueryGET
 from .settings import Settings
 
+# The sidecar index describes a history file in blocks of this many lines.
+_BLOCK_LINES: Final = 1000
+# Unindexed parts of history files are read backwards in chunks of this size.
+_CHUNK_SIZE: Final = 1 << 20
+
 
 class FileHistory(History):
     def __init__(
@@ -39,6 +44,8 @@ class FileHistory(History):
         self._history_columns = history_columns
         self._lock = threading.Lock()
         self._active_history_period = ActiveHistoryPeriod()
+        self._indexed_columns = _IndexedColumns.from_history_columns(history_columns)
+        self._index_writer: _IndexWriter | None = None
 
     def flush(self) -> None:
         _expire_logfiles(self._settings, self._config, self._logger, self._lock, True)
@@ -52,6 +59,8 @@ class FileHistory(History):
         2: user who initiated the action (for GUI actions)
         3: additional information about the action
         4-oo: StatusTableEvents.columns
+
+        Each history file has a sidecar index, see _IndexWriter.
         """
         _log_event(self._config, self._logger, event, what, who, addinfo)
         with self._lock:
@@ -66,12 +75,25 @@ class FileHistory(History):
                 for colname, defval in self._event_columns
             ]
 
-            with get_logfile(
+            path = get_logfile(
                 self._config,
                 self._settings.paths.history_dir.value,
                 self._active_history_period,
-            ).open(mode="ab") as f:
-                f.write(b"\t".join(columns) + b"\n")
+            )
+            if (
+                self._index_writer is None
+                or self._index_writer.path != path
+                or not path.exists()  # flushed or expired
+            ):
+                if self._index_writer is not None and self._index_writer.path.exists():
+                    self._index_writer.finish()
+                self._index_writer = _IndexWriter(path, self._indexed_columns, self._logger)
+
+            line = b"\t".join(columns) + b"\n"
+            with path.open(mode="ab") as f:
+                f.write(line)
+                end = f.tell()
+            self._index_writer.add(line, end)
 
     def get(self, query: QueryGET) -> Iterable[Sequence[object]]:
         if not self._settings.paths.history_dir.value.exists():
@@ -79,57 +101,59 @@ class FileHistory(History):
 
         filters = query.filters
         self._logger.debug("Filters: %r", filters)
-        limit = query.limit
-        self._logger.debug("Limit: %r", limit)
-
-        grep_pipeline = _grep_pipeline(filters)
-
-        time_filters = [
-            (f.operator_name, f.argument) for f in filters if f.column_name.split("_")[-1] == "time"
-        ]
-        time_range = (
-            _greatest_lower_bound_for_filters(time_filters),
-            _least_upper_bound_for_filters(time_filters),
-        )
-        self._logger.debug("time range: %r", time_range)
+        self._logger.debug("Limit: %r", query.limit)
+        block_filter = _BlockFilter.from_filters(filters)
+        self._logger.debug("time range: %r", block_filter.time_range)
+        return itertools.islice(self._entries(query, block_filter), query.limit)
 
+    def _entries(self, query: QueryGET, block_filter: "_BlockFilter") -> Iterator[Sequence[object]]:
         # We do not want to open all files. So our strategy is:
         # look for "time" filters and first apply the filter to
         # the first entry and modification time of the file. Only
         # if at least one of both timestamps is accepted then we
-        # take that file into account.
+        # take that file into account. Within the files, the index
+        # tells us which blocks of lines can contain matching entries.
         # Use the later logfiles first, to get the newer log entries
         # first. When a limit is reached, the newer entries should
-        # be processed in most cases. We assume that now.
-        # To keep a consistent order of log entries, we should care
-        # about sorting the log lines in reverse, but that seems to
-        # already be done by the GUI, so we don't do that twice. Skipping
-        # this # will lead into some lines of a single file to be limited in
-        # wrong order. But this should be better than before.
-        history_entries: list[Any] = []
+        # be processed in most cases.
         for path in sorted(self._settings.paths.history_dir.value.glob("*.log"), reverse=True):
-            if limit is not None and limit <= 0:
-                self._logger.debug("query limit reached")
-                break
-            if not _intersects(time_range, _get_logfile_timespan(path)):
+            if not _intersects(block_filter.time_range, _get_logfile_timespan(path)):
                 self._logger.debug("skipping history file %s because of time filters", path)
                 continue
-            tac = f"nl -b a {shlex.quote(str(path))} | tac"  # Process younger lines first
-            cmd = " | ".join([tac] + grep_pipeline)
-            self._logger.debug("preprocessing history file with command [%s]", cmd)
-            new_entries = parse_history_file(
-                self._history_columns, path, query.filter_row, cmd, limit, self._logger
+            yield from read_history_file(
+                self._history_columns, path, block_filter, query.filter_row, self._logger
             )
-            history_entries += new_entries
-            if limit is not None:
-                limit -= len(new_entries)
-        return history_entries
 
     def housekeeping(self) -> None:
         _expire_logfiles(self._settings, self._config, self._logger, self._lock, False)
+        self._index_history_file()
+
+    def _index_history_file(self) -> None:
+        """Index one history file without an up to date index
+
+        These are files written by older versions or by an event daemon which was killed.
+        The newest file is left alone, its index is maintained by add().
+        """
+        paths = sorted(self._settings.paths.history_dir.value.glob("*.log"))
+        for path in paths[:-1]:
+            try:
+                index_path = _index_path(path)
+                if index_path.exists() and index_path.stat().st_mtime >= path.stat().st_mtime:
+                    continue
+                self._logger.info("Indexing history file %s", path)
+                _IndexWriter(path, self._indexed_columns, self._logger).finish()
+                index_path.touch()
+            except Exception as e:
+                if self._settings.options.debug:
+                    raise
+                self._logger.warning("Error indexing history file %s: %s", path, e)
+            return
 
     def close(self) -> None:
-        pass
+        with self._lock:
+            if self._index_writer is not None:
+                self._index_writer.finish()
+                self._index_writer = None
 
 
 def _expire_logfiles(
@@ -152,65 +176,13 @@ def _expire_logfiles(
                         "Deleting log file %s (age %s)", path, date_and_time(path.stat().st_mtime)
                     )
                     path.unlink()
+                    _index_path(path).unlink(missing_ok=True)
         except Exception as e:
             if settings.options.debug:
                 raise
             logger.warning("Error expiring log files: %s", e)
 
 
-# Please note: Keep this in sync with packages/neb/src/TableEventConsole.cc.
-_GREPABLE_COLUMNS = {
-    "event_id",
-    "event_text",
-    "event_comment",
-    "event_host",
-    "event_contact",
-    "event_application",
-    "event_rule_id",
-    "event_owner",
-    "event_ipaddress",
-    "event_core_host",
-}
-
-
-def _grep_pipeline(filters: Iterable[QueryFilter]) -> list[str]:
-    """
-    Optimization: use grep in order to reduce amount of read lines based on some frequently used
-    filters. It's OK if the filters don't match 100% accurately on the right lines. If in doubt, you
-    can output more lines than necessary. This is only a kind of prefiltering.
-
-    >>> _grep_pipeline([])
-    []
-
-    >>> _grep_pipeline([QueryFilter("event_core_host", '=', lambda x: True, '|| ping')])
-    ["grep -F -e '|| ping'"]
-
-    """
-    return [
-        command
-        for f in filters
-        if f.column_name in _GREPABLE_COLUMNS
-        for command in [_grep_command(f.operator_name, str(f.argument))]
-        if command is not None
-    ]
-
-
-def _grep_command(operator_name: OperatorName, argument: str) -> str | None:
-    if operator_name == "=":
-        return f"grep -F {_grep_pattern(argument)}"
-    if operator_name == "=~":
-        return f"grep -F -i {_grep_pattern(argument)}"
-    if operator_name == "~":
-        return f"grep -E {_grep_pattern(argument)}"
-    if operator_name == "~~":
-        return f"grep -E -i {_grep_pattern(argument)}"
-    return None
-
-
-def _grep_pattern(argument: str) -> str:
-    return f"-e {shlex.quote(argument)}"
-
-
 def _greatest_lower_bound_for_filters(
     filters: Iterable[tuple[OperatorName, float]],
 ) -> float | None:
@@ -228,7 +200,7 @@ def _greatest_lower_bound_for_filter(operator: OperatorName, value: float) -> fl
     if operator == ">=":
         return value
     if operator == ">":
-        return value + 1
+        return value
     return None
 
 
@@ -247,7 +219,7 @@ def _least_upper_bound_for_filter(operator: OperatorName, value: float) -> float
     if operator == "<=":
         return value
     if operator == "<":
-        return value - 1
+        return value
     return None
 
 
@@ -260,36 +232,326 @@ def _intersects(
     return (lo2 is None or hi1 is None or lo2 <= hi1) and (lo1 is None or hi2 is None or lo1 <= hi2)
 
 
-def parse_history_file(
+class _IndexedColumns(NamedTuple):
+    """The positions of the indexed columns in the lines of a history file"""
+
+    event_id: int
+    host: int
+    rule_id: int
+
+    @classmethod
+    def from_history_columns(cls, history_columns: Columns) -> "_IndexedColumns":
+        # The lines don't contain the history_line column.
+        names = [name for name, _default in history_columns[1:]]
+        return cls(names.index("event_id"), names.index("event_host"), names.index("event_rule_id"))
+
+
+class _Block(NamedTuple):
+    """Consecutive lines of a history file, None means unknown
+
+    Hosts and rule IDs are in lower case.
+    """
+
+    offset: int
+    end: int
+    line: int  # number of the first line, starting at 1
+    lines: int
+    time_range: tuple[float, float] | None
+    hosts: frozenset[str] | None
+    rule_ids: frozenset[str] | None
+    event_ids: frozenset[int] | None
+
+    def serialize(self) -> str:
+        return (
+            json.dumps(
+                {
+                    "offset": self.offset,
+                    "end": self.end,
+                    "line": self.line,
+                    "lines": self.lines,
+                    "time_range": self.time_range,
+                    "hosts": None if self.hosts is None else sorted(self.hosts),
+                    "rule_ids": None if self.rule_ids is None else sorted(self.rule_ids),
+                    "event_ids": None if self.event_ids is None else sorted(self.event_ids),
+                }
+            )
+            + "\n"
+        )
+
+    @classmethod
+    def deserialize(cls, raw: str) -> "_Block":
+        record = json.loads(raw)
+        return cls(
+            offset=int(record["offset"]),
+            end=int(record["end"]),
+            line=int(record["line"]),
+            lines=int(record["lines"]),
+            time_range=(
+                None
+                if record["time_range"] is None
+                else (float(record["time_range"][0]), float(record["time_range"][1]))
+            ),
+            hosts=None if record["hosts"] is None else frozenset(record["hosts"]),
+            rule_ids=None if record["rule_ids"] is None else frozenset(record["rule_ids"]),
+            event_ids=None if record["event_ids"] is None else frozenset(record["event_ids"]),
+        )
+
+
+class _BlockBuilder:
+    def __init__(self, columns: _IndexedColumns, offset: int, line: int) -> None:
+        self._columns: Final = columns
+        self.offset: Final = offset
+        self.end = offset
+        self.line: Final = line
+        self.lines = 0
+        self._complete = True
+        self._min_time = float("inf")
+        self._max_time = float("-inf")
+        self._hosts: set[str] = set()
+        self._rule_ids: set[str] = set()
+        self._event_ids: set[int] = set()
+
+    def add(self, line: bytes, end: int) -> None:
+        self.end = end
+        self.lines += 1
+        parts = line.rstrip(b"\n").split(b"\t")
+        try:
+            timestamp = float(parts[0])
+            event_id = int(parts[self._columns.event_id])
+            host = parts[self._columns.host].decode("utf-8").lower()
+            rule_id = parts[self._columns.rule_id].decode("utf-8").lower()
+        except (IndexError, ValueError):
+            self._complete = False
+            return
+        self._min_time = min(self._min_time, timestamp)
+        self._max_time = max(self._max_time, timestamp)
+        self._hosts.add(host)
+        self._rule_ids.add(rule_id)
+        self._event_ids.add(event_id)
+
+    def build(self) -> _Block:
+        if not self._complete:
+            return _Block(self.offset, self.end, self.line, self.lines, None, None, None, None)
+        return _Block(
+            self.offset,
+            self.end,
+            self.line,
+            self.lines,
+            (self._min_time, self._max_time),
+            frozenset(self._hosts),
+            frozenset(self._rule_ids),
+            frozenset(self._event_ids),
+        )
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_suffix(".idx")
+
+
+def _next_position(blocks: Sequence[_Block]) -> tuple[int, int]:
+    """The offset and the number of the first line after the blocks"""
+    if not blocks:
+        return 0, 1
+    return blocks[-1].end, blocks[-1].line + blocks[-1].lines
+
+
+def _load_index(index_path: Path, size: int) -> tuple[list[_Block], bool]:
+    """The blocks of the index which fit to a history file of the given size
+
+    The flag tells if the whole index was usable.
+    """
+    blocks: list[_Block] = []
+    try:
+        with index_path.open(encoding="utf-8") as f:
+            for raw in f:
+                try:
+                    block = _Block.deserialize(raw)
+                except (KeyError, TypeError, ValueError):
+                    return blocks, False
+                offset, line = _next_position(blocks)
+                if block.offset != offset or block.line != line or not offset < block.end <= size:
+                    return blocks, False
+                blocks.append(block)
+    except FileNotFoundError:
+        return blocks, False
+    return blocks, True
+
+
+class _IndexWriter:
+    """Maintain the sidecar index of a history file
+
+    The index <timestamp>.idx next to <timestamp>.log contains a JSON object per
+    block of lines with their offsets, line numbers, time range, hosts, rule IDs
+    and event IDs. A block is written when it is complete, the lines after the
+    last block are read without the help of the index.
+    """
+
+    def __init__(self, path: Path, columns: _IndexedColumns, logger: Logger) -> None:
+        self.path: Final = path
+        self._index_path: Final = _index_path(path)
+        self._columns: Final = columns
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        blocks, usable = _load_index(self._index_path, size)
+        if not usable:
+            logger.debug("Rewriting index of history file %s", path)
+            self._index_path.write_text("".join(block.serialize() for block in blocks))
+        offset, line = _next_position(blocks)
+        self._block = _BlockBuilder(columns, offset, line)
+        if offset == size:
+            return
+        with path.open("rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # The next line written will complete this one.
+                offset += len(raw)
+                self.add(raw, offset)
+
+    def add(self, line: bytes, end: int) -> None:
+        self._block.add(line, end)
+        if self._block.lines >= _BLOCK_LINES:
+            self._write_block()
+
+    def finish(self) -> None:
+        """Write the incomplete block, e.g. when the file is not written anymore"""
+        if self._block.lines:
+            self._write_block()
+
+    def _write_block(self) -> None:
+        block = self._block.build()
+        with self._index_path.open("a", encoding="utf-8") as f:
+            f.write(block.serialize())
+        self._block = _BlockBuilder(self._columns, *_next_position([block]))
+
+
+class _BlockFilter(NamedTuple):
+    """The conditions of a query which can be checked against the index"""
+
+    time_range: tuple[float | None, float | None]
+    # The lower case value has to be one of each of the sets.
+    hosts: Sequence[frozenset[str]]
+    rule_ids: Sequence[frozenset[str]]
+    event_ids: Sequence[int]
+
+    @classmethod
+    def from_filters(cls, filters: Sequence[QueryFilter]) -> "_BlockFilter":
+        # The index only knows the time of the history entries, not e.g. event_first.
+        time_filters = [
+            (f.operator_name, f.argument) for f in filters if f.column_name == "history_time"
+        ]
+        return cls(
+            time_range=(
+                _greatest_lower_bound_for_filters(time_filters),
+                _least_upper_bound_for_filters(time_filters),
+            ),
+            hosts=_one_of(filters, "event_host"),
+            rule_ids=_one_of(filters, "event_rule_id"),
+            event_ids=[
+                f.argument
+                for f in filters
+                if f.column_name == "event_id" and f.operator_name == "="
+            ],
+        )
+
+    def may_match(self, block: _Block) -> bool:
+        if block.time_range is not None and not _intersects(self.time_range, block.time_range):
+            return False
+        if block.hosts is not None and any(block.hosts.isdisjoint(h) for h in self.hosts):
+            return False
+        if block.rule_ids is not None and any(block.rule_ids.isdisjoint(r) for r in self.rule_ids):
+            return False
+        return block.event_ids is None or all(e in block.event_ids for e in self.event_ids)
+
+
+def _one_of(filters: Iterable[QueryFilter], column_name: str) -> list[frozenset[str]]:
+    # "=" is case sensitive, but the index isn't: Checking too many lines is OK.
+    return [
+        frozenset([f.argument.lower()] if f.operator_name != "in" else map(str.lower, f.argument))
+        for f in filters
+        if f.column_name == column_name and f.operator_name in ("=", "=~", "in")
+    ]
+
+
+def read_history_file(
     history_columns: Sequence[tuple[str, Any]],
     path: Path,
+    block_filter: _BlockFilter,
     filter_row: Callable[[Sequence[Any]], bool],
-    cmd: str,
-    limit: int | None,
     logger: Logger,
-) -> list[Any]:
-    entries: list[Any] = []
-    with subprocess.Popen(
-        cmd,
-        shell=True,  # nosec B602 # BNS:67522a
-        close_fds=True,
-        stdout=subprocess.PIPE,
-    ) as grep:
-        if grep.stdout is None:
-            raise Exception("Huh? stdout vanished...")
-
-        for line in grep.stdout:
-            if limit is not None and len(entries) > limit:
-                break
-            try:
-                parts: list[Any] = line.decode("utf-8").rstrip("\n").split("\t")
-                convert_history_line(history_columns, parts)
-                if filter_row(parts):
-                    entries.append(parts)
-            except Exception:
-                logger.exception("Invalid line '%s' in history file %s", line, path)
+) -> Iterator[list[Any]]:
+    """Yield the entries of a history file passing the filter, the newest first
 
-    return entries
+    Of the indexed blocks, only the ones which might contain matching entries are
+    read. The lines after the last indexed block are always read.
+    """
+    with path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        blocks, _usable = _load_index(_index_path(path), size)
+        offset, line_number = _next_position(blocks)
+        for number, line in _read_lines_backwards(f, offset, size, line_number):
+            if (entry := _parse_history_line(history_columns, number, line, path, logger)) and (
+                filter_row(entry)
+            ):
+                yield entry
+        for block in reversed(blocks):
+            if not block_filter.may_match(block):
+                continue
+            f.seek(block.offset)
+            lines = f.read(block.end - block.offset).split(b"\n")[:-1]
+            for number in range(len(lines) - 1, -1, -1):
+                if (
+                    entry := _parse_history_line(
+                        history_columns, block.line + number, lines[number], path, logger
+                    )
+                ) and filter_row(entry):
+                    yield entry
+
+
+def _read_lines_backwards(
+    f: BinaryIO, start: int, end: int, first_line: int
+) -> Iterator[tuple[int, bytes]]:
+    """The numbered lines between the offsets, the last line first"""
+    if start >= end:
+        return
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        end -= 1
+    f.seek(start)
+    num_lines = 1
+    for pos in range(start, end, _CHUNK_SIZE):
+        num_lines += f.read(min(_CHUNK_SIZE, end - pos)).count(b"\n")
+
+    number = first_line + num_lines
+    rest = b""
+    while end > start:
+        chunk_size = min(_CHUNK_SIZE, end - start)
+        end -= chunk_size
+        f.seek(end)
+        lines = (f.read(chunk_size) + rest).split(b"\n")
+        rest = lines[0]
+        for line in reversed(lines[1:]):
+            number -= 1
+            yield number, line
+    yield first_line, rest
+
+
+def _parse_history_line(
+    history_columns: Sequence[tuple[str, Any]],
+    number: int,
+    line: bytes,
+    path: Path,
+    logger: Logger,
+) -> list[Any] | None:
+    try:
+        values: list[Any] = [number, *line.decode("utf-8").split("\t")]
+        convert_history_line(history_columns, values)
+    except Exception:
+        logger.exception("Invalid line '%s' in history file %s", line, path)
+        return None
+    return values
 
 
 def parse_history_file_python(
@@ -300,8 +562,7 @@ def parse_history_file_python(
     """Pure python reader for history files. Used for update config, where filtering is not needed.
 
     To avoid slurping the whole file in memory this generator yields chunks of entries.
-    This is not faster than the grep approach(parse_history_file()), but it's more memory efficient
-    and does not need to fork a subprocess and other cmk specific stuff.
+    Unlike read_history_file(), it neither needs nor maintains the index.
     """
     with open(path, "rb") as f:
         for chunk in itertools.batched(f, 100_000):
@@ -6,7 +6,9 @@
 
 import itertools
 import json
+import queue
 import sqlite3
+import threading
 import time
 from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
@@ -57,7 +59,12 @@ TABLE_COLUMNS: Final = (
 INDEXED_COLUMNS: Final = (
     "time",
     "id",
+)
+
+# Filters on these columns usually come with a time range.
+INDEXED_COLUMNS_WITH_TIME: Final = (
     "host",
+    "rule_id",
 )
 
 SQLITE_PRAGMAS = {
@@ -67,9 +74,22 @@ SQLITE_PRAGMAS = {
 }
 
 SQLITE_INDEXES = [
-    f"CREATE INDEX IF NOT EXISTS idx_{column} ON history ({column});" for column in INDEXED_COLUMNS
+    *(
+        f"CREATE INDEX IF NOT EXISTS idx_{column} ON history ({column});"
+        for column in INDEXED_COLUMNS
+    ),
+    *(
+        f"CREATE INDEX IF NOT EXISTS idx_{column}_time ON history ({column}, time);"
+        for column in INDEXED_COLUMNS_WITH_TIME
+    ),
+    # superseded by idx_host_time
+    "DROP INDEX IF EXISTS idx_host;",
 ]
 
+# add() blocks when the writer thread falls behind by this many entries.
+_MAX_QUEUED_ENTRIES: Final = 10000
+_MAX_ENTRIES_PER_TRANSACTION: Final = 1000
+
 
 def configure_sqlite_types() -> None:
     """
@@ -159,6 +179,13 @@ class SQLiteHistory(History):
         self._history_columns = history_columns
         self._last_housekeeping = 0.0
         self._page_size = 4096
+        # The connection is shared by the writer thread and the threads querying the history.
+        self._lock = threading.Lock()
+        # Entries to be written, None stops the writer
+        self._queue: queue.Queue[Sequence[object] | None] = queue.Queue(_MAX_QUEUED_ENTRIES)
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
 
         if isinstance(self._settings.database, Path):
             self._settings.database.parent.mkdir(parents=True, exist_ok=True)
@@ -222,38 +249,37 @@ class SQLiteHistory(History):
 
     def flush(self) -> None:
         """Delete all entries the history table."""
-        with self.conn as connection:
+        self.drain()
+        with self._lock, self.conn as connection:
             connection.execute("DELETE FROM history;")
 
     def add(self, event: Event, what: HistoryWhat, who: str = "", addinfo: str = "") -> None:
-        """Add a single entry to the history table.
+        """Queue a single entry for the history table.
 
-        No need to include the line column, as it is autoincremented.
+        The entries are written by a background thread, see _write_entries().
         """
-        with self.conn as connection:
-            cur = connection.cursor()
-            cur.execute(
-                f"""INSERT INTO
-                    history ({', '.join(TABLE_COLUMNS[1:])})
-                        VALUES ({', '.join(itertools.repeat('?', len(TABLE_COLUMNS[1:])))});""",
-                tuple(
-                    itertools.chain(
-                        (time.time(), what, who, addinfo),
-                        [
-                            event.get(colname.removeprefix("event_"), defval)
-                            for colname, defval in self._event_columns
-                        ],
-                    )
+        self._start_writer()
+        self._queue.put(
+            (
+                0,  # line, ignored by add_entries()
+                time.time(),
+                what,
+                who,
+                addinfo,
+                *(
+                    event.get(colname.removeprefix("event_"), defval)
+                    for colname, defval in self._event_columns
                 ),
             )
+        )
 
     def add_entries(self, entries: Sequence[Sequence[object]]) -> None:
-        """Add multiple entries to the history table.
+        """Add multiple entries to the history table in a single transaction.
 
-        Used only by the cmk-update-config during EC history migration to sqlite.
+        Used by the writer thread and by the cmk-update-config during EC history migration to sqlite.
         The first column is the line number, which is autoincremented, so ignored in TABLE_COLUMNS.
         """
-        with self.conn as connection:
+        with self._lock, self.conn as connection:
             cur = connection.cursor()
             cur.executemany(
                 f"""INSERT INTO
@@ -262,6 +288,52 @@ class SQLiteHistory(History):
                 (entry[1:] for entry in entries),
             )
 
+    def _start_writer(self) -> None:
+        # Not started in the constructor: The event daemon forks after creating the history.
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._write_entries, name="sqlite-history-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _write_entries(self) -> None:
+        """Write the queued entries, grouping the ones which queued up into one transaction."""
+        stop = False
+        while not stop and (entry := self._queue.get()) is not None:
+            entries = [entry]
+            while len(entries) < _MAX_ENTRIES_PER_TRANSACTION:
+                try:
+                    next_entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_entry is None:
+                    stop = True
+                    break
+                entries.append(next_entry)
+            try:
+                self.add_entries(entries)
+            except Exception:
+                self._logger.exception("Error writing %d entries to the history", len(entries))
+            finally:
+                for _entry in entries:
+                    self._queue.task_done()
+        self._queue.task_done()  # for None
+
+    def drain(self) -> None:
+        """Wait until all queued entries are written.
+
+        Fails if the writer thread has died, the entries would never be written then.
+        """
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if self._writer is None or not self._writer.is_alive():
+                    raise RuntimeError(
+                        f"History writer is not running, {self._queue.unfinished_tasks}"
+                        " entries are not written"
+                    )
+                self._queue.all_tasks_done.wait(timeout=1)
+
     def get(self, query: QueryGET) -> Iterable[Sequence[object]]:
         """Retrieve entries from the history table.
 
@@ -269,9 +341,10 @@ class SQLiteHistory(History):
         """
         sqlite_query, sqlite_arguments = filters_to_sqlite_query(query.filters)
         if query.limit:
-            sqlite_query += " LIMIT ?"
-            sqlite_arguments += f" {query.limit + 1}"
-        with self.conn as connection:
+            sqlite_query = f"{sqlite_query.removesuffix(';')} LIMIT ?;"
+            sqlite_arguments.append(query.limit + 1)
+        self.drain()
+        with self._lock, self.conn as connection:
             cur = connection.cursor()
             cur.execute(sqlite_query, sqlite_arguments)
             return cur.fetchall()
@@ -284,7 +357,8 @@ class SQLiteHistory(History):
         now = time.time()
         if now - self._last_housekeeping > self._config["sqlite_housekeeping_interval"]:
             delta = now - timedelta(days=self._config["history_lifetime"]).total_seconds()
-            with self.conn as connection:
+            self.drain()
+            with self._lock, self.conn as connection:
                 cur = connection.cursor()
                 cur.execute("DELETE FROM history WHERE time <= ?;", (delta,))
             # should be executed outside of the transaction
@@ -293,18 +367,29 @@ class SQLiteHistory(History):
 
     def _vacuum(self) -> None:
         """Run VACUUM command only if the free pages in DB are greater than 50 Mb."""
-        with self.conn as connection:
-            freelist_count = connection.execute("PRAGMA freelist_count").fetchone()[0]
-            freelist_size = freelist_count * self._page_size
+        with self._lock:
+            with self.conn as connection:
+                freelist_count = connection.execute("PRAGMA freelist_count").fetchone()[0]
+                freelist_size = freelist_count * self._page_size
 
-        if freelist_size > self._config["sqlite_freelist_size"]:
-            self.conn.execute("VACUUM;")
+            if freelist_size > self._config["sqlite_freelist_size"]:
+                self.conn.execute("VACUUM;")
 
     def close(self) -> None:
         """Explicitly close the connection to the sqlite database.
 
         Used during a new object instantiation,
-        to avoid sqlite3.OperationalError: database is locked.
+        to avoid sqlite3.OperationalError: database is locked, and when shutting down.
+        The queued entries are written before. Closing it again does nothing.
         """
-        self.conn.commit()
-        self.conn.close()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._queue.put(None)
+                self._writer.join()
+                self._writer = None
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self.conn.commit()
+            self.conn.close()
@@ -29,10 +29,11 @@ import threading
 import time
 import traceback
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures.process import BrokenProcessPool
 from logging import DEBUG, getLogger, Logger
 from pathlib import Path
 from types import FrameType
-from typing import Any, assert_never, IO, Literal, TypedDict
+from typing import Any, assert_never, IO, Literal, TypedDict, TypeVar
 
 from setproctitle import setthreadtitle
 
@@ -63,7 +64,7 @@ from .config import (
 )
 from .core_queries import HostInfo, query_hosts_scheduled_downtime_depth
 from .crash_reporting import CrashReportStore, ECCrashReport
-from .event import create_events_from_syslog_messages, Event, scrub_string
+from .event import create_event_from_syslog_message, Event, scrub_string
 from .helpers import ECLock, parse_bytes_into_syslog_messages
 from .history import ActiveHistoryPeriod, get_logfile, History, HistoryWhat, quote_tab, TimedHistory
 from .history_file import FileHistory
@@ -71,6 +72,7 @@ from .history_mongo import MongoDBHistory
 from .history_sqlite import SQLiteHistory, SQLiteSettings
 from .host_config import HostConfig
 from .perfcounters import Perfcounters
+from .pipeline import Address, EventPipeline, match_rules, RuleIndexHash
 from .query import (
     Columns,
     filter_operator_in,
@@ -81,6 +83,7 @@ from .query import (
     QueryREPLICATE,
     StatusTable,
 )
+from .rule_index import RuleIndex
 from .rule_matcher import compile_rule, match, MatchFailure, MatchResult, MatchSuccess, RuleMatcher
 from .rule_packs import load_active_config
 from .settings import create_settings, FileDescriptor, PortNumber, Settings
@@ -118,6 +121,13 @@ Response = Iterable[Sequence[object]] | Mapping[str, object] | None
 
 LimitKind = Literal["overall", "by_rule", "by_host"]
 
+_T = TypeVar("_T")
+
+# Below this number of messages, the round trip to the worker processes costs more than it saves.
+_MIN_PIPELINE_MESSAGES = 16
+# Maximum number of syslog datagrams read at once when the pipeline is enabled
+_MAX_SYSLOG_UDP_BATCH = 1000
+
 
 # .
 #   .--Helper functions----------------------------------------------------.
@@ -390,9 +400,12 @@ class EventServer(ECServerThread):
         self._rules: list[Rule] = []
         self._rule_by_id: dict[str | None, Rule] = {}
         self._rule_hash: dict[int, dict[int, Any]] = {}
+        self._rule_index = RuleIndex([])
         self._hash_stats: list[list[int]] = []  # facility/priority
         for _unused_facility in range(32):
             self._hash_stats.append([0] * 8)
+        # Created on demand, the worker processes must not be started before daemonizing.
+        self._pipeline: EventPipeline | None = None
 
         self.host_config = HostConfig(self._logger)
         self._perfcounters = perfcounters
@@ -736,10 +749,7 @@ class EventServer(ECServerThread):
 
             # Read events from builtin syslog server
             if self._syslog_udp is not None and self._syslog_udp in readable:
-                message, address = self._syslog_udp.recvfrom(4096)
-                self.process_syslog_messages(
-                    [message], parse_address("syslog socket (UDP)", address)
-                )
+                self.process_addressed_syslog_messages(self._read_syslog_udp(self._syslog_udp))
 
             # Read events from builtin snmptrap server
             if self._snmp_trap_socket is not None and self._snmp_trap_socket in readable:
@@ -757,6 +767,22 @@ class EventServer(ECServerThread):
             else:
                 select_timeout = 1  # restore default select timeout
 
+    def _read_syslog_udp(self, syslog_udp: socket.socket) -> list[tuple[bytes, Address]]:
+        """Read one datagram, or everything pending when the pipeline can process it in bulk"""
+        message, address = syslog_udp.recvfrom(4096)
+        messages: list[tuple[bytes, Address]] = [
+            (message, parse_address("syslog socket (UDP)", address))
+        ]
+        if not self._pipeline_enabled():
+            return messages
+        while len(messages) < _MAX_SYSLOG_UDP_BATCH:
+            try:
+                message, address = syslog_udp.recvfrom(4096, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                break
+            messages.append((message, parse_address("syslog socket (UDP)", address)))
+        return messages
+
     def create_events_from_trap(self, data: bytes, address: tuple[str, int]) -> Iterator[Event]:
         try:
             if varbinds_and_ipaddress := self._snmp_trap_parser(data, address):
@@ -774,24 +800,102 @@ class EventServer(ECServerThread):
         """
         for event in events:
             self._perfcounters.count("messages")
+            self._perfcounters.count("parsed_messages")
             before = time.time()
             # In replication slave mode (when not took over), ignore all events
-            if not is_replication_slave(self._config) or self._slave_status["mode"] != "sync":
+            if not self._is_replication_slave_in_sync():
                 self.process_potential_event(event)
             elif self.settings.options.debug:
                 self._logger.info("Replication: we are in slave mode, ignoring event")
             elapsed = time.time() - before
             self._perfcounters.count_time("processing", elapsed)
 
-    def process_syslog_messages(
-        self, messages: Iterable[bytes], address: tuple[str, int] | None
-    ) -> None:
+    def _is_replication_slave_in_sync(self) -> bool:
+        return is_replication_slave(self._config) and self._slave_status["mode"] == "sync"
+
+    def process_syslog_messages(self, messages: Iterable[bytes], address: Address) -> None:
+        self.process_addressed_syslog_messages([(message, address) for message in messages])
+
+    def process_addressed_syslog_messages(self, messages: Sequence[tuple[bytes, Address]]) -> None:
+        """Process syslog messages, in the worker processes if there are enough of them"""
+        if (
+            len(messages) >= _MIN_PIPELINE_MESSAGES
+            and self._pipeline_enabled()
+            and not self._is_replication_slave_in_sync()
+        ):
+            try:
+                self._process_in_pipeline(messages)
+                return
+            except BrokenProcessPool:
+                # Nothing has been applied yet, so we can simply do it on our own.
+                self._logger.exception("Event processing worker died, restarting the workers")
+                with self._lock_configuration:
+                    self.close_pipeline()
+
+        logger = self._logger if self._config["debug_rules"] else None
         self.process_potential_event_instrumented(
-            create_events_from_syslog_messages(
-                messages, address, self._logger if self._config["debug_rules"] else None
-            )
+            create_event_from_syslog_message(message, address, logger)
+            for message, address in messages
+        )
+
+    def _pipeline_enabled(self) -> bool:
+        # Debugging the rules needs the log messages of the matching in the right order.
+        return self._config["event_processing_workers"] > 0 and not self._config["debug_rules"]
+
+    def _process_in_pipeline(self, messages: Sequence[tuple[bytes, Address]]) -> None:
+        before = time.time()
+        with self._lock_configuration:
+            if self._pipeline is None:
+                self._pipeline = self._create_pipeline()
+            preprocessed_events = list(self._pipeline.process(messages))
+        # Parsing and matching are done in parallel, so we attribute the wall clock time evenly.
+        preprocessing_time = (time.time() - before) / len(messages)
+        self._perfcounters.count("parsed_messages", len(preprocessed_events))
+        self._perfcounters.count("matched_messages", len(preprocessed_events))
+        self._perfcounters.count(
+            "rule_tries", sum(preprocessed.rule_tries for preprocessed in preprocessed_events)
+        )
+
+        for event, matches, _rule_tries in preprocessed_events:
+            self._perfcounters.count("messages")
+            before = time.time()
+            self.process_rule_matches(event, matches)
+            elapsed = time.time() - before
+            self._perfcounters.count_time("processing", preprocessing_time + elapsed)
+
+    def _create_pipeline(self) -> EventPipeline:
+        rule_indices = {id(rule): idx for idx, rule in enumerate(self._rules)}
+        rule_hash: RuleIndexHash | None = (
+            {
+                facility: {
+                    priority: [rule_indices[id(rule)] for rule in rules]
+                    for priority, rules in priorities.items()
+                }
+                for facility, priorities in self._rule_hash.items()
+            }
+            if self._config["rule_optimizer"]
+            else None
+        )
+        self._logger.info(
+            "Starting %d event processing workers", self._config["event_processing_workers"]
+        )
+        return EventPipeline(
+            self._config["event_processing_workers"],
+            rules=self._rules,
+            rule_hash=rule_hash,
+            hostname_translation=self._config["hostname_translation"],
         )
 
+    def close_pipeline(self) -> None:
+        """Stop the worker processes, they are restarted when needed"""
+        if self._pipeline is not None:
+            self._pipeline.close()
+            self._pipeline = None
+
+    def close_history(self) -> None:
+        """Write the queued history entries, the history might have been reloaded meanwhile"""
+        self._history.close()
+
     def do_housekeeping(self) -> None:
         with self._event_status.lock, self._lock_configuration:
             self.hk_handle_event_timeouts()
@@ -995,9 +1099,8 @@ class EventServer(ECServerThread):
                 # First look for case 1: rule that already have at least one hit
                 # and this events in the state "counting" exist.
                 events_to_delete: list[tuple[Event, HistoryWhat]] = []
-                events = self._event_status.events()
-                for event in events:
-                    if event["rule_id"] == rule["id"] and event["phase"] == "counting":
+                for event in list(self._event_status.events_of_rule(rule["id"])):
+                    if event["phase"] == "counting":
                         # time has elapsed. Now lets see if we have reached
                         # the necessary count:
                         if event["count"] < expect["count"]:  # no -> trigger alarm
@@ -1048,10 +1151,8 @@ class EventServer(ECServerThread):
             merge, reset_ack = merge  # type: ignore[unreachable]
 
         if merge != "never":
-            for event in self._event_status.events():
-                if event["rule_id"] == rule["id"] and (
-                    event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked")
-                ):
+            for event in self._event_status.events_of_rule(rule["id"]):
+                if event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked"):
                     merge_event = event
                     break
 
@@ -1069,7 +1170,9 @@ class EventServer(ECServerThread):
             merge_event["text"] = text
             # Better rewrite (again). Rule might have changed. Also we have changed
             # the text and the user might have his own text added via set_text.
+            host, core_host = merge_event["host"], merge_event["core_host"]
             self.rewrite_event(rule, merge_event, MatchGroups(), set_first=False)
+            self._event_status.reindex_host(merge_event, host, core_host)
             self._history.add(merge_event, "COUNTFAILED")
         else:
             # Create artificial event from scratch. Make sure that all important
@@ -1128,6 +1231,8 @@ class EventServer(ECServerThread):
 
     def compile_rules(self, rule_packs: Sequence[ECRulePack]) -> None:
         """Precompile regular expressions and similar stuff."""
+        # The workers have a copy of the old rules.
+        self.close_pipeline()
         self._rules = []
         self._rule_by_id = {}
         # Speedup-Hash for rule execution
@@ -1181,12 +1286,17 @@ class EventServer(ECServerThread):
             "Compiled %d active rules (ignoring %d disabled rules)", count_rules, count_disabled
         )
         if self._config["rule_optimizer"]:
+            self._rule_index = RuleIndex(self._rules)
             self._logger.info(
                 "Rule hash: %d rules - %d hashed, %d unspecific",
                 len(self._rules),
                 len(self._rules) - count_unspecific,
                 count_unspecific,
             )
+            self._logger.info(
+                "Rule index: %d rules by host, %d by application, %d by message text",
+                *self._rule_index.num_indexed,
+            )
             for facility in list(range(23)) + [31]:
                 if facility in self._rule_hash:
                     stats = [
@@ -1250,9 +1360,24 @@ class EventServer(ECServerThread):
                 (100.0 * count / float(total_count)),
             )
 
-    def process_potential_event(self, event: Event) -> None:  # pylint: disable=too-many-branches
+    def process_potential_event(self, event: Event) -> None:
         self.do_translate_hostname(event)
+        self._perfcounters.count("matched_messages")
+        if self._config["rule_optimizer"]:
+            rule_candidates = self._rule_index.candidates(
+                self._rule_hash.get(event["facility"], {}).get(event["priority"], []), event
+            )
+        else:
+            rule_candidates = self._rules
+        # The rules are matched lazily, interleaved with processing the matches.
+        self.process_rule_matches(
+            event, match_rules(rule_candidates, event, self.event_rule_matches, self._logger)
+        )
 
+    def process_rule_matches(  # pylint: disable=too-many-branches
+        self, event: Event, matches: Iterable[tuple[Rule, MatchSuccess]]
+    ) -> None:
+        """Apply the matching rules to the event and the event status, in this order"""
         # Log all incoming messages into a syslog-like text file if that is enabled
         if self._config["log_messages"]:
             self.log_message(event)
@@ -1260,134 +1385,84 @@ class EventServer(ECServerThread):
         # Rule optimizer
         if self._config["rule_optimizer"]:
             self._hash_stats[event["facility"]][event["priority"]] += 1
-            rule_candidates = self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
-        else:
-            rule_candidates = self._rules
 
-        skip_pack = None
-        for rule in rule_candidates:
-            # TODO: Rewrite this skipping logic, so it's blindingly obvious, even for mypy.
-            if skip_pack and rule["pack"] == skip_pack:  # type: ignore[unreachable]
-                continue  # type: ignore[unreachable] # still in the rule pack that we want to skip
-            skip_pack = None  # new pack, reset skipping
+        for rule, result in matches:
+            self._perfcounters.count("rule_hits")
+            if self._config["debug_rules"]:
+                self._logger.info("  matching groups:\n%s", pprint.pformat(result.match_groups))
 
-            try:
-                result = self.event_rule_matches(rule, event)
-            except Exception as e:
-                result = MatchFailure(
-                    reason=f"Rule would match, but due to inverted matching does not. {e}"
+            self._event_status.count_rule_match(rule["id"])
+            if self._config["log_rulehits"]:
+                self._logger.info(
+                    "Rule '%s/%s' hit by message %s/%s - '%s'.",
+                    rule["pack"],
+                    rule["id"],
+                    SyslogFacility(event["facility"]),
+                    SyslogPriority(event["priority"]),
+                    event["text"],
                 )
-                self._logger.exception(result.reason)
-
-            if isinstance(result, MatchSuccess):
-                self._perfcounters.count("rule_hits")
-                if self._config["debug_rules"]:
-                    self._logger.info("  matching groups:\n%s", pprint.pformat(result.match_groups))
-
-                self._event_status.count_rule_match(rule["id"])
-                if self._config["log_rulehits"]:
-                    self._logger.info(
-                        "Rule '%s/%s' hit by message %s/%s - '%s'.",
-                        rule["pack"],
-                        rule["id"],
-                        SyslogFacility(event["facility"]),
-                        SyslogPriority(event["priority"]),
-                        event["text"],
-                    )
-
-                if rule.get("drop"):
-                    if rule["drop"] == "skip_pack":
-                        skip_pack = rule["pack"]
-                        if self._config["debug_rules"]:
-                            self._logger.info("  skipping this rule pack (%s)", skip_pack)
-                        continue
-                    self._perfcounters.count("drops")
-                    return
-
-                if result.cancelling:
-                    self._event_status.cancel_events(
-                        self, self._event_columns, event, result.match_groups, rule
-                    )
-                    return
 
-                # Remember the rule id that this event originated from
-                event["rule_id"] = rule["id"]
-
-                # Attach optional contact group information for visibility
-                # and eventually for notifications
-                self._add_rule_contact_groups_to_event(rule, event)
-
-                # Store groups from matching this event. In order to make
-                # persistence easier, we do not save them as list but join
-                # them on ASCII-1.
-                match_groups_message = result.match_groups.get("match_groups_message", ())
-                assert match_groups_message is not False
-                event["match_groups"] = match_groups_message
+            if rule.get("drop"):
+                if rule["drop"] == "skip_pack":
+                    if self._config["debug_rules"]:
+                        self._logger.info("  skipping this rule pack (%s)", rule["pack"])
+                    continue
+                self._perfcounters.count("drops")
+                return
 
-                match_groups_syslog_application = result.match_groups.get(
-                    "match_groups_syslog_application", ()
+            if result.cancelling:
+                self._event_status.cancel_events(
+                    self, self._event_columns, event, result.match_groups, rule
                 )
-                assert match_groups_syslog_application is not False
-                event["match_groups_syslog_application"] = match_groups_syslog_application
+                return
 
-                self.rewrite_event(rule, event, result.match_groups)
+            # Remember the rule id that this event originated from
+            event["rule_id"] = rule["id"]
 
-                # Lookup the monitoring core hosts and add the core host
-                # name to the event when one can be matched.
-                #
-                # Needs to be done AFTER event rewriting, because the rewriting
-                # may change the "host" field.
-                #
-                # For the moment we have no rule/condition matching on this
-                # field. So we only add the core host info for matched events.
-                self._add_core_host_to_new_event(event)
-
-                if "count" in rule:
-                    count = rule["count"]
-                    # Check if a matching event already exists that we need to
-                    # count up. If the count reaches the limit, the event will
-                    # be opened and its rule actions performed.
-                    existing_event = self._event_status.count_event(self, event, count)
-                    if existing_event:
-                        if "delay" in rule:
-                            if self._config["debug_rules"]:
-                                self._logger.info(
-                                    "Event opening will be delayed for %d seconds", rule["delay"]
-                                )
-                            existing_event["delay_until"] = time.time() + rule["delay"]
-                            existing_event["phase"] = "delayed"
-                        else:
-                            event_has_opened(
-                                self._history,
-                                self.settings,
-                                self._config,
-                                self._logger,
-                                self.host_config,
-                                self._event_columns,
-                                rule,
-                                existing_event,
-                            )
+            # Attach optional contact group information for visibility
+            # and eventually for notifications
+            self._add_rule_contact_groups_to_event(rule, event)
 
-                        self._history.add(existing_event, "COUNTREACHED")
+            # Store groups from matching this event. In order to make
+            # persistence easier, we do not save them as list but join
+            # them on ASCII-1.
+            match_groups_message = result.match_groups.get("match_groups_message", ())
+            assert match_groups_message is not False
+            event["match_groups"] = match_groups_message
 
-                        if "delay" not in rule and rule.get("autodelete"):
-                            existing_event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(existing_event, "AUTODELETE")
-                elif rule.get("expect"):
-                    self._event_status.count_expected_event(self, event)
-                else:
+            match_groups_syslog_application = result.match_groups.get(
+                "match_groups_syslog_application", ()
+            )
+            assert match_groups_syslog_application is not False
+            event["match_groups_syslog_application"] = match_groups_syslog_application
+
+            self.rewrite_event(rule, event, result.match_groups)
+
+            # Lookup the monitoring core hosts and add the core host
+            # name to the event when one can be matched.
+            #
+            # Needs to be done AFTER event rewriting, because the rewriting
+            # may change the "host" field.
+            #
+            # For the moment we have no rule/condition matching on this
+            # field. So we only add the core host info for matched events.
+            self._add_core_host_to_new_event(event)
+
+            if "count" in rule:
+                count = rule["count"]
+                # Check if a matching event already exists that we need to
+                # count up. If the count reaches the limit, the event will
+                # be opened and its rule actions performed.
+                existing_event = self._event_status.count_event(self, event, count)
+                if existing_event:
                     if "delay" in rule:
                         if self._config["debug_rules"]:
                             self._logger.info(
                                 "Event opening will be delayed for %d seconds", rule["delay"]
                             )
-                        event["delay_until"] = time.time() + rule["delay"]
-                        event["phase"] = "delayed"
+                        existing_event["delay_until"] = time.time() + rule["delay"]
+                        existing_event["phase"] = "delayed"
                     else:
-                        event["phase"] = "open"
-
-                    if self.new_event_respecting_limits(event) and event["phase"] == "open":
                         event_has_opened(
                             self._history,
                             self.settings,
@@ -1396,13 +1471,44 @@ class EventServer(ECServerThread):
                             self.host_config,
                             self._event_columns,
                             rule,
-                            event,
+                            existing_event,
                         )
-                        if rule.get("autodelete"):
-                            event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(event, "AUTODELETE")
-                return
+
+                    self._history.add(existing_event, "COUNTREACHED")
+
+                    if "delay" not in rule and rule.get("autodelete"):
+                        existing_event["phase"] = "closed"
+                        with self._event_status.lock:
+                            self._event_status.remove_event(existing_event, "AUTODELETE")
+            elif rule.get("expect"):
+                self._event_status.count_expected_event(self, event)
+            else:
+                if "delay" in rule:
+                    if self._config["debug_rules"]:
+                        self._logger.info(
+                            "Event opening will be delayed for %d seconds", rule["delay"]
+                        )
+                    event["delay_until"] = time.time() + rule["delay"]
+                    event["phase"] = "delayed"
+                else:
+                    event["phase"] = "open"
+
+                if self.new_event_respecting_limits(event) and event["phase"] == "open":
+                    event_has_opened(
+                        self._history,
+                        self.settings,
+                        self._config,
+                        self._logger,
+                        self.host_config,
+                        self._event_columns,
+                        rule,
+                        event,
+                    )
+                    if rule.get("autodelete"):
+                        event["phase"] = "closed"
+                        with self._event_status.lock:
+                            self._event_status.remove_event(event, "AUTODELETE")
+            return
 
         # End of loop over rules.
         if self._config["archive_orphans"]:
@@ -2253,13 +2359,13 @@ class StatusServer(ECServerThread):
             raise MKClientError("Wrong number of arguments for DELETE")
         event_ids, user = arguments
         ids = {int(event_id) for event_id in event_ids.split(",")}
-        self._event_status.delete_events_by(lambda event: event["id"] in ids, user)
+        self._event_status.delete_events_by_ids(ids, user)
 
     def handle_command_delete_events_of_host(self, arguments: list[str]) -> None:
         if len(arguments) != 2:
             raise MKClientError("Wrong number of arguments for DELETE_EVENTS_OF_HOST")
         hostname, user = arguments
-        self._event_status.delete_events_by(lambda event: event["host"] == hostname, user)
+        self._event_status.delete_events_of_host(HostName(hostname), user)
 
     def handle_command_update(self, arguments: list[str]) -> None:
         event_ids, user, acknowledged, comment, contact = arguments
@@ -2304,7 +2410,6 @@ class StatusServer(ECServerThread):
             self.settings,
             getLogger("cmk.mkeventd"),
             self._lock_configuration,
-            self._history,
             self._event_status,
             self._event_server,
             self,
@@ -2424,7 +2529,6 @@ def run_eventd(  # pylint: disable=too-many-branches
     settings: Settings,
     config: Config,
     lock_configuration: ECLock,
-    history: History,
     perfcounters: Perfcounters,
     event_status: EventStatus,
     event_server: EventServer,
@@ -2499,7 +2603,6 @@ def run_eventd(  # pylint: disable=too-many-branches
                     settings,
                     logger,
                     lock_configuration,
-                    history,
                     event_status,
                     event_server,
                     status_server,
@@ -2555,8 +2658,7 @@ class EventStatus:
         self._history = history
 
     def flush(self) -> None:
-        # TODO: Improve types!
-        self._events: list[Event] = []
+        self._set_events([])
         self._next_event_id = 1
         self._rule_stats: dict[str, int] = {}
         # needed for expecting rules
@@ -2570,13 +2672,56 @@ class EventStatus:
 
     def events(self) -> list[Event]:
         # TODO: Improve type!
-        return self._events
+        return list(self._events.values())
 
     def event(self, eid: int) -> Event | None:
-        for event in self._events:
-            if event["id"] == eid:
-                return event
-        return None
+        return self._events.get(eid)
+
+    def _set_events(self, events: Iterable[Event]) -> None:
+        # All open events by ID and the ones of each rule and host, each in the
+        # order of their creation.
+        self._events: dict[int, Event] = {}
+        self._events_by_rule: dict[str | None, dict[int, Event]] = {}
+        self._events_by_host: dict[HostName, dict[int, Event]] = {}
+        for event in events:
+            self._index_event(event)
+
+    def _index_event(self, event: Event) -> None:
+        self._events[event["id"]] = event
+        self._events_by_rule.setdefault(event.get("rule_id"), {})[event["id"]] = event
+        self._events_by_host.setdefault(event["host"], {})[event["id"]] = event
+
+    def _unindex_event(self, event: Event) -> None:
+        # Raises the KeyError for an event which is not open.
+        event = self._events.pop(event["id"])
+        self._unindex(self._events_by_rule, event.get("rule_id"), event["id"])
+        self._unindex(self._events_by_host, event["host"], event["id"])
+
+    def _unindex(self, index: dict[_T, dict[int, Event]], key: _T, eid: int) -> None:
+        # A host is only changed together with reindex_host(), so the key is always found.
+        events = index.get(key, {})
+        if events.pop(eid, None) is None:
+            self._logger.error("Event %d is missing in the index of %r", eid, key)
+        elif not events:
+            del index[key]
+
+    def reindex_host(self, event: Event, host: HostName, core_host: HostName | None) -> None:
+        """Account an open event to its host after the host has changed from the given one"""
+        if self._events.get(event["id"]) is not event:
+            return
+        if host != event["host"]:
+            self._unindex(self._events_by_host, host, event["id"])
+            self._events_by_host.setdefault(event["host"], {})[event["id"]] = event
+        old_key, new_key = (host, core_host), (event["host"], event["core_host"])
+        if old_key != new_key:
+            self.num_existing_events_by_host[old_key] -= 1
+            self.num_existing_events_by_host[new_key] = (
+                self.num_existing_events_by_host.get(new_key, 0) + 1
+            )
+
+    def events_of_rule(self, rule_id: str | None) -> Iterable[Event]:
+        """The open events of the rule, in the order of their creation"""
+        return self._events_by_rule.get(rule_id, {}).values()
 
     def interval_start(self, rule_id: str, interval: ExpectInterval) -> int:
         """
@@ -2621,14 +2766,14 @@ class EventStatus:
     def pack_status(self) -> PackedEventStatus:
         return PackedEventStatus(
             next_event_id=self._next_event_id,
-            events=self._events,
+            events=list(self._events.values()),
             rule_stats=self._rule_stats,
             interval_starts=self._interval_starts,
         )
 
     def unpack_status(self, status: PackedEventStatus) -> None:
         self._next_event_id = status["next_event_id"]
-        self._events = status["events"]
+        self._set_events(status["events"])
         self._rule_stats = status["rule_stats"]
         self._interval_starts = status["interval_starts"]
 
@@ -2660,7 +2805,7 @@ class EventStatus:
             try:
                 status = ast.literal_eval(path.read_text(encoding="utf-8"))
                 self._next_event_id = status["next_event_id"]
-                self._events = status["events"]
+                events = status["events"]
                 self._rule_stats = status["rule_stats"]
                 self._interval_starts = status.get("interval_starts", {})
                 self._logger.info("Loaded event state from %s.", path)
@@ -2668,8 +2813,11 @@ class EventStatus:
                 self._logger.exception("Error loading event state from %s", path)
                 raise
 
+        else:
+            events = self.events()
+
         # Add new columns and fix broken events
-        for event in self._events:
+        for event in events:
             event.setdefault("ipaddress", "")
             event.setdefault("host", HostName(""))
             event.setdefault("application", "")
@@ -2678,6 +2826,7 @@ class EventStatus:
             if "core_host" not in event:
                 event_server.add_core_host_to_event(event)
                 event["host_in_downtime"] = False
+        self._set_events(events)
 
         # core_host is needed to initialize the status
         self._initialize_event_limit_status()
@@ -2692,7 +2841,7 @@ class EventStatus:
 
         self.num_existing_events_by_host: dict[tuple[str, HostName | None], int] = {}
         self.num_existing_events_by_rule: dict[Any, int] = {}
-        for event in self._events:
+        for event in self._events.values():
             self._count_event_add(event)
 
     def _count_event_add(self, event: Event) -> None:
@@ -2711,14 +2860,17 @@ class EventStatus:
         host_key = (event["host"], event["core_host"])
 
         self.num_existing_events -= 1
-        self.num_existing_events_by_host[host_key] -= 1
+        if host_key in self.num_existing_events_by_host:
+            self.num_existing_events_by_host[host_key] -= 1
+        else:
+            self._logger.error("Event %d of host %r is not counted", event["id"], host_key)
         self.num_existing_events_by_rule[event["rule_id"]] -= 1
 
     def new_event(self, event: Event) -> None:
         self._perfcounters.count("events")
         event["id"] = self._next_event_id
         self._next_event_id += 1
-        self._events.append(event)
+        self._index_event(event)
         self.num_existing_events += 1
         self._count_event_add(event)
         self._history.add(event, "NEW")
@@ -2732,17 +2884,17 @@ class EventStatus:
 
     def remove_event(self, event: Event, delete_reason: HistoryWhat, user: str = "") -> None:
         try:
-            self._events.remove(event)
+            self._unindex_event(event)
             self._history.add(event, delete_reason, user)
             self._count_event_remove(event)
-        except ValueError:
+        except KeyError:
             self._logger.exception("Cannot remove event %d: not present", event["id"])
 
     # protected by self.lock
     def remove_oldest_event(self, ty: LimitKind, event: Event) -> None:
         if ty == "overall":
             self._logger.log(VERBOSE, "  Removing oldest event")
-            oldest_event = self._events[0]
+            oldest_event = next(iter(self._events.values()))
             self.remove_event(oldest_event, "AUTODELETE")
         elif ty == "by_rule" and event["rule_id"] is not None:
             self._logger.log(VERBOSE, '  Removing oldest event of rule "%s"', event["rule_id"])
@@ -2753,17 +2905,15 @@ class EventStatus:
 
     # protected by self.lock
     def _remove_oldest_event_of_rule(self, rule_id: str) -> None:
-        for event in self._events:
-            if event["rule_id"] == rule_id:
-                self.remove_event(event, "AUTODELETE")
-                return
+        for event in self.events_of_rule(rule_id):
+            self.remove_event(event, "AUTODELETE")
+            return
 
     # protected by self.lock
-    def _remove_oldest_event_of_host(self, hostname: str) -> None:
-        for event in self._events:
-            if event["host"] == hostname:
-                self.remove_event(event, "AUTODELETE")
-                return
+    def _remove_oldest_event_of_host(self, hostname: HostName) -> None:
+        for event in self._events_by_host.get(hostname, {}).values():
+            self.remove_event(event, "AUTODELETE")
+            return
 
     # protected by self.lock
     def get_num_existing_events_by(self, ty: LimitKind, event: Event) -> int:
@@ -2791,10 +2941,8 @@ class EventStatus:
         """
         with self.lock:
             to_delete = []
-            for event in self._events:
-                if event["rule_id"] == rule["id"] and self.cancelling_match(
-                    match_groups, new_event, event, rule
-                ):
+            for event in self.events_of_rule(rule["id"]):
+                if self.cancelling_match(match_groups, new_event, event, rule):
                     # Fill a few fields of the cancelled event with data from
                     # the cancelling event so that action scripts have useful
                     # values and the logfile entry if more relevant.
@@ -2965,12 +3113,14 @@ class EventStatus:
                 preserve["comment"] = found["comment"]
             if "contact" in found:
                 preserve["contact"] = found["contact"]
+        host, core_host = found["host"], found["core_host"]
         found.update(event)
         found.update(preserve)
+        self.reindex_host(found, host, core_host)
 
     def count_expected_event(self, event_server: EventServer, event: Event) -> None:
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"] and ev["phase"] == "counting":
+        for ev in self.events_of_rule(event["rule_id"]):
+            if ev["phase"] == "counting":
                 self.count_event_up(ev, event)
                 return
 
@@ -2987,31 +3137,30 @@ class EventStatus:
         since the event has been created because the count was too
         low in the specified period of time.
         """
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"]:
-                if ev["phase"] == "ack" and not count["count_ack"]:
-                    continue  # skip acknowledged events
+        for ev in self.events_of_rule(event["rule_id"]):
+            if ev["phase"] == "ack" and not count["count_ack"]:
+                continue  # skip acknowledged events
 
-                if count["separate_host"] and ev["host"] != event["host"]:
-                    continue  # treat events with separated hosts separately
+            if count["separate_host"] and ev["host"] != event["host"]:
+                continue  # treat events with separated hosts separately
 
-                if count["separate_application"] and ev["application"] != event["application"]:
-                    continue  # same for application
+            if count["separate_application"] and ev["application"] != event["application"]:
+                continue  # same for application
 
-                if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
-                    continue
+            if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
+                continue
 
-                count_duration = count.get("count_duration")
-                if count_duration is not None and ev["first"] + count_duration < event["time"]:
-                    # Counting has been discontinued on this event after a certain time
-                    continue
+            count_duration = count.get("count_duration")
+            if count_duration is not None and ev["first"] + count_duration < event["time"]:
+                # Counting has been discontinued on this event after a certain time
+                continue
 
-                if ev["host_in_downtime"] != event["host_in_downtime"]:
-                    continue  # treat events with different downtime states separately
+            if ev["host_in_downtime"] != event["host_in_downtime"]:
+                continue  # treat events with different downtime states separately
 
-                found = ev
-                self.count_event_up(found, event)
-                break
+            found = ev
+            self.count_event_up(found, event)
+            break
         else:
             event["count"] = 1
             event["phase"] = "counting"
@@ -3025,15 +3174,25 @@ class EventStatus:
         return None  # do not do event action
 
     def delete_events_by(self, predicate: Callable[[Event], bool], user: str) -> None:
-        for event in self._events[:]:
-            if predicate(event):
-                event["phase"] = "closed"
-                if user:
-                    event["owner"] = user
-                self.remove_event(event, "DELETE", user)
+        self._delete_events([event for event in self._events.values() if predicate(event)], user)
+
+    def delete_events_by_ids(self, ids: Iterable[int], user: str) -> None:
+        self._delete_events(
+            [event for event in map(self._events.get, sorted(ids)) if event is not None], user
+        )
+
+    def delete_events_of_host(self, hostname: HostName, user: str) -> None:
+        self._delete_events(list(self._events_by_host.get(hostname, {}).values()), user)
+
+    def _delete_events(self, events: Iterable[Event], user: str) -> None:
+        for event in events:
+            event["phase"] = "closed"
+            if user:
+                event["owner"] = user
+            self.remove_event(event, "DELETE", user)
 
     def get_events(self) -> Iterable[Event]:
-        return self._events
+        return self.events()
 
     def get_rule_stats(self) -> Iterable[tuple[str, int]]:
         return sorted(self._rule_stats.items(), key=lambda x: x[0])
@@ -3346,7 +3505,6 @@ def reload_configuration(
     settings: Settings,
     logger: Logger,
     lock_configuration: ECLock,
-    history: History,
     event_status: EventStatus,
     event_server: EventServer,
     status_server: StatusServer,
@@ -3355,7 +3513,7 @@ def reload_configuration(
     with lock_configuration:
         config = load_configuration(settings, logger, slave_status)
 
-        history.close()
+        event_server.close_history()
         history = create_history(
             settings, config, logger, StatusTableEvents.columns, StatusTableHistory.columns
         )
@@ -3386,6 +3544,7 @@ def main() -> None:
     settings = create_settings(cmk_version.__version__, cmk.utils.paths.omd_root, sys.argv)
 
     pid_path = None
+    event_server: EventServer | None = None
     try:
         log.setup_logging_handler(sys.stderr)
         log.logger.setLevel(log.verbosity_to_log_level(settings.options.verbosity))
@@ -3478,7 +3637,6 @@ def main() -> None:
             settings,
             config,
             lock_configuration,
-            history,
             perfcounters,
             event_status,
             event_server,
@@ -3511,6 +3669,12 @@ def main() -> None:
         logger.log(VERBOSE, "Output hash stats")
         event_server.output_hash_stats()
 
+        logger.log(VERBOSE, "Stopping event processing workers")
+        event_server.close_pipeline()
+
+        logger.log(VERBOSE, "Writing the history")
+        event_server.close_history()
+
         logger.log(VERBOSE, "Closing fds which might be still open")
         for fd in [
             settings.options.syslog_udp,
@@ -3540,6 +3704,10 @@ def main() -> None:
         bail_out(logger, traceback.format_exc())
 
     finally:
+        # Signals and crashes must not lose the queued history entries either.
+        if event_server is not None:
+            with contextlib.suppress(Exception):
+                event_server.close_history()
         if pid_path and store.have_lock(str(pid_path)):
             with contextlib.suppress(OSError):
                 pid_path.unlink()
@@ -28,6 +28,9 @@ class Perfcounters:
         "overflows",
         "events",
         "connects",
+        # Throughput of the stages of the event processing, "messages" counts the last one.
+        "parsed_messages",
+        "matched_messages",
     ]
 
     # Average processing times
@@ -51,9 +54,9 @@ class Perfcounters:
 
         self._logger = logger.getChild("Perfcounters")
 
-    def count(self, counter: str) -> None:
+    def count(self, counter: str, num: int = 1) -> None:
         with self._lock:
-            self._counters[counter] += 1
+            self._counters[counter] += num
 
     def count_time(self, counter: str, ptime: float) -> None:
         with self._lock:
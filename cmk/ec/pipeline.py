@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Parse syslog messages and match them against the rules in worker processes
+
+Parsing and rule matching only depend on the message and the configuration, so
+they can be done in parallel. Everything touching the event status (counting,
+cancelling, event limits, actions) is left to the event server, which applies
+the results in the order the messages arrived.
+"""
+
+import multiprocessing
+import signal
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger, Logger
+from typing import Final, NamedTuple
+
+from cmk.ccc.site import omd_site
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.translations import translate_hostname, TranslationOptions
+
+from .config import Rule
+from .event import create_event_from_syslog_message, Event
+from .rule_index import RuleIndex
+from .rule_matcher import MatchFailure, MatchResult, MatchSuccess, RuleMatcher
+from .timeperiod import TimePeriods
+
+Address = tuple[str, int] | None
+
+# Index of the rules to try for a facility and priority, see EventServer.hash_rule()
+RuleIndexHash = Mapping[int, Mapping[int, Sequence[int]]]
+
+
+class PreprocessedEvent(NamedTuple):
+    event: Event
+    matches: Sequence[tuple[Rule, MatchSuccess]]
+    rule_tries: int
+
+
+class _WorkerResult(NamedTuple):
+    event: Event
+    # The rules are referenced by their index, sending them back would create copies.
+    matches: Sequence[tuple[int, MatchSuccess]]
+    rule_tries: int
+
+
+def match_rules(
+    rules: Iterable[Rule],
+    event: Event,
+    event_rule_matches: Callable[[Rule, Event], MatchResult],
+    logger: Logger,
+) -> Iterator[tuple[Rule, MatchSuccess]]:
+    """Yield the matching rules in the order they have to be applied
+
+    Only a matching rule which skips the rest of its rule pack lets the evaluation
+    continue (with the next rule pack), any other match is final.
+    """
+    skip_pack: str | None = None
+    for rule in rules:
+        if skip_pack is not None and rule["pack"] == skip_pack:
+            continue  # still in the rule pack that we want to skip
+        skip_pack = None  # new pack, reset skipping
+
+        try:
+            result = event_rule_matches(rule, event)
+        except Exception as e:
+            result = MatchFailure(
+                reason=f"Rule would match, but due to inverted matching does not. {e}"
+            )
+            logger.exception(result.reason)
+
+        if isinstance(result, MatchSuccess):
+            yield rule, result
+            if rule.get("drop") != "skip_pack":
+                return
+            skip_pack = rule["pack"]
+
+
+class _Worker:
+    def __init__(
+        self,
+        rules: Sequence[Rule],
+        rule_hash: RuleIndexHash | None,
+        hostname_translation: TranslationOptions,
+    ) -> None:
+        self._rules: Final = rules
+        self._rule_indices: Final = {id(rule): idx for idx, rule in enumerate(rules)}
+        self._rule_hash: Final = rule_hash
+        self._rule_index: Final = RuleIndex(rules)
+        self._hostname_translation: Final = hostname_translation
+        self._logger: Final = getLogger("cmk.mkeventd.EventServer.pipeline")
+        self._rule_matcher: Final = RuleMatcher(
+            logger=None,
+            omd_site_id=omd_site(),
+            is_active_time_period=TimePeriods(self._logger).active,
+        )
+
+    def process(self, messages: Sequence[tuple[bytes, Address]]) -> list[_WorkerResult]:
+        return [self._process(message, address) for message, address in messages]
+
+    def _process(self, message: bytes, address: Address) -> _WorkerResult:
+        event = create_event_from_syslog_message(message, address, None)
+        try:
+            event["host"] = translate_hostname(self._hostname_translation, event["host"])
+        except Exception:
+            event["host"] = HostName("")
+
+        if self._rule_hash is None:
+            candidates: Sequence[Rule] = self._rules
+        else:
+            candidates = self._rule_index.candidates(
+                (
+                    self._rules[idx]
+                    for idx in self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
+                ),
+                event,
+            )
+
+        rule_tries = 0
+
+        def event_rule_matches(rule: Rule, event: Event) -> MatchResult:
+            nonlocal rule_tries
+            rule_tries += 1
+            return self._rule_matcher.event_rule_matches(rule, event)
+
+        matches = [
+            (self._rule_indices[id(rule)], result)
+            for rule, result in match_rules(candidates, event, event_rule_matches, self._logger)
+        ]
+        return _WorkerResult(event, matches, rule_tries)
+
+
+_worker: _Worker | None = None
+
+
+def _init_worker(
+    rules: Sequence[Rule],
+    rule_hash: RuleIndexHash | None,
+    hostname_translation: TranslationOptions,
+) -> None:
+    global _worker
+    # Ctrl-C in foreground mode is handled by the event daemon, which shuts us down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker = _Worker(rules, rule_hash, hostname_translation)
+
+
+def _process_chunk(messages: Sequence[tuple[bytes, Address]]) -> list[_WorkerResult]:
+    assert _worker is not None
+    return _worker.process(messages)
+
+
+class EventPipeline:
+    """A pool of processes doing the stateless part of the event processing
+
+    The workers get a copy of the compiled rules when they are started, so the
+    pipeline has to be replaced whenever the rules change. The matches refer to
+    the rules given to the constructor, not to copies of them.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        *,
+        rules: Sequence[Rule],
+        rule_hash: RuleIndexHash | None,
+        hostname_translation: TranslationOptions,
+    ) -> None:
+        self._num_workers: Final = num_workers
+        self._rules: Final = rules
+        # The event daemon runs several threads, so we must not fork.
+        self._executor: Final = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(rules, rule_hash, hostname_translation),
+        )
+
+    def process(self, messages: Sequence[tuple[bytes, Address]]) -> Iterator[PreprocessedEvent]:
+        """Parse and match the messages, the results keep the order of the messages
+
+        Raises BrokenProcessPool when a worker died.
+        """
+        # A few chunks per worker balance the load without too much IPC overhead.
+        chunk_size = max(1, -(-len(messages) // (4 * self._num_workers)))
+        chunks = [messages[idx : idx + chunk_size] for idx in range(0, len(messages), chunk_size)]
+        for results in self._executor.map(_process_chunk, chunks):
+            for result in results:
+                yield PreprocessedEvent(
+                    result.event,
+                    [(self._rules[idx], match) for idx, match in result.matches],
+                    result.rule_tries,
+                )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
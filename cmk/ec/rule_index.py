@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Preselection of the rules which might match an event
+
+Most rules have conditions on the host, the syslog application or the message
+text. Instead of trying the rules one by one, these conditions are evaluated for
+all rules at once: exact host names are looked up in a dictionary, regular
+expressions with a literal prefix in a trie, and the regular expressions for the
+message text are combined into a few large alternations, which are only taken
+apart when they match. Only the rules passing all of these are tried, which gives
+exactly the same results as trying all rules.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+from collections.abc import Iterable, Sequence
+from typing import Final
+
+from .config import Rule, TextPattern
+from .event import Event
+
+# Rule masks are ints with one bit per rule.
+_Mask = int
+
+_MESSAGE_PATTERNS_PER_REGEX: Final = 32
+
+# Characters which stand for themselves in a regex, even with re.IGNORECASE
+_LITERAL_CHARS: Final = frozenset(string.ascii_letters + string.digits + " !\"#%&',-/:;<=>@_`~")
+# A repeated literal character is optional with these
+_OPTIONAL_QUANTIFIERS: Final = frozenset("*?{")
+# Group numbers and names, inline flags and conditionals don't survive combining regexes.
+_NOT_COMBINABLE: Final = re.compile(r"\\\d|\(\?(?![:=!]|<[=!])")
+
+
+def literal_prefix(pattern: re.Pattern[str]) -> str | None:
+    """The lower case text every match of the case insensitive pattern starts with"""
+    if pattern.flags & (re.MULTILINE | re.VERBOSE) or not pattern.flags & re.IGNORECASE:
+        return None
+    source = pattern.pattern
+    if not source.startswith("^") or "|" in source:
+        return None
+    prefix: list[str] = []
+    for char in source[1:]:
+        if char not in _LITERAL_CHARS:
+            if char in _OPTIONAL_QUANTIFIERS and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return "".join(prefix).lower() or None
+
+
+def _is_combinable(pattern: re.Pattern[str]) -> bool:
+    return pattern.flags == re.IGNORECASE | re.UNICODE and not _NOT_COMBINABLE.search(
+        pattern.pattern
+    )
+
+
+class _PrefixTrie:
+    __slots__ = ("_children", "_mask")
+
+    def __init__(self) -> None:
+        self._children: dict[str, _PrefixTrie] = {}
+        self._mask: _Mask = 0
+
+    def add(self, prefix: str, mask: _Mask) -> None:
+        node = self
+        for char in prefix:
+            node = node._children.setdefault(char, _PrefixTrie())
+        node._mask |= mask
+
+    def lookup(self, text: str) -> _Mask:
+        """The rules with a prefix of the text"""
+        mask = self._mask
+        node = self
+        for char in text:
+            if (child := node._children.get(char)) is None:
+                break
+            node = child
+            mask |= node._mask
+        return mask
+
+
+class _TextIndex:
+    """The rules with a condition on some text field of the event
+
+    Regexes with a literal prefix are only evaluated for ASCII text: re.IGNORECASE
+    treats some non-ASCII characters as equal to ASCII letters, str.lower() doesn't.
+    """
+
+    def __init__(self, *, complete: bool) -> None:
+        self._complete: Final = complete
+        self.constrained: _Mask = 0
+        self._texts: dict[str, _Mask] = {}
+        self._prefixes: Final = _PrefixTrie()
+        self._by_prefix: _Mask = 0
+
+    def add(self, pattern: TextPattern, mask: _Mask) -> bool:
+        if isinstance(pattern, str):
+            self._texts[pattern] = self._texts.get(pattern, 0) | mask
+        elif (prefix := literal_prefix(pattern)) is not None:
+            self._prefixes.add(prefix, mask)
+            self._by_prefix |= mask
+        else:
+            return False
+        self.constrained |= mask
+        return True
+
+    def passing(self, text: str) -> _Mask:
+        lower_text = text.lower()
+        if self._complete:
+            mask = self._texts.get(lower_text, 0)
+        else:
+            mask = 0
+            for pattern, rules in self._texts.items():
+                if pattern in lower_text:
+                    mask |= rules
+        if not self._by_prefix:
+            return mask
+        return mask | (self._prefixes.lookup(lower_text) if text.isascii() else self._by_prefix)
+
+
+class RuleIndex:
+    """Find the rules which might match an event
+
+    Rules with inverted matching can match anything, so they are never skipped.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self._bits: Final = {id(rule): 1 << pos for pos, rule in enumerate(rules)}
+        self._hosts: Final = _TextIndex(complete=True)
+        self._applications: Final = _TextIndex(complete=False)
+        self._message_texts: Final = _TextIndex(complete=False)
+        # Combined regexes with the regexes they are made of
+        self._message_regexes: list[
+            tuple[re.Pattern[str], _Mask, Sequence[tuple[re.Pattern[str], _Mask]]]
+        ] = []
+
+        message_regexes: dict[str, _Mask] = {}
+        for rule in rules:
+            if rule.get("invert_matching"):
+                continue
+            bit = self._bits[id(rule)]
+            if (host := rule.get("match_host")) is not None:
+                self._hosts.add(host, bit)
+            # Either the application or the cancelling application has to match.
+            if "match_application" in rule and "cancel_application" not in rule:
+                self._applications.add(rule["match_application"], bit)
+            # Either the message or the cancelling message has to match.
+            if "match" in rule:
+                patterns = [rule["match"], *([rule["match_ok"]] if "match_ok" in rule else [])]
+                if all(isinstance(p, str) or _is_combinable(p) for p in patterns):
+                    for pattern in patterns:
+                        if isinstance(pattern, str):
+                            self._message_texts.add(pattern, bit)
+                        else:
+                            message_regexes[pattern.pattern] = (
+                                message_regexes.get(pattern.pattern, 0) | bit
+                            )
+                    self._message_texts.constrained |= bit
+
+        sources = list(message_regexes)
+        for start in range(0, len(sources), _MESSAGE_PATTERNS_PER_REGEX):
+            self._add_message_regexes(
+                sources[start : start + _MESSAGE_PATTERNS_PER_REGEX], message_regexes
+            )
+
+    def _add_message_regexes(self, sources: Sequence[str], masks: dict[str, _Mask]) -> None:
+        regexes = [(re.compile(source, re.IGNORECASE), masks[source]) for source in sources]
+        mask = 0
+        for _regex, rules in regexes:
+            mask |= rules
+        try:
+            combined = re.compile("|".join(f"(?:{source})" for source in sources), re.IGNORECASE)
+        except re.error:
+            self._message_regexes.extend((regex, rules, []) for regex, rules in regexes)
+        else:
+            self._message_regexes.append((combined, mask, regexes))
+
+    @property
+    def num_indexed(self) -> tuple[int, int, int]:
+        """The number of rules indexed by host, application and message text"""
+        return (
+            self._hosts.constrained.bit_count(),
+            self._applications.constrained.bit_count(),
+            self._message_texts.constrained.bit_count(),
+        )
+
+    def candidates(self, rules: Iterable[Rule], event: Event) -> list[Rule]:
+        """The rules which might match the event, in the given order"""
+        excluded = self._excluded(event)
+        return [rule for rule in rules if not excluded & self._bits.get(id(rule), 0)]
+
+    def _excluded(self, event: Event) -> _Mask:
+        excluded = self._hosts.constrained & ~self._hosts.passing(event["host"])
+        if self._applications.constrained:
+            excluded |= self._applications.constrained & ~self._applications.passing(
+                event["application"]
+            )
+        if not (remaining := self._message_texts.constrained & ~excluded):
+            return excluded
+        text = event["text"]
+        passing = self._message_texts.passing(text)
+        for combined, mask, regexes in self._message_regexes:
+            if not (mask & remaining & ~passing and combined.search(text)):
+                continue
+            if not regexes:
+                passing |= mask
+                continue
+            # Most of the time only few of the combined regexes match.
+            for regex, rules in regexes:
+                if rules & remaining & ~passing and regex.search(text):
+                    passing |= rules
+        return excluded | remaining & ~passing
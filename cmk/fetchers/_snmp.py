@@ -5,6 +5,9 @@
 
 import dataclasses
 import logging
+import os
+import struct
+import tempfile
 import time
 from collections.abc import Collection, Iterable, Iterator, Mapping, MutableMapping, Sequence
 from pathlib import Path
@@ -32,6 +35,8 @@ from .snmp import make_backend, SNMPPluginStore
 
 __all__ = ["SNMPFetcher", "SNMPSectionMeta", "SNMPScanConfig"]
 
+_WalkCacheKey = tuple[str, str, bool]
+
 
 class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):  # pylint: disable=too-many-ancestors
     """A cache on a per-fetchoid basis
@@ -42,6 +47,8 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):  # pylint:
     The fetched data is always saved to a file *if* the respective OID is marked as being cached
     by the plug-in using `OIDCached` (that is: if the save_to_cache attribute of the OID object
     is true).
+
+    This is the former layout with one file per walk, see CompactWalkCache.
     """
 
     __slots__ = ("_store", "_path", "_logger")
@@ -67,7 +74,11 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):  # pylint:
         return name_parts[0], name_parts[1]
 
     def _iterfiles(self) -> Iterable[Path]:
-        return self._path.iterdir() if self._path.is_dir() else ()
+        return (
+            (path for path in self._path.iterdir() if path.name.startswith("OID"))
+            if self._path.is_dir()
+            else ()
+        )
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self._store!r})"
@@ -120,6 +131,217 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):  # pylint:
             self._write_row(path, rowinfo)
 
 
+_COMPACT_MAGIC: Final = b"CMKWALK1"
+# key length, value length
+_RECORD_HEADER: Final = struct.Struct("<HI")
+# OID length, value length
+_ROW_HEADER: Final = struct.Struct("<HI")
+
+
+def _encode_walk_record(fetchoid: str, context_hash: str, rowinfo: SNMPRowInfo) -> bytes:
+    key = f"{fetchoid}-{context_hash}".encode()
+    value = b"".join(
+        _ROW_HEADER.pack(len(oid_bytes := oid.encode()), len(raw)) + oid_bytes + raw
+        for oid, raw in rowinfo
+    )
+    return _RECORD_HEADER.pack(len(key), len(value)) + key + value
+
+
+def _decode_walk_value(data: bytes, begin: int, end: int) -> SNMPRowInfo:
+    rowinfo: SNMPRowInfo = []
+    pos = begin
+    while pos < end:
+        oid_length, value_length = _ROW_HEADER.unpack_from(data, pos)
+        pos += _ROW_HEADER.size
+        oid = data[pos : pos + oid_length].decode()
+        pos += oid_length
+        rowinfo.append((oid, data[pos : pos + value_length]))
+        pos += value_length
+    return rowinfo
+
+
+def _index_walk_records(data: bytes) -> tuple[dict[tuple[str, str], tuple[int, int, int]], int]:
+    """Index the records of a compact walk cache file
+
+    Returns the record begin, value begin and record end by fetchoid and
+    context hash, and the size of the valid part of the data. Later records
+    replace earlier ones, a truncated record at the end is ignored.
+    """
+    if not data.startswith(_COMPACT_MAGIC):
+        return {}, 0
+    index: dict[tuple[str, str], tuple[int, int, int]] = {}
+    pos = len(_COMPACT_MAGIC)
+    while pos + _RECORD_HEADER.size <= len(data):
+        key_length, value_length = _RECORD_HEADER.unpack_from(data, pos)
+        key_begin = pos + _RECORD_HEADER.size
+        value_begin = key_begin + key_length
+        end = value_begin + value_length
+        if end > len(data):
+            break
+        fetchoid, context_hash = data[key_begin:value_begin].decode().split("-", 1)
+        index[(fetchoid, context_hash)] = (pos, value_begin, end)
+        pos = end
+    return index, pos
+
+
+class CompactWalkCache(MutableMapping[_WalkCacheKey, SNMPRowInfo]):  # pylint: disable=too-many-ancestors
+    """A WalkCache keeping all walks of a host in one file
+
+    The file holds one record per walk and is only ever appended to. On load()
+    just the record headers are read, a walk is decoded when it is looked up.
+    save() appends all changed walks with one write and one fsync. The file is
+    rewritten once more than half of it is outdated, or to drop deleted walks.
+
+    The per-OID files of a WalkCache found in the same directory are migrated
+    on load().
+    """
+
+    __slots__ = ("_store", "_index", "_data", "_dirty", "_deleted", "_path", "_file", "_logger")
+
+    FILENAME: Final = "walks"
+
+    def __init__(self, walk_cache: Path, logger: logging.Logger) -> None:
+        self._store: dict[_WalkCacheKey, SNMPRowInfo] = {}
+        self._index: dict[tuple[str, str], tuple[int, int, int]] = {}
+        self._data = b""
+        self._dirty: set[tuple[str, str]] = set()
+        self._deleted: set[tuple[str, str]] = set()
+        self._path = walk_cache
+        self._file = walk_cache / self.FILENAME
+        self._logger = logger
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def __getitem__(self, key: _WalkCacheKey) -> SNMPRowInfo:
+        try:
+            return self._store[key]
+        except KeyError:
+            fetchoid, context_hash, save_flag = key
+            if not save_flag or (fetchoid, context_hash) not in self._index:
+                raise
+        _begin, value_begin, end = self._index[(fetchoid, context_hash)]
+        rowinfo = self._store[key] = _decode_walk_value(self._data, value_begin, end)
+        return rowinfo
+
+    def __setitem__(self, key: _WalkCacheKey, value: SNMPRowInfo) -> None:
+        fetchoid, context_hash, save_flag = key
+        self._store[key] = value
+        if save_flag:
+            self._dirty.add((fetchoid, context_hash))
+            self._deleted.discard((fetchoid, context_hash))
+
+    def __delitem__(self, key: _WalkCacheKey) -> None:
+        fetchoid, context_hash, save_flag = key
+        found = self._store.pop(key, None) is not None
+        if save_flag:
+            found |= self._index.pop((fetchoid, context_hash), None) is not None
+            self._dirty.discard((fetchoid, context_hash))
+        if not found:
+            raise KeyError(key)
+        if save_flag:
+            self._deleted.add((fetchoid, context_hash))
+
+    def __iter__(self) -> Iterator[_WalkCacheKey]:
+        yield from self._store
+        yield from (
+            (fetchoid, context_hash, True)
+            for fetchoid, context_hash in self._index
+            if (fetchoid, context_hash, True) not in self._store
+        )
+
+    def __len__(self) -> int:
+        return len(self._store) + sum(
+            1
+            for fetchoid, context_hash in self._index
+            if (fetchoid, context_hash, True) not in self._store
+        )
+
+    def clear(self) -> None:
+        WalkCache(self._path, self._logger).clear()
+        self._file.unlink(missing_ok=True)
+        self._index = {}
+        self._data = b""
+        self._deleted.clear()
+
+    def load(self) -> None:
+        """Index the walks in the cache file, decoding happens on access"""
+        try:
+            self._data = self._file.read_bytes()
+        except FileNotFoundError:
+            self._data = b""
+        self._index, _size = _index_walk_records(self._data)
+        self._logger.debug(f"  Indexed {len(self._index)} walks in walk cache {self._file}")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        legacy = WalkCache(self._path, self._logger)
+        legacy.load()
+        if not legacy:
+            return
+        for (fetchoid, context_hash, save_flag), rowinfo in legacy.items():
+            if (fetchoid, context_hash) not in self._index:
+                self[(fetchoid, context_hash, save_flag)] = rowinfo
+        self._logger.debug(f"  Migrating {len(legacy)} walks to walk cache {self._file}")
+        self.save()
+        legacy.clear()
+
+    def save(self) -> None:
+        if not self._dirty and not self._deleted:
+            return
+        self._path.mkdir(parents=True, exist_ok=True)
+        records = {
+            (fetchoid, context_hash): _encode_walk_record(
+                fetchoid, context_hash, self._store[(fetchoid, context_hash, True)]
+            )
+            for fetchoid, context_hash in self._dirty
+        }
+        self._logger.debug(f"  Saving {len(records)} walks to walk cache {self._file}")
+        with store.locked(self._file):
+            # Others may have written to the file since we loaded it.
+            try:
+                data = self._file.read_bytes()
+            except FileNotFoundError:
+                data = b""
+            index, size = _index_walk_records(data)
+            kept = [
+                data[begin:end]
+                for key, (begin, _vb, end) in index.items()
+                if key not in records and key not in self._deleted
+            ]
+            live = sum(map(len, kept)) + sum(map(len, records.values()))
+            # Deleted walks can only be dropped by a rewrite, next load() would find them again.
+            if (
+                size == 0
+                or not self._deleted.isdisjoint(index)
+                or size + sum(map(len, records.values())) > 2 * live
+            ):
+                self._rewrite(_COMPACT_MAGIC, *kept, *records.values())
+            else:
+                with self._file.open("r+b") as f:
+                    f.truncate(size)
+                    f.seek(size)
+                    f.write(b"".join(records.values()))
+                    f.flush()
+                    os.fsync(f.fileno())
+        self._dirty.clear()
+        self._deleted.clear()
+
+    def _rewrite(self, *chunks: bytes) -> None:
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=self._path, prefix=f".{self.FILENAME}.new", delete=False
+        ) as tmp:
+            try:
+                Path(tmp.name).chmod(0o660)
+                tmp.write(b"".join(chunks))
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            except BaseException:
+                Path(tmp.name).unlink(missing_ok=True)
+                raise
+        os.replace(tmp.name, self._file)
+
+
 @dataclasses.dataclass(init=False)
 class SNMPSectionMeta:
     """Metadata for the section names."""
@@ -304,7 +526,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
             raise MKFetcherError("missing backend")
 
         now = int(time.time())
-        persisted_sections = self._section_store.load() if mode is Mode.CHECKING else {}
+        persist_info = self._section_store.load_persist_info() if mode is Mode.CHECKING else {}
         section_names = self._get_selection(mode)
         section_names |= self._detect(
             select_from=self._get_detected_sections(mode) - section_names, backend=self._backend
@@ -313,7 +535,9 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
             # Nothing to discover? That can't be right.
             raise MKFetcherError("Got no data")
 
-        walk_cache = WalkCache(self.walk_cache_path / str(self._backend.hostname), self._logger)
+        walk_cache = CompactWalkCache(
+            self.walk_cache_path / str(self._backend.hostname), self._logger
+        )
         if mode is Mode.CHECKING:
             walk_cache_msg = "SNMP walk cache is enabled: Use any locally cached information"
             walk_cache.load()
@@ -324,7 +548,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
         fetched_data: dict[SectionName, SNMPRawDataElem] = {}
         for section_name in self._sort_section_names(section_names):
             try:
-                _from, until, _section = persisted_sections[section_name]
+                _from, until = persist_info[section_name]
                 if now > until:
                     raise LookupError(section_name)
             except LookupError:
@@ -4,11 +4,12 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 from ._agent import AgentFileCache
-from ._cache import FileCache, FileCacheMode, FileCacheOptions, MaxAge, NoCache
+from ._cache import FileCache, FileCacheEncoding, FileCacheMode, FileCacheOptions, MaxAge, NoCache
 from ._snmp import SNMPFileCache
 
 __all__ = [
     "FileCache",
+    "FileCacheEncoding",
     "FileCacheOptions",
     "FileCacheMode",
     "MaxAge",
@@ -14,8 +14,8 @@ __all__ = ["AgentFileCache"]
 
 class AgentFileCache(FileCache[AgentRawData]):
     @staticmethod
-    def _from_cache_file(raw_data: bytes) -> AgentRawData:
-        return AgentRawData(raw_data)
+    def _from_cache_file(raw_data: bytes | memoryview) -> AgentRawData:
+        return AgentRawData(bytes(raw_data))
 
     @staticmethod
     def _to_cache_file(raw_data: AgentRawData) -> bytes:
@@ -48,8 +48,10 @@ from __future__ import annotations
 import abc
 import enum
 import logging
+import mmap
 import os
 import time
+import zlib
 from collections.abc import Sized
 from dataclasses import dataclass
 from pathlib import Path
@@ -64,6 +66,7 @@ from .._abstract import Mode
 
 __all__ = [
     "FileCache",
+    "FileCacheEncoding",
     "FileCacheMode",
     "FileCacheOptions",
     "MaxAge",
@@ -74,6 +77,12 @@ __all__ = [
 TFileCache = TypeVar("TFileCache", bound="FileCache")
 _TRawData = TypeVar("_TRawData", bound=Sized)
 
+# Cache files of the previous versions have no header. They never start with a null byte.
+_HEADER_PREFIX: Final = b"\0cmk-file-cache:"
+_MAX_HEADER_SIZE: Final = 64
+# Cache files are written far more often than read, so compress fast.
+_ZLIB_LEVEL: Final = 1
+
 
 class MaxAge(NamedTuple):
     """Maximum age allowed for the cached data, in seconds"""
@@ -102,6 +111,18 @@ class FileCacheMode(enum.IntFlag):
     READ_WRITE = READ | WRITE
 
 
+@enum.unique
+class FileCacheEncoding(enum.Enum):
+    """How the data is written to the cache file
+
+    The encoding is recorded in a header, so that files of any encoding can be read.
+    Compressed files are checked with the checksum of the compressed stream.
+    """
+
+    NONE = "none"
+    ZLIB = "zlib"
+
+
 class FileCache(Generic[_TRawData], abc.ABC):
     def __init__(
         self,
@@ -111,6 +132,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
         simulation: bool,
         use_only_cache: bool,
         file_cache_mode: FileCacheMode | int,
+        encoding: FileCacheEncoding = FileCacheEncoding.NONE,
     ) -> None:
         super().__init__()
         self.path_template: Final = path_template
@@ -121,6 +143,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
         self.simulation = simulation
         self.use_only_cache = use_only_cache
         self.file_cache_mode = FileCacheMode(file_cache_mode)
+        self.encoding = encoding
         self._logger: Final = logging.getLogger("cmk.helper")
 
     def __repr__(self) -> str:
@@ -133,6 +156,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
                     f"simulation={self.simulation}",
                     f"use_only_cache={self.use_only_cache}",
                     f"file_cache_mode={self.file_cache_mode.value}",
+                    f"encoding={self.encoding.value}",
                 )
             )
             + ")"
@@ -148,12 +172,14 @@ class FileCache(Generic[_TRawData], abc.ABC):
                 self.simulation == other.simulation,
                 self.use_only_cache == other.use_only_cache,
                 self.file_cache_mode == other.file_cache_mode,
+                self.encoding == other.encoding,
             )
         )
 
     @staticmethod
     @abc.abstractmethod
-    def _from_cache_file(raw_data: bytes) -> _TRawData:
+    def _from_cache_file(raw_data: bytes | memoryview) -> _TRawData:
+        """Deserialize the data, the memoryview must not be referenced afterwards"""
         raise NotImplementedError()
 
     @staticmethod
@@ -221,17 +247,52 @@ class FileCache(Generic[_TRawData], abc.ABC):
         # TODO: Use some generic store file read function to generalize error handling,
         # but there is currently no function that simply reads data from the file
         try:
-            cache_file = path.read_bytes()
+            with path.open("rb") as cache_file:
+                if not os.fstat(cache_file.fileno()).st_size:
+                    self._logger.debug("Not using cache (Empty)")
+                    return None
+                with (
+                    mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+                    memoryview(mapped) as view,
+                ):
+                    raw_data = self._decode(view)
         except FileNotFoundError:
             self._logger.debug("Not using cache (Does not exist)")
             return None
-
-        if not cache_file:
-            self._logger.debug("Not using cache (Empty)")
+        except (ValueError, zlib.error) as e:
+            self._logger.debug("Not using cache (Invalid: %s)", e)
             return None
 
         self._logger.log(VERBOSE, "Using data from cache file %s", path)
-        return self._from_cache_file(cache_file)
+        return raw_data
+
+    def _decode(self, view: memoryview) -> _TRawData:
+        if view[: len(_HEADER_PREFIX)].tobytes() != _HEADER_PREFIX:
+            return self._from_cache_file(view)
+
+        header_size = bytes(view[:_MAX_HEADER_SIZE]).find(b"\n") + 1
+        if not header_size:
+            raise ValueError("incomplete header")
+        encoding = FileCacheEncoding(
+            bytes(view[len(_HEADER_PREFIX) : header_size - 1]).decode("ascii")
+        )
+        with view[header_size:] as payload:
+            match encoding:
+                case FileCacheEncoding.NONE:
+                    return self._from_cache_file(payload)
+                case FileCacheEncoding.ZLIB:
+                    return self._from_cache_file(zlib.decompress(payload))
+
+    def _encode(self, raw_data: bytes) -> bytes:
+        if self.encoding is FileCacheEncoding.NONE and not raw_data.startswith(_HEADER_PREFIX):
+            # Keep the format of the previous versions if possible.
+            return raw_data
+        header = _HEADER_PREFIX + self.encoding.value.encode("ascii") + b"\n"
+        match self.encoding:
+            case FileCacheEncoding.NONE:
+                return header + raw_data
+            case FileCacheEncoding.ZLIB:
+                return header + zlib.compress(raw_data, _ZLIB_LEVEL)
 
     def write(self, raw_data: _TRawData, mode: Mode) -> None:
         if FileCacheMode.WRITE not in self.file_cache_mode or not self._do_cache(mode):
@@ -247,7 +308,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
 
         self._logger.debug("Write data to cache file %s", path)
         try:
-            _store.save_bytes_to_file(path, self._to_cache_file(raw_data))
+            _store.save_bytes_to_file(path, self._encode(self._to_cache_file(raw_data)))
         except MKTimeout:
             raise
         except Exception as e:
@@ -291,6 +352,8 @@ class FileCacheOptions:
     use_only_cache: bool = False
     # Set by the --force option from inventory.
     keep_outdated: bool = False
+    # Set by the configuration, only used for writing.
+    encoding: FileCacheEncoding = FileCacheEncoding.NONE
 
     def file_cache_mode(self) -> FileCacheMode:
         return FileCacheMode.DISABLED if self.disabled else FileCacheMode.READ_WRITE
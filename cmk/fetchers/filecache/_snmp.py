@@ -18,8 +18,8 @@ __all__ = ["SNMPFileCache"]
 
 class SNMPFileCache(FileCache[SNMPRawData]):
     @staticmethod
-    def _from_cache_file(raw_data: bytes) -> SNMPRawData:
-        return {SectionName(k): v for k, v in ast.literal_eval(raw_data.decode("utf-8")).items()}
+    def _from_cache_file(raw_data: bytes | memoryview) -> SNMPRawData:
+        return {SectionName(k): v for k, v in ast.literal_eval(str(raw_data, "utf-8")).items()}
 
     @staticmethod
     def _to_cache_file(raw_data: SNMPRawData) -> bytes:
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# Copyright (C) 2019 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Minimal BER codec for the subset of ASN.1 used by SNMP messages."""
+
+import enum
+from collections.abc import Iterator, Sequence
+from typing import Final, NamedTuple
+
+from cmk.ccc.exceptions import MKSNMPError
+
+__all__ = [
+    "decode_integer",
+    "decode_oid",
+    "decode_pdu",
+    "decode_tlv",
+    "encode_integer",
+    "encode_octet_string",
+    "encode_oid",
+    "encode_pdu",
+    "encode_sequence",
+    "encode_tlv",
+    "EXCEPTION_TAGS",
+    "iter_tlvs",
+    "PDU",
+    "PDUType",
+    "Tag",
+    "TLV",
+    "VarBind",
+]
+
+
+class Tag(enum.IntEnum):
+    INTEGER = 0x02
+    OCTET_STRING = 0x04
+    NULL = 0x05
+    OBJECT_IDENTIFIER = 0x06
+    SEQUENCE = 0x30
+    IP_ADDRESS = 0x40
+    COUNTER32 = 0x41
+    GAUGE32 = 0x42
+    TIMETICKS = 0x43
+    OPAQUE = 0x44
+    COUNTER64 = 0x46
+    NO_SUCH_OBJECT = 0x80
+    NO_SUCH_INSTANCE = 0x81
+    END_OF_MIB_VIEW = 0x82
+
+
+class PDUType(enum.IntEnum):
+    GET = 0xA0
+    GET_NEXT = 0xA1
+    RESPONSE = 0xA2
+    SET = 0xA3
+    GET_BULK = 0xA5
+    REPORT = 0xA8
+
+
+EXCEPTION_TAGS: Final = frozenset(
+    {Tag.NO_SUCH_OBJECT, Tag.NO_SUCH_INSTANCE, Tag.END_OF_MIB_VIEW},
+)
+
+
+class TLV(NamedTuple):
+    tag: int
+    value: bytes
+
+
+class VarBind(NamedTuple):
+    oid: tuple[int, ...]
+    tag: int
+    value: bytes
+
+
+class PDU(NamedTuple):
+    type: int
+    request_id: int
+    # For GETBULK requests these two are non-repeaters and max-repetitions
+    error_status: int
+    error_index: int
+    varbinds: Sequence[VarBind]
+
+
+def _encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes((length,))
+    raw = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes((0x80 | len(raw),)) + raw
+
+
+def encode_tlv(tag: int, value: bytes) -> bytes:
+    return bytes((tag,)) + _encode_length(len(value)) + value
+
+
+def encode_integer(value: int, tag: int = Tag.INTEGER) -> bytes:
+    if tag == Tag.INTEGER:
+        raw = value.to_bytes(max(1, (value.bit_length() + 8) // 8), "big", signed=True)
+    else:
+        # Application types (Counter32, Gauge32, ...) are unsigned
+        raw = value.to_bytes(max(1, (value.bit_length() + 8) // 8), "big")
+    return encode_tlv(tag, raw)
+
+
+def encode_octet_string(value: bytes) -> bytes:
+    return encode_tlv(Tag.OCTET_STRING, value)
+
+
+def encode_oid(oid: Sequence[int]) -> bytes:
+    if len(oid) < 2:
+        raise MKSNMPError(f"Invalid OID {oid!r}")
+    raw = bytearray()
+    for sub_id in (40 * oid[0] + oid[1], *oid[2:]):
+        chunk = bytearray((sub_id & 0x7F,))
+        sub_id >>= 7
+        while sub_id:
+            chunk.append(0x80 | (sub_id & 0x7F))
+            sub_id >>= 7
+        chunk.reverse()
+        raw += chunk
+    return encode_tlv(Tag.OBJECT_IDENTIFIER, bytes(raw))
+
+
+def encode_sequence(*items: bytes, tag: int = Tag.SEQUENCE) -> bytes:
+    return encode_tlv(tag, b"".join(items))
+
+
+def decode_tlv(data: bytes, pos: int = 0) -> tuple[int, int, int]:
+    """Return tag, begin and end of the value of the TLV at position pos"""
+    try:
+        tag = data[pos]
+        length = data[pos + 1]
+        pos += 2
+        if length & 0x80:
+            num_bytes = length & 0x7F
+            length = int.from_bytes(data[pos : pos + num_bytes], "big")
+            pos += num_bytes
+    except IndexError:
+        raise MKSNMPError("Truncated SNMP message")
+    if pos + length > len(data):
+        raise MKSNMPError("Truncated SNMP message")
+    return tag, pos, pos + length
+
+
+def iter_tlvs(data: bytes) -> Iterator[TLV]:
+    pos = 0
+    while pos < len(data):
+        tag, begin, end = decode_tlv(data, pos)
+        yield TLV(tag, data[begin:end])
+        pos = end
+
+
+def decode_integer(value: bytes, *, signed: bool = True) -> int:
+    return int.from_bytes(value, "big", signed=signed)
+
+
+def decode_oid(value: bytes) -> tuple[int, ...]:
+    sub_ids = []
+    sub_id = 0
+    for byte in value:
+        sub_id = (sub_id << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            sub_ids.append(sub_id)
+            sub_id = 0
+    if not sub_ids:
+        return ()
+    first, second = divmod(sub_ids[0], 40) if sub_ids[0] < 80 else (2, sub_ids[0] - 80)
+    return (first, second, *sub_ids[1:])
+
+
+def encode_pdu(pdu: PDU) -> bytes:
+    return encode_sequence(
+        encode_integer(pdu.request_id),
+        encode_integer(pdu.error_status),
+        encode_integer(pdu.error_index),
+        encode_sequence(
+            *(
+                encode_sequence(encode_oid(vb.oid), encode_tlv(vb.tag, vb.value))
+                for vb in pdu.varbinds
+            )
+        ),
+        tag=pdu.type,
+    )
+
+
+def decode_pdu(data: bytes) -> PDU:
+    tag, begin, end = decode_tlv(data)
+    fields = list(iter_tlvs(data[begin:end]))
+    if len(fields) != 4:
+        raise MKSNMPError("Malformed SNMP PDU")
+    varbinds = []
+    for varbind in iter_tlvs(fields[3].value):
+        name, value = iter_tlvs(varbind.value)
+        varbinds.append(VarBind(decode_oid(name.value), value.tag, value.value))
+    return PDU(
+        type=tag,
+        request_id=decode_integer(fields[0].value),
+        error_status=decode_integer(fields[1].value),
+        error_index=decode_integer(fields[2].value),
+        varbinds=varbinds,
+    )
@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+# Copyright (C) 2019 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""SNMP message processing for the community based and the user based security model
+
+See RFC 3412 (message processing), RFC 3414 (USM), RFC 3826 (AES) and
+RFC 7860 (HMAC-SHA-2).
+"""
+
+import abc
+import hashlib
+import hmac
+import os
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Final, Literal
+
+from cryptography.hazmat.decrepit.ciphers.algorithms import TripleDES
+from cryptography.hazmat.primitives.ciphers import algorithms, Cipher, modes
+
+from cmk.ccc.exceptions import MKGeneralException, MKSNMPError
+
+from cmk.snmplib import SNMPContext, SNMPCredentials, SNMPVersion
+
+from ._ber import (
+    decode_integer,
+    decode_pdu,
+    decode_tlv,
+    encode_integer,
+    encode_octet_string,
+    encode_pdu,
+    encode_sequence,
+    iter_tlvs,
+    PDU,
+    PDUType,
+    Tag,
+)
+
+__all__ = [
+    "make_message_processor",
+    "MessageProcessor",
+    "NotInTimeWindow",
+    "UnknownEngine",
+]
+
+# usmStatsNotInTimeWindows and usmStatsUnknownEngineIDs
+_OID_NOT_IN_TIME_WINDOW: Final = (1, 3, 6, 1, 6, 3, 15, 1, 1, 2, 0)
+_OID_UNKNOWN_ENGINE_ID: Final = (1, 3, 6, 1, 6, 3, 15, 1, 1, 4, 0)
+
+_FLAG_AUTH: Final = 0x01
+_FLAG_PRIV: Final = 0x02
+_FLAG_REPORTABLE: Final = 0x04
+
+_MAX_MESSAGE_SIZE: Final = 65507
+
+
+class UnknownEngine(MKSNMPError):
+    pass
+
+
+class NotInTimeWindow(MKSNMPError):
+    pass
+
+
+class MessageProcessor(abc.ABC):
+    @abc.abstractmethod
+    def encode(self, pdu: PDU, context: SNMPContext) -> bytes:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def decode(self, data: bytes) -> PDU:
+        raise NotImplementedError()
+
+    @staticmethod
+    @abc.abstractmethod
+    def message_id(data: bytes) -> int:
+        """Extract the ID used to match a response to its request"""
+        raise NotImplementedError()
+
+    def needs_discovery(self) -> bool:
+        return False
+
+    def discovery_message(self, request_id: int) -> bytes:
+        raise NotImplementedError()
+
+    def process_discovery(self, data: bytes) -> None:
+        raise NotImplementedError()
+
+
+class CommunityMessageProcessor(MessageProcessor):
+    def __init__(self, version: Literal[0, 1], community: str) -> None:
+        self._header: Final = encode_integer(version) + encode_octet_string(community.encode())
+
+    def encode(self, pdu: PDU, context: SNMPContext) -> bytes:
+        return encode_sequence(self._header, encode_pdu(pdu))
+
+    def decode(self, data: bytes) -> PDU:
+        _tag, begin, end = decode_tlv(data)
+        _tag, _vb, pos = decode_tlv(data, begin)  # version
+        _tag, _cb, pos = decode_tlv(data, pos)  # community
+        return decode_pdu(data[pos:end])
+
+    @staticmethod
+    def message_id(data: bytes) -> int:
+        _tag, begin, _end = decode_tlv(data)
+        _tag, _vb, pos = decode_tlv(data, begin)
+        _tag, _cb, pos = decode_tlv(data, pos)
+        _tag, pdu_begin, _pdu_end = decode_tlv(data, pos)
+        _tag, id_begin, id_end = decode_tlv(data, pdu_begin)
+        return decode_integer(data[id_begin:id_end])
+
+
+@dataclass(frozen=True)
+class _AuthProtocol:
+    hash_name: str
+    mac_length: int
+
+
+@dataclass(frozen=True)
+class _PrivProtocol:
+    name: Literal["DES", "AES"]
+    key_length: int
+
+
+_AUTH_PROTOCOLS: Final = {
+    "md5": _AuthProtocol("md5", 12),
+    "sha": _AuthProtocol("sha1", 12),
+    "SHA-224": _AuthProtocol("sha224", 16),
+    "SHA-256": _AuthProtocol("sha256", 24),
+    "SHA-384": _AuthProtocol("sha384", 32),
+    "SHA-512": _AuthProtocol("sha512", 48),
+}
+
+_PRIV_PROTOCOLS: Final = {
+    "DES": _PrivProtocol("DES", 16),
+    "AES": _PrivProtocol("AES", 16),
+    "AES-192": _PrivProtocol("AES", 24),
+    "AES-256": _PrivProtocol("AES", 32),
+}
+
+
+def password_to_key(password: str, engine_id: bytes, hash_name: str) -> bytes:
+    """Password to localized key algorithm of RFC 3414, A.2"""
+    raw = password.encode()
+    if not raw:
+        raise MKSNMPError("Empty SNMPv3 password")
+    expanded = (raw * (1048576 // len(raw) + 1))[:1048576]
+    ku = hashlib.new(hash_name, expanded).digest()
+    return hashlib.new(hash_name, ku + engine_id + ku).digest()
+
+
+def _extend_key(key: bytes, length: int, hash_name: str) -> bytes:
+    # Key extension as used by Net-SNMP for AES-192/AES-256 (draft-blumenthal-aes-usm-04)
+    while len(key) < length:
+        key += hashlib.new(hash_name, key).digest()
+    return key[:length]
+
+
+class USMMessageProcessor(MessageProcessor):
+    def __init__(
+        self,
+        user: str,
+        auth: tuple[_AuthProtocol, str] | None,
+        priv: tuple[_PrivProtocol, str] | None,
+    ) -> None:
+        self._user: Final = user.encode()
+        self._auth: Final = auth
+        self._priv: Final = priv
+        self._engine_id = b""
+        self._engine_boots = 0
+        self._engine_time = 0
+        self._time_reference = time.monotonic()
+        self._auth_key = b""
+        self._priv_key = b""
+        self._salt = int.from_bytes(os.urandom(8), "big")
+
+    def needs_discovery(self) -> bool:
+        return not self._engine_id
+
+    def discovery_message(self, request_id: int) -> bytes:
+        return self._encode_message(
+            request_id,
+            _FLAG_REPORTABLE,
+            security_parameters=self._security_parameters(b"", 0, 0, b"", b"", b""),
+            scoped_pdu=encode_sequence(
+                encode_octet_string(b""),
+                encode_octet_string(b""),
+                encode_pdu(PDU(PDUType.GET, request_id, 0, 0, [])),
+            ),
+        )
+
+    def process_discovery(self, data: bytes) -> None:
+        params = self._decode_message(data, verify=False)
+        self._engine_id = params.engine_id
+        self._set_time(params.engine_boots, params.engine_time)
+        if self._auth is not None:
+            protocol, password = self._auth
+            self._auth_key = password_to_key(password, self._engine_id, protocol.hash_name)
+            if self._priv is not None:
+                priv_protocol, priv_password = self._priv
+                self._priv_key = _extend_key(
+                    password_to_key(priv_password, self._engine_id, protocol.hash_name),
+                    priv_protocol.key_length,
+                    protocol.hash_name,
+                )
+
+    def _set_time(self, boots: int, engine_time: int) -> None:
+        self._engine_boots = boots
+        self._engine_time = engine_time
+        self._time_reference = time.monotonic()
+
+    def _current_time(self) -> int:
+        return self._engine_time + int(time.monotonic() - self._time_reference)
+
+    @staticmethod
+    def message_id(data: bytes) -> int:
+        _tag, begin, _end = decode_tlv(data)
+        _tag, _vb, pos = decode_tlv(data, begin)
+        _tag, global_begin, _global_end = decode_tlv(data, pos)
+        _tag, id_begin, id_end = decode_tlv(data, global_begin)
+        return decode_integer(data[id_begin:id_end])
+
+    @staticmethod
+    def _security_parameters(
+        engine_id: bytes,
+        boots: int,
+        engine_time: int,
+        user: bytes,
+        auth: bytes,
+        priv: bytes,
+    ) -> bytes:
+        return encode_octet_string(
+            encode_sequence(
+                encode_octet_string(engine_id),
+                encode_integer(boots),
+                encode_integer(engine_time),
+                encode_octet_string(user),
+                encode_octet_string(auth),
+                encode_octet_string(priv),
+            )
+        )
+
+    @staticmethod
+    def _encode_message(
+        message_id: int, flags: int, *, security_parameters: bytes, scoped_pdu: bytes
+    ) -> bytes:
+        return encode_sequence(
+            encode_integer(3),
+            encode_sequence(
+                encode_integer(message_id),
+                encode_integer(_MAX_MESSAGE_SIZE),
+                encode_octet_string(bytes((flags,))),
+                encode_integer(3),  # USM
+            ),
+            security_parameters,
+            scoped_pdu,
+        )
+
+    def encode(self, pdu: PDU, context: SNMPContext) -> bytes:
+        scoped_pdu = encode_sequence(
+            encode_octet_string(self._engine_id),
+            encode_octet_string(context.encode()),
+            encode_pdu(pdu),
+        )
+        flags = _FLAG_REPORTABLE
+        boots, engine_time = self._engine_boots, self._current_time()
+        priv_params = b""
+        if self._priv is not None:
+            flags |= _FLAG_PRIV
+            scoped_pdu, priv_params = self._encrypt(scoped_pdu, boots, engine_time)
+            scoped_pdu = encode_octet_string(scoped_pdu)
+        if self._auth is None:
+            return self._encode_message(
+                pdu.request_id,
+                flags,
+                security_parameters=self._security_parameters(
+                    self._engine_id, boots, engine_time, self._user, b"", priv_params
+                ),
+                scoped_pdu=scoped_pdu,
+            )
+
+        flags |= _FLAG_AUTH
+        protocol = self._auth[0]
+
+        def _message(auth_params: bytes) -> bytes:
+            return self._encode_message(
+                pdu.request_id,
+                flags,
+                security_parameters=self._security_parameters(
+                    self._engine_id,
+                    boots,
+                    engine_time,
+                    self._user,
+                    auth_params,
+                    priv_params,
+                ),
+                scoped_pdu=scoped_pdu,
+            )
+
+        return _message(self._mac(_message(bytes(protocol.mac_length))))
+
+    def _mac(self, message: bytes) -> bytes:
+        assert self._auth is not None
+        protocol = self._auth[0]
+        return hmac.new(self._auth_key, message, protocol.hash_name).digest()[: protocol.mac_length]
+
+    def _encrypt(self, data: bytes, boots: int, engine_time: int) -> tuple[bytes, bytes]:
+        assert self._priv is not None
+        self._salt = (self._salt + 1) % (1 << 64)
+        if self._priv[0].name == "AES":
+            salt = self._salt.to_bytes(8, "big")
+            iv = boots.to_bytes(4, "big") + engine_time.to_bytes(4, "big") + salt
+            encryptor = Cipher(
+                algorithms.AES(self._priv_key[: self._priv[0].key_length]),
+                modes.CFB(iv),
+            ).encryptor()
+            return encryptor.update(data) + encryptor.finalize(), salt
+
+        salt = boots.to_bytes(4, "big") + (self._salt & 0xFFFFFFFF).to_bytes(4, "big")
+        iv = bytes(a ^ b for a, b in zip(self._priv_key[8:16], salt))
+        data += bytes(-len(data) % 8)
+        encryptor = Cipher(TripleDES(self._priv_key[:8] * 3), modes.CBC(iv)).encryptor()
+        return encryptor.update(data) + encryptor.finalize(), salt
+
+    def _decrypt(self, data: bytes, params: "_SecurityParameters") -> bytes:
+        assert self._priv is not None
+        if self._priv[0].name == "AES":
+            iv = (
+                params.engine_boots.to_bytes(4, "big")
+                + params.engine_time.to_bytes(4, "big")
+                + params.priv
+            )
+            decryptor = Cipher(
+                algorithms.AES(self._priv_key[: self._priv[0].key_length]),
+                modes.CFB(iv),
+            ).decryptor()
+        else:
+            iv = bytes(a ^ b for a, b in zip(self._priv_key[8:16], params.priv))
+            decryptor = Cipher(TripleDES(self._priv_key[:8] * 3), modes.CBC(iv)).decryptor()
+        return decryptor.update(data) + decryptor.finalize()
+
+    def decode(self, data: bytes) -> PDU:
+        params = self._decode_message(data, verify=True)
+        pdu = params.pdu
+        if pdu.type == PDUType.REPORT and pdu.varbinds:
+            oid = pdu.varbinds[0].oid
+            if oid == _OID_NOT_IN_TIME_WINDOW:
+                self._set_time(params.engine_boots, params.engine_time)
+                raise NotInTimeWindow("SNMPv3 message not in time window")
+            if oid == _OID_UNKNOWN_ENGINE_ID:
+                self._engine_id = b""
+                raise UnknownEngine("Unknown SNMPv3 engine ID")
+            raise MKSNMPError(
+                f"SNMPv3 report received: .{'.'.join(map(str, oid))}"
+                f" = {decode_integer(pdu.varbinds[0].value, signed=False)}"
+            )
+        return pdu
+
+    def _decode_message(self, data: bytes, *, verify: bool) -> "_SecurityParameters":
+        _tag, begin, end = decode_tlv(data)
+        _tag, _vb, pos = decode_tlv(data, begin)  # version
+        _tag, global_begin, pos = decode_tlv(data, pos)
+        global_data = list(iter_tlvs(data[global_begin:pos]))
+        flags = global_data[2].value[0] if global_data[2].value else 0
+
+        _tag, params_begin, params_end = decode_tlv(data, pos)
+        _tag, field_pos, _seq_end = decode_tlv(data, params_begin)
+        fields: list[tuple[int, int]] = []
+        for _ in range(6):
+            _tag, field_begin, field_pos = decode_tlv(data, field_pos)
+            fields.append((field_begin, field_pos))
+        engine_id, boots, engine_time, _user, auth, priv = (data[b:e] for b, e in fields)
+
+        authenticated = bool(flags & _FLAG_AUTH)
+        if verify and self._auth is not None and authenticated:
+            auth_begin, auth_end = fields[4]
+            zeroed = data[:auth_begin] + bytes(auth_end - auth_begin) + data[auth_end:end]
+            if not hmac.compare_digest(self._mac(zeroed), auth):
+                raise MKSNMPError("SNMPv3 authentication failure")
+
+        payload_tag, payload_begin, payload_end = decode_tlv(data, params_end)
+        encrypted = payload_tag == Tag.OCTET_STRING
+        if encrypted:
+            if self._priv is None or not verify:
+                raise MKSNMPError("Unexpected encrypted SNMPv3 message")
+            scoped = self._decrypt(
+                data[payload_begin:payload_end],
+                _SecurityParameters(
+                    engine_id, decode_integer(boots), decode_integer(engine_time), priv
+                ),
+            )
+            _tag, scoped_begin, scoped_end = decode_tlv(scoped)
+        else:
+            scoped, scoped_begin, scoped_end = data, payload_begin, payload_end
+
+        _tag, _ctx_begin, pos = decode_tlv(scoped, scoped_begin)  # contextEngineID
+        _tag, _name_begin, pos = decode_tlv(scoped, pos)  # contextName
+        pdu = decode_pdu(scoped[pos:scoped_end])
+        if (
+            verify
+            and (
+                (self._auth is not None and not authenticated)
+                or (self._priv is not None and not encrypted)
+            )
+            and not _is_unauthenticated_report(pdu)
+        ):
+            raise MKSNMPError("SNMPv3 message below the security level of the user")
+        return _SecurityParameters(
+            engine_id,
+            decode_integer(boots),
+            decode_integer(engine_time),
+            priv,
+            pdu,
+        )
+
+
+def _is_unauthenticated_report(pdu: PDU) -> bool:
+    """Reports an agent sends without authentication (RFC 3414, 3.2)
+
+    They only make us fail or discover the engine again, they never carry data.
+    The time window is only adjusted by authenticated reports.
+    """
+    return (
+        pdu.type == PDUType.REPORT
+        and bool(pdu.varbinds)
+        and pdu.varbinds[0].oid != _OID_NOT_IN_TIME_WINDOW
+    )
+
+
+@dataclass(frozen=True)
+class _SecurityParameters:
+    engine_id: bytes
+    engine_boots: int
+    engine_time: int
+    priv: bytes
+    pdu: PDU = PDU(0, 0, 0, 0, ())
+
+
+def make_message_processor(version: SNMPVersion, credentials: SNMPCredentials) -> MessageProcessor:
+    match version:
+        case SNMPVersion.V1 | SNMPVersion.V2C:
+            if not isinstance(credentials, str):
+                raise TypeError()
+            return CommunityMessageProcessor(0 if version is SNMPVersion.V1 else 1, credentials)
+        case SNMPVersion.V3:
+            return _make_usm_processor(credentials)
+
+
+def _make_usm_processor(credentials: SNMPCredentials) -> USMMessageProcessor:
+    if not (isinstance(credentials, tuple) and len(credentials) in (2, 4, 6)):
+        raise MKGeneralException(
+            f"Invalid SNMP credentials '{credentials!r}': "
+            "must be string, 2-tuple, 4-tuple or 6-tuple"
+        )
+    sec_level: str = credentials[0]
+    if len(credentials) == 2 or sec_level == "noAuthNoPriv":
+        return USMMessageProcessor(
+            credentials[1] if len(credentials) == 2 else credentials[2], None, None
+        )
+
+    auth = (_auth_protocol_for(credentials[1]), credentials[3])
+    if len(credentials) == 4 or sec_level == "authNoPriv":
+        return USMMessageProcessor(credentials[2], auth, None)
+
+    return USMMessageProcessor(
+        credentials[2], auth, (_priv_protocol_for(credentials[4]), credentials[5])
+    )
+
+
+def _auth_protocol_for(name: str) -> _AuthProtocol:
+    try:
+        return _AUTH_PROTOCOLS[name]
+    except KeyError:
+        raise MKGeneralException(f"Invalid SNMP auth protocol: {name}")
+
+
+def _priv_protocol_for(name: str) -> _PrivProtocol:
+    try:
+        return _PRIV_PROTOCOLS[name]
+    except KeyError:
+        raise MKGeneralException(f"Invalid SNMP priv protocol: {name}")
@@ -4,9 +4,18 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """Helpers for the backends."""
 
-from cmk.snmplib import SNMPRawValue
+from cmk.ccc.exceptions import MKSNMPError
 
-__all__ = ["strip_snmp_value"]
+from cmk.snmplib import OID, SNMPRawValue
+
+__all__ = ["oid_to_tuple", "strip_snmp_value"]
+
+
+def oid_to_tuple(oid: OID) -> tuple[int, ...]:
+    try:
+        return tuple(map(int, oid.strip(".").split(".")))
+    except ValueError:
+        raise MKSNMPError(f"Invalid OID {oid}")
 
 
 def strip_snmp_value(value: str) -> SNMPRawValue:
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# Copyright (C) 2019 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Persistent OID index for stored snmpwalk files.
+
+The index maps the numerically sorted OIDs of a walk file to the byte
+ranges of their records. It is persisted next to the walk file and is
+invalidated whenever the size or the mtime of the walk file changes.
+
+Binary layout of the index file (all little endian)::
+
+    header:      magic (8s), walk mtime in ns (q), walk size (q), #records (I)
+    offsets:     #records * (start, end)    as unsigned 64 bit integers
+    oid lengths: #records                    as unsigned 16 bit integers
+    oids:        sum(oid lengths)            as unsigned 32 bit integers
+"""
+
+import bisect
+import logging
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Final, Self
+
+from cmk.ccc import store
+from cmk.ccc.exceptions import MKGeneralException
+
+from ._utils import oid_to_tuple
+
+__all__ = ["WalkIndex", "index_path_for"]
+
+_MAGIC: Final = b"CMKWIDX1"
+_HEADER: Final = struct.Struct("<8sqqI")
+
+
+def index_path_for(walk_path: Path) -> Path:
+    return walk_path.with_name(f".{walk_path.name}.index")
+
+
+class WalkIndex:
+    """Sorted OIDs of a walk file together with the byte ranges of their records"""
+
+    def __init__(
+        self,
+        *,
+        mtime_ns: int,
+        size: int,
+        oids: Sequence[tuple[int, ...]],
+        offsets: Sequence[int],
+    ) -> None:
+        self.mtime_ns: Final = mtime_ns
+        self.size: Final = size
+        self.oids: Final = oids
+        # start and end of record i are at offsets[2 * i] and offsets[2 * i + 1]
+        self.offsets: Final = offsets
+
+    def __len__(self) -> int:
+        return len(self.oids)
+
+    def record_range(self, index: int) -> tuple[int, int]:
+        return self.offsets[2 * index], self.offsets[2 * index + 1]
+
+    def prefix_range(self, prefix: tuple[int, ...]) -> tuple[int, int]:
+        """Return the index range of all OIDs that are equal to or below prefix"""
+        begin = bisect.bisect_left(self.oids, prefix)
+        # All OIDs below the prefix sort before the prefix with its last
+        # component incremented.
+        end = bisect.bisect_left(self.oids, prefix[:-1] + (prefix[-1] + 1,), lo=begin)
+        return begin, end
+
+    def is_valid_for(self, stat: os.stat_result) -> bool:
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+    @classmethod
+    def build(cls, data: bytes | mmap.mmap, stat: os.stat_result) -> Self:
+        records: list[tuple[tuple[int, ...], int, int]] = []
+        oid_start = -1
+        pos = 0
+        size = len(data)
+        while pos < size:
+            eol = data.find(b"\n", pos)
+            next_pos = size if eol == -1 else eol + 1
+            # Sometimes there are newlines in the data of snmpwalks.
+            # Lines not starting with an OID belong to the previous record.
+            if data[pos : pos + 1] == b".":
+                if oid_start >= 0:
+                    records.append(cls._make_record(data, oid_start, pos))
+                oid_start = pos
+            pos = next_pos
+        if oid_start >= 0:
+            records.append(cls._make_record(data, oid_start, size))
+
+        # The sort is stable, so duplicate OIDs keep the order of the file.
+        records.sort(key=lambda r: r[0])
+        offsets = array("Q")
+        for _oid, start, end in records:
+            offsets.append(start)
+            offsets.append(end)
+        return cls(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            oids=[r[0] for r in records],
+            offsets=offsets,
+        )
+
+    @staticmethod
+    def _make_record(
+        data: bytes | mmap.mmap, start: int, end: int
+    ) -> tuple[tuple[int, ...], int, int]:
+        line = data[start:end]
+        oid_end = len(line)
+        for sep in (b" ", b"\t", b"\n", b"\r"):
+            if (idx := line.find(sep)) != -1 and idx < oid_end:
+                oid_end = idx
+        return oid_to_tuple(line[:oid_end].decode()), start, end
+
+    def serialize(self) -> bytes:
+        lengths = array("H", (len(oid) for oid in self.oids))
+        components = array("I", (c for oid in self.oids for c in oid))
+        offsets = array("Q", self.offsets)
+        if offsets.itemsize != 8 or components.itemsize != 4 or lengths.itemsize != 2:
+            raise NotImplementedError("Unsupported platform for walk index")
+        return b"".join(
+            (
+                _HEADER.pack(_MAGIC, self.mtime_ns, self.size, len(self.oids)),
+                offsets.tobytes(),
+                lengths.tobytes(),
+                components.tobytes(),
+            )
+        )
+
+    @classmethod
+    def deserialize(cls, raw: bytes) -> Self:
+        magic, mtime_ns, size, count = _HEADER.unpack_from(raw)
+        if magic != _MAGIC:
+            raise ValueError("Not a walk index")
+        pos = _HEADER.size
+
+        offsets = array("Q")
+        offsets.frombytes(raw[pos : (pos := pos + 2 * count * offsets.itemsize)])
+        lengths = array("H")
+        lengths.frombytes(raw[pos : (pos := pos + count * lengths.itemsize)])
+        components = array("I")
+        components.frombytes(raw[pos:])
+        if len(offsets) != 2 * count or len(lengths) != count or len(components) != sum(lengths):
+            raise ValueError("Truncated walk index")
+
+        oids = []
+        start = 0
+        for length in lengths:
+            oids.append(tuple(components[start : start + length]))
+            start += length
+        return cls(mtime_ns=mtime_ns, size=size, oids=oids, offsets=offsets)
+
+    @classmethod
+    def load(cls, path: Path, stat: os.stat_result) -> Self | None:
+        try:
+            index = cls.deserialize(path.read_bytes())
+        except (OSError, ValueError, struct.error):
+            return None
+        return index if index.is_valid_for(stat) else None
+
+    def save(self, path: Path, logger: logging.Logger) -> None:
+        try:
+            store.save_bytes_to_file(path, self.serialize())
+        except (OSError, OverflowError, MKGeneralException, NotImplementedError) as e:
+            # The index is an optimization only. Not being able to persist it
+            # (e.g. read only walk directory) must not break the fetcher.
+            logger.debug(f"  Cannot write snmpwalk index {path}: {e}")
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# Copyright (C) 2019 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""In-process SNMP backend
+
+Talks SNMP over UDP directly instead of forking the Net-SNMP command line
+tools for every OID. All requests of one backend call go through one socket
+and an asyncio event loop, so that several columns can be walked concurrently.
+"""
+
+import asyncio
+import itertools
+import logging
+import random
+import socket
+from collections.abc import Iterable, Sequence
+from typing import Final
+
+from cmk.ccc.exceptions import MKSNMPError
+
+from cmk.utils import tty
+from cmk.utils.log import VERBOSE
+from cmk.utils.sectionname import SectionName
+
+from cmk.snmplib import (
+    OID,
+    SNMPBackend,
+    SNMPContext,
+    SNMPHostConfig,
+    SNMPRawValue,
+    SNMPRowInfo,
+    SNMPVersion,
+)
+
+from ._ber import (
+    decode_integer,
+    decode_oid,
+    EXCEPTION_TAGS,
+    PDU,
+    PDUType,
+    Tag,
+    VarBind,
+)
+from ._usm import make_message_processor, MessageProcessor, NotInTimeWindow, UnknownEngine
+from ._utils import oid_to_tuple
+
+__all__ = ["NativeSNMPBackend"]
+
+# Net-SNMP defaults
+_DEFAULT_TIMEOUT: Final = 1.0
+_DEFAULT_RETRIES: Final = 5
+
+# noSuchName, returned by SNMPv1 agents at the end of the MIB view
+_V1_NO_SUCH_NAME: Final = 2
+
+# Number of OIDs walked together in one request and the maximum number of
+# requests outstanding per device
+_MAX_VARBINDS_PER_REQUEST: Final = 10
+_MAX_IN_FLIGHT: Final = 4
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, session: "_Session") -> None:
+        self._session: Final = session
+
+    def datagram_received(self, data: bytes, addr: tuple[str | object, ...]) -> None:
+        self._session.dispatch(data)
+
+    def error_received(self, exc: Exception) -> None:
+        self._session.fail(exc)
+
+
+class _Session:
+    """One socket to one agent with any number of requests in flight"""
+
+    def __init__(
+        self,
+        processor: MessageProcessor,
+        *,
+        timeout: float,
+        retries: int,
+        max_in_flight: int,
+    ) -> None:
+        self._processor: Final = processor
+        self._timeout: Final = timeout
+        self._retries: Final = retries
+        self._request_ids: Final = itertools.count(random.randrange(1, 1 << 30))
+        self._pending: dict[int, asyncio.Future[bytes]] = {}
+        self._transport: asyncio.DatagramTransport | None = None
+        self._discovery_lock: Final = asyncio.Lock()
+        self._in_flight: Final = asyncio.Semaphore(max_in_flight)
+
+    async def open(self, address: str, port: int, family: socket.AddressFamily) -> None:
+        loop = asyncio.get_running_loop()
+        self._transport, _protocol = await loop.create_datagram_endpoint(
+            lambda: _DatagramProtocol(self), remote_addr=(address, port), family=family
+        )
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+        for future in self._pending.values():
+            future.cancel()
+
+    def dispatch(self, data: bytes) -> None:
+        try:
+            message_id = self._processor.message_id(data)
+        except MKSNMPError:
+            return  # Garbage, ignore it like Net-SNMP does
+        if (future := self._pending.get(message_id)) is not None and not future.done():
+            future.set_result(data)
+
+    def fail(self, exc: Exception) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(MKSNMPError(f"SNMP socket error: {exc}"))
+
+    async def _exchange(self, message: bytes, request_id: int) -> bytes:
+        async with self._in_flight:
+            return await self._send_and_receive(message, request_id)
+
+    async def _send_and_receive(self, message: bytes, request_id: int) -> bytes:
+        assert self._transport is not None
+        loop = asyncio.get_running_loop()
+        for _attempt in range(self._retries + 1):
+            future = self._pending[request_id] = loop.create_future()
+            self._transport.sendto(message)
+            try:
+                return await asyncio.wait_for(future, self._timeout)
+            except TimeoutError:
+                continue
+            finally:
+                del self._pending[request_id]
+        raise MKSNMPError("Timeout: No Response")
+
+    async def request(
+        self,
+        pdu_type: PDUType,
+        oids: Iterable[tuple[int, ...]],
+        *,
+        context: SNMPContext,
+        non_repeaters: int = 0,
+        max_repetitions: int = 0,
+    ) -> PDU:
+        varbinds = [VarBind(oid, Tag.NULL, b"") for oid in oids]
+        for _attempt in range(3):
+            async with self._discovery_lock:
+                if self._processor.needs_discovery():
+                    request_id = next(self._request_ids)
+                    self._processor.process_discovery(
+                        await self._exchange(
+                            self._processor.discovery_message(request_id), request_id
+                        )
+                    )
+            request_id = next(self._request_ids)
+            pdu = PDU(pdu_type, request_id, non_repeaters, max_repetitions, varbinds)
+            try:
+                return self._processor.decode(
+                    await self._exchange(self._processor.encode(pdu, context), request_id)
+                )
+            except (NotInTimeWindow, UnknownEngine):
+                # The processor has updated its view of the agent, try again.
+                continue
+        raise MKSNMPError("SNMPv3 engine discovery failed")
+
+
+def _tuple_to_oid(oid: Sequence[int]) -> OID:
+    return "." + ".".join(map(str, oid))
+
+
+def _raw_value(varbind: VarBind) -> SNMPRawValue:
+    """Convert a value to what the Net-SNMP tools print with '-OQ -Ot -On -Oe'"""
+    match varbind.tag:
+        case Tag.OCTET_STRING | Tag.OPAQUE:
+            return varbind.value
+        case Tag.INTEGER:
+            return str(decode_integer(varbind.value)).encode()
+        case Tag.COUNTER32 | Tag.GAUGE32 | Tag.TIMETICKS | Tag.COUNTER64:
+            return str(decode_integer(varbind.value, signed=False)).encode()
+        case Tag.IP_ADDRESS:
+            return ".".join(map(str, varbind.value)).encode()
+        case Tag.OBJECT_IDENTIFIER:
+            return _tuple_to_oid(decode_oid(varbind.value)).encode()
+        case _:
+            return b""
+
+
+def _is_below(oid: tuple[int, ...], base: tuple[int, ...]) -> bool:
+    return len(oid) > len(base) and oid[: len(base)] == base
+
+
+class NativeSNMPBackend(SNMPBackend):
+    def __init__(self, snmp_config: SNMPHostConfig, logger: logging.Logger) -> None:
+        super().__init__(snmp_config, logger)
+        # Keeps the discovered SNMPv3 engine and the localized keys across requests
+        self._processor: MessageProcessor | None = None
+
+    def get(self, /, oid: OID, *, context: SNMPContext) -> SNMPRawValue | None:
+        try:
+            return asyncio.run(self._get(oid, context))
+        except MKSNMPError as e:
+            self._logger.log(VERBOSE, f"{tty.red}{tty.bold}ERROR: {tty.normal}SNMP error: {e}")
+            return None
+
+    def walk(
+        self,
+        /,
+        oid: OID,
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> SNMPRowInfo:
+        return self.walk_many([oid], context=context)[0]
+
+    def walk_many(
+        self,
+        /,
+        oids: Sequence[OID],
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> Sequence[SNMPRowInfo]:
+        """Walk several OIDs concurrently over one socket
+
+        Up to _MAX_VARBINDS_PER_REQUEST OIDs are walked together with every
+        request carrying one varbind per OID, and at most _MAX_IN_FLIGHT
+        requests are outstanding at any time.
+        """
+        try:
+            return asyncio.run(self._walk_many(oids, context))
+        except MKSNMPError as e:
+            raise MKSNMPError(f"SNMP Error on {self.config.ipaddress}: {e}") from e
+
+    async def _open_session(self) -> _Session:
+        if self._processor is None:
+            self._processor = make_message_processor(
+                self.config.snmp_version, self.config.credentials
+            )
+        settings = self.config.timing
+        session = _Session(
+            self._processor,
+            timeout=float(settings.get("timeout", _DEFAULT_TIMEOUT)),
+            retries=int(settings.get("retries", _DEFAULT_RETRIES)),
+            max_in_flight=_MAX_IN_FLIGHT,
+        )
+        await session.open(
+            self.config.ipaddress or "0.0.0.0",
+            self.config.port,
+            socket.AF_INET6 if self.config.is_ipv6_primary else socket.AF_INET,
+        )
+        return session
+
+    async def _get(self, oid: OID, context: SNMPContext) -> SNMPRawValue | None:
+        self._logger.debug(f"Native SNMP: get {oid}")
+        session = await self._open_session()
+        try:
+            if oid.endswith(".*"):
+                base = oid_to_tuple(oid[:-2])
+                pdu = await session.request(PDUType.GET_NEXT, [base], context=context)
+            else:
+                base = oid_to_tuple(oid)
+                pdu = await session.request(PDUType.GET, [base], context=context)
+        finally:
+            session.close()
+
+        if pdu.error_status or not pdu.varbinds:
+            return None
+        varbind = pdu.varbinds[0]
+        if varbind.tag in EXCEPTION_TAGS:
+            return None
+        # In case of .*, check if prefix is the one we are looking for
+        if oid.endswith(".*") and not _is_below(varbind.oid, base):
+            return None
+        value = _raw_value(varbind)
+        self._logger.debug(f"SNMP answer: ==> [{value!r}]")
+        return value
+
+    async def _walk_many(self, oids: Sequence[OID], context: SNMPContext) -> list[SNMPRowInfo]:
+        self._logger.debug(f"Native SNMP: walk {', '.join(oids)}")
+        session = await self._open_session()
+        try:
+            groups = await asyncio.gather(
+                *(
+                    self._walk_columns(
+                        session, oids[idx : idx + _MAX_VARBINDS_PER_REQUEST], context
+                    )
+                    for idx in range(0, len(oids), _MAX_VARBINDS_PER_REQUEST)
+                )
+            )
+        finally:
+            session.close()
+        return [rowinfo for group in groups for rowinfo in group]
+
+    async def _walk_columns(
+        self, session: _Session, oids: Sequence[OID], context: SNMPContext
+    ) -> list[SNMPRowInfo]:
+        bases = [oid_to_tuple(oid) for oid in oids]
+        rowinfos: list[SNMPRowInfo] = [[] for _oid in oids]
+        seen: list[set[tuple[int, ...]]] = [set() for _oid in oids]
+        current = list(bases)
+        # Indices of the columns still being walked, in the order of the request varbinds
+        active = list(range(len(oids)))
+        while active:
+            if self.config.use_bulkwalk:
+                pdu = await session.request(
+                    PDUType.GET_BULK,
+                    [current[column] for column in active],
+                    context=context,
+                    max_repetitions=self.config.bulk_walk_size_of,
+                )
+            else:
+                pdu = await session.request(
+                    PDUType.GET_NEXT, [current[column] for column in active], context=context
+                )
+
+            if pdu.error_status:
+                if self.config.snmp_version is SNMPVersion.V1 and (
+                    pdu.error_status == _V1_NO_SUCH_NAME
+                ):
+                    # The error index tells us which column has reached the end of
+                    # the MIB view, the request has to be repeated for the others.
+                    if not 0 < pdu.error_index <= len(active):
+                        break
+                    del active[pdu.error_index - 1]
+                    continue
+                raise MKSNMPError(f"Error in packet: error status {pdu.error_status}")
+
+            if not pdu.varbinds:
+                break
+
+            finished: set[int] = set()
+            # The varbinds of a GETBULK response are interleaved: one per column
+            # for every repetition.
+            for position, varbind in enumerate(pdu.varbinds):
+                column = active[position % len(active)]
+                if column in finished:
+                    continue
+                # Stop at the end of the subtree, the end of the MIB view or if the
+                # agent starts repeating itself.
+                if (
+                    varbind.tag == Tag.END_OF_MIB_VIEW
+                    or not _is_below(varbind.oid, bases[column])
+                    or varbind.oid in seen[column]
+                ):
+                    finished.add(column)
+                    continue
+                seen[column].add(varbind.oid)
+                current[column] = varbind.oid
+                if varbind.tag not in EXCEPTION_TAGS:
+                    rowinfos[column].append((_tuple_to_oid(varbind.oid), _raw_value(varbind)))
+            active = [column for column in active if column not in finished]
+
+        # Like snmpwalk: if the subtree is empty, the OID may be a scalar.
+        await asyncio.gather(
+            *(
+                self._get_scalar(session, base, rowinfo, context)
+                for base, rowinfo in zip(bases, rowinfos)
+                if not rowinfo
+            )
+        )
+        return rowinfos
+
+    async def _get_scalar(
+        self,
+        session: _Session,
+        oid: tuple[int, ...],
+        rowinfo: SNMPRowInfo,
+        context: SNMPContext,
+    ) -> None:
+        pdu = await session.request(PDUType.GET, [oid], context=context)
+        if not pdu.error_status and pdu.varbinds:
+            varbind = pdu.varbinds[0]
+            if varbind.tag not in EXCEPTION_TAGS:
+                rowinfo.append((_tuple_to_oid(varbind.oid), _raw_value(varbind)))
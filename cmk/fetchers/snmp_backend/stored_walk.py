@@ -5,17 +5,19 @@
 """Abstract classes and types."""
 
 import logging
-from collections.abc import Sequence
+import mmap
+import os
 from pathlib import Path
 from typing import Final
 
-from cmk.ccc.exceptions import MKException, MKGeneralException, MKSNMPError
+from cmk.ccc.exceptions import MKSNMPError
 
 from cmk.utils.sectionname import SectionName
 
 from cmk.snmplib import OID, SNMPBackend, SNMPContext, SNMPHostConfig, SNMPRawValue, SNMPRowInfo
 
-from ._utils import strip_snmp_value
+from ._utils import oid_to_tuple, strip_snmp_value
+from ._walk_index import index_path_for, WalkIndex
 
 __all__ = ["StoredWalkSNMPBackend"]
 
@@ -26,6 +28,7 @@ class StoredWalkSNMPBackend(SNMPBackend):
         self.path: Final = path
         if not self.path.exists():
             raise MKSNMPError(f"No snmpwalk file {self.path}")
+        self._indexed_walk: tuple[mmap.mmap | bytes, WalkIndex] | None = None
 
     def get(self, /, oid: OID, *, context: SNMPContext) -> SNMPRawValue | None:
         walk = self.walk(oid, context=context)
@@ -57,100 +60,45 @@ class StoredWalkSNMPBackend(SNMPBackend):
             dot_star = False
 
         self._logger.debug(f"  Loading {oid}")
-        lines = self.read_walk_data()
-
-        begin = 0
-        end = len(lines)
-        hit = None
-        while end - begin > 0:
-            current = (begin + end) // 2
-            parts = lines[current].split(None, 1)
-            comp = parts[0]
-            hit = StoredWalkSNMPBackend._compare_oids(oid_prefix, comp)
-            if hit == 0:
-                break
-            if hit == 1:  # we are too low
-                begin = current + 1
-            else:
-                end = current
-
-        if hit != 0:
-            return []  # not found
-
-        rowinfo = StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current, -1)
-        rowinfo.reverse()
-        rowinfo += StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current + 1, 1)
+        data, index = self._get_indexed_walk()
 
+        prefix = oid_to_tuple(oid_prefix)
+        begin, end = index.prefix_range(prefix)
         if dot_star:
-            return [rowinfo[0]]
+            # Only OIDs strictly below the prefix count, not the prefix itself.
+            while begin < end and index.oids[begin] == prefix:
+                begin += 1
+            end = min(end, begin + 1)
 
-        return rowinfo
+        return [self._read_record(data, *index.record_range(i)) for i in range(begin, end)]
+
+    def _get_indexed_walk(self) -> tuple[mmap.mmap | bytes, WalkIndex]:
+        """Map the walk file and get its (possibly persisted) index
+
+        Both are computed at most once per backend instance, i.e. per host fetch.
+        """
+        if self._indexed_walk is not None:
+            return self._indexed_walk
 
-    @staticmethod
-    def read_walk_from_path(path: Path, logger: logging.Logger) -> Sequence[str]:
-        logger.debug(f"  Opening {path}")
-        lines = []
-        with path.open() as f:
-            # Sometimes there are newlines in the data of snmpwalks.
-            # Append the data to the last OID rather than throwing it away/skipping it.
-            for line in f.readlines():
-                if line.startswith("."):
-                    lines.append(line)
-                elif lines:
-                    lines[-1] += line
-        return lines
-
-    def read_walk_data(self) -> Sequence[str]:
         try:
-            return self.read_walk_from_path(self.path, self._logger)
+            with self.path.open("rb") as f:
+                stat = os.fstat(f.fileno())
+                # mmap refuses to map empty files
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
         except OSError:
             raise MKSNMPError(f"No snmpwalk file {self.path}")
 
-    @staticmethod
-    def _compare_oids(a: OID, b: OID) -> int:
-        aa = StoredWalkSNMPBackend._to_bin_string(a)
-        bb = StoredWalkSNMPBackend._to_bin_string(b)
-        if len(aa) <= len(bb) and bb[: len(aa)] == aa:
-            result = 0
-        else:
-            result = (aa > bb) - (aa < bb)
-        return result
+        index_path = index_path_for(self.path)
+        if (index := WalkIndex.load(index_path, stat)) is None:
+            self._logger.debug(f"  Indexing {self.path}")
+            index = WalkIndex.build(data, stat)
+            index.save(index_path, self._logger)
 
-    @staticmethod
-    def _to_bin_string(oid: OID) -> tuple[int, ...]:
-        try:
-            return tuple(map(int, oid.strip(".").split(".")))
-        except MKException:
-            raise
-        except Exception:
-            raise MKGeneralException(f"Invalid OID {oid}")
+        self._indexed_walk = data, index
+        return self._indexed_walk
 
     @staticmethod
-    def _collect_until(
-        oid: OID, oid_prefix: OID, lines: Sequence[str], index: int, direction: int
-    ) -> SNMPRowInfo:
-        rows = []
-        # Handle case, where we run after the end of the lines list
-        if index >= len(lines):
-            if direction > 0:
-                return []
-            index -= 1
-        while True:
-            line = lines[index]
-            parts = line.split(None, 1)
-            o = parts[0]
-            if o.startswith("."):
-                o = o[1:]
-            if o == oid or o.startswith(oid_prefix + "."):
-                if len(parts) > 1:
-                    value = parts[1]
-                else:
-                    value = ""
-                # Fix for missing starting oids
-                rows.append(("." + o, strip_snmp_value(value)))
-                index += direction
-                if index < 0 or index >= len(lines):
-                    break
-            else:
-                break
-        return rows
+    def _read_record(data: mmap.mmap | bytes, start: int, end: int) -> tuple[OID, SNMPRawValue]:
+        parts = data[start:end].decode().split(None, 1)
+        # Fix for missing starting oids
+        return "." + parts[0].lstrip("."), strip_snmp_value(parts[1] if len(parts) > 1 else "")
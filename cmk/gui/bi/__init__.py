@@ -16,11 +16,17 @@ from ._packs import get_cached_bi_packs as get_cached_bi_packs
 from ._valuespecs import (
     bi_config_aggregation_function_registry as bi_config_aggregation_function_registry,
 )
-from .bi_manager import all_sites_with_id_and_online, bi_livestatus_query, BIManager
+from .bi_manager import (
+    all_sites_with_id_and_online,
+    bi_livestatus_query,
+    BIManager,
+    computation_cache_statistics,
+)
 from .foldable_tree_renderer import FoldableTreeRendererTree
 
 __all__ = [
     "BIManager",
+    "computation_cache_statistics",
     "FoldableTreeRendererTree",
     "is_part_of_aggregation",
     "get_aggregation_group_trees",
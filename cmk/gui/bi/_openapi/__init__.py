@@ -19,7 +19,7 @@ from collections.abc import Mapping
 from typing import Any
 
 from cmk.gui import fields as gui_fields
-from cmk.gui.bi import BIManager, get_cached_bi_packs
+from cmk.gui.bi import BIManager, computation_cache_statistics, get_cached_bi_packs
 from cmk.gui.http import Response
 from cmk.gui.logged_in import user
 from cmk.gui.openapi.restful_objects import constructors, Endpoint, response_schemas
@@ -264,6 +264,14 @@ class BIAggregationStateResponseSchema(Schema):
     missing_aggr = fields.List(
         fields.String(), description="the missing aggregations", example=["Host heute"]
     )
+    computation_cache = fields.Dict(
+        description=(
+            "The counters of the cache of computed aggregation branches of the answering"
+            " process: branches taken from the cache (hits), branches computed at least"
+            " partially (misses) and subtrees of computed branches taken from the cache"
+        ),
+        example={"hits": 3950, "misses": 50, "reused_subtrees": 120},
+    )
 
 
 @Endpoint(
@@ -391,6 +399,7 @@ def _aggregation_state(
         "aggregations": aggregations,
         "missing_sites": list(required_sites - have_sites),
         "missing_aggr": missing_aggregations,
+        "computation_cache": computation_cache_statistics(),
     }
     return response
 
@@ -19,11 +19,14 @@ from cmk.gui.i18n import _
 
 from cmk.bi.aggregation import BIAggregation
 from cmk.bi.compiler import BICompiler, path_compiled_aggregations
-from cmk.bi.computer import BIComputer
+from cmk.bi.computer import BIComputationCache, BIComputer
 from cmk.bi.data_fetcher import BIStatusFetcher
 from cmk.bi.lib import SitesCallback
 from cmk.bi.trees import BICompiledAggregation, BICompiledRule
 
+# Kept for the lifetime of the GUI process, unlike the BIManager
+_computation_cache = BIComputationCache()
+
 
 class BIManager:
     def __init__(self) -> None:
@@ -31,13 +34,21 @@ class BIManager:
         self.compiler = BICompiler(self.bi_configuration_file(), sites_callback)
         self.compiler.load_compiled_aggregations()
         self.status_fetcher = BIStatusFetcher(sites_callback)
-        self.computer = BIComputer(self.compiler.compiled_aggregations, self.status_fetcher)
+        _computation_cache.invalidate_on_change(self.compiler.compilation_generation())
+        self.computer = BIComputer(
+            self.compiler.compiled_aggregations, self.status_fetcher, _computation_cache
+        )
 
     @classmethod
     def bi_configuration_file(cls) -> str:
         return str(Path(default_config_dir) / "multisite.d" / "wato" / "bi_config.bi")
 
 
+def computation_cache_statistics() -> dict[str, int]:
+    """The hits and misses of the BI computation cache of this GUI process"""
+    return _computation_cache.statistics()
+
+
 def all_sites_with_id_and_online() -> list[tuple[SiteId, bool]]:
     return [
         (site_id, site_status["state"] == "online")
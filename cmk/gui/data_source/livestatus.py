@@ -6,7 +6,7 @@
 from __future__ import annotations
 
 import functools
-from collections.abc import Callable, Sequence
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from typing import cast
 
 from livestatus import LivestatusColumn, LivestatusRow, OnlySites, Query, QuerySpecification
@@ -100,31 +100,42 @@ class RowTableLivestatus(RowTable):
         all_active_filters: Momentarily unused
         """
         columns, dynamic_columns = self._prepare_columns(datasource, cells, columns)
-        data = query_livestatus(
-            self.create_livestatus_query(columns, headers + datasource.add_headers),
-            only_sites,
-            limit,
-            datasource.auth_domain,
-        )
-
+        query = self.create_livestatus_query(columns, headers + datasource.add_headers)
+        data: Iterable[LivestatusRow]
         if merge_column := datasource.merge_by:
-            data = _merge_data(data, columns, merge_column)
+            data = _merge_data(
+                query_livestatus(query, only_sites, limit, datasource.auth_domain),
+                columns,
+                merge_column,
+            )
+        else:
+            # The rows are converted while they are received, large responses are never
+            # held in memory twice.
+            data = iter_livestatus(query, only_sites, limit, datasource.auth_domain)
 
         # convert lists-rows into dictionaries.
         # performance, but makes live much easier later.
         columns = ["site"] + columns + datasource.add_columns
-        rows: Rows = datasource.post_process([dict(zip(columns, row)) for row in data])
+        data_rows = [dict(zip(columns, row)) for row in data]
+        rows: Rows = datasource.post_process(data_rows)
 
         for index, cell in enumerate(cells):
             painter = cell.painter()
             painter.derive(rows, cell, dynamic_columns.get(index, []))
 
-        return rows, len(data)
+        return rows, len(data_rows)
 
 
 def query_livestatus(
     query: Query, only_sites: OnlySites, limit: int | None, auth_domain: str
 ) -> list[LivestatusRow]:
+    return list(iter_livestatus(query, only_sites, limit, auth_domain))
+
+
+def iter_livestatus(
+    query: Query, only_sites: OnlySites, limit: int | None, auth_domain: str
+) -> Iterator[LivestatusRow]:
+    """Like query_livestatus(), but yields the rows while they are received"""
     if all(
         (
             active_config.debug_livestatus_queries,
@@ -137,12 +148,11 @@ def query_livestatus(
         html.close_div()
 
     sites.live().set_auth_domain(auth_domain)
-    with sites.only_sites(only_sites), sites.prepend_site(), sites.set_limit(limit):
-        data = sites.live().query(query)
-
-    sites.live().set_auth_domain("read")
-
-    return data
+    try:
+        with sites.only_sites(only_sites), sites.prepend_site(), sites.set_limit(limit):
+            yield from sites.live().query_iter(query)
+    finally:
+        sites.live().set_auth_domain("read")
 
 
 def _merge_data(
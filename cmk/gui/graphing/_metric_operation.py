@@ -13,6 +13,7 @@ from dataclasses import dataclass
 from itertools import chain
 from typing import Annotated, assert_never, final, Literal, TypeVar
 
+import numpy as np
 from pydantic import BaseModel, computed_field, PlainValidator, SerializeAsAny
 
 from livestatus import SiteId
@@ -25,7 +26,7 @@ from cmk.utils.metrics import MetricName
 from cmk.utils.servicename import ServiceName
 
 from cmk.gui.i18n import _
-from cmk.gui.time_series import TimeSeries, TimeSeriesValues
+from cmk.gui.time_series import TimeSeries, TimeSeriesArray, TimeSeriesValues
 from cmk.gui.utils import escaping
 
 GraphConsolidationFunction = Literal["max", "min", "average"]
@@ -154,6 +155,68 @@ def time_series_operators() -> (
     }
 
 
+def _array_operator_sum(stacked: TimeSeriesArray) -> TimeSeriesArray:
+    return np.where(np.isnan(stacked).all(axis=0), np.nan, np.nansum(stacked, axis=0))
+
+
+def _array_operator_product(stacked: TimeSeriesArray) -> TimeSeriesArray:
+    return np.prod(stacked, axis=0)
+
+
+def _array_operator_difference(stacked: TimeSeriesArray) -> TimeSeriesArray:
+    return stacked[0] - stacked[1]
+
+
+def _array_operator_fraction(stacked: TimeSeriesArray) -> TimeSeriesArray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(stacked[1] == 0, np.nan, stacked[0] / stacked[1])
+
+
+def _array_operator_maximum(stacked: TimeSeriesArray) -> TimeSeriesArray:
+    return np.fmax.reduce(stacked, axis=0)
+
+
+def _array_operator_minimum(stacked: TimeSeriesArray) -> TimeSeriesArray:
+    return np.fmin.reduce(stacked, axis=0)
+
+
+def _array_operator_average(stacked: TimeSeriesArray) -> TimeSeriesArray:
+    valid = ~np.isnan(stacked)
+    counts = np.count_nonzero(valid, axis=0)
+    sums = np.where(valid, stacked, 0.0).sum(axis=0)
+    return np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+
+
+def _array_operator_merge(stacked: TimeSeriesArray) -> TimeSeriesArray:
+    first_valid = np.argmax(~np.isnan(stacked), axis=0)
+    return stacked[first_valid, np.arange(stacked.shape[1])]
+
+
+# The operators of time_series_operators() for all points of the time series at
+# once: they get the values stacked into rows and give NaN where the point-wise
+# operator gives None.
+_ARRAY_OPERATORS: Mapping[Operators, Callable[[TimeSeriesArray], TimeSeriesArray]] = {
+    "+": _array_operator_sum,
+    "*": _array_operator_product,
+    "-": _array_operator_difference,
+    "/": _array_operator_fraction,
+    "MAX": _array_operator_maximum,
+    "MIN": _array_operator_minimum,
+    "AVERAGE": _array_operator_average,
+    "MERGE": _array_operator_merge,
+}
+
+
+def apply_time_series_operator(
+    operator_id: Operators, operands: Sequence[TimeSeries]
+) -> TimeSeriesArray:
+    """The values of the operator applied point by point, up to the shortest operand"""
+    num_points = min(len(operand) for operand in operands)
+    return _ARRAY_OPERATORS[operator_id](
+        np.vstack([operand.array[:num_points] for operand in operands])
+    )
+
+
 @dataclass(frozen=True)
 class TranslationKey:
     host_name: HostName
@@ -265,11 +328,9 @@ def _time_series_math(
         # Silently return so to get an empty graph slot
         return None
 
-    _op_title, op_func = operators[operator_id]
-    twindow = operands_evaluated[0].twindow
-
     return TimeSeries(
-        [op_func_wrapper(op_func, list(tsp)) for tsp in zip(*operands_evaluated)], twindow
+        apply_time_series_operator(operator_id, operands_evaluated),
+        operands_evaluated[0].twindow,
     )
 
 
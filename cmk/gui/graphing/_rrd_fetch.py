@@ -5,13 +5,13 @@
 """Core for getting the actual raw data points via Livestatus from RRD"""
 
 import collections
-import contextlib
+import threading
 import time
-from collections.abc import Callable, Iterable, Iterator, Mapping
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from functools import lru_cache
+from typing import Final
 
-import livestatus
-from livestatus import livestatus_lql, SiteId
+from livestatus import lq_logic, lqencode, SiteId
 
 import cmk.ccc.version as cmk_version
 from cmk.ccc.exceptions import MKGeneralException
@@ -20,6 +20,7 @@ from cmk.ccc.version import parse_check_mk_version
 from cmk.utils.hostaddress import HostName
 from cmk.utils.metrics import MetricName
 from cmk.utils.servicename import ServiceName
+from cmk.utils.user import UserId
 
 from cmk.gui import sites
 from cmk.gui.i18n import _
@@ -35,11 +36,10 @@ from ._legacy import (
     LegacyUnitSpecification,
 )
 from ._metric_operation import (
+    apply_time_series_operator,
     GraphConsolidationFunction,
-    op_func_wrapper,
     RRDData,
     RRDDataKey,
-    time_series_operators,
 )
 from ._metrics import get_metric_spec
 from ._translated_metrics import find_matching_translation, TranslationSpec
@@ -61,29 +61,27 @@ def fetch_rrd_data_for_graph(
         if isinstance(key, RRDDataKey)
     )
     rrd_data: dict[RRDDataKey, TimeSeries] = {}
-    for (site, host_name, service_description), metrics in by_service.items():
-        with contextlib.suppress(livestatus.MKLivestatusNotFoundError):
-            for (metric_name, consolidation_function, scale), data in _fetch_rrd_data(
+    for (
+        (site, host_name, service_description),
+        (metric_name, consolidation_function, scale),
+    ), data in _fetch_rrd_data(
+        by_service,
+        graph_recipe.consolidation_function,
+        graph_data_range,
+    ).items():
+        rrd_data[
+            RRDDataKey(
                 site,
                 host_name,
                 service_description,
-                metrics,
-                graph_recipe.consolidation_function,
-                graph_data_range,
-            ):
-                rrd_data[
-                    RRDDataKey(
-                        site,
-                        host_name,
-                        service_description,
-                        metric_name,
-                        consolidation_function,
-                        scale,
-                    )
-                ] = TimeSeries(
-                    data,
-                    conversion=conversion,
-                )
+                metric_name,
+                consolidation_function,
+                scale,
+            )
+        ] = TimeSeries(
+            data,
+            conversion=conversion,
+        )
     _align_and_resample_rrds(rrd_data, graph_recipe.consolidation_function)
     _chop_last_empty_step(graph_data_range, rrd_data)
 
@@ -148,21 +146,24 @@ def _chop_last_empty_step(graph_data_range: GraphDataRange, rrd_data: RRDData) -
 
 def _chop_end_of_the_curve(rrd_data: RRDData, step: int) -> None:
     for data in rrd_data.values():
-        del data.values[-1]
+        data.array = data.array[:-1]
         data.end -= step
 
 
 MetricProperties = tuple[str, GraphConsolidationFunction | None, float]
+_ServiceKey = tuple[SiteId, HostName, ServiceName]
+# The Livestatus auth user, the service and the RRD column
+_RRDDataCacheKey = tuple[UserId | None, SiteId, HostName, ServiceName, ColumnName]
 
 
 def _group_needed_rrd_data_by_service(
     rrd_data_keys: Iterable[RRDDataKey],
 ) -> dict[
-    tuple[SiteId, HostName, ServiceName],
+    _ServiceKey,
     set[MetricProperties],
 ]:
     by_service: dict[
-        tuple[SiteId, HostName, ServiceName],
+        _ServiceKey,
         set[MetricProperties],
     ] = collections.defaultdict(set)
     for key in rrd_data_keys:
@@ -172,14 +173,48 @@ def _group_needed_rrd_data_by_service(
     return by_service
 
 
+class _RRDDataCache:
+    """The RRD data fetched recently by the process
+
+    Graphs shown together, e.g. on dashboards or in reports, often need the same data.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl: Final = ttl
+        self._lock: Final = threading.Lock()
+        self._entries: dict[_RRDDataCacheKey, tuple[float, TimeSeriesValues]] = {}
+
+    def get(self, key: _RRDDataCacheKey) -> TimeSeriesValues | None:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def update(self, data: Mapping[_RRDDataCacheKey, TimeSeriesValues]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries = {key: entry for key, entry in self._entries.items() if entry[0] >= now}
+            self._entries.update((key, (now + self._ttl, values)) for key, values in data.items())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_rrd_data_cache = _RRDDataCache(ttl=10)
+
+
 def _fetch_rrd_data(
-    site: SiteId,
-    host_name: HostName,
-    service_description: ServiceName,
-    metrics: set[MetricProperties],
+    by_service: Mapping[_ServiceKey, set[MetricProperties]],
     consolidation_function: GraphConsolidationFunction | None,
     graph_data_range: GraphDataRange,
-) -> list[tuple[MetricProperties, TimeSeriesValues]]:
+) -> dict[tuple[_ServiceKey, MetricProperties], TimeSeriesValues]:
+    """Fetch the RRD data of all services with as few Livestatus queries as possible
+
+    The services needing the same columns are fetched by one query, all queries are sent
+    to all of the sites at once.
+    """
     start_time, end_time = graph_data_range.time_range
 
     step = graph_data_range.step
@@ -188,11 +223,89 @@ def _fetch_rrd_data(
         step = max(1, step)
 
     point_range = ":".join(map(str, (start_time, end_time, step)))
-    lql_columns = list(rrd_columns(metrics, consolidation_function, point_range))
-    query = livestatus_lql([host_name], lql_columns, service_description)
+    auth_user = sites.live_auth_user()
 
-    with sites.only_sites(site):
-        return list(zip(metrics, sites.live().query_row(query)))
+    rrd_data: dict[tuple[_ServiceKey, MetricProperties], TimeSeriesValues] = {}
+    columns_by_service: dict[_ServiceKey, list[tuple[MetricProperties, ColumnName]]] = {}
+    to_fetch: dict[tuple[bool, tuple[ColumnName, ...]], list[_ServiceKey]] = (
+        collections.defaultdict(list)
+    )
+    for service, metrics in by_service.items():
+        service_columns = list(
+            zip(metrics, rrd_columns(metrics, consolidation_function, point_range))
+        )
+        cached = [
+            (properties, _rrd_data_cache.get((auth_user, *service, column)))
+            for properties, column in service_columns
+        ]
+        if all(data is not None for _p, data in cached):
+            rrd_data.update(
+                ((service, properties), data) for properties, data in cached if data is not None
+            )
+            continue
+        columns_by_service[service] = service_columns
+        to_fetch[
+            (service[2] == "_HOST_", tuple(sorted({column for _p, column in service_columns})))
+        ].append(service)
+
+    if not to_fetch:
+        return rrd_data
+
+    with sites.only_sites(sorted({site for site, _h, _s in columns_by_service})):
+        with sites.prepend_site():
+            responses = sites.live().query_many(
+                [
+                    _rrd_data_query(columns, services, host_data=host_data)
+                    for (host_data, columns), services in to_fetch.items()
+                ],
+                "ColumnHeaders: off\n",
+            )
+
+    fetched: dict[_RRDDataCacheKey, TimeSeriesValues] = {}
+    for ((host_data, columns), services), response in zip(to_fetch.items(), responses):
+        needed = set(services)
+        for row in response:
+            if host_data:
+                site, host_name, *values = row
+                service = (SiteId(site), HostName(host_name), ServiceName("_HOST_"))
+            else:
+                site, host_name, service_description, *values = row
+                service = (SiteId(site), HostName(host_name), ServiceName(service_description))
+            if service not in needed:
+                # Hosts and services of the same names on the other sites
+                continue
+            data_by_column = dict(zip(columns, values))
+            fetched.update(
+                ((auth_user, *service, column), data) for column, data in data_by_column.items()
+            )
+            rrd_data.update(
+                ((service, properties), data_by_column[column])
+                for properties, column in columns_by_service[service]
+            )
+
+    _rrd_data_cache.update(fetched)
+    return rrd_data
+
+
+def _rrd_data_query(
+    columns: Sequence[ColumnName], services: Sequence[_ServiceKey], *, host_data: bool
+) -> str:
+    if host_data:
+        return (
+            f"GET hosts\nColumns: host_name {' '.join(columns)}\n"
+            f"{lq_logic('Filter: host_name =', sorted({h for _s, h, _d in services}), 'Or')}"
+        )
+    filters = [
+        f"Filter: host_name = {lqencode(host_name)}\n"
+        f"Filter: service_description = {lqencode(service_description)}\n"
+        for _site, host_name, service_description in sorted(set(services))
+    ]
+    if len(filters) > 1:
+        filters = [f"{f}And: 2\n" for f in filters] + [f"Or: {len(filters)}\n"]
+    return (
+        f"GET services\nColumns: host_name service_description {' '.join(columns)}\n"
+        f"{''.join(filters)}"
+    )
 
 
 def rrd_columns(
@@ -303,11 +416,8 @@ def translate_and_merge_rrd_columns(
     if not relevant_ts:
         return TimeSeries([0, 0, 0])
 
-    _op_title, op_func = time_series_operators()["MERGE"]
-    single_value_series = [op_func_wrapper(op_func, list(tsp)) for tsp in zip(*relevant_ts)]
-
     return TimeSeries(
-        single_value_series,
+        apply_time_series_operator("MERGE", relevant_ts),
         time_window=relevant_ts[0].twindow,
         conversion=get_conversion_function(get_metric_spec(metric_name).unit_spec),
     )
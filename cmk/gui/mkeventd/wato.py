@@ -249,6 +249,7 @@ def register(
     config_var_registry.register(ConfigVariableEventConsoleHistoryLifetime)
     config_var_registry.register(ConfigVariableEventConsoleSocketQueueLength)
     config_var_registry.register(ConfigVariableEventConsoleEventSocketQueueLength)
+    config_var_registry.register(ConfigVariableEventConsoleEventProcessingWorkers)
     config_var_registry.register(ConfigVariableEventConsoleTranslateSNMPTraps)
     config_var_registry.register(ConfigVariableEventConsoleSNMPCredentials)
     config_var_registry.register(ConfigVariableEventConsoleDebugRules)
@@ -4617,6 +4618,32 @@ class ConfigVariableEventConsoleEventSocketQueueLength(ConfigVariable):
         )
 
 
+class ConfigVariableEventConsoleEventProcessingWorkers(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupEventConsoleGeneric
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainEventConsole
+
+    def ident(self) -> str:
+        return "event_processing_workers"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Worker processes for parsing and rule matching"),
+            help=_(
+                "With a high rate of incoming syslog messages, the Event Console can parse "
+                "the messages and match them against the rules in several processes. "
+                "Counting, cancelling and the event limits are still applied in the order "
+                "the messages arrived. With 0, all messages are processed in the Event "
+                "Console process itself. While debugging the rules is enabled, the worker "
+                "processes are not used."
+            ),
+            minvalue=0,
+            unit=_("processes"),
+        )
+
+
 class ConfigVariableEventConsoleTranslateSNMPTraps(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupEventConsoleSNMP
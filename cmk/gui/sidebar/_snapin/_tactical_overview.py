@@ -260,26 +260,22 @@ class TacticalOverviewSnapin(CustomizableSidebarSnapin):
         html.close_table()
 
     def _get_rows(self) -> list[OverviewRow]:
-        rows = []
-        for row_config in self.parameters()["rows"]:
-            what, context = row_config["query"]
-
-            if what == "events" and not user.may("mkeventd.see_in_tactical_overview"):
-                continue
-
-            stats = self._get_stats(what, context)
-
-            rows.append(
-                OverviewRow(
-                    what=what,
-                    title=row_config["title"],
-                    context=context,
-                    stats=stats,
-                    views=self._row_views(what),
-                )
+        row_configs = [
+            row_config
+            for row_config in self.parameters()["rows"]
+            if row_config["query"][0] != "events" or user.may("mkeventd.see_in_tactical_overview")
+        ]
+        all_stats = self._get_stats([row_config["query"] for row_config in row_configs])
+        return [
+            OverviewRow(
+                what=row_config["query"][0],
+                title=row_config["title"],
+                context=row_config["query"][1],
+                stats=stats,
+                views=self._row_views(row_config["query"][0]),
             )
-
-        return rows
+            for row_config, stats in zip(row_configs, all_stats)
+        ]
 
     def _row_views(self, what: Literal["hosts", "services", "events"]) -> ViewURLParams:
         if what == "hosts":
@@ -342,10 +338,37 @@ class TacticalOverviewSnapin(CustomizableSidebarSnapin):
         raise NotImplementedError()
 
     def _get_stats(
+        self, row_queries: Sequence[tuple[Literal["hosts", "services", "events"], VisualContext]]
+    ) -> list[Sequence[int] | None]:
+        """Query the stats of all rows, the ones with the same auth domain and sites at once"""
+        groups: dict[
+            tuple[str, tuple[livestatus.SiteId, ...]],
+            list[tuple[int, str | livestatus.Query, Sequence[int] | None]],
+        ] = {}
+        for index, (what, context) in enumerate(row_queries):
+            query, only_sites = self._get_stats_query(what, context)
+            groups.setdefault(
+                ("ec" if what == "events" else "read", tuple(only_sites or ())), []
+            ).append((index, query, [0, 0, 0] if what == "events" else None))
+
+        all_stats: list[Sequence[int] | None] = [None] * len(row_queries)
+        for (auth_domain, site_ids), group in groups.items():
+            for (index, _query, deflt), stats in zip(
+                group,
+                self._execute_stats_queries(
+                    [query for _index, query, _deflt in group],
+                    auth_domain=auth_domain,
+                    only_sites=list(site_ids),
+                ),
+            ):
+                all_stats[index] = stats or deflt
+        return all_stats
+
+    def _get_stats_query(
         self,
         what: Literal["hosts", "services", "events"],
         context: VisualContext,
-    ) -> Sequence[int] | None:
+    ) -> tuple[str | livestatus.Query, list[livestatus.SiteId] | None]:
         query: str | livestatus.Query
         if what == "hosts":
             context_filters, only_sites = visuals.get_filter_headers(
@@ -370,12 +393,7 @@ class TacticalOverviewSnapin(CustomizableSidebarSnapin):
         else:
             raise NotImplementedError()
 
-        return self._execute_stats_query(
-            query,
-            auth_domain="ec" if what == "events" else "read",
-            only_sites=only_sites,
-            deflt=[0, 0, 0] if what == "events" else None,
-        )
+        return query, only_sites
 
     def _get_host_stats_query(self, context_filters: str) -> str:
         return (
@@ -459,24 +477,23 @@ class TacticalOverviewSnapin(CustomizableSidebarSnapin):
             ),
         )
 
-    def _execute_stats_query(
+    def _execute_stats_queries(
         self,
-        query: str | livestatus.Query,
+        queries: Sequence[str | livestatus.Query],
         auth_domain: str = "read",
         only_sites: list[livestatus.SiteId] | None = None,
-        deflt: Sequence[int] | None = None,
-    ) -> Sequence[int] | None:
+    ) -> list[Sequence[int] | None]:
+        """The stats summed up over the sites, None for queries without result"""
         try:
             sites.live().set_auth_domain(auth_domain)
             if only_sites:
                 sites.live().set_only_sites(only_sites)
 
-            return sites.live().query_summed_stats(query)
-        except livestatus.MKLivestatusNotFoundError:
-            return deflt
+            responses = sites.live().query_many(queries)
         finally:
             sites.live().set_only_sites(None)
             sites.live().set_auth_domain("read")
+        return [[sum(column) for column in zip(*response)] or None for response in responses]
 
     def _show_failed_notifications(self) -> None:
         if not self.parameters()["show_failed_notifications"]:
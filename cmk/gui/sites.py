@@ -69,6 +69,12 @@ def live(
     return g.live
 
 
+def live_auth_user() -> UserId | None:
+    """The user the Livestatus queries are restricted to, None if they are not restricted"""
+    _ensure_connected(None, None)
+    return g.get("live_auth_user")
+
+
 class SiteStatus(TypedDict, total=False):
     """The status of a remote site
 
@@ -117,6 +123,7 @@ def disconnect() -> None:
     if "live" in g:
         g.live.disconnect()
     g.pop("live", None)
+    g.pop("live_auth_user", None)
     g.pop("site_status", None)
 
 
@@ -481,6 +488,7 @@ def _set_initial_site_states(
 # AuthUser: header for livestatus.
 def _set_livestatus_auth(user: LoggedInUser, force_authuser: UserId | None) -> None:
     user_id = _livestatus_auth_user(user, force_authuser)
+    g.live_auth_user = user_id
     if user_id is not None:
         g.live.set_auth_user("read", user_id)
         g.live.set_auth_user("action", user_id)
@@ -6,11 +6,16 @@
 from collections.abc import Callable, Iterator, Sequence
 from statistics import fmean
 
+import numpy as np
+import numpy.typing as npt
+
 Timestamp = int
 
 TimeWindow = tuple[Timestamp, Timestamp, int]
 TimeSeriesValue = float | None
 TimeSeriesValues = Sequence[TimeSeriesValue]
+# The values of a time series with NaN for the missing ones
+TimeSeriesArray = npt.NDArray[np.float64]
 
 
 def rrd_timestamps(time_window: TimeWindow) -> list[Timestamp]:
@@ -38,6 +43,30 @@ def aggregation_functions(series: TimeSeriesValues, aggr: str | None) -> TimeSer
             raise ValueError(f"Invalid Aggregation function {aggr}, only max, min, average allowed")
 
 
+def _timestamps(time_window: TimeWindow) -> npt.NDArray[np.int64]:
+    """The timestamps of rrd_timestamps() as an array"""
+    start, end, step = time_window
+    if step == 0:
+        return np.array([], dtype=np.int64)
+    return np.arange(start, end, step, dtype=np.int64) + step
+
+
+def to_array(values: TimeSeriesValues | TimeSeriesArray) -> TimeSeriesArray:
+    """The values as an array with NaN for None"""
+    return np.array(values, dtype=np.float64)
+
+
+def to_values(array: TimeSeriesArray) -> list[TimeSeriesValue]:
+    """The values of the array with None for NaN"""
+    values = array.astype(object)
+    values[np.isnan(array)] = None
+    return values.tolist()
+
+
+def _no_conversion(v: float) -> float:
+    return v
+
+
 class TimeSeries:
     """Describes the returned time series returned by livestatus
 
@@ -47,6 +76,9 @@ class TimeSeries:
     - The Series describes the interval [start; end[
     - Start has no associated value to it.
 
+    The values are kept in an array with NaN for the missing ones, the sequence
+    interface and `values` still return None for them.
+
     args:
         data : list
             Includes [start, end, step, *values]
@@ -59,9 +91,9 @@ class TimeSeries:
 
     def __init__(
         self,
-        data: TimeSeriesValues,
+        data: TimeSeriesValues | TimeSeriesArray,
         time_window: TimeWindow | None = None,
-        conversion: Callable[[float], float] = lambda v: v,
+        conversion: Callable[[float], float] = _no_conversion,
     ) -> None:
         if time_window is None:
             if not data or data[0] is None or data[1] is None or data[2] is None:
@@ -74,7 +106,22 @@ class TimeSeries:
         self.start = int(time_window[0])
         self.end = int(time_window[1])
         self.step = int(time_window[2])
-        self.values = [v if v is None else conversion(v) for v in data]
+        self.array = to_array(data)
+        if conversion is not _no_conversion:
+            # The conversions are plain functions of one value, they are not applied
+            # to the whole array at once.
+            valid = ~np.isnan(self.array)
+            self.array[valid] = np.fromiter(
+                map(conversion, self.array[valid].tolist()), dtype=np.float64
+            )
+
+    @property
+    def values(self) -> list[TimeSeriesValue]:
+        return to_values(self.array)
+
+    @values.setter
+    def values(self, values: TimeSeriesValues | TimeSeriesArray) -> None:
+        self.array = to_array(values)
 
     @property
     def twindow(self) -> TimeWindow:
@@ -89,12 +136,9 @@ class TimeSeries:
         if twindow == self.twindow:
             return self.values
 
-        idx_max = len(self.values) - 1
-
-        return [
-            self.values[max(0, min(int((t - self.start) / self.step), idx_max))]
-            for t in range(*twindow)
-        ]
+        # Truncating towards zero, like int() does
+        indices = np.trunc((np.arange(*twindow) - self.start) / self.step).astype(np.int64)
+        return to_values(self.array[np.clip(indices, 0, len(self.array) - 1)])
 
     def downsample(self, twindow: TimeWindow, cf: str | None = "max") -> TimeSeriesValues:
         """Downsample time series by consolidation function
@@ -107,23 +151,37 @@ class TimeSeries:
         if twindow == self.twindow:
             return self.values
 
-        dwsa = []
-        co: list[TimeSeriesValue] = []
-        desired_times = rrd_timestamps(twindow)
-        i = 0
-        for t, val in self.time_data_pairs():
-            if t > desired_times[i]:
-                dwsa.append(aggregation_functions(co, cf))
-                co = []
-                i += 1
-            co.append(val)
-
-        diff_len = len(desired_times) - len(dwsa)
-        if diff_len > 0:
-            dwsa.append(aggregation_functions(co, cf))
-            dwsa += [None] * (diff_len - 1)
+        aggr = "max" if cf is None else cf.lower()
+        if aggr not in ("average", "max", "min"):
+            raise ValueError(f"Invalid Aggregation function {aggr}, only max, min, average allowed")
 
-        return dwsa
+        desired_times = _timestamps(twindow)
+        times = _timestamps(self.twindow)[: len(self.array)]
+        # Every value is consolidated into the first desired point in time not before
+        # its own one, the values after the last desired point in time are dropped.
+        buckets = np.searchsorted(desired_times, times, side="left")
+        kept = buckets < len(desired_times)
+        buckets = buckets[kept]
+        values = self.array[: len(times)][kept]
+
+        result = np.full(len(desired_times), np.nan)
+        if not len(values):
+            return to_values(result)
+
+        if aggr == "average":
+            valid = ~np.isnan(values)
+            counts = np.bincount(buckets, weights=valid, minlength=len(desired_times))
+            sums = np.bincount(
+                buckets, weights=np.where(valid, values, 0.0), minlength=len(desired_times)
+            )
+            np.divide(sums, counts, out=result, where=counts > 0)
+            return to_values(result)
+
+        # The buckets are sorted, fmax and fmin ignore NaN unless all values are NaN.
+        starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+        reduce = np.fmax if aggr == "max" else np.fmin
+        result[buckets[starts]] = reduce.reduceat(values, starts)
+        return to_values(result)
 
     def time_data_pairs(self) -> list[tuple[Timestamp, TimeSeriesValue]]:
         return list(zip(rrd_timestamps(self.twindow), self.values))
@@ -139,17 +197,20 @@ class TimeSeries:
             self.start == other.start
             and self.end == other.end
             and self.step == other.step
-            and self.values == other.values
+            and np.array_equal(self.array, other.array, equal_nan=True)
         )
 
     def __getitem__(self, i: int) -> TimeSeriesValue:
-        return self.values[i]
+        value = float(self.array[i])
+        return None if np.isnan(value) else value
 
     def __len__(self) -> int:
-        return len(self.values)
+        return len(self.array)
 
     def __iter__(self) -> Iterator[TimeSeriesValue]:
         yield from self.values
 
     def count(self, /, v: TimeSeriesValue) -> int:
-        return self.values.count(v)
+        if v is None:
+            return int(np.count_nonzero(np.isnan(self.array)))
+        return int(np.count_nonzero(self.array == v))
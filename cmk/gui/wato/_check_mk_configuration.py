@@ -208,6 +208,7 @@ def register(
     config_variable_registry.register(ConfigVariableDelayPrecompile)
     config_variable_registry.register(ConfigVariableClusterMaxCachefileAge)
     config_variable_registry.register(ConfigVariablePiggybackMaxCachefileAge)
+    config_variable_registry.register(ConfigVariableMaxConcurrentFetches)
     config_variable_registry.register(ConfigVariableCheckMKPerfdataWithTimes)
     config_variable_registry.register(ConfigVariableUseDNSCache)
     config_variable_registry.register(ConfigVariableChooseSNMPBackend)
@@ -290,6 +291,7 @@ def register(
     rulespec_registry.register(SnmpPorts)
     rulespec_registry.register(AgentPorts)
     rulespec_registry.register(TcpConnectTimeouts)
+    rulespec_registry.register(MaxConcurrentFetchesPerHost)
     rulespec_registry.register(EncryptionHandling)
     rulespec_registry.register(AgentEncryption)
     rulespec_registry.register(CheckMkExitStatus)
@@ -3161,6 +3163,29 @@ class ConfigVariablePiggybackMaxCachefileAge(ConfigVariable):
         )
 
 
+class ConfigVariableMaxConcurrentFetches(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainCore
+
+    def ident(self) -> str:
+        return "max_concurrent_fetches"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Maximum concurrent fetches per host"),
+            minvalue=1,
+            help=_(
+                "The number of data sources of a host, or of the nodes of a cluster, which "
+                "are fetched at the same time. With the default of 1 the data sources are "
+                "fetched one after the other. The rule <i>Maximum concurrent fetches</i> "
+                "overrides this setting for individual hosts."
+            ),
+        )
+
+
 class ConfigVariableCheckMKPerfdataWithTimes(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupCheckExecution
@@ -3212,20 +3237,25 @@ class ConfigVariableUseDNSCache(ConfigVariable):
 
 
 def transform_snmp_backend_default_to_valuespec(
-    backend: Literal["classic", "inline"],
+    backend: Literal["classic", "inline", "native"],
 ) -> SNMPBackendEnum:
     return {
         "classic": SNMPBackendEnum.CLASSIC,
         "inline": SNMPBackendEnum.INLINE,
+        "native": SNMPBackendEnum.NATIVE,
     }[backend]
 
 
-def transform_snmp_backend_from_valuespec(backend: SNMPBackendEnum) -> Literal["classic", "inline"]:
+def transform_snmp_backend_from_valuespec(
+    backend: SNMPBackendEnum,
+) -> Literal["classic", "inline", "native"]:
     match backend:
         case SNMPBackendEnum.CLASSIC:
             return "classic"
         case SNMPBackendEnum.INLINE:
             return "inline"
+        case SNMPBackendEnum.NATIVE:
+            return "native"
         case _:
             raise MKConfigError("SNMPBackendEnum %r not implemented" % backend)
 
@@ -3249,6 +3279,7 @@ class ConfigVariableChooseSNMPBackend(ConfigVariable):
                 choices=[
                     (SNMPBackendEnum.CLASSIC, _("Use Classic SNMP Backend")),
                     (SNMPBackendEnum.INLINE, _("Use Inline SNMP Backend")),
+                    (SNMPBackendEnum.NATIVE, _("Use Native SNMP Backend")),
                 ],
                 help=_(
                     "By default Checkmk uses command line calls of Net-SNMP tools like snmpget or "
@@ -3257,7 +3288,8 @@ class ConfigVariableChooseSNMPBackend(ConfigVariable):
                     "which calls the respective libraries directly via its python bindings. This "
                     "should increase the performance of SNMP checks in a significant way. Both "
                     "SNMP modes are features which improve the performance for large installations and are "
-                    "only available via our subscription."
+                    "only available via our subscription. The Native SNMP backend speaks SNMP "
+                    "directly from within Checkmk without any external tools or libraries."
                 ),
             ),
             to_valuespec=transform_snmp_backend_hosts_to_valuespec,
@@ -5687,6 +5719,8 @@ def transform_snmp_backend_hosts_to_valuespec(backend):
         # We dropped pysnmp during the 2.1 beta because it is currently slow
         # and unreliable.
         return SNMPBackendEnum.CLASSIC
+    if backend == "native":
+        return SNMPBackendEnum.NATIVE
     raise MKConfigError("SNMPBackendEnum %r not implemented" % backend)
 
 
@@ -5697,6 +5731,7 @@ def _valuespec_snmp_backend():
             choices=[
                 (SNMPBackendEnum.INLINE, _("Use Inline SNMP backend")),
                 (SNMPBackendEnum.CLASSIC, _("Use Classic backend")),
+                (SNMPBackendEnum.NATIVE, _("Use Native SNMP backend")),
             ],
         ),
         to_valuespec=transform_snmp_backend_hosts_to_valuespec,
@@ -5809,6 +5844,28 @@ TcpConnectTimeouts = HostRulespec(
 )
 
 
+def _valuespec_max_concurrent_fetches_per_host() -> Integer:
+    return Integer(
+        minvalue=1,
+        default_value=1,
+        title=_("Maximum concurrent fetches"),
+        help=_(
+            "The number of data sources of a host, or of the nodes of a cluster, which are "
+            "fetched at the same time. This rule overrides the global setting <i>Maximum "
+            "concurrent fetches per host</i>. Fetching the data sources at the same time "
+            "lets the fetching take about as long as the slowest data source, instead of "
+            "the sum of all of them."
+        ),
+    )
+
+
+MaxConcurrentFetchesPerHost = HostRulespec(
+    group=RulespecGroupAgentGeneralSettings,
+    name="max_concurrent_fetches_per_host",
+    valuespec=_valuespec_max_concurrent_fetches_per_host,
+)
+
+
 def _valuespec_encryption_handling() -> Dictionary:
     return Dictionary(
         title=_("Enforce agent data encryption"),
@@ -58,6 +58,27 @@ def get_snmp_table(
     max_len = 0
     max_len_col = -1
 
+    # Fetch all columns in one go, so that backends supporting it can walk
+    # them concurrently.
+    fetchoids = [
+        (f"{tree.base}.{oid.column}", oid.save_to_cache)
+        for oid in tree.oids
+        if not isinstance(oid.column, SpecialColumn)
+    ]
+    walks = dict(
+        zip(
+            (fetchoid for fetchoid, _save in fetchoids),
+            get_snmpwalks(
+                section_name,
+                tree.base,
+                fetchoids,
+                walk_cache=walk_cache,
+                backend=backend,
+                log=log,
+            ),
+        )
+    )
+
     for oid in tree.oids:
         fetchoid: OID = f"{tree.base}.{oid.column}"
         # column may be integer or string like "1.5.4.2.3"
@@ -78,15 +99,7 @@ def get_snmp_table(
             index_column = len(columns)
             index_format = oid.column
         else:
-            rowinfo = get_snmpwalk(
-                section_name,
-                tree.base,
-                fetchoid,
-                walk_cache=walk_cache,
-                save_walk_cache=oid.save_to_cache,
-                backend=backend,
-                log=log,
-            )
+            rowinfo = walks[fetchoid]
             if len(rowinfo) > max_len:
                 max_len_col = len(columns)
 
@@ -186,61 +199,132 @@ def get_snmpwalk(
     backend: SNMPBackend,
     log: Callable[[str], None],
 ) -> SNMPRowInfo:
+    return get_snmpwalks(
+        section_name,
+        base_oid,
+        [(fetchoid, save_walk_cache)],
+        walk_cache=walk_cache,
+        backend=backend,
+        log=log,
+    )[0]
+
+
+def get_snmpwalks(
+    section_name: SectionName | None,
+    base_oid: str,
+    fetchoids: Sequence[tuple[OID, bool]],
+    *,
+    walk_cache: MutableMapping[tuple[str, str, bool], SNMPRowInfo],
+    backend: SNMPBackend,
+    log: Callable[[str], None],
+) -> list[SNMPRowInfo]:
+    """Walk several OIDs (with their save-to-walk-cache flag) of the same table
+
+    All OIDs not found in the walk cache are passed to the backend at once,
+    see SNMPBackend.walk_many().
+    """
     contexts = backend.config.snmpv3_contexts_of(section_name).contexts
     context_string = "-".join(["no_context" if not c else c for c in contexts])
 
     # contexts are hashed in order not to exceed max pathname length
     context_hash = hashlib.shake_256(context_string.encode("utf-8")).hexdigest(15)
 
-    with contextlib.suppress(KeyError):
-        cache_info = walk_cache[(fetchoid, context_hash, save_walk_cache)]
-        log(f"Already fetched OID: {fetchoid}")
-        return cache_info
+    results: dict[OID, SNMPRowInfo] = {}
+    missing: list[OID] = []
+    for fetchoid, save_walk_cache in fetchoids:
+        with contextlib.suppress(KeyError):
+            results[fetchoid] = walk_cache[(fetchoid, context_hash, save_walk_cache)]
+            log(f"Already fetched OID: {fetchoid}")
+            continue
+        if fetchoid not in missing:
+            missing.append(fetchoid)
 
-    added_oids: set[OID] = set()
-    rowinfo: SNMPRowInfo = []
+    added_oids: dict[OID, set[OID]] = {fetchoid: set() for fetchoid in missing}
+    rowinfos: dict[OID, SNMPRowInfo] = {fetchoid: [] for fetchoid in missing}
 
     skip: set[SNMPContext] = set()
     context_config = backend.config.snmpv3_contexts_of(section_name)
-    for context in context_config.contexts:
+    for context in context_config.contexts if missing else ():
         if context in skip:
             continue
 
         try:
-            rows = backend.walk(
-                fetchoid,
-                section_name=section_name,
-                table_base_oid=base_oid,
-                context=context,
+            walks = dict(
+                zip(
+                    missing,
+                    backend.walk_many(
+                        missing,
+                        section_name=section_name,
+                        table_base_oid=base_oid,
+                        context=context,
+                    ),
+                )
             )
-        except SNMPContextTimeout:
+        except SNMPContextTimeout as e:
             if context_config.timeout_policy == "stop":
                 raise
 
+            walks = _walk_until_timeout(
+                backend, missing, e, section_name=section_name, base_oid=base_oid, context=context
+            )
             log(f"Timeout for SNMP context {context}.  Skipping for now.")
             skip.add(context)
-            continue
 
-        # I've seen a broken device (Mikrotik Router), that broke after an
-        # update to RouterOS v6.22. It would return 9 time the same OID when
-        # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
-        # by removing any duplicate OID information
-        if len(rows) > 1 and rows[0][0] == rows[1][0]:
-            log("Detected broken SNMP agent. Ignoring duplicate OID {rows[0][0]}.")
-            rows = rows[:1]
-
-        for row_oid, val in rows:
-            if row_oid in added_oids:
-                log(f"Duplicate OID found: {row_oid} ({val!r})")
-            else:
-                rowinfo.append((row_oid, val))
-                added_oids.add(row_oid)
-
-    if skip and not rowinfo:
+        for fetchoid in missing:
+            if (rows := walks.get(fetchoid)) is None:
+                continue
+            # I've seen a broken device (Mikrotik Router), that broke after an
+            # update to RouterOS v6.22. It would return 9 time the same OID when
+            # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
+            # by removing any duplicate OID information
+            if len(rows) > 1 and rows[0][0] == rows[1][0]:
+                log("Detected broken SNMP agent. Ignoring duplicate OID {rows[0][0]}.")
+                rows = rows[:1]
+
+            for row_oid, val in rows:
+                if row_oid in added_oids[fetchoid]:
+                    log(f"Duplicate OID found: {row_oid} ({val!r})")
+                else:
+                    rowinfos[fetchoid].append((row_oid, val))
+                    added_oids[fetchoid].add(row_oid)
+
+    if skip and not all(rowinfos.values()):
         raise MKSNMPError("SNMP Error on %s: SNMP query timed out" % backend.config.hostname)
 
-    walk_cache[(fetchoid, context_hash, save_walk_cache)] = rowinfo
-    return rowinfo
+    for fetchoid, save_walk_cache in fetchoids:
+        if fetchoid in rowinfos:
+            walk_cache[(fetchoid, context_hash, save_walk_cache)] = rowinfos[fetchoid]
+            results[fetchoid] = rowinfos[fetchoid]
+    return [results[fetchoid] for fetchoid, _save in fetchoids]
+
+
+def _walk_until_timeout(
+    backend: SNMPBackend,
+    oids: Sequence[OID],
+    timeout: SNMPContextTimeout,
+    *,
+    section_name: SectionName | None,
+    base_oid: str,
+    context: SNMPContext,
+) -> dict[OID, SNMPRowInfo]:
+    """Keep the OIDs walked before the timeout, walk the rest one after another
+
+    The OIDs which timed out are not walked again, the others are walked until
+    the next timeout.
+    """
+    walks = dict(timeout.walked)
+    if timeout.not_started is not None:
+        not_started = timeout.not_started
+    elif len(oids) < 2:
+        not_started = []
+    else:
+        not_started = [oid for oid in oids if oid not in walks]
+    with contextlib.suppress(SNMPContextTimeout):
+        for oid in not_started:
+            walks[oid] = backend.walk(
+                oid, context=context, section_name=section_name, table_base_oid=base_oid
+            )
+    return walks
 
 
 def _decode_column(
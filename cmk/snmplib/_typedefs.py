@@ -29,7 +29,22 @@ SNMPRowInfo = list[tuple[OID, SNMPRawValue]]
 
 
 class SNMPContextTimeout(MKSNMPError):
-    pass
+    """Walking in an SNMP context timed out
+
+    Walking several OIDs at once, the backend can pass on the OIDs it has walked
+    before the timeout and the ones it has not even started to walk. The latter
+    are unknown if None.
+    """
+
+    def __init__(
+        self,
+        *args: object,
+        walked: Mapping[OID, SNMPRowInfo] | None = None,
+        not_started: Sequence[OID] | None = None,
+    ) -> None:
+        super().__init__(*args)
+        self.walked: Mapping[OID, SNMPRowInfo] = walked or {}
+        self.not_started = not_started
 
 
 # TODO: Be more specific about the possible tuples
@@ -56,6 +71,7 @@ SNMPTiming = dict
 class SNMPBackendEnum(enum.Enum):
     INLINE = "Inline"
     CLASSIC = "Classic"
+    NATIVE = "Native"
     STORED_WALK = "StoredWalk"
 
     def serialize(self) -> str:
@@ -221,6 +237,30 @@ class SNMPBackend(abc.ABC):
     ) -> SNMPRowInfo:
         return []
 
+    def walk_many(
+        self,
+        /,
+        oids: Sequence[OID],
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> Sequence[SNMPRowInfo]:
+        """Walk several OIDs, typically the columns of one table
+
+        Backends able to multiplex requests should override this, the default
+        walks the OIDs one after another.
+        """
+        walks: dict[OID, SNMPRowInfo] = {}
+        for num, oid in enumerate(oids):
+            try:
+                walks[oid] = self.walk(
+                    oid, context=context, section_name=section_name, table_base_oid=table_base_oid
+                )
+            except SNMPContextTimeout as e:
+                raise SNMPContextTimeout(*e.args, walked=walks, not_started=oids[num + 1 :]) from e
+        return [walks[oid] for oid in oids]
+
 
 class SpecialColumn(enum.IntEnum):
     # Until we remove all but the first, its worth having an enum
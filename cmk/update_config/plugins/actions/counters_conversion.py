@@ -36,7 +36,11 @@ class ConvertCounters(UpdateAction):
     @staticmethod
     def convert_counter_files(counters_path: Path) -> None:
         for f in _ls(counters_path):
-            if not (content := f.read_text().strip()) or _is_json(content):
+            # Files with changes appended consist of several lines of JSON, the ones
+            # rewritten since start with a comment holding their generation.
+            if not (content := f.read_text().strip()) or (
+                (first_line := content.split("\n", 1)[0]).startswith("#") or _is_json(first_line)
+            ):
                 continue
 
             f.write_text(
@@ -31,6 +31,13 @@ class Eventconsolestatus(Table):
     )
     """The average event rate"""
 
+    status_average_matched_message_rate = Column(
+        'status_average_matched_message_rate',
+        col_type='float',
+        description='The average rate of messages matched against the rules',
+    )
+    """The average rate of messages matched against the rules"""
+
     status_average_message_rate = Column(
         'status_average_message_rate',
         col_type='float',
@@ -45,6 +52,13 @@ class Eventconsolestatus(Table):
     )
     """The average overflow rate"""
 
+    status_average_parsed_message_rate = Column(
+        'status_average_parsed_message_rate',
+        col_type='float',
+        description='The average rate of parsed messages',
+    )
+    """The average rate of parsed messages"""
+
     status_average_processing_time = Column(
         'status_average_processing_time',
         col_type='float',
@@ -171,6 +185,20 @@ class Eventconsolestatus(Table):
     )
     """The number of events received since startup of the Event Console"""
 
+    status_matched_message_rate = Column(
+        'status_matched_message_rate',
+        col_type='float',
+        description='The rate of messages matched against the rules',
+    )
+    """The rate of messages matched against the rules"""
+
+    status_matched_messages = Column(
+        'status_matched_messages',
+        col_type='int',
+        description='The number of messages matched against the rules since startup of the Event Console',
+    )
+    """The number of messages matched against the rules since startup of the Event Console"""
+
     status_message_rate = Column(
         'status_message_rate',
         col_type='float',
@@ -206,6 +234,20 @@ class Eventconsolestatus(Table):
     )
     """The number of message overflows, i.e. messages simply dropped due to an overflow of the Event Console"""
 
+    status_parsed_message_rate = Column(
+        'status_parsed_message_rate',
+        col_type='float',
+        description='The rate of parsed messages',
+    )
+    """The rate of parsed messages"""
+
+    status_parsed_messages = Column(
+        'status_parsed_messages',
+        col_type='int',
+        description='The number of messages parsed since startup of the Event Console',
+    )
+    """The number of messages parsed since startup of the Event Console"""
+
     status_replication_last_sync = Column(
         'status_replication_last_sync',
         col_type='time',
@@ -718,11 +718,13 @@ class MockSingleSiteConnection:
         return self._last_response.read(length).encode("utf-8")
 
     def socket_send(self, data: bytes) -> None:
-        self._sent_queries.append(data)
-        if data[-2:] == b"\n\n":
-            data = data[:-2]
-        response, output_format = self.result_of_next_query(data.decode("utf-8"))
-        self._last_response = io.StringIO(_make_livestatus_response(response, output_format))
+        # Several queries may be sent at once, their responses are read one after the other.
+        responses = []
+        for query in data.removesuffix(b"\n\n").split(b"\n\n"):
+            self._sent_queries.append(query + b"\n\n")
+            response, output_format = self.result_of_next_query(query.decode("utf-8"))
+            responses.append(_make_livestatus_response(response, output_format))
+        self._last_response = io.StringIO("".join(responses))
 
     def __enter__(self) -> None:
         pass
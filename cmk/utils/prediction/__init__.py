@@ -6,6 +6,7 @@
 
 from ._grouping import PREDICTION_PERIODS, Timegroup, timezone_at
 from ._plugin_interface import estimate_levels, make_updated_predictions
+from ._precompute import precompute_predictions
 from ._prediction import DataStat, PredictionData, PredictionStore
 from ._query import PredictionQuerier
 
@@ -15,6 +16,7 @@ __all__ = [
     "make_updated_predictions",
     "PredictionData",
     "PREDICTION_PERIODS",
+    "precompute_predictions",
     "PredictionQuerier",
     "PredictionStore",
     "Timegroup",
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# Copyright (C) 2019 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Computation of the predictions
+
+The time slices are resampled into the rows of an array, the statistics of all points in
+time are computed column by column. The checks only read the stored predictions, so this
+module (and numpy) is only imported when computing them.
+"""
+
+from collections.abc import Callable, Iterable, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from cmk.agent_based.prediction_backend import PredictionInfo
+
+from ._grouping import time_slices
+from ._prediction import DataStat, MetricRecord, PredictionData
+
+
+def compute_prediction(
+    info: PredictionInfo,
+    get_recorded_data: Callable[[str, int, int], MetricRecord | None],
+) -> PredictionData | None:
+    time_windows = time_slices(
+        info.valid_interval[0], info.params.horizon * 86400, info.params.period
+    )
+
+    from_time = time_windows[0][0]
+    raw_slices = [
+        (
+            response.window,
+            response.values,
+            from_time - start,
+        )
+        for start, end in time_windows
+        if (response := get_recorded_data(f"{info.metric}.max", start, end))
+    ]
+
+    return _calculate_data_for_prediction(raw_slices[0][0], raw_slices) if raw_slices else None
+
+
+def _calculate_data_for_prediction(
+    youngest_range: range,
+    raw_slices: Sequence[tuple[range, Sequence[float | None], int]],
+) -> PredictionData:
+    # Upsample all time slices to same resolution
+    # We assume that the youngest slice has the finest resolution.
+    slices = [
+        _forward_fill_resample(
+            current_range,
+            values,
+            range(youngest_range.start - shift, youngest_range.stop - shift, youngest_range.step),
+        )
+        for current_range, values, shift in raw_slices
+    ]
+
+    return PredictionData(
+        points=_data_stats(slices),
+        start=youngest_range.start,
+        step=youngest_range.step,
+    )
+
+
+def _forward_fill_resample(
+    current_range: range, values: Sequence[float | None], new_range: range
+) -> npt.NDArray[np.float64]:
+    """The values at the times of the new range, NaN for the missing ones"""
+    array = np.array(values, dtype=np.float64)
+    if current_range == new_range:
+        return array
+
+    # Truncating towards zero, like int() does
+    indices = np.trunc(
+        (np.arange(new_range.start, new_range.stop, new_range.step) - current_range.start)
+        / current_range.step
+    ).astype(np.int64)
+    return array[np.clip(indices, 0, len(array) - 1)]
+
+
+def _data_stats(
+    slices: Iterable[Sequence[float | None] | npt.NDArray[np.float64]],
+) -> list[DataStat | None]:
+    "Statistically summarize all the upsampled RRD data"
+    rows = [np.array(slice_, dtype=np.float64) for slice_ in slices]
+    if not rows:
+        return []
+    num_points = min(len(row) for row in rows)
+    columns = np.vstack([row[:num_points] for row in rows])
+
+    valid = ~np.isnan(columns)
+    samples = np.count_nonzero(valid, axis=0)
+    values = np.where(valid, columns, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        averages = values.sum(axis=0) / samples
+        # In the case of a single data-point an unbiased standard deviation is undefined.
+        stdevs = np.sqrt(np.abs((values**2).sum(axis=0) - averages**2 * samples) / (samples - 1))
+
+    return [
+        None if count == 0 else DataStat(average, min_, max_, None if count == 1 else stdev)
+        for count, average, min_, max_, stdev in zip(
+            samples.tolist(),
+            averages.tolist(),
+            np.fmin.reduce(columns, axis=0).tolist(),
+            np.fmax.reduce(columns, axis=0).tolist(),
+            stdevs.tolist(),
+        )
+    ]
@@ -4,37 +4,27 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """Code for predictive monitoring / anomaly detection"""
 
-import logging
-from collections.abc import Callable, Mapping
+from collections.abc import Mapping
 from typing import assert_never, Literal
 
-from cmk.utils.log import VERBOSE
-
 from cmk.agent_based.prediction_backend import PredictionInfo
 
-from ._prediction import (
-    compute_prediction,
-    LevelsSpec,
-    MetricRecord,
-    PredictionData,
-    PredictionStore,
-)
+from ._prediction import LevelsSpec, PredictionData, PredictionStore
 
 EstimatedLevels = tuple[tuple[float, float] | None, tuple[float, float] | None]
 
-logger = logging.getLogger("cmk.prediction")
-
 
 def make_updated_predictions(
     store: PredictionStore,
-    get_recorded_data: Callable[[str, int, int], MetricRecord | None],
     now: float,
 ) -> Mapping[int, tuple[float | None, tuple[float, float] | None]]:
+    """The reference values and levels of the stored predictions
+
+    The predictions are computed by precompute_predictions(), the checks never wait for it.
+    """
     store.remove_outdated_predictions(now)
     return {
-        hash(meta): _make_reference_and_prediction(
-            meta, valid_prediction or _update_prediction(store, meta, get_recorded_data), now
-        )
+        hash(meta): _make_reference_and_prediction(meta, valid_prediction, now)
         for meta, valid_prediction in store.iter_all_valid_predictions(now)
     }
 
@@ -56,24 +46,6 @@ def _make_reference_and_prediction(
     )
 
 
-def _update_prediction(
-    store: PredictionStore,
-    meta: PredictionInfo,
-    get_recorded_data: Callable[[str, int, int], MetricRecord | None],
-) -> PredictionData | None:
-    logger.log(
-        VERBOSE,
-        "Predicting %s / %s / %s",
-        meta.metric,
-        meta.params.period,
-        meta.valid_interval[0],
-    )
-    if (prediction := compute_prediction(meta, get_recorded_data)) is None:
-        return None
-    store.save_prediction(meta, prediction)
-    return prediction
-
-
 def estimate_levels(
     reference_value: float,
     stdev: float | None,
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Computation of the predictions ahead of the checks
+
+The checks only read the stored predictions and write the info of the ones they are
+missing. This job computes those on its next run. The predictions of the next day are
+computed before midnight: every one of them at its own time during the last hours of
+the day, so they are not all computed at once. The ones based on time slices which had
+not ended by then, like the day before for the period "hour", are computed again at the
+same time after midnight.
+"""
+
+import logging
+import zlib
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Final
+
+from livestatus import get_rrd_data, MKLivestatusException, SingleSiteConnection
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.log import VERBOSE
+from cmk.utils.misc import pnp_cleanup
+
+from cmk.agent_based.prediction_backend import PredictionInfo
+
+from ._grouping import time_slices
+from ._prediction import MetricRecord, PredictionData, PredictionStore
+
+logger = logging.getLogger("cmk.prediction")
+
+# The predictions of the next day are computed during this time before it starts.
+_PRECOMPUTE_WINDOW: Final = 6 * 3600
+
+
+def precompute_predictions(
+    predictions_dir: Path,
+    make_connection: Callable[[], SingleSiteConnection],
+    now: float,
+    *,
+    max_workers: int,
+) -> int:
+    """Compute the missing predictions of all services, return how many were computed"""
+    pending = [
+        (service_dir, metas)
+        for service_dir in sorted(predictions_dir.glob("*/*"))
+        if (metas := pending_predictions(PredictionStore(service_dir), now))
+    ]
+    if not pending:
+        return 0
+
+    # The directories are named after the cleaned up service descriptions.
+    descriptions = {
+        (host_name, pnp_cleanup(description)): description
+        for host_name, description in make_connection().query(
+            "GET services\nColumns: host_name description\n"
+        )
+    }
+
+    def compute(service_dir: Path, metas: Sequence[PredictionInfo]) -> int:
+        host_name = service_dir.parent.name
+        if (description := descriptions.get((host_name, service_dir.name))) is None:
+            return 0
+        store = PredictionStore(service_dir)
+        try:
+            get_recorded_data = partial(
+                get_rrd_data, make_connection(), HostName(host_name), description
+            )
+            return sum(
+                update_prediction(store, meta, get_recorded_data) is not None for meta in metas
+            )
+        except MKLivestatusException as e:
+            # E.g. the core is reloaded. The predictions are still pending on the next run.
+            logger.error("Cannot compute the predictions of %s / %s: %s", host_name, description, e)
+            return 0
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prediction") as executor:
+        return sum(executor.map(compute, *zip(*pending)))
+
+
+def pending_predictions(store: PredictionStore, now: float) -> list[PredictionInfo]:
+    """The predictions to be computed now
+
+    These are the ones valid now and not computed yet or lacking recent data, and the
+    ones of the next day which are due.
+    """
+    store.remove_outdated_predictions(now)
+    pending = []
+    for meta, prediction in store.iter_all_valid_predictions(now):
+        if prediction is None or (
+            now >= _due_time(store, meta) + _PRECOMPUTE_WINDOW and _lacks_recent_data(store, meta)
+        ):
+            pending.append(meta)
+        upcoming = _next_day(meta)
+        if now >= _due_time(store, upcoming) and not store.has_prediction(upcoming):
+            pending.append(upcoming)
+    return pending
+
+
+def _next_day(meta: PredictionInfo) -> PredictionInfo:
+    # Days are 23 to 25 hours long, 36 hours after the start is always on the next day.
+    return PredictionInfo.make(
+        meta.metric, meta.direction, meta.params, meta.valid_interval[0] + 36 * 3600
+    )
+
+
+def _due_time(store: PredictionStore, meta: PredictionInfo) -> int:
+    offset = (
+        zlib.crc32(str(store.path / store.relative_data_file(meta)).encode()) % _PRECOMPUTE_WINDOW
+    )
+    return meta.valid_interval[0] - _PRECOMPUTE_WINDOW + offset
+
+
+def _lacks_recent_data(store: PredictionStore, meta: PredictionInfo) -> bool:
+    """Whether the prediction was computed before the end of a past time slice it is based on"""
+    computed = store.computation_time(meta)
+    if computed is None or computed >= meta.valid_interval[0]:
+        return False
+    return any(
+        start < meta.valid_interval[0] and computed < end
+        for start, end in time_slices(
+            meta.valid_interval[0], meta.params.horizon * 86400, meta.params.period
+        )
+    )
+
+
+def update_prediction(
+    store: PredictionStore,
+    meta: PredictionInfo,
+    get_recorded_data: Callable[[str, int, int], MetricRecord | None],
+) -> PredictionData | None:
+    # numpy is imported by the computation only, not by the checks.
+    from ._compute import compute_prediction  # pylint: disable=import-outside-toplevel
+
+    logger.log(
+        VERBOSE,
+        "Predicting %s / %s / %s",
+        meta.metric,
+        meta.params.period,
+        meta.valid_interval[0],
+    )
+    if (prediction := compute_prediction(meta, get_recorded_data)) is None:
+        return None
+    # The prediction is only valid if it is written after the info.
+    store.save_info(meta)
+    store.save_prediction(meta, prediction)
+    return prediction
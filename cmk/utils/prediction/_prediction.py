@@ -4,17 +4,14 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import logging
-import math
-from collections.abc import Callable, Iterable, Iterator, Sequence
+from collections.abc import Iterable, Iterator, Sequence
 from pathlib import Path
-from typing import Final, Literal, NamedTuple, Protocol, Self
+from typing import Final, Literal, NamedTuple, Protocol
 
 from pydantic import BaseModel
 
 from cmk.agent_based.prediction_backend import PredictionInfo
 
-from ._grouping import time_slices
-
 logger = logging.getLogger("cmk.prediction")
 
 
@@ -38,17 +35,6 @@ class DataStat(NamedTuple):
     max_: float
     stdev: float | None
 
-    @classmethod
-    def from_values(cls, values: Sequence[float]) -> Self:
-        """Statistically summarize all the measured values"""
-        average = sum(values) / float(len(values))
-        return cls(
-            average=average,
-            min_=min(values),
-            max_=max(values),
-            stdev=_std_dev(values, average),
-        )
-
 
 class PredictionData(BaseModel, frozen=True):
     points: list[DataStat | None]
@@ -103,10 +89,28 @@ class PredictionStore:
             if metric in prediction_file.parts
         )
 
+    def _info_file(self, meta: PredictionInfo) -> Path:
+        return Path(self.meta_file_path_template.format(meta=meta))
+
+    def save_info(self, meta: PredictionInfo) -> None:
+        _write_atomically(self._info_file(meta), meta.model_dump_json())
+
     def save_prediction(self, meta: PredictionInfo, prediction: PredictionData) -> None:
-        data_file = self._data_file(meta)
-        data_file.parent.mkdir(exist_ok=True, parents=True)
-        data_file.write_text(prediction.model_dump_json())
+        _write_atomically(self._data_file(meta), prediction.model_dump_json())
+
+    def computation_time(self, meta: PredictionInfo) -> float | None:
+        """When the prediction was computed, if it was"""
+        try:
+            return self._data_file(meta).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def has_prediction(self, meta: PredictionInfo) -> bool:
+        """Whether the prediction has been computed since the info was written"""
+        try:
+            return _is_up_to_date(self._info_file(meta), self._data_file(meta))
+        except FileNotFoundError:
+            return False
 
     def iter_all_metadata_files(self) -> Iterable[Path]:
         if not self.path.exists():
@@ -135,86 +139,23 @@ class PredictionStore:
 
             data_path = info_path.with_suffix(self.DATA_FILE_SUFFIX)
             try:
-                if info_path.stat().st_mtime >= data_path.stat().st_mtime:
+                if _is_up_to_date(info_path, data_path):
                     yield meta, PredictionData.model_validate_json(data_path.read_text())
+                    continue
             except FileNotFoundError:
                 pass
 
             yield meta, None
 
 
-def compute_prediction(
-    info: PredictionInfo,
-    get_recorded_data: Callable[[str, int, int], MetricRecord | None],
-) -> PredictionData | None:
-    time_windows = time_slices(
-        info.valid_interval[0], info.params.horizon * 86400, info.params.period
-    )
-
-    from_time = time_windows[0][0]
-    raw_slices = [
-        (
-            response.window,
-            response.values,
-            from_time - start,
-        )
-        for start, end in time_windows
-        if (response := get_recorded_data(f"{info.metric}.max", start, end))
-    ]
-
-    return _calculate_data_for_prediction(raw_slices[0][0], raw_slices) if raw_slices else None
-
-
-def _calculate_data_for_prediction(
-    youngest_range: range,
-    raw_slices: Sequence[tuple[range, Sequence[float | None], int]],
-) -> PredictionData:
-    # Upsample all time slices to same resolution
-    # We assume that the youngest slice has the finest resolution.
-    slices = [
-        _forward_fill_resample(
-            current_range,
-            values,
-            range(youngest_range.start - shift, youngest_range.stop - shift, youngest_range.step),
-        )
-        for current_range, values, shift in raw_slices
-    ]
-
-    return PredictionData(
-        points=_data_stats(slices),
-        start=youngest_range.start,
-        step=youngest_range.step,
-    )
-
-
-def _forward_fill_resample(
-    current_range: range, values: Sequence[float | None], new_range: range
-) -> Sequence[float | None]:
-    if current_range == new_range:
-        return values
-
-    idx_max = len(values) - 1
-    return [
-        values[max(0, min(int((t - current_range.start) / current_range.step), idx_max))]
-        for t in new_range
-    ]
-
-
-def _data_stats(slices: Iterable[Iterable[float | None]]) -> list[DataStat | None]:
-    "Statistically summarize all the upsampled RRD data"
-    return [  # can't inline this b/c it is unit tested :-/
-        (
-            DataStat.from_values(point_line)
-            if (point_line := [x for x in time_column if x is not None])
-            else None
-        )
-        for time_column in zip(*slices)
-    ]
+def _is_up_to_date(info_path: Path, data_path: Path) -> bool:
+    # The info is written again when the parameters change.
+    return data_path.stat().st_mtime >= info_path.stat().st_mtime
 
 
-def _std_dev(point_line: Sequence[float], average: float) -> float | None:
-    samples = len(point_line)
-    # In the case of a single data-point an unbiased standard deviation is undefined.
-    if samples == 1:
-        return None
-    return math.sqrt(abs(sum(p**2 for p in point_line) - average**2 * samples) / float(samples - 1))
+def _write_atomically(path: Path, content: str) -> None:
+    """The checks read the files while the predictions are computed in the background"""
+    path.parent.mkdir(exist_ok=True, parents=True)
+    tmp_path = path.with_name(f".{path.name}.new")
+    tmp_path.write_text(content)
+    tmp_path.replace(path)
@@ -648,6 +648,12 @@ class RulesetOptimizer:
 
         return all_matching_hosts
 
+    def matching_hosts(self, rule: RuleSpec[TRuleValue], with_foreign_hosts: bool) -> set[HostName]:
+        """The hosts matching the host conditions of the rule, none if it is disabled"""
+        if is_disabled(rule):
+            return set()
+        return self._all_matching_hosts(rule["condition"], with_foreign_hosts)
+
     def get_host_ruleset(
         self, ruleset: Sequence[RuleSpec[TRuleValue]], with_foreign_hosts: bool
     ) -> Mapping[HostAddress, Sequence[TRuleValue]]:
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure the splitting of agent outputs into sections
+
+Run from the root of the repository:
+
+    PYTHONPATH=. python3 doc/benchmark/agent_parser.py --scale 50 [AGENT_OUTPUT ...]
+
+The agent outputs default to the ones in the repository. Each of them is repeated
+to get outputs of the size of large Windows hosts. They are parsed once feeding
+every line through the state machine and decoding all sections like the parser
+used to, and once with the parser, for all sections and for a few of them.
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from collections.abc import Callable, Mapping, Sequence
+from pathlib import Path
+
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.hostaddress import HostName
+from cmk.utils.sectionname import SectionName
+
+from cmk.checkengine.parser import (
+    AgentParser,
+    AgentRawDataSectionElem,
+    NO_SELECTION,
+    SectionNameCollection,
+    SectionStore,
+)
+from cmk.checkengine.parser._agent import _iter_lines, NOOPParser, ParserState
+
+_CORPUS = [
+    Path("tests/gui_e2e/data/windows-2.3.0p10"),
+    Path("tests/gui_e2e/data/linux-2.4.0-2024.08.27"),
+    Path("tests/integration/cmk/base/test-files/linux-agent-output"),
+    Path("agents/wnx/test_files/sections/test_output.txt"),
+]
+_SELECTION = frozenset({SectionName("check_mk"), SectionName("mem"), SectionName("uptime")})
+
+
+def _line_by_line(
+    parser: AgentParser, raw_data: AgentRawData, selection: SectionNameCollection
+) -> dict[SectionName, list[AgentRawDataSectionElem]]:
+    state: ParserState = NOOPParser(
+        parser.hostname,
+        [],
+        {},
+        translation=parser.translation,
+        encoding_fallback=parser.encoding_fallback,
+        logger=logging.getLogger("benchmark"),
+    )
+    for line in raw_data.split(b"\n"):
+        state = state(line.rstrip(b"\r"))
+    sections: dict[SectionName, list[AgentRawDataSectionElem]] = {}
+    for header, chunks in state.sections:
+        sections.setdefault(header.name, []).extend(
+            header.parse_line(line) for line in _iter_lines(chunks, strip=not header.nostrip)
+        )
+    return {
+        name: content
+        for name, content in sections.items()
+        if selection is NO_SELECTION or name in selection
+    }
+
+
+def _measure(
+    name: str,
+    parse: Callable[[], Mapping[SectionName, object]],
+    size: int,
+    repeat: int,
+) -> Mapping[SectionName, object]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = parse()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {name:<32} {1000 * elapsed:8.1f} ms {size / elapsed / 2**20:8.1f} MiB/s")
+    return result
+
+
+def _benchmark(raw_data: AgentRawData, parser: AgentParser, repeat: int) -> None:
+    for selection_name, selection in (("all", NO_SELECTION), ("selected", _SELECTION)):
+        line_by_line = _measure(
+            f"line by line, {selection_name} sections",
+            lambda: _line_by_line(parser, raw_data, selection),
+            len(raw_data),
+            repeat,
+        )
+        parsed = _measure(
+            f"parser, {selection_name} sections",
+            lambda: parser.parse(raw_data, selection=selection).sections,
+            len(raw_data),
+            repeat,
+        )
+        # The parser adds the sections persisted by the previous runs.
+        assert {
+            name: parsed[name] for name in line_by_line
+        } == line_by_line, "the parser changed the sections"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("agent_outputs", type=Path, nargs="*", default=_CORPUS)
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for path in args.agent_outputs:
+        raw_data = AgentRawData(path.read_bytes().rstrip(b"\n") + b"\n") * args.scale
+        print(f"{path} x {args.scale}: {len(raw_data) >> 20} MiB")
+        # A fresh store for every agent output, their persisted sections must not mix.
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            agent_parser = AgentParser(
+                HostName("benchmark"),
+                SectionStore[Sequence[AgentRawDataSectionElem]](
+                    Path(tmp_dir) / "persisted", logger=logging.getLogger("benchmark")
+                ),
+                host_check_interval=60,
+                keep_outdated=True,
+                translation={},
+                encoding_fallback="ascii",
+                logger=logging.getLogger("benchmark"),
+            )
+            _benchmark(AgentRawData(raw_data), agent_parser, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure the message throughput of the Event Console with many open events
+
+Run from the root of the repository:
+
+    PYTHONPATH=. python3 doc/benchmark/ec_event_status.py --open-events 10000 100000
+
+The event status is filled with open events spread over many rules and hosts,
+then syslog messages are processed which alternately open and cancel events of
+one rule. With --workers, parsing and rule matching are done by that many
+worker processes.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.config import Config, ServiceLevel
+from cmk.ec.helpers import ECLock
+from cmk.ec.history_sqlite import SQLiteHistory, SQLiteSettings
+from cmk.ec.host_config import HostConfig
+from cmk.ec.main import (
+    default_slave_status_master,
+    EventServer,
+    EventStatus,
+    make_config,
+    StatusTableEvents,
+    StatusTableHistory,
+)
+from cmk.ec.perfcounters import Perfcounters
+from cmk.ec.settings import create_settings
+
+_RULE = ec.Rule(
+    actions=[],
+    actions_in_downtime=True,
+    autodelete=False,
+    cancel_action_phases="always",
+    cancel_actions=[],
+    comment="",
+    description="",
+    disabled=False,
+    docu_url="",
+    id="benchmark",
+    invert_matching=False,
+    sl=ServiceLevel(precedence="message", value=0),
+    state=2,
+    match="ERROR on port (.*)",
+    match_ok="OK on port (.*)",
+)
+
+_NO_LIMIT = ec.EventLimit(action="stop", limit=10**9)
+
+
+class _HostConfigWithoutCore(HostConfig):
+    """Benchmark the Event Console alone, there is no monitoring core to ask"""
+
+    def _update_cache_after_core_restart(self) -> bool:
+        return True
+
+
+def _make_event_server(
+    omd_root: Path, workers: int, logger: logging.Logger
+) -> tuple[EventServer, EventStatus]:
+    settings = create_settings("benchmark", omd_root, ["mkeventd"])
+    config: Config = make_config(ec.default_config()) | {
+        "rule_packs": [ec.default_rule_pack([_RULE])],
+        "event_limit": ec.EventLimits(by_host=_NO_LIMIT, by_rule=_NO_LIMIT, overall=_NO_LIMIT),
+        "event_processing_workers": workers,
+    }
+    history = SQLiteHistory(
+        SQLiteSettings.from_settings(settings, database=":memory:"),
+        config | {"archive_mode": "sqlite"},
+        logger,
+        StatusTableEvents.columns,
+        StatusTableHistory.columns,
+    )
+    perfcounters = Perfcounters(logger)
+    event_status = EventStatus(settings, config, perfcounters, history, logger)
+    event_server = EventServer(
+        logger,
+        settings,
+        config,
+        default_slave_status_master(),
+        perfcounters,
+        ECLock(logger),
+        history,
+        event_status,
+        StatusTableEvents.columns,
+        False,
+    )
+    event_server.reload_configuration(config, history)
+    event_server.host_config = _HostConfigWithoutCore(logger)
+    return event_server, event_status
+
+
+def _fill(event_status: EventStatus, num_events: int) -> None:
+    now = time.time()
+    for num in range(num_events):
+        event_status.new_event(
+            ec.Event(
+                rule_id=f"rule-{num % 100}",
+                text=f"Something happened {num}",
+                phase="open",
+                count=1,
+                time=now,
+                first=now,
+                last=now,
+                comment="",
+                host=HostName(f"host-{num % 1000}"),
+                core_host=HostName(f"host-{num % 1000}"),
+                host_in_downtime=False,
+                ipaddress="127.0.0.1",
+                application="app",
+                pid=0,
+                priority=3,
+                facility=1,
+                match_groups=(),
+            )
+        )
+
+
+def _measure(num_events: int, num_messages: int, workers: int) -> None:
+    logger = logging.getLogger("benchmark")
+    with tempfile.TemporaryDirectory() as omd_root:
+        event_server, event_status = _make_event_server(Path(omd_root), workers, logger)
+        _fill(event_status, num_events)
+        messages = [
+            f"<11>Jan 1 00:00:00 host-{num % 1000} app: {verdict} on port {num // 2 % 48}".encode()
+            for num in range(num_messages)
+            for verdict in ("ERROR" if num % 2 else "OK",)
+        ]
+        # warm up, this starts the worker processes
+        event_server.process_syslog_messages(messages[:100], None)
+        start = time.perf_counter()
+        event_server.process_syslog_messages(messages, None)
+        elapsed = time.perf_counter() - start
+        event_server.close_pipeline()
+    print(f"{num_events:>8} open events  {num_messages / elapsed:10.0f} messages/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--open-events", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args()
+
+    # The event server wants to know its site, like everything running in a site does.
+    os.environ.setdefault("OMD_SITE", "benchmark")
+    for num_events in args.open_events:
+        _measure(num_events, args.messages, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure queries of the file based history of the Event Console
+
+Run from the root of the repository:
+
+    PYTHONPATH=. python3 doc/benchmark/ec_history_file.py --entries 200000
+
+The history is filled with events of many hosts, then the events of one host
+are queried with and without the index of the history file.
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.history_file import FileHistory
+from cmk.ec.main import make_config, StatusTableEvents, StatusTableHistory
+from cmk.ec.query import QueryGET, StatusTable
+from cmk.ec.settings import create_settings
+
+
+def _query(history: FileHistory, logger: logging.Logger, headers: list[str]) -> int:
+    def get_table(name: str) -> StatusTable:
+        return StatusTableHistory(logger, history)
+
+    query = QueryGET(get_table, ["GET history", *headers], logger)
+    start = time.perf_counter()
+    num_rows = sum(1 for _row in history.get(query))
+    print(f"{' '.join(headers):<40} {num_rows:>6} rows {time.perf_counter() - start:8.3f} s")
+    return num_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=200000)
+    parser.add_argument("--hosts", type=int, default=1000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    with tempfile.TemporaryDirectory() as omd_root:
+        settings = create_settings("benchmark", Path(omd_root), ["mkeventd"])
+        history = FileHistory(
+            settings,
+            make_config(ec.default_config()),
+            logger,
+            StatusTableEvents.columns,
+            StatusTableHistory.columns,
+        )
+        # Hosts appear in bursts, like the events of a host having a problem.
+        for num in range(args.entries):
+            history.add(
+                ec.Event(
+                    id=num,
+                    host=HostName(f"host-{num * args.hosts // args.entries}"),
+                    rule_id=f"rule-{num % 100}",
+                    text=f"Something happened {num}",
+                ),
+                "NEW",
+            )
+        history.close()
+
+        queries = [
+            ["Filter: event_host = host-42"],
+            ["Filter: event_id = 4242"],
+            ["Filter: event_rule_id = rule-42", "Limit: 1000"],
+        ]
+        indexed = [_query(history, logger, headers) for headers in queries]
+        for path in settings.paths.history_dir.value.glob("*.idx"):
+            path.unlink()
+        print("without index:")
+        assert indexed == [_query(history, logger, headers) for headers in queries]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure the SQLite history of the Event Console
+
+Run from the root of the repository:
+
+    PYTHONPATH=. python3 doc/benchmark/ec_history_sqlite.py --rows 10000000
+
+First the rate of single entries added like the event daemon does is measured,
+then the database is filled up to the given number of rows and typical queries
+of the GUI are timed.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.history_sqlite import SQLiteHistory, SQLiteSettings
+from cmk.ec.main import make_config, StatusTableEvents, StatusTableHistory
+from cmk.ec.query import QueryGET, StatusTable
+from cmk.ec.settings import create_settings
+
+_HOSTS = 10000
+_RULES = 1000
+
+
+def _event(num: int) -> ec.Event:
+    return ec.Event(
+        id=num,
+        host=HostName(f"host-{num % _HOSTS}"),
+        rule_id=f"rule-{num % _RULES}",
+        text=f"Something happened {num}",
+        first=float(num),
+        last=float(num),
+    )
+
+
+def _measure_adds(history: SQLiteHistory, num_adds: int) -> None:
+    start = time.perf_counter()
+    for num in range(num_adds):
+        history.add(_event(num), "NEW")
+    history.drain()
+    print(f"add()            {num_adds / (time.perf_counter() - start):10.0f} entries/s")
+
+
+def _fill(history: SQLiteHistory, num_rows: int, start_time: float) -> None:
+    columns = StatusTableEvents.columns
+    batch_size = 10000
+    for first in range(0, num_rows, batch_size):
+        history.add_entries(
+            [
+                [
+                    0,
+                    start_time + num,
+                    "NEW",
+                    "",
+                    "",
+                    *(event.get(name.removeprefix("event_"), default) for name, default in columns),
+                ]
+                for num in range(first, min(num_rows, first + batch_size))
+                for event in (_event(num),)
+            ]
+        )
+
+
+def _measure_query(history: SQLiteHistory, logger: logging.Logger, headers: list[str]) -> None:
+    def get_table(name: str) -> StatusTable:
+        return StatusTableHistory(logger, history)
+
+    query = QueryGET(get_table, ["GET history", *headers], logger)
+    start = time.perf_counter()
+    num_rows = len(list(history.get(query)))
+    elapsed = time.perf_counter() - start
+    print(f"{' '.join(headers):<60} {num_rows:>6} rows {1000 * elapsed:10.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--adds", type=int, default=20000)
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    with tempfile.TemporaryDirectory() as omd_root:
+        settings = create_settings("benchmark", Path(omd_root), ["mkeventd"])
+        history = SQLiteHistory(
+            SQLiteSettings.from_settings(settings, database=Path(omd_root) / "history.sqlite"),
+            make_config(ec.default_config()) | {"archive_mode": "sqlite"},
+            logger,
+            StatusTableEvents.columns,
+            StatusTableHistory.columns,
+        )
+        _measure_adds(history, args.adds)
+
+        start_time = time.time() - args.rows
+        start = time.perf_counter()
+        _fill(history, args.rows, start_time)
+        size = os.stat(Path(omd_root) / "history.sqlite").st_size
+        print(
+            f"filled {args.rows} rows in {time.perf_counter() - start:.0f} s, {size >> 20} MiB",
+        )
+        last_day = start_time + args.rows - 86400
+        for headers in [
+            ["Filter: event_host = host-42"],
+            ["Filter: event_id = 4242"],
+            ["Filter: event_rule_id = rule-42", f"Filter: history_time >= {last_day}"],
+            ["Filter: event_host = host-42", f"Filter: history_time >= {last_day}"],
+            [f"Filter: history_time >= {last_day}", "Limit: 1000"],
+        ]:
+            _measure_query(history, logger, headers)
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
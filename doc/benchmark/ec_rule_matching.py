@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure the rule matching of the Event Console with and without the rule index
+
+Run from the root of the repository:
+
+    PYTHONPATH=. python3 doc/benchmark/ec_rule_matching.py --rules 3000
+
+The rules resemble the ones shipped in MKPs: most of them have conditions on the
+host name or the syslog application, all of them on the message text.
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable, Sequence
+
+from livestatus import SiteId
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.rule_index import RuleIndex
+from cmk.ec.rule_matcher import compile_rule
+
+
+def _make_rules(num_rules: int) -> list[ec.Rule]:
+    rules = []
+    for num in range(num_rules):
+        rule = ec.Rule(id=f"rule-{num}", pack=f"pack-{num // 100}", match=f"error {num}: (.*)")
+        match num % 4:
+            case 0:
+                rule["match_host"] = f"host-{num}"
+            case 1:
+                rule["match_host"] = f"^web-{num}-"
+            case 2:
+                rule["match_application"] = f"^app{num}\\["
+        compile_rule(rule)
+        rules.append(rule)
+    return rules
+
+
+def _make_events(num_rules: int, num_events: int) -> list[ec.Event]:
+    rng = random.Random(42)
+    return [
+        ec.Event(
+            host=HostName(rng.choice([f"host-{num}", f"web-{num}-1", "db-1"])),
+            application=rng.choice([f"app{num}[123]", "sshd"]),
+            text=f"error {num}: something happened",
+            ipaddress="10.0.0.1",
+            facility=1,
+            priority=3,
+        )
+        for num in (rng.randrange(num_rules * 2) for _ in range(num_events))
+    ]
+
+
+def _measure(
+    name: str,
+    events: Sequence[ec.Event],
+    candidates: Callable[[ec.Event], Sequence[ec.Rule]],
+) -> list[list[str]]:
+    matcher = ec.RuleMatcher(None, SiteId("benchmark"), lambda time_period_name: True)
+    matching = []
+    start = time.perf_counter()
+    for event in events:
+        matching.append(
+            [
+                rule["id"]
+                for rule in candidates(event)
+                if isinstance(matcher.event_rule_matches(rule, event), ec.MatchSuccess)
+            ]
+        )
+    elapsed = time.perf_counter() - start
+    print(f"{name:<12} {len(events) / elapsed:10.0f} events/s")
+    return matching
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=3000)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+
+    rules = _make_rules(args.rules)
+    events = _make_events(args.rules, args.events)
+    start = time.perf_counter()
+    rule_index = RuleIndex(rules)
+    print(f"building the index took {1000 * (time.perf_counter() - start):.1f} ms")
+
+    all_rules = _measure("all rules", events, lambda event: rules)
+    indexed = _measure("rule index", events, lambda event: rule_index.candidates(rules, event))
+    assert all_rules == indexed, "the rule index changed the results"
+
+
+if __name__ == "__main__":
+    main()
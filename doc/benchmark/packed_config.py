@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure the startup of the keepalive helpers with the packed configuration
+
+Run from the root of the repository:
+
+    PYTHONPATH=. python3 doc/benchmark/packed_config.py --hosts 10000 50000 100000
+
+A packed configuration resembling the one of a site with the given number of
+hosts is written once in the format of the previous versions and once with the
+rulesets packed separately. Each of them is read by a fresh process, which then
+uses the rulesets of a few checks like a helper checking one host does. The time
+until then and the growth of the peak RSS of the process are reported.
+"""
+
+import argparse
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from cmk.base.config import _PackedRuleset, PackedConfigStore
+
+_RULESETS = 400
+_USED_RULESETS = 10
+
+
+def _rule(num: int, hosts: list[str]) -> dict[str, Any]:
+    return {
+        "id": f"rule-{num}",
+        "value": {"levels": (80.0, 90.0), "average": 15, "description": f"Rule {num}"},
+        "condition": {
+            "host_name": hosts,
+            "host_tags": {"criticality": "prod", "networking": {"$ne": "dmz"}},
+            "service_description": [{"$regex": f"Interface {num}"}],
+        },
+    }
+
+
+def _make_config(num_hosts: int) -> dict[str, Any]:
+    hosts = [f"host-{num}" for num in range(num_hosts)]
+    # Many rules list explicit hosts, so the rulesets grow with the number of hosts.
+    rules_per_ruleset = max(1, num_hosts // 1000)
+    return {
+        "all_hosts": [f"{host}|lan|prod|cmk-agent" for host in hosts],
+        "ipaddresses": {
+            host: f"10.{num >> 16}.{num >> 8 & 255}.{num & 255}" for num, host in enumerate(hosts)
+        },
+        "host_attributes": {host: {"alias": host, "site": "benchmark"} for host in hosts},
+        "host_paths": {
+            host: f"/wato/folder-{num % 100}/hosts.mk" for num, host in enumerate(hosts)
+        },
+        "checkgroup_parameters": {
+            f"ruleset_{ruleset}": [
+                _rule(num, hosts[num * 50 % num_hosts : num * 50 % num_hosts + 50])
+                for num in range(rules_per_ruleset)
+            ]
+            for ruleset in range(_RULESETS)
+        },
+    }
+
+
+def _write(path: Path, helper_config: dict[str, Any], packed: bool) -> None:
+    if packed:
+        PackedConfigStore(path).write(
+            helper_config
+            | {
+                "checkgroup_parameters": {
+                    name: _PackedRuleset.pack(ruleset)
+                    for name, ruleset in helper_config["checkgroup_parameters"].items()
+                }
+            }
+        )
+        return
+    with path.open("wb") as f:
+        pickle.dump(helper_config, f)
+
+
+def _peak_rss() -> int:
+    """The peak RSS in KiB, not inherited from the benchmark like ru_maxrss"""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+    raise RuntimeError("no peak RSS in /proc/self/status")
+
+
+def _load(path: Path) -> None:
+    """Run in a fresh process, like a helper being started"""
+    rss_before = _peak_rss()
+    start = time.perf_counter()
+    helper_config = PackedConfigStore(path).read()
+    rulesets = helper_config["checkgroup_parameters"]
+    for num in range(_USED_RULESETS):
+        for _rule in rulesets[f"ruleset_{num}"]:
+            pass
+    elapsed = time.perf_counter() - start
+    rss = _peak_rss() - rss_before
+    print(f"{elapsed} {rss}")
+
+
+def _measure(path: Path) -> tuple[float, int]:
+    output = subprocess.run(
+        [sys.executable, __file__, "--load", str(path)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(output[0]), int(output[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--load", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.load:
+        _load(args.load)
+        return
+
+    print(f"{'hosts':>8} {'format':<10} {'size':>8} {'startup':>10} {'RSS':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_hosts in args.hosts:
+            helper_config = _make_config(num_hosts)
+            for packed in (False, True):
+                path = Path(tmp_dir) / f"precompiled_check_config_{num_hosts}_{packed}.mk"
+                _write(path, helper_config, packed)
+                elapsed, rss = _measure(path)
+                print(
+                    f"{num_hosts:>8} {'rulesets' if packed else 'pickle':<10}"
+                    f" {path.stat().st_size >> 20:>5} MiB {1000 * elapsed:>7.0f} ms"
+                    f" {rss >> 10:>6} MiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure the computation of the predictions for predictive levels
+
+Run from the root of the repository:
+
+    PYTHONPATH=. python3 doc/benchmark/prediction.py --slices 14 --points 1440
+
+Time slices with some missing values are created like the RRDs return them for the
+days of the horizon. They are summarized point by point like the predictions used
+to be computed and with the arrays. The checks must not import numpy for this,
+which is verified as well.
+"""
+
+import argparse
+import random
+import subprocess
+import sys
+import time
+from collections.abc import Sequence
+
+from cmk.utils.prediction import DataStat
+from cmk.utils.prediction._compute import _data_stats
+
+
+def _slices(num_slices: int, num_points: int) -> list[list[float | None]]:
+    return [
+        [None if random.random() < 0.05 else random.uniform(0, 100) for _ in range(num_points)]
+        for _ in range(num_slices)
+    ]
+
+
+def _data_stats_by_point(slices: Sequence[Sequence[float | None]]) -> list[DataStat | None]:
+    return [
+        (
+            DataStat.from_values(point_line)
+            if (point_line := [x for x in time_column if x is not None])
+            else None
+        )
+        for time_column in zip(*slices)
+    ]
+
+
+def _checks_import_numpy() -> bool:
+    return (
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, cmk.base.checkers; print('numpy' in sys.modules)",
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        == "True"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--slices", type=int, default=14)
+    parser.add_argument("--points", type=int, default=1440)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    slices = _slices(args.slices, args.points)
+    results = []
+    for name, compute in (("by point", _data_stats_by_point), ("arrays", _data_stats)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = compute(slices)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{name:<10} {1000 * elapsed:8.2f} ms")
+        results.append(result)
+
+    for by_point, by_array in zip(*results):
+        assert (by_point is None) == (by_array is None), "the predictions differ"
+        if by_point is not None and by_array is not None:
+            assert all(
+                abs(a - b) < 1e-9 for a, b in zip(by_point[:3], by_array[:3])
+            ), "the predictions differ"
+    assert not _checks_import_numpy(), "the checks import numpy"
+
+
+if __name__ == "__main__":
+    main()
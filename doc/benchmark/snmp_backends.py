@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compare the SNMP backends against a simulated agent on localhost
+
+Run from the root of the repository:
+
+    PYTHONPATH=. python3 doc/benchmark/snmp_backends.py --rows 48 --columns 22
+
+The classic backend is only benchmarked if the Net-SNMP command line tools
+are available.
+"""
+
+import argparse
+import logging
+import shutil
+import time
+from collections.abc import Callable
+
+from tests.testlib.snmp_agent import MIB, SimulatedSNMPAgent
+
+from cmk.utils.hostaddress import HostAddress, HostName
+from cmk.utils.sectionname import SectionName
+
+from cmk.snmplib import (
+    BackendOIDSpec,
+    BackendSNMPTree,
+    get_snmp_table,
+    SNMPBackend,
+    SNMPBackendEnum,
+    SNMPHostConfig,
+    SNMPVersion,
+)
+
+from cmk.fetchers.snmp_backend import ClassicSNMPBackend, NativeSNMPBackend
+from cmk.fetchers.snmp_backend._ber import encode_integer, Tag
+
+_TABLE_BASE = ".1.3.6.1.2.1.2.2.1"
+
+
+def _make_mib(rows: int, columns: int) -> MIB:
+    mib = {}
+    for column in range(1, columns + 1):
+        for row in range(1, rows + 1):
+            oid = (1, 3, 6, 1, 2, 1, 2, 2, 1, column, row)
+            if column % 2:
+                mib[oid] = (Tag.COUNTER32, encode_integer(row * column, Tag.COUNTER32)[2:])
+            else:
+                mib[oid] = (Tag.OCTET_STRING, f"value {column}.{row}".encode())
+    return mib
+
+
+def _make_config(port: int, backend: SNMPBackendEnum) -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName("benchmark"),
+        ipaddress=HostAddress("127.0.0.1"),
+        credentials="public",
+        port=port,
+        bulkwalk_enabled=True,
+        snmp_version=SNMPVersion.V2C,
+        bulk_walk_size_of=10,
+        timing={"timeout": 1, "retries": 1},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=backend,
+    )
+
+
+def _fetch_table(backend: SNMPBackend, columns: int) -> int:
+    table = get_snmp_table(
+        section_name=SectionName("benchmark"),
+        tree=BackendSNMPTree(
+            base=_TABLE_BASE,
+            oids=[BackendOIDSpec(str(c), "string", False) for c in range(1, columns + 1)],
+        ),
+        walk_cache={},
+        backend=backend,
+        log=lambda msg: None,
+    )
+    return len(table)
+
+
+def _measure(name: str, fetch: Callable[[], int], repetitions: int) -> None:
+    rows = fetch()  # warm up
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        fetch()
+    elapsed = (time.perf_counter() - start) / repetitions
+    print(f"{name:<10} {rows:>6} rows  {1000 * elapsed:10.2f} ms per table")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=48)
+    parser.add_argument("--columns", type=int, default=22)
+    parser.add_argument("--repetitions", type=int, default=20)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    with SimulatedSNMPAgent.running(_make_mib(args.rows, args.columns)) as agent:
+        backends: dict[str, SNMPBackend] = {
+            "native": NativeSNMPBackend(_make_config(agent.port, SNMPBackendEnum.NATIVE), logger)
+        }
+        if shutil.which("snmpbulkwalk"):
+            backends["classic"] = ClassicSNMPBackend(
+                _make_config(agent.port, SNMPBackendEnum.CLASSIC), logger
+            )
+        else:
+            print("snmpbulkwalk not found, skipping the classic backend")
+
+        for name, backend in backends.items():
+            _measure(name, lambda b=backend: _fetch_table(b, args.columns), args.repetitions)
+        print(f"agent handled {agent.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
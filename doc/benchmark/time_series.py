@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure the computations on the time series of the graphs
+
+Run from the root of the repository:
+
+    PYTHONPATH=. python3 doc/benchmark/time_series.py --curves 200 --days 400
+
+Time series with some missing values are created like the RRDs of a graph with
+many curves over a long time range return them. They are resampled to a coarser
+and a finer step, combined by the graph operators and merged like the columns of
+translated metrics.
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+from cmk.utils.metrics import MetricName
+
+from cmk.gui.graphing._metric_operation import _time_series_math, Operators
+from cmk.gui.graphing._rrd_fetch import translate_and_merge_rrd_columns
+from cmk.gui.time_series import TimeSeries
+
+_STEP = 300
+_OPERATORS: list[Operators] = ["+", "*", "MAX", "MIN", "AVERAGE", "MERGE"]
+
+
+def _measure(name: str, compute: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    compute()
+    print(f"{name:<32} {1000 * (time.perf_counter() - start):10.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--curves", type=int, default=200)
+    parser.add_argument("--days", type=int, default=400)
+    args = parser.parse_args()
+
+    num_points = args.days * 86400 // _STEP
+    twindow = (0, num_points * _STEP, _STEP)
+    rng = random.Random(42)
+    curves = [
+        [None if rng.random() < 0.05 else rng.uniform(0, 100) for _ in range(num_points)]
+        for _ in range(args.curves)
+    ]
+    print(f"{args.curves} curves of {num_points} points")
+
+    _measure("create", lambda: [TimeSeries(values, twindow) for values in curves])
+    time_series = [TimeSeries(values, twindow) for values in curves]
+    _measure(
+        "downsample",
+        lambda: [ts.downsample((0, twindow[1], 4 * _STEP), "average") for ts in time_series],
+    )
+    _measure(
+        "forward fill",
+        lambda: [ts.forward_fill_resample((0, twindow[1], _STEP // 5)) for ts in time_series[:10]],
+    )
+    for operator_id in _OPERATORS:
+        _measure(f"operator {operator_id}", lambda: _time_series_math(operator_id, time_series))
+    _measure(
+        "merge translated columns",
+        lambda: translate_and_merge_rrd_columns(
+            MetricName("load1"),
+            [(f"rrddata:load1:{num}", [*twindow, *values]) for num, values in enumerate(curves)],
+            {},
+        ),
+    )
+    _measure("values", lambda: [ts.values for ts in time_series])
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,20 @@
 functionality is the locked file opening realized with the File() context
 manager."""
 
+import hashlib
+import importlib.util
 import logging
+import marshal
 import pickle
 import pprint
 import shutil
+import struct
+import time
 from collections.abc import Mapping
 from contextlib import nullcontext
 from pathlib import Path
-from typing import Any
+from types import CodeType
+from typing import Any, Final
 
 from cmk import trace
 from cmk.ccc.exceptions import MKGeneralException, MKTerminate, MKTimeout
@@ -359,3 +365,79 @@ def try_load_file_from_pickle_cache(
 def clear_pickled_files_cache(temp_dir: Path) -> None:
     """Remove all cached pickle files"""
     shutil.rmtree(_pickled_files_cache_dir(temp_dir), ignore_errors=True)
+
+
+def _compiled_files_cache_dir(temp_dir: Path) -> Path:
+    return temp_dir / "compiled_files_cache"
+
+
+# Python version of the code, size and modification time of the source file and hash of its content
+_CODE_CACHE_HEADER: Final = struct.Struct("<4sqq32s")
+# Modifications of a file within this time can't be told apart by the modification time.
+_MTIME_RESOLUTION_NS: Final = 2_000_000_000
+
+
+def load_code_from_file(path: Path, *, temp_dir: Path, root_dir: Path) -> CodeType:
+    """Compile the Python file `path`, using the cached code compiled before if it's still valid
+
+    The compiled code is located in the tmpfs directory under the same relative site path, just as
+    the pickled files of try_load_file_from_pickle_cache(). It is stored with the size,
+    modification time and content hash of the file it was compiled from.
+
+    If size and modification time of the file still match, the cached code is used without even
+    reading the file. Otherwise, or if the file was compiled right after it has been modified
+    (another modification might follow within the resolution of the modification time), the
+    content hash decides.
+    """
+    try:
+        relative_path = path.relative_to(root_dir)  # usually cmk.utils.paths.omd_root
+    except ValueError:
+        return compile(path.read_bytes(), path, "exec")
+
+    code_path = (
+        _compiled_files_cache_dir(temp_dir) / relative_path.parent / (relative_path.name + ".code")
+    )
+    stat = path.stat()
+    try:
+        cached = load_bytes_from_file(code_path)
+    except MKGeneralException:
+        cached = b""
+
+    cached_header = None
+    if len(cached) > _CODE_CACHE_HEADER.size:
+        magic, size, mtime_ns, digest = _CODE_CACHE_HEADER.unpack_from(cached)
+        if magic == importlib.util.MAGIC_NUMBER:
+            cached_header = (size, mtime_ns, digest)
+    if cached_header is not None and cached_header[:2] == (stat.st_size, stat.st_mtime_ns):
+        if (code := _unmarshal_code(cached)) is not None:
+            return code
+
+    source = load_bytes_from_file(path)
+    digest = hashlib.sha256(source).digest()
+    if (
+        cached_header is None
+        or cached_header[2] != digest
+        or (code := _unmarshal_code(cached)) is None
+    ):
+        code = compile(source, path, "exec")
+
+    # Only trust the modification time once the file was left alone for long enough.
+    mtime_ns = stat.st_mtime_ns if time.time_ns() - stat.st_mtime_ns > _MTIME_RESOLUTION_NS else -1
+    header = (stat.st_size, mtime_ns, digest)
+    if header != cached_header:
+        try:
+            code_path.parent.mkdir(exist_ok=True, parents=True)
+            ObjectStore(code_path, serializer=BytesSerializer()).write_obj(
+                _CODE_CACHE_HEADER.pack(importlib.util.MAGIC_NUMBER, *header) + marshal.dumps(code)
+            )
+        except (OSError, MKGeneralException) as e:
+            logger.debug("Cannot cache the code compiled from %s: %s", path, e)
+    return code
+
+
+def _unmarshal_code(cached: bytes) -> CodeType | None:
+    try:
+        code = marshal.loads(cached[_CODE_CACHE_HEADER.size :])  # nosec B302 # BNS:9a7128
+    except (EOFError, ValueError, TypeError):
+        return None
+    return code if isinstance(code, CodeType) else None
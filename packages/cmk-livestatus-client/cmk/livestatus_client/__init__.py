@@ -12,21 +12,24 @@
 from __future__ import annotations
 
 import ast
+import codecs
 import contextlib
+import itertools
 import json
 import os
 import re
 import select
+import selectors
 import socket
 import ssl
 import threading
 import time
-from collections.abc import Callable, Iterator, Sequence
+from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
 from functools import cache
 from io import BytesIO
-from typing import Any, Literal, NamedTuple, NewType, override, TypedDict
+from typing import Any, Literal, NamedTuple, NewType, override, TypedDict, TypeVar
 
 from opentelemetry import trace
 
@@ -167,16 +170,17 @@ class LivestatusTestingError(RuntimeError):
 
 tracer = trace.get_tracer("cmk.livestatus_client")
 
-# TODO: This mechanism does not take different connection options into account
-# Keep a global array of persistent connections
-persistent_connections: dict[str, socket.socket] = {}
-
 # Regular expression for removing Cache: headers if caching is not allowed
 remove_cache_regex = re.compile("\nCache:[^\n]*")
 
 # Pattern for allowed UserId values
 validate_user_id_regex = re.compile(r"^[\w$][-@.+\w$]*$", re.UNICODE)
 
+# Size of the pieces a response is received in when its rows are decoded on the fly
+_RECEIVE_CHUNK_SIZE = 1 << 16
+
+_T = TypeVar("_T")
+
 
 class MKLivestatusException(Exception):
     pass
@@ -295,10 +299,106 @@ def intercept_queries() -> Iterator[list[str]]:
         SingleSiteConnection.collect_queries.queries = []
 
 
+# Connection options a pooled connection has been established with
+_PoolKey = tuple[str, bool, bool, str | None]
+
+
+class ConnectionPool:
+    """The idle persistent connections of the process, shared by all its threads
+
+    A connection is handed out to one user at a time and put back once its responses have been
+    read completely. Connections idle for longer than max_idle seconds are closed. Before a
+    connection is handed out, it is checked not to be readable: an idle connection becomes
+    readable when the site closes it.
+    """
+
+    def __init__(self, max_idle: float = 60.0, max_per_site: int = 8) -> None:
+        self.max_idle = max_idle
+        self.max_per_site = max_per_site
+        self._lock = threading.Lock()
+        # The idle connections with the time they were put back, most recently used last
+        self._idle: dict[_PoolKey, list[tuple[float, socket.socket]]] = {}
+        # The connections of the parent process must not be used by a forked child.
+        os.register_at_fork(after_in_child=self._forget)
+
+    def get(self, key: _PoolKey) -> socket.socket | None:
+        with self._lock:
+            self._evict(time.monotonic())
+            idle = self._idle.get(key, [])
+            while idle:
+                _since, sock = idle.pop()
+                if sock.fileno() != -1 and not is_socket_readable(sock, 0):
+                    return sock
+                _close_quietly(sock)
+        return None
+
+    def put(self, key: _PoolKey, sock: socket.socket) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            idle = self._idle.setdefault(key, [])
+            if len(idle) >= self.max_per_site:
+                _close_quietly(idle.pop(0)[1])
+            idle.append((now, sock))
+
+    def num_idle(self, key: _PoolKey) -> int:
+        with self._lock:
+            return len(self._idle.get(key, []))
+
+    def clear(self) -> None:
+        with self._lock:
+            for idle in self._idle.values():
+                for _since, sock in idle:
+                    _close_quietly(sock)
+            self._idle.clear()
+
+    def _evict(self, now: float) -> None:
+        for key, idle in list(self._idle.items()):
+            while idle and now - idle[0][0] > self.max_idle:
+                _close_quietly(idle.pop(0)[1])
+            if not idle:
+                del self._idle[key]
+
+    def _forget(self) -> None:
+        self._lock = threading.Lock()
+        self._idle = {}
+
+
+def _close_quietly(sock: socket.socket) -> None:
+    try:
+        sock.close()
+    except OSError:
+        pass
+
+
+# Keep the persistent connections of all sites
+connection_pool = ConnectionPool()
+
+
 class Helpers:
     def query(self, query: QueryTypes, add_headers: str = "") -> LivestatusResponse:
         raise NotImplementedError()
 
+    def query_iter(
+        self, query: QueryTypes, add_headers: str = ""
+    ) -> Generator[LivestatusRow, None, None]:
+        """Like query(), but yields the rows while the response is received
+
+        The response is never held in memory as a whole. Stopping the iteration early closes
+        the connection, as the rest of the response can't be skipped otherwise.
+        """
+        raise NotImplementedError()
+
+    def query_many(
+        self, queries: Sequence[QueryTypes], add_headers: str = ""
+    ) -> list[LivestatusResponse]:
+        """Issue independent queries at once and return their responses in the same order
+
+        All queries are sent before the first response is read, so they cost a single round
+        trip instead of one each.
+        """
+        return [self.query(query, add_headers) for query in queries]
+
     def query_value(self, query: QueryTypes, deflt: Any = no_default) -> LivestatusColumn:
         """Issues a query that returns exactly one line and one columns and returns
         the response as a single value"""
@@ -340,14 +440,14 @@ class Helpers:
         of all lines in that column as a single list"""
         normalized_query = Query(query) if not isinstance(query, Query) else query
 
-        return [row[0] for row in self.query(normalized_query, "ColumnHeaders: off\n")]
+        return [row[0] for row in self.query_iter(normalized_query, "ColumnHeaders: off\n")]
 
     def query_column_unique(self, query: QueryTypes) -> set[LivestatusColumn]:
         """Issues a query that returns exactly one column and returns the values
         of all lines with duplicates removed. The "natural order" of the rows is
         not preserved."""
         normalized_query = Query(query) if not isinstance(query, Query) else query
-        return {line[0] for line in self.query(normalized_query, "ColumnHeaders: off\n")}
+        return {line[0] for line in self.query_iter(normalized_query, "ColumnHeaders: off\n")}
 
     def query_table(self, query: QueryTypes) -> LivestatusResponse:
         """Issues a query that may return multiple lines and columns and returns
@@ -374,12 +474,14 @@ class Helpers:
         Adds up results column-wise. This is useful for multisite queries."""
         normalized_query = Query(query) if not isinstance(query, Query) else query
 
-        data = self.query(normalized_query, add_headers)
-        if not data:
+        sums: list[int] | None = None
+        for row in self.query_iter(normalized_query, add_headers):
+            sums = list(row) if sums is None else [a + b for a, b in zip(sums, row)]
+        if sums is None:
             raise MKLivestatusNotFoundError(
                 "No matching entries found for query: Empty result to Stats-Query"
             )
-        return [sum(column) for column in zip(*data)]
+        return sums
 
 
 @cache
@@ -558,6 +660,9 @@ class SingleSiteConnection(Helpers):
         self.timeout: int | None = None
         self.successful_persistence = False
         self._output_format = LivestatusOutputFormat.PYTHON
+        # Responses sent by the site but not read yet. A connection with pending responses
+        # can't be reused.
+        self._pending_responses = 0
 
         # Whether to establish an encrypted connection
         self.tls = tls
@@ -580,18 +685,21 @@ class SingleSiteConnection(Helpers):
         if self.socket:
             self.socket.settimeout(float(timeout))
 
+    @property
+    def _pool_key(self) -> _PoolKey:
+        return (self.socketurl, self.tls, self.tls_verify, self._tls_ca_file_path)
+
     def _try_get_persisted_connection(self) -> socket.socket | None:
-        if self.persist and self.socketurl in persistent_connections:
+        if self.persist and (site_socket := connection_pool.get(self._pool_key)) is not None:
             self.successful_persistence = True
-            return persistent_connections[self.socketurl]
+            return site_socket
         return None
 
     def connect(self) -> None:
         if (site_socket := self._try_get_persisted_connection()) is None:
             site_socket = self._create_new_socket_connection()
-            if self.persist:
-                persistent_connections[self.socketurl] = site_socket
         self.socket = site_socket
+        self._pending_responses = 0
 
     def _create_new_socket_connection(self) -> socket.socket:
         self.successful_persistence = False
@@ -661,23 +769,22 @@ class SingleSiteConnection(Helpers):
         )
 
     def disconnect(self) -> None:
+        """Give up the connection, persistent connections are kept for later use if possible"""
+        if self.persist and self.socket is not None and not self._pending_responses:
+            connection_pool.put(self._pool_key, self.socket)
+            self.socket = None
+            self.successful_persistence = False
+            return
         self._close_socket()
 
     def _close_socket(self) -> None:
         if self.socket is not None:
-            try:
-                self.socket.close()
-            except OSError:
-                pass
-
+            _close_quietly(self.socket)
             self.socket = None
 
+        self._pending_responses = 0
         if self.persist:
             self.successful_persistence = False
-            try:
-                del persistent_connections[self.socketurl]
-            except KeyError:
-                pass
 
     def receive_data(self, size: int, timeout: float | None = None) -> bytes:
         if self.socket is None:
@@ -703,6 +810,29 @@ class SingleSiteConnection(Helpers):
 
         return data.getvalue()
 
+    def receive_chunks(self, size: int, timeout: float) -> Iterator[bytes]:
+        """Yield the next size bytes from the socket in pieces while they are received
+
+        Other than with receive_data(), the timeout applies to each piece: The consumer may
+        take its time between the pieces.
+        """
+        if self.socket is None:
+            raise MKLivestatusSocketError("Socket to '%s' is not connected" % self.socketurl)
+
+        self.socket.settimeout(timeout)
+        while size > 0:
+            if not is_socket_readable(self.socket, timeout):
+                raise MKLivestatusSocketError(
+                    f"{timeout}s while reading data from socket. Missing data: {size} bytes"
+                )
+            packet = self.socket.recv(min(size, _RECEIVE_CHUNK_SIZE))
+            if not packet:
+                raise MKLivestatusSocketClosed(
+                    "Read zero data from socket, remote peer closed connection."
+                )
+            size -= len(packet)
+            yield packet
+
     def do_query(self, query: Query, add_headers: str = "") -> LivestatusResponse:
         with (
             tracer.start_as_current_span(
@@ -726,6 +856,14 @@ class SingleSiteConnection(Helpers):
                 self.disconnect()
                 raise
 
+    def build_queries(self, queries: Sequence[Query], add_headers: str) -> list[str]:
+        """Build the queries in the output format each of them supports"""
+        str_queries = []
+        for query in queries:
+            with _livestatus_output_format_switcher(query, self):
+                str_queries.append(self.build_query(query, add_headers))
+        return str_queries
+
     def build_query(self, query_obj: Query, add_headers: str) -> str:
         # Prevent injection of further livestatus commands inside AuthUser header.
         if "\n" in self.auth_header[:-1]:
@@ -747,6 +885,10 @@ class SingleSiteConnection(Helpers):
         return _combine_query(query, headers)
 
     def send_query(self, query: str, do_reconnect: bool = True) -> None:
+        self.send_queries([query], do_reconnect)
+
+    def send_queries(self, queries: Sequence[str], do_reconnect: bool = True) -> None:
+        """Send the queries at once, their responses are read one after the other"""
         if self.socket is None:
             self.connect()
 
@@ -754,62 +896,110 @@ class SingleSiteConnection(Helpers):
             raise MKLivestatusSocketError("Socket to '%s' is not connected" % self.socketurl)
 
         try:
-            self.socket.sendall(query.encode("utf-8") + b"\n\n")
+            self.socket.sendall(b"".join(query.encode("utf-8") + b"\n\n" for query in queries))
+            self._pending_responses += len(queries)
             if getattr(self.collect_queries, "active", False):
-                self.collect_queries.queries.append(query)
+                self.collect_queries.queries.extend(queries)
         except OSError as e:
             self._close_socket()
 
             if do_reconnect:
                 # Automatically try to reconnect in case of an error, but only once.
                 self.connect()
-                self.send_query(query, False)
+                self.send_queries(queries, False)
                 return
 
             raise MKLivestatusSocketError("RC1:" + str(e))
 
-    # Reads a response from the livestatus socket. If the socket is closed
-    # by the livestatus server, we automatically make a reconnect and send
-    # the query again (once). This is due to timeouts during keepalive.
     def receive_raw_response(
         self,
         query: str,
         suppress_exceptions: tuple[type[Exception], ...],
         timeout_at: float | None = None,
     ) -> bytes:
-        try:
-            # Headers are always ASCII encoded
-            resp = self.receive_data(16)
-            code = resp[0:3].decode("ascii")
+        return self._receive_with_reconnect(
+            self._receive_raw_response, [query], suppress_exceptions, timeout_at
+        )
+
+    def receive_response_length(
+        self, query: str, suppress_exceptions: tuple[type[Exception], ...]
+    ) -> int:
+        """Receive the header of a successful response, leaving its data in the socket"""
+        return self._receive_with_reconnect(
+            self._receive_response_length, [query], suppress_exceptions, None
+        )
+
+    def receive_responses(
+        self, str_queries: Sequence[str], queries: Sequence[Query]
+    ) -> list[LivestatusResponse]:
+        """Receive the responses to queries sent at once with send_queries()
+
+        The response to a query failing with one of its suppressed exceptions is empty. When the
+        site closes the connection in between, the queries not answered yet are sent again.
+        """
+        responses = []
+        for pos, query in enumerate(queries):
             try:
-                length = int(resp[4:15].lstrip())
-            except Exception:
-                self.disconnect()
-                raise MKLivestatusSocketError(
-                    f"Malformed response header {resp!r}. Livestatus TCP socket might be "
-                    "unreachable or wrong encryption settings are used."
+                raw_response = self._receive_with_reconnect(
+                    self._receive_raw_response, str_queries[pos:], query.suppress_exceptions, None
                 )
+            except query.suppress_exceptions:
+                responses.append(LivestatusResponse([]))
+                continue
+            responses.append(self.parse_raw_response(raw_response, query))
+        return responses
+
+    def _receive_raw_response(self) -> bytes:
+        length = self._receive_response_length()
+        # Apply a lower timeout for the content because the data is already available
+        # in the socket. The liveproxyd (same system) has the complete data available
+        # while the data from a standard connection can still take some time.
+        # 30 seconds should be more than enough for the maximum telegram size of 100MB
+        raw_response = self.receive_data(length, 30)
+        self._pending_responses -= 1
+        return raw_response
+
+    def _receive_response_length(self) -> int:
+        # Headers are always ASCII encoded
+        resp = self.receive_data(16)
+        code = resp[0:3].decode("ascii")
+        try:
+            length = int(resp[4:15].lstrip())
+        except Exception:
+            self.disconnect()
+            raise MKLivestatusSocketError(
+                f"Malformed response header {resp!r}. Livestatus TCP socket might be "
+                "unreachable or wrong encryption settings are used."
+            )
 
-            # Apply a lower timeout for the content because the data is already available
-            # in the socket. The liveproxyd (same system) has the complete data available
-            # while the data from a standard connection can still take some time.
-            # 30 seconds should be more than enough for the maximum telegram size of 100MB
-            data = self.receive_data(length, 30)
+        if code == "200":
+            return length
 
-            if code == "200":
-                return data
+        error_info = self.receive_data(length, 30).decode("utf-8")
+        self._pending_responses -= 1
+        if code == "404":
+            raise MKLivestatusTableNotFoundError(f"Not Found ({code}): {error_info!r}")
 
-            error_info = data.decode("utf-8")
-            if code == "404":
-                raise MKLivestatusTableNotFoundError(f"Not Found ({code}): {error_info!r}")
+        if code == "413":
+            raise MKLivestatusPayloadTooLargeError(error_info)
 
-            if code == "413":
-                raise MKLivestatusPayloadTooLargeError(error_info)
+        if code == "502":
+            raise MKLivestatusBadGatewayError(error_info)
 
-            if code == "502":
-                raise MKLivestatusBadGatewayError(error_info)
+        raise MKLivestatusQueryError(f"{code}: {error_info}")
 
-            raise MKLivestatusQueryError(f"{code}: {error_info}")
+    # Reads a response from the livestatus socket. If the socket is closed
+    # by the livestatus server, we automatically make a reconnect and send
+    # the query again (once). This is due to timeouts during keepalive.
+    def _receive_with_reconnect(
+        self,
+        receive: Callable[[], _T],
+        queries: Sequence[str],
+        suppress_exceptions: tuple[type[Exception], ...],
+        timeout_at: float | None,
+    ) -> _T:
+        try:
+            return receive()
 
         except (MKLivestatusSocketClosed, OSError) as e:
             # In case of an IO error or the other side having
@@ -834,9 +1024,11 @@ class SingleSiteConnection(Helpers):
 
                 time.sleep(0.1)
                 self.connect()
-                self.send_query(query)
+                self.send_queries(queries)
                 # do not send query again -> danger of infinite loop
-                return self.receive_raw_response(query, suppress_exceptions, timeout_at)
+                return self._receive_with_reconnect(
+                    receive, queries, suppress_exceptions, timeout_at
+                )
             raise MKLivestatusSocketError(str(e))
 
         except suppress_exceptions:
@@ -849,6 +1041,21 @@ class SingleSiteConnection(Helpers):
             # FIXME: ? self.disconnect()
             raise MKLivestatusSocketError("Unhandled exception: %s" % e)
 
+    def receive_rows(self, length: int, query: Query) -> Iterator[LivestatusRow]:
+        """Yield the rows of a response of the given length while they are received
+
+        The connection is closed when the rows are not consumed completely: The rest of the
+        response would still be waiting in the socket.
+        """
+        complete = False
+        try:
+            yield from _decode_rows(self.receive_chunks(length, 30), query.supports_json_format())
+            complete = True
+            self._pending_responses -= 1
+        finally:
+            if not complete:
+                self.disconnect()
+
     def parse_raw_response(self, raw_response: bytes, query: Query) -> LivestatusResponse:
         data = raw_response.decode("utf-8")
         try:
@@ -892,6 +1099,57 @@ class SingleSiteConnection(Helpers):
                 row.insert(0, b"")
         return response
 
+    @override
+    def query_iter(
+        self, query: QueryTypes, add_headers: str = ""
+    ) -> Generator[LivestatusRow, None, None]:
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+
+        if self.limit is not None:
+            normalized_query = Query(
+                "%sLimit: %d\n" % (normalized_query, self.limit),
+                normalized_query.suppress_exceptions,
+            )
+
+        with _livestatus_output_format_switcher(normalized_query, self):
+            str_query = self.build_query(normalized_query, add_headers)
+        self.send_query(str_query)
+        length = self.receive_response_length(str_query, normalized_query.suppress_exceptions)
+        for row in self.receive_rows(length, normalized_query):
+            if self.prepend_site:
+                row.insert(0, b"")
+            yield row
+
+    @override
+    def query_many(
+        self, queries: Sequence[QueryTypes], add_headers: str = ""
+    ) -> list[LivestatusResponse]:
+        normalized_queries = [Query(q) if not isinstance(q, Query) else q for q in queries]
+        if self.limit is not None:
+            add_headers += "Limit: %d\n" % self.limit
+
+        with tracer.start_as_current_span(
+            "query_many",
+            kind=trace.SpanKind.CLIENT,
+            attributes={
+                "cmk.livestatus.target_site_id": str(self.site_name),
+            },
+        ):
+            str_queries = self.build_queries(normalized_queries, add_headers)
+            self.send_queries(str_queries)
+            try:
+                responses = self.receive_responses(str_queries, normalized_queries)
+            finally:
+                # The responses to the rest of the batch would be read by the next query.
+                if self._pending_responses:
+                    self._close_socket()
+
+        if self.prepend_site:
+            for response in responses:
+                for row in response:
+                    row.insert(0, b"")
+        return responses
+
     def command(
         self,
         command: str,
@@ -992,6 +1250,7 @@ class MultiSiteConnection(Helpers):
         self.prepend_site = False
         self.only_sites: OnlySites = None
         self.limit: int | None = None
+        self.deadline: float | None = None
         self.parallelize = True
         self._only_sites_postprocess = only_sites_postprocess
 
@@ -1168,6 +1427,10 @@ class MultiSiteConnection(Helpers):
         """Impose Limit on number of returned datasets (distributed among sites)"""
         self.limit = limit
 
+    def set_deadline(self, deadline: float | None = None) -> None:
+        """Consider sites dead which don't answer a parallel query within deadline seconds"""
+        self.deadline = deadline
+
     def dead_sites(self) -> dict[SiteId, DeadSite]:
         return self.deadsites
 
@@ -1247,14 +1510,11 @@ class MultiSiteConnection(Helpers):
         The semantics differs in the handling of Limit: since all sites are queried in parallel, the
         Limit: is simply applied to all sites - resulting in possibly more results then Limit
         requests.
+
+        The answers are read and parsed in the order the sites send them, so a slow site does not
+        hold back the others. Sites not answering within the deadline are considered dead.
         """
-        stillalive = []
-        if self.only_sites is not None:
-            connect_to_sites = [c for c in self.connections if c[0] in self.only_sites]
-            # Unused sites are assumed to be alive
-            stillalive.extend([c for c in self.connections if c[0] not in self.only_sites])
-        else:
-            connect_to_sites = self.connections
+        stillalive, connect_to_sites = self._sites_to_query()
 
         with tracer.start_as_current_span(
             "query_parallel", attributes={"cmk.livestatus.query": str(query)}
@@ -1267,15 +1527,170 @@ class MultiSiteConnection(Helpers):
                 limit_header="Limit: %d\n" % self.limit if self.limit is not None else "",
             )
 
-            # Then retrieve all raw responses. We will be as slow as the slowest of all connections.
-            site_responses = self._retrieve_responses(query, retrieve_responses, stillalive)
+            # Then read and parse the responses as they come in. We will be as slow as the
+            # slowest of all connections, or the deadline.
+            site_rows = self._collect_responses(query, retrieve_responses)
 
-            # Convert responses to python format
-            result = self._parse_responses(query, site_responses, stillalive)
+        # Keep the order of the sites, regardless of the order of their answers
+        result: list[LivestatusRow] = []
+        for _str_query, _span, connected_site in retrieve_responses:
+            if (rows := site_rows.get(connected_site.id)) is not None:
+                stillalive.append(connected_site)
+                result.extend(rows)
 
         self.connections = stillalive
         return LivestatusResponse(result)
 
+    @override
+    def query_iter(
+        self, query: QueryTypes, add_headers: str = ""
+    ) -> Generator[LivestatusRow, None, None]:
+        """Like query(), but yields the rows while the responses are received
+
+        All sites are queried in parallel, their rows are yielded site by site in the order the
+        sites answer, so a slow site does not hold back the others. A site failing in the middle
+        of its response is considered dead, its rows yielded so far stay valid though.
+        """
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+        stillalive, connect_to_sites = self._sites_to_query()
+
+        # Not made the current span: the rows are yielded to the caller while it is open.
+        query_span = tracer.start_span(
+            "query_iter", attributes={"cmk.livestatus.query": str(normalized_query)}
+        )
+        with trace.use_span(query_span), _livestatus_output_format_switcher(normalized_query, self):
+            retrieve_responses = self._send_queries(
+                normalized_query,
+                add_headers,
+                connect_to_sites,
+                limit_header="Limit: %d\n" % self.limit if self.limit is not None else "",
+            )
+
+        readable = self._iter_readable(retrieve_responses, lambda entry: entry[2])
+        try:
+            for str_query, request_span, connected_site in readable:
+                connection = connected_site.connection
+                receive_span = tracer.start_span(
+                    f"receive_from_site[{connected_site.id}]",
+                    context=trace.set_span_in_context(query_span),
+                    kind=trace.SpanKind.CONSUMER,
+                    links=[trace.Link(request_span.get_span_context())],
+                    attributes={
+                        "cmk.livestatus.query": str_query,
+                        "cmk.livestatus.target_site_id": str(connected_site.id),
+                    },
+                )
+                try:
+                    length = connection.receive_response_length(
+                        str_query, normalized_query.suppress_exceptions
+                    )
+                    for row in connection.receive_rows(length, normalized_query):
+                        if self.prepend_site:
+                            row.insert(0, connected_site.id)
+                        yield row
+                except normalized_query.suppress_exceptions:
+                    pass
+                except LivestatusTestingError:
+                    raise
+                except Exception as e:
+                    self._mark_dead(connected_site, e)
+                    continue
+                finally:
+                    receive_span.end()
+                stillalive.append(connected_site)
+        finally:
+            readable.close()
+            answered = {connected_site.id for connected_site in stillalive}
+            for _str_query, _request_span, connected_site in retrieve_responses:
+                if connected_site.id not in answered and connected_site.id not in self.deadsites:
+                    # The iteration was stopped before the answer of this site was read.
+                    connected_site.connection.disconnect()
+                    stillalive.append(connected_site)
+            # Keep the order of the sites, regardless of the order of their answers
+            alive = {connected_site.id for connected_site in stillalive}
+            self.connections = [c for c in self.connections if c.id in alive]
+            query_span.end()
+
+    @override
+    def query_many(
+        self, queries: Sequence[QueryTypes], add_headers: str = ""
+    ) -> list[LivestatusResponse]:
+        """Like query() for each of the queries, but all of them are sent to a site at once
+
+        The sites are queried in parallel and their answers are read in the order they come
+        in. A site failing to answer any of the queries is considered dead and contributes to
+        none of the responses.
+        """
+        normalized_queries = [Query(q) if not isinstance(q, Query) else q for q in queries]
+        stillalive, connect_to_sites = self._sites_to_query()
+        limit_header = "Limit: %d\n" % self.limit if self.limit is not None else ""
+
+        with tracer.start_as_current_span(
+            "query_many", attributes={"cmk.livestatus.queries": len(normalized_queries)}
+        ):
+            sent: list[tuple[list[str], trace.Span, ConnectedSite]] = []
+            for connected_site in connect_to_sites:
+                with tracer.start_as_current_span(
+                    f"send_query_to_site[{connected_site.id}]",
+                    kind=trace.SpanKind.PRODUCER,
+                    attributes={"cmk.livestatus.target_site_id": str(connected_site.id)},
+                ) as span:
+                    try:
+                        str_queries = connected_site.connection.build_queries(
+                            normalized_queries, add_headers + limit_header
+                        )
+                        connected_site.connection.send_queries(str_queries)
+                        sent.append((str_queries, span, connected_site))
+                    except LivestatusTestingError:
+                        raise
+                    except Exception as e:
+                        self._mark_dead(connected_site, e)
+
+            site_responses: dict[SiteId, Sequence[LivestatusResponse]] = {}
+            for str_queries, request_span, connected_site in self._iter_readable(
+                sent, lambda entry: entry[2]
+            ):
+                with tracer.start_as_current_span(
+                    f"receive_from_site[{connected_site.id}]",
+                    kind=trace.SpanKind.CONSUMER,
+                    links=[trace.Link(request_span.get_span_context())],
+                    attributes={"cmk.livestatus.target_site_id": str(connected_site.id)},
+                ):
+                    try:
+                        site_responses[connected_site.id] = (
+                            connected_site.connection.receive_responses(
+                                str_queries, normalized_queries
+                            )
+                        )
+                    except LivestatusTestingError:
+                        raise
+                    except Exception as e:
+                        self._mark_dead(connected_site, e)
+
+        # Keep the order of the sites, regardless of the order of their answers
+        responses = [LivestatusResponse([]) for _query in normalized_queries]
+        for _str_queries, _span, connected_site in sent:
+            if (answers := site_responses.get(connected_site.id)) is None:
+                continue
+            for response, site_response in zip(responses, answers):
+                if self.prepend_site:
+                    for row in site_response:
+                        row.insert(0, connected_site.id)
+                response.extend(site_response)
+            stillalive.append(connected_site)
+
+        self.connections = stillalive
+        return responses
+
+    def _sites_to_query(self) -> tuple[ConnectedSites, ConnectedSites]:
+        """The sites not to be queried, which are assumed to be alive, and the ones to query"""
+        if self.only_sites is None:
+            return [], self.connections
+        return (
+            [c for c in self.connections if c.id not in self.only_sites],
+            [c for c in self.connections if c.id in self.only_sites],
+        )
+
     def _send_queries(
         self, query: Query, add_headers: str, connect_to_sites: ConnectedSites, limit_header: str
     ) -> list[tuple[str, trace.Span, ConnectedSite]]:
@@ -1304,14 +1719,58 @@ class MultiSiteConnection(Helpers):
                     }
         return retrieve_responses
 
-    def _retrieve_responses(
+    def _iter_readable(
+        self, entries: Sequence[_T], site_of: Callable[[_T], ConnectedSite]
+    ) -> Generator[_T, None, None]:
+        """The entries in the order their sites answer
+
+        Livestatus sends the response header only after the whole response has been computed,
+        so once the socket of a site is readable, its response can be read completely without
+        waiting for the site any longer. Sites not answering within the deadline are marked dead.
+        """
+        timeout_at = None if self.deadline is None else time.monotonic() + self.deadline
+        with selectors.DefaultSelector() as selector:
+            for entry in entries:
+                site_socket = site_of(entry).connection.socket
+                assert site_socket is not None
+                selector.register(site_socket, selectors.EVENT_READ, entry)
+
+            while waiting := list(selector.get_map().values()):
+                # Data already decrypted by an SSL socket is not seen by select()
+                ready = [key for key in waiting if _has_pending_data(key.fileobj)]
+                if not ready:
+                    ready = [
+                        key
+                        for key, _events in selector.select(
+                            None if timeout_at is None else max(timeout_at - time.monotonic(), 0)
+                        )
+                    ]
+                if not ready:
+                    for key in waiting:
+                        selector.unregister(key.fileobj)
+                        self._mark_dead(
+                            site_of(key.data),
+                            MKLivestatusSocketError(
+                                f"No response within the deadline of {self.deadline} seconds"
+                            ),
+                        )
+                    return
+
+                for key in ready:
+                    # Unregister first: receiving may reconnect and replace the socket.
+                    selector.unregister(key.fileobj)
+                    yield key.data
+
+    def _collect_responses(
         self,
         query: Query,
         retrieve_responses: list[tuple[str, trace.Span, ConnectedSite]],
-        stillalive: ConnectedSites,
-    ) -> list[tuple[ConnectedSite, bytes]]:
-        site_responses: list[tuple[ConnectedSite, bytes]] = []
-        for str_query, request_span, connected_site in retrieve_responses:
+    ) -> dict[SiteId, list[LivestatusRow]]:
+        """Wait for the sites to answer and parse each answer as soon as it comes in"""
+        site_rows: dict[SiteId, list[LivestatusRow]] = {}
+        for str_query, request_span, connected_site in self._iter_readable(
+            retrieve_responses, lambda entry: entry[2]
+        ):
             with tracer.start_as_current_span(
                 f"receive_from_site[{connected_site.id}]",
                 kind=trace.SpanKind.CONSUMER,
@@ -1322,55 +1781,34 @@ class MultiSiteConnection(Helpers):
                 },
             ):
                 try:
-                    site_responses.append(
-                        (
-                            connected_site,
-                            connected_site.connection.receive_raw_response(
-                                str_query, query.suppress_exceptions
-                            ),
-                        )
+                    rows = connected_site.connection.parse_raw_response(
+                        connected_site.connection.receive_raw_response(
+                            str_query, query.suppress_exceptions
+                        ),
+                        query,
                     )
                 except query.suppress_exceptions:
                     # Mostly handles exception types MKLivestatusTableNotFoundError
-                    stillalive.append(connected_site)
+                    site_rows[connected_site.id] = []
                     continue
                 except LivestatusTestingError:
                     raise
                 except Exception as e:
-                    connected_site.connection.disconnect()
-                    self.deadsites[connected_site.id] = {
-                        "exception": e,
-                        "site": connected_site.config,
-                    }
-        return site_responses
+                    self._mark_dead(connected_site, e)
+                    continue
 
-    def _parse_responses(
-        self,
-        query: Query,
-        site_responses: list[tuple[ConnectedSite, bytes]],
-        stillalive: ConnectedSites,
-    ) -> list[LivestatusRow]:
-        result: list[LivestatusRow] = []
-        for connected_site, raw_response in site_responses:
-            try:
-                rows = connected_site.connection.parse_raw_response(raw_response, query)
-                stillalive.append(connected_site)
-                if self.prepend_site:
-                    for row in rows:
-                        row.insert(0, connected_site.id)
-                result.extend(rows)
-            except query.suppress_exceptions:
-                stillalive.append(connected_site)
-                continue
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                connected_site.connection.disconnect()
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
-        return result
+            if self.prepend_site:
+                for row in rows:
+                    row.insert(0, connected_site.id)
+            site_rows[connected_site.id] = rows
+        return site_rows
+
+    def _mark_dead(self, connected_site: ConnectedSite, exception: Exception) -> None:
+        connected_site.connection.disconnect()
+        self.deadsites[connected_site.id] = {
+            "exception": exception,
+            "site": connected_site.config,
+        }
 
     def command(self, command: str, sitename: SiteId | None = SiteId("local")) -> None:
         if sitename in self.deadsites:
@@ -1499,11 +1937,103 @@ def _combine_query(query: str, headers: str | list[str]) -> str:
     return query + "\n" + headers
 
 
+_NON_WHITESPACE = re.compile(r"\S")
+# The tokens needed to find the end of a row in the Python output format. A quote not being part
+# of a string means the string is not complete yet.
+_PYTHON_ROW_TOKEN = re.compile(
+    r"""[\[\](){}]|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|["']""", re.DOTALL
+)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _parse_json_row(text: str, pos: int) -> tuple[LivestatusRow, int] | None:
+    try:
+        return _JSON_DECODER.raw_decode(text, pos)
+    except json.JSONDecodeError:
+        return None
+
+
+def _parse_python_row(text: str, pos: int) -> tuple[LivestatusRow, int] | None:
+    depth = 0
+    for match in _PYTHON_ROW_TOKEN.finditer(text, pos):
+        token = match.group()
+        if token in ("[", "(", "{"):
+            depth += 1
+        elif token in ("]", ")", "}"):
+            depth -= 1
+            if depth == 0:
+                return ast.literal_eval(text[pos : match.end()]), match.end()
+        elif len(token) == 1:
+            return None
+    return None
+
+
+def _decode_rows(chunks: Iterable[bytes], json_format: bool) -> Iterator[LivestatusRow]:
+    """Decode the rows of a response while it is received
+
+    Only the part of the response not decoded yet is kept, so the memory needed is bound by the
+    size of the largest row instead of the size of the whole response.
+
+    >>> list(_decode_rows([b'[["a", 1], ["\\xc3', b'\\xa4", 2', b']]\\n'], json_format=True))
+    [['a', 1], ['ä', 2]]
+    >>> list(_decode_rows([b"[['a]', (1, 2)],\\n['b', {}]]", b"\\n"], json_format=False))
+    [['a]', (1, 2)], ['b', {}]]
+    """
+    parse_row = _parse_json_row if json_format else _parse_python_row
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    # What comes next: "start", "first" row, "row", "next" row or "end"
+    state = "start"
+    # Don't parse an incomplete row again until its text has doubled in size.
+    retry_size = 0
+    for chunk in itertools.chain(chunks, [None]):
+        text += text_decoder.decode(chunk or b"", final=chunk is None)
+        pos = 0
+        while match := _NON_WHITESPACE.search(text, pos):
+            pos = match.start()
+            char = match.group()
+            if state == "start" and char == "[":
+                state = "first"
+                pos += 1
+            elif state in ("first", "next") and char == "]":
+                state = "end"
+                pos += 1
+            elif state == "next" and char == ",":
+                state = "row"
+                pos += 1
+            elif state in ("first", "row") and char == "[":
+                if chunk is not None and len(text) - pos < retry_size:
+                    break
+                try:
+                    parsed = parse_row(text, pos)
+                except (ValueError, SyntaxError):
+                    raise MKLivestatusQueryError("Malformed raw response output")
+                if parsed is None:
+                    retry_size = 2 * (len(text) - pos)
+                    break
+                row, pos = parsed
+                retry_size = 0
+                state = "next"
+                yield row
+            else:
+                raise MKLivestatusQueryError("Malformed raw response output")
+        else:
+            pos = len(text)
+        text = text[pos:]
+
+    if state != "end":
+        raise MKLivestatusQueryError("Malformed raw response output")
+
+
+def _has_pending_data(sock: object) -> bool:
+    return isinstance(sock, ssl.SSLSocket) and sock.pending() > 0
+
+
 def is_socket_readable(sock: socket.socket, select_timeout: float = 1.0) -> bool:
     # SSL sockets may not return any fileno in the select, since the data lingers around in pending
     # https://stackoverflow.com/questions/3187565/select-and-ssl-in-python
     # https://stackoverflow.com/questions/40346619/behavior-of-pythons-select-with-partial-recv-on-ssl-socket/40347469#40347469
-    if isinstance(sock, ssl.SSLSocket) and sock.pending():
+    if _has_pending_data(sock):
         return True
     fd_sets = select.select([sock], [], [], select_timeout)
     return sock in fd_sets[0]
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""A tiny simulated SNMP v1/v2c agent serving a static MIB over UDP on localhost"""
+
+import bisect
+import socket
+import threading
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from typing import Final, Self
+
+from cmk.fetchers.snmp_backend._ber import (
+    decode_integer,
+    decode_pdu,
+    decode_tlv,
+    encode_integer,
+    encode_octet_string,
+    encode_pdu,
+    encode_sequence,
+    EXCEPTION_TAGS,
+    PDU,
+    PDUType,
+    Tag,
+    VarBind,
+)
+
+MIB = Mapping[tuple[int, ...], tuple[int, bytes]]
+
+
+class SimulatedSNMPAgent:
+    def __init__(self, mib: MIB, *, community: bytes = b"public") -> None:
+        self._oids: Final = sorted(mib)
+        self._mib: Final = dict(mib)
+        self._community: Final = community
+        self._socket: Final = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(("127.0.0.1", 0))
+        self._socket.settimeout(0.1)
+        self._stop: Final = threading.Event()
+        self._thread: Final = threading.Thread(target=self._serve, daemon=True)
+        self.requests = 0
+
+    @property
+    def port(self) -> int:
+        return int(self._socket.getsockname()[1])
+
+    @classmethod
+    @contextmanager
+    def running(cls, mib: MIB, *, community: bytes = b"public") -> Iterator[Self]:
+        agent = cls(mib, community=community)
+        agent._thread.start()
+        try:
+            yield agent
+        finally:
+            agent._stop.set()
+            agent._thread.join()
+            agent._socket.close()
+
+    def _serve(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data, addr = self._socket.recvfrom(65535)
+            except TimeoutError:
+                continue
+            self.requests += 1
+            if (response := self._respond(data)) is not None:
+                self._socket.sendto(response, addr)
+
+    def _respond(self, data: bytes) -> bytes | None:
+        _tag, begin, end = decode_tlv(data)
+        _tag, version_begin, pos = decode_tlv(data, begin)
+        version = data[version_begin:pos]
+        _tag, community_begin, pos = decode_tlv(data, pos)
+        if data[community_begin:pos] != self._community:
+            return None
+        request = decode_pdu(data[pos:end])
+        varbinds = self._varbinds(request)
+        response = PDU(PDUType.RESPONSE, request.request_id, 0, 0, varbinds)
+        if decode_integer(version) == 0:
+            # SNMPv1 has no exception values, it reports noSuchName instead
+            for idx, varbind in enumerate(varbinds):
+                if varbind.tag in EXCEPTION_TAGS:
+                    response = PDU(
+                        PDUType.RESPONSE, request.request_id, 2, idx + 1, request.varbinds
+                    )
+                    break
+        return encode_sequence(
+            encode_integer(decode_integer(version)),
+            encode_octet_string(self._community),
+            encode_pdu(response),
+        )
+
+    def _varbinds(self, request: PDU) -> list[VarBind]:
+        match request.type:
+            case PDUType.GET:
+                return [
+                    VarBind(vb.oid, *self._mib.get(vb.oid, (Tag.NO_SUCH_OBJECT, b"")))
+                    for vb in request.varbinds
+                ]
+            case PDUType.GET_NEXT:
+                return [self._next(vb.oid) for vb in request.varbinds]
+            case PDUType.GET_BULK:
+                non_repeaters, max_repetitions = request.error_status, request.error_index
+                varbinds = [self._next(vb.oid) for vb in request.varbinds[:non_repeaters]]
+                repeaters = [vb.oid for vb in request.varbinds[non_repeaters:]]
+                for _ in range(max_repetitions):
+                    if not repeaters:
+                        break
+                    step = [self._next(oid) for oid in repeaters]
+                    varbinds += step
+                    repeaters = [vb.oid for vb in step]
+                    if all(vb.tag == Tag.END_OF_MIB_VIEW for vb in step):
+                        break
+                return varbinds
+        return []
+
+    def _next(self, oid: tuple[int, ...]) -> VarBind:
+        index = bisect.bisect_right(self._oids, oid)
+        if index >= len(self._oids):
+            return VarBind(oid, Tag.END_OF_MIB_VIEW, b"")
+        next_oid = self._oids[index]
+        return VarBind(next_oid, *self._mib[next_oid])
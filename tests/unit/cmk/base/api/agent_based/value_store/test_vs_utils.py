@@ -5,7 +5,6 @@
 
 from ast import literal_eval
 from pathlib import Path
-from unittest.mock import Mock
 
 import pytest
 
@@ -79,25 +78,14 @@ class Test_DynamicDiskSyncedMapping:
 
 
 class Test_StaticDiskSyncedMapping:
-    def _mock_load(self, mocker):
-        stored_item_states = (
+    @staticmethod
+    def _write_stored(tmp_path: Path) -> None:
+        # written by older versions: a single line without newline
+        (tmp_path / "test-host").write_text(
             '{("check1", None, "stored-user-key-1"): 23,'
             ' ("check2", "item", "stored-user-key-2"): 42}'
         )
 
-        mocker.patch.object(
-            store,
-            "load_text_from_file",
-            side_effect=lambda *a, **kw: stored_item_states,
-        )
-
-    def _mock_store(self, mocker):
-        mocker.patch.object(
-            store,
-            "save_text_to_file",
-            autospec=True,
-        )
-
     @staticmethod
     def _get_sdsm(
         tmp_path: Path,
@@ -109,8 +97,8 @@ class Test_StaticDiskSyncedMapping:
             deserializer=literal_eval,
         )
 
-    def test_mapping_features(self, mocker: Mock, tmp_path: Path) -> None:
-        self._mock_load(mocker)
+    def test_mapping_features(self, tmp_path: Path) -> None:
+        self._write_stored(tmp_path)
         sdsm = self._get_sdsm(tmp_path)
         assert sdsm.get(("check_no", None, "moo")) is None
         with pytest.raises(KeyError):
@@ -125,10 +113,8 @@ class Test_StaticDiskSyncedMapping:
         ]
         assert len(sdsm) == 2
 
-    def test_store(self, mocker: Mock, tmp_path: Path) -> None:
-        self._mock_load(mocker)
-        self._mock_store(mocker)
-
+    def test_store(self, tmp_path: Path) -> None:
+        self._write_stored(tmp_path)
         sdsm = self._get_sdsm(tmp_path)
 
         sdsm.disksync(
@@ -140,9 +126,77 @@ class Test_StaticDiskSyncedMapping:
             ("check1", None, "stored-user-key-1"): 23,
             ("check3", "el Barto", "Ay caramba"): "ASDF",
         }
-        written = store.save_text_to_file.call_args.args[1]  # type: ignore[attr-defined]
-        assert written == repr(expected_values)
+        # the file of the older version is rewritten
+        header, values = (tmp_path / "test-host").read_text().splitlines()
+        assert header.startswith("# generation ")
+        assert values == repr(expected_values)
         assert list(sdsm.items()) == list(expected_values.items())
+        assert list(self._get_sdsm(tmp_path).items()) == list(expected_values.items())
+
+    def test_store_appends_changes(self, tmp_path: Path) -> None:
+        self._get_sdsm(tmp_path).disksync(updated=[(("check1", None, "key"), 1)])
+        sdsm = self._get_sdsm(tmp_path)
+
+        sdsm.disksync(
+            removed={("check1", None, "key"), ("check1", None, "unknown")},
+            updated=[(("check2", None, "key"), 2)],
+        )
+        sdsm.disksync(updated=[(("check2", None, "key"), 2), (("check3", None, "key"), 3)])
+
+        assert (tmp_path / "test-host").read_text().splitlines()[1:] == [
+            repr({("check1", None, "key"): 1}),
+            repr({("check1", None, "key"): None, ("check2", None, "key"): 2}),
+            repr({("check3", None, "key"): 3}),
+        ]
+        expected_values = {("check2", None, "key"): 2, ("check3", None, "key"): 3}
+        assert dict(sdsm) == expected_values
+        assert dict(self._get_sdsm(tmp_path)) == expected_values
+
+    def test_store_compacts_changes(self, tmp_path: Path) -> None:
+        sdsm = self._get_sdsm(tmp_path)
+        for value in range(2000):
+            sdsm.disksync(updated=[(("check", None, "key"), value)])
+
+        assert len((tmp_path / "test-host").read_bytes()) < 17000
+        assert dict(self._get_sdsm(tmp_path)) == {("check", None, "key"): 1999}
+
+    def test_load_changes_of_others(self, tmp_path: Path) -> None:
+        sdsm = self._get_sdsm(tmp_path)
+        other = self._get_sdsm(tmp_path)
+
+        other.disksync(updated=[(("check1", None, "key"), 1)])
+        sdsm.disksync(updated=[(("check2", None, "key"), 2)])
+        other.disksync(removed={("check2", None, "key")})
+        sdsm.disksync()
+
+        assert dict(sdsm) == dict(other) == {("check1", None, "key"): 1}
+
+    def test_ignore_incomplete_line(self, tmp_path: Path) -> None:
+        self._get_sdsm(tmp_path).disksync(updated=[(("check1", None, "key"), 1)])
+        with (tmp_path / "test-host").open("a") as file:
+            file.write('{("check1", None, "key"): ')
+
+        sdsm = self._get_sdsm(tmp_path)
+        assert dict(sdsm) == {("check1", None, "key"): 1}
+
+        sdsm.disksync(updated=[(("check2", None, "key"), 2)])
+        assert (tmp_path / "test-host").read_text().splitlines()[1:] == [
+            repr({("check1", None, "key"): 1, ("check2", None, "key"): 2})
+        ]
+
+    def test_load_compacted_file_with_same_inode(self, tmp_path: Path) -> None:
+        sdsm = self._get_sdsm(tmp_path)
+        sdsm.disksync(updated=[(("check1", None, "key"), 1)])
+        path = tmp_path / "test-host"
+        size = path.stat().st_size
+        # Another process has compacted the file, the new one got the inode of the old one.
+        expected_values = {("check2", None, "key"): "x" * 100}
+        path.write_text(f"# generation 0123456789abcdef\n{expected_values!r}\n")
+        assert path.stat().st_size > size
+
+        sdsm.disksync()
+
+        assert dict(sdsm) == expected_values
 
 
 class Test_DiskSyncedMapping:
@@ -5,6 +5,8 @@
 
 # pylint: disable=protected-access
 
+import signal
+import threading
 import time
 from collections.abc import Iterable, Mapping
 from typing import Literal
@@ -14,10 +16,16 @@ from pytest import MonkeyPatch
 
 from tests.testlib.base import Scenario
 
+from cmk.ccc.exceptions import MKTimeout
+
+from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.hostaddress import HostName
 
+from cmk.fetchers import Fetcher, Mode
+from cmk.fetchers.filecache import NoCache
+
 from cmk.checkengine.checkresults import ServiceCheckResult, SubmittableServiceCheckResult
-from cmk.checkengine.fetcher import HostKey, SourceType
+from cmk.checkengine.fetcher import FetcherType, HostKey, SourceInfo, SourceType
 from cmk.checkengine.parameters import TimespecificParameters, TimespecificParameterSet
 
 from cmk.base import checkers, config
@@ -186,6 +194,107 @@ def test_config_cache_get_clustered_service_node_keys_clustered(monkeypatch: Mon
     )
 
 
+class _SleepingFetcher(Fetcher[AgentRawData]):
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _fetch_from_io(self, mode: Mode) -> AgentRawData:
+        time.sleep(self.delay)
+        return AgentRawData(b"<<<delay>>>\n%r" % self.delay)
+
+
+def test_fetch_concurrently() -> None:
+    delays = [0.2, 0.1, 0.2]
+    jobs: list[tuple[SourceInfo, NoCache, Fetcher]] = [
+        (
+            SourceInfo(
+                HostName("heute"), None, f"source{num}", FetcherType.PROGRAM, SourceType.HOST
+            ),
+            NoCache(),
+            _SleepingFetcher(delay),
+        )
+        for num, delay in enumerate(delays)
+    ]
+
+    start = time.monotonic()
+    fetched = checkers._fetch_concurrently(jobs, mode=Mode.CHECKING, max_workers=3)
+    elapsed = time.monotonic() - start
+
+    assert [(source_info.ident, raw_data.ok) for source_info, raw_data, _duration in fetched] == [
+        ("source0", b"<<<delay>>>\n0.2"),
+        ("source1", b"<<<delay>>>\n0.1"),
+        ("source2", b"<<<delay>>>\n0.2"),
+    ]
+    assert elapsed < sum(delays)
+    # The durations add up to the time spent fetching, not to the sum of the latencies.
+    total = sum(duration.process.elapsed for _info, _data, duration in fetched)
+    assert total == pytest.approx(elapsed, abs=0.05)
+
+
+def test_fetch_concurrently_leaves_running_fetches_on_timeout() -> None:
+    jobs: list[tuple[SourceInfo, NoCache, Fetcher]] = [
+        (
+            SourceInfo(
+                HostName("heute"), None, f"source{num}", FetcherType.PROGRAM, SourceType.HOST
+            ),
+            NoCache(),
+            _SleepingFetcher(delay),
+        )
+        for num, delay in enumerate([2.0, 2.0, 0.0])
+    ]
+
+    def _raise_timeout(signum: int, frame: object) -> None:
+        raise MKTimeout("Timed out")
+
+    previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, 0.2)
+    start = time.monotonic()
+    try:
+        with pytest.raises(MKTimeout):
+            checkers._fetch_concurrently(jobs, mode=Mode.CHECKING, max_workers=2)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+    assert time.monotonic() - start < 1
+    # The interpreter doesn't wait for the fetches still running when exiting.
+    fetchers = [thread for thread in threading.enumerate() if thread.name.startswith("fetcher")]
+    assert fetchers
+    assert all(thread.daemon for thread in fetchers)
+
+
+@pytest.mark.parametrize(
+    "hostname, result",
+    [
+        (HostName("testhost1"), 2),
+        (HostName("testhost2"), 4),
+    ],
+)
+def test_max_concurrent_fetches(monkeypatch: MonkeyPatch, hostname: HostName, result: int) -> None:
+    ts = Scenario()
+    ts.add_host(hostname)
+    ts.set_option("max_concurrent_fetches", 2)
+    ts.set_ruleset(
+        "max_concurrent_fetches_per_host",
+        [
+            {
+                "id": "01",
+                "condition": {"host_name": [HostName("testhost2")]},
+                "value": 4,
+                "options": {},
+            }
+        ],
+    )
+    config_cache = ts.apply(monkeypatch)
+    assert config_cache.max_concurrent_fetches(hostname) == result
+
+
 def test_only_from_injection() -> None:
     p_config = checkers.PostprocessingConfig(
         only_from=lambda: ["1.2.3.4"],
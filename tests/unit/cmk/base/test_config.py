@@ -6,6 +6,7 @@
 # pylint: disable=protected-access
 
 import itertools
+import pickle
 import re
 import shutil
 import socket
@@ -3000,6 +3001,23 @@ class TestPackedConfigStore:
         assert precompiled_check_config.exists()
         assert store.read() == {"abc": 1}
 
+    def test_packed_rulesets(self, store: config.PackedConfigStore) -> None:
+        rules: list[RuleSpec[object]] = [{"id": "1", "value": 42, "condition": {}}]
+        store.write({"checkgroup_parameters": {"if": config._PackedRuleset.pack(rules)}})
+
+        ruleset = store.read()["checkgroup_parameters"]["if"]
+
+        assert isinstance(ruleset, config._PackedRuleset)
+        assert len(ruleset) == 1
+        assert ruleset == rules
+        assert list(ruleset) == rules
+
+    def test_read_previous_format(self, store: config.PackedConfigStore) -> None:
+        store.path.parent.mkdir(parents=True, exist_ok=True)
+        store.path.write_bytes(pickle.dumps({"abc": 1}))
+
+        assert store.read() == {"abc": 1}
+
 
 def test__extract_check_plugins(monkeypatch: MonkeyPatch) -> None:
     duplicate_legacy_plugin = LegacyCheckDefinition(
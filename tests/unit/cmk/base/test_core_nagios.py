@@ -26,13 +26,16 @@ import cmk.ccc.version as cmk_version
 from cmk.utils import paths
 from cmk.utils.config_path import VersionedConfigPath
 from cmk.utils.hostaddress import HostAddress, HostName
+from cmk.utils.rulesets.ruleset_matcher import RuleSpec
 
 from cmk.checkengine.checking import CheckPluginName
 from cmk.checkengine.discovery import AutocheckEntry
 
 from cmk.base import config, core_nagios
-from cmk.base.api.agent_based.plugin_classes import CheckPlugin
+from cmk.base.api.agent_based.plugin_classes import CheckPlugin, LegacyPluginLocation
 from cmk.base.api.agent_based.register import AgentBasedPlugins
+from cmk.base.config import ConfigCache
+from cmk.base.core_nagios import _precompile_host_checks
 
 from cmk.discover_plugins import PluginLocation
 from cmk.server_side_calls.v1 import ActiveCheckCommand, ActiveCheckConfig
@@ -452,6 +455,145 @@ def test_dump_precompiled_hostcheck_not_existing_host(
     assert host_check is None
 
 
+def _precompile_scenario(monkeypatch: MonkeyPatch, hostnames: Sequence[HostName]) -> ConfigCache:
+    ts = Scenario()
+    for num, hostname in enumerate(hostnames):
+        ts.add_host(hostname, ipaddress=HostAddress(f"127.0.0.{num + 1}"))
+        ts.set_autochecks(hostname, [AutocheckEntry(CheckPluginName("uptime"), None, {}, {})])
+    return ts.apply(monkeypatch)
+
+
+def test_precompile_hostchecks_reuses_unchanged_hosts(monkeypatch: MonkeyPatch) -> None:
+    hostnames = [HostName("host1"), HostName("host2")]
+    config_cache = _precompile_scenario(monkeypatch, hostnames)
+    plugins = _make_plugins_for_test()
+    determined: list[HostName] = []
+    make_needed_plugins_locations = _precompile_host_checks._make_needed_plugins_locations
+
+    def _make_needed_plugins_locations(
+        config_cache: ConfigCache, hostname: HostName, plugins: AgentBasedPlugins
+    ) -> tuple[list[PluginLocation], list[str]]:
+        determined.append(hostname)
+        return make_needed_plugins_locations(config_cache, hostname, plugins)
+
+    monkeypatch.setattr(
+        _precompile_host_checks, "_make_needed_plugins_locations", _make_needed_plugins_locations
+    )
+
+    for serial in (42, 43):
+        config_path = VersionedConfigPath(serial)
+        with config_path.create(is_cmc=True):
+            _precompile_host_checks.precompile_hostchecks(
+                config_path,
+                config_cache,
+                plugins,
+                precompile_mode=core_nagios.PrecompileMode.DELAYED,
+            )
+        assert determined == hostnames
+        assert core_nagios.HostCheckStore.host_check_file_path(config_path, hostnames[1]).exists()
+
+    # The changed autochecks of the second host are not mocked, but change its fingerprint.
+    Path(paths.autochecks_dir).mkdir(parents=True, exist_ok=True)
+    Path(paths.autochecks_dir, "host2.mk").write_text("[]\n")
+    determined.clear()
+    _precompile_host_checks.precompile_hostchecks(
+        VersionedConfigPath(44),
+        config_cache,
+        plugins,
+        precompile_mode=core_nagios.PrecompileMode.DELAYED,
+    )
+    assert determined == [HostName("host2")]
+
+
+def test_precompile_hostchecks_rule_of_single_host(monkeypatch: MonkeyPatch) -> None:
+    hostnames = [HostName("host1"), HostName("host2")]
+    plugins = _make_plugins_for_test()
+    determined: list[HostName] = []
+    make_needed_plugins_locations = _precompile_host_checks._make_needed_plugins_locations
+
+    def _make_needed_plugins_locations(
+        config_cache: ConfigCache, hostname: HostName, plugins: AgentBasedPlugins
+    ) -> tuple[list[PluginLocation], list[str]]:
+        determined.append(hostname)
+        return make_needed_plugins_locations(config_cache, hostname, plugins)
+
+    monkeypatch.setattr(
+        _precompile_host_checks, "_make_needed_plugins_locations", _make_needed_plugins_locations
+    )
+
+    def _precompile(serial: int, host_groups: Sequence[RuleSpec[str]]) -> VersionedConfigPath:
+        ts = Scenario()
+        for num, hostname in enumerate(hostnames):
+            ts.add_host(hostname, ipaddress=HostAddress(f"127.0.0.{num + 1}"))
+            ts.set_autochecks(hostname, [AutocheckEntry(CheckPluginName("uptime"), None, {}, {})])
+        ts.set_ruleset("host_groups", host_groups)
+        config_cache = ts.apply(monkeypatch)
+        config_path = VersionedConfigPath(serial)
+        with config_path.create(is_cmc=True):
+            _precompile_host_checks.precompile_hostchecks(
+                config_path,
+                config_cache,
+                plugins,
+                precompile_mode=core_nagios.PrecompileMode.INSTANT,
+            )
+        return config_path
+
+    first = _precompile(42, [])
+    assert determined == hostnames
+
+    determined.clear()
+    second = _precompile(43, [])
+    assert not determined
+    # The compiled host checks of the unchanged hosts are linked, not compiled again.
+    for hostname in hostnames:
+        assert os.path.samefile(
+            core_nagios.HostCheckStore.host_check_file_path(first, hostname),
+            core_nagios.HostCheckStore.host_check_file_path(second, hostname),
+        )
+
+    determined.clear()
+    _precompile(44, [{"id": "01", "condition": {"host_name": ["host1"]}, "value": "linux"}])
+    assert determined == [HostName("host1")]
+
+
+def test_precompile_hostchecks_in_workers(monkeypatch: MonkeyPatch) -> None:
+    hostnames = [HostName(f"host{num}") for num in range(4)]
+    config_cache = _precompile_scenario(monkeypatch, hostnames)
+    monkeypatch.setattr(_precompile_host_checks, "_HOSTS_PER_WORKER", 2)
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    config_path = VersionedConfigPath(42)
+
+    _precompile_host_checks.precompile_hostchecks(
+        config_path,
+        config_cache,
+        _make_plugins_for_test(),
+        precompile_mode=core_nagios.PrecompileMode.DELAYED,
+    )
+
+    for hostname in hostnames:
+        assert core_nagios.HostCheckStore.host_check_file_path(config_path, hostname).exists()
+    assert set(core_nagios.HostCheckStore().read_needed_plugins(config_path)) == set(hostnames)
+
+
+def test_host_check_fingerprint_changes_with_plugin_source(tmp_path: Path) -> None:
+    source = tmp_path / "my_check.py"
+    source.write_text("check_info = {}\n")
+    uptime = _make_plugins_for_test().check_plugins[CheckPluginName("uptime")]
+    plugins = AgentBasedPlugins(
+        agent_sections={},
+        snmp_sections={},
+        check_plugins={uptime.name: uptime._replace(location=LegacyPluginLocation(str(source)))},
+        inventory_plugins={},
+    )
+    fingerprint = _precompile_host_checks._HostCheckFingerprints._common_fingerprint(plugins)
+    assert fingerprint is not None
+
+    source.write_text("check_info = {'my_check': None}\n")
+    assert (
+        _precompile_host_checks._HostCheckFingerprints._common_fingerprint(plugins) != fingerprint
+    )
+
+
 MOCK_PLUGIN = ActiveCheckConfig(
     name="my_active_check",
     parameter_parser=lambda x: x,
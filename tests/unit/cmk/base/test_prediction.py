@@ -7,6 +7,7 @@
 
 import datetime
 import math
+import os
 import time
 from collections.abc import Callable, Sequence
 from pathlib import Path
@@ -15,7 +16,9 @@ from zoneinfo import ZoneInfo
 import pytest
 import time_machine
 
-from cmk.utils.prediction import _grouping, _prediction, DataStat, PredictionStore
+from cmk.utils.prediction import _compute, _grouping, DataStat, PredictionData, PredictionStore
+
+from cmk.agent_based.prediction_backend import PredictionInfo, PredictionParameters
 
 Timestamp = int
 
@@ -206,7 +209,7 @@ def approx(value_in: float) -> float:
 def test_data_stats(
     slices: list[Sequence[float | None]], result: Sequence[DataStat | None]
 ) -> None:
-    assert _prediction._data_stats(slices) == result
+    assert _compute._data_stats(slices) == result
 
 
 class TestPredictionStore:
@@ -235,3 +238,37 @@ class TestPredictionStore:
         assert stillok_hour.exists()
         assert not too_old_minute.exists()
         assert stillok_minute.exists()
+
+    @staticmethod
+    def _meta(now: float) -> PredictionInfo:
+        return PredictionInfo.make(
+            "util",
+            "upper",
+            PredictionParameters(period="day", horizon=10, levels=("absolute", (1.0, 2.0))),
+            now,
+        )
+
+    def test_iter_all_valid_predictions(self, tmp_path: Path) -> None:
+        now = time.time()
+        store = PredictionStore(tmp_path)
+        meta = self._meta(now)
+        prediction = PredictionData(points=[DataStat(1.0, 0.0, 2.0, 0.5)], start=0, step=60)
+        store.save_info(meta)
+        assert not store.has_prediction(meta)
+        assert list(store.iter_all_valid_predictions(now)) == [(meta, None)]
+
+        store.save_prediction(meta, prediction)
+        assert store.has_prediction(meta)
+        assert list(store.iter_all_valid_predictions(now)) == [(meta, prediction)]
+
+    def test_prediction_older_than_info(self, tmp_path: Path) -> None:
+        now = time.time()
+        store = PredictionStore(tmp_path)
+        meta = self._meta(now)
+        store.save_info(meta)
+        store.save_prediction(meta, PredictionData(points=[None], start=0, step=60))
+        info_file = Path(store.meta_file_path_template.format(meta=meta))
+        os.utime(info_file, (now + 1, now + 1))
+
+        assert not store.has_prediction(meta)
+        assert list(store.iter_all_valid_predictions(now)) == [(meta, None)]
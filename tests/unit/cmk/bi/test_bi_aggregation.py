@@ -3,13 +3,18 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import copy
+from typing import Any
+
 import pytest
 
 from livestatus import LivestatusResponse, SiteId
 
 from cmk.bi.actions import BICallARuleAction
 from cmk.bi.aggregation import BIAggregation
+from cmk.bi.computer import BIComputationCache
 from cmk.bi.data_fetcher import BIStatusFetcher, BIStructureFetcher
+from cmk.bi.lib import NodeResultBundle
 from cmk.bi.packs import BIAggregationPacks
 from cmk.bi.searcher import BISearcher
 
@@ -83,3 +88,113 @@ def test_compute_aggregation(
     assert actual_result.acknowledged == expected_acknowledgment
     assert actual_result.in_downtime == expected_in_downtime
     assert actual_result.in_service_period == expected_service_period
+
+
+def _results(bundles: list[NodeResultBundle]) -> list[tuple[Any, ...]]:
+    return [
+        (
+            bundle.instance.serialize(),
+            bundle.actual_result,
+            bundle.assumed_result,
+            _results(bundle.nested_results),
+        )
+        for bundle in bundles
+    ]
+
+
+def test_compute_aggregation_with_cache(
+    bi_packs_sample_config: BIAggregationPacks,
+    bi_structure_fetcher: BIStructureFetcher,
+    bi_searcher: BISearcher,
+    bi_status_fetcher: BIStatusFetcher,
+) -> None:
+    bi_structure_fetcher.add_site_data(SiteId("heute"), sample_config.bi_structure_states)
+    bi_searcher.set_hosts(bi_structure_fetcher.hosts)
+    bi_aggregation = bi_packs_sample_config.get_aggregation("default_aggregation")
+    assert bi_aggregation is not None
+    cache = BIComputationCache()
+
+    computations: list[tuple[Any, int, int]] = [
+        (sample_config.bi_status_rows, 0, 2),
+        (sample_config.bi_status_rows, 2, 2),
+        (sample_config.bi_acknowledgment_status_rows, 2, 4),
+        (sample_config.bi_downtime_status_rows, 3, 5),
+        (sample_config.bi_downtime_status_rows, 5, 5),
+    ]
+    for status_rows, hits, misses in computations:
+        # Each computation gets its own compiled aggregation, like every GUI request.
+        compiled_aggregation = bi_aggregation.compile(bi_searcher)
+        bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(status_rows)
+
+        assert _results(
+            cache.compute_branches(
+                compiled_aggregation, compiled_aggregation.branches, bi_status_fetcher
+            )
+        ) == _results(
+            compiled_aggregation.compute_branches(compiled_aggregation.branches, bi_status_fetcher)
+        )
+        assert (cache.hits, cache.misses) == (hits, misses)
+
+    cache.invalidate_on_change("recompiled")
+    cache.compute_branches(compiled_aggregation, compiled_aggregation.branches, bi_status_fetcher)
+    assert (cache.hits, cache.misses) == (5, 7)
+
+
+def _with_changed_outputs(status_rows: LivestatusResponse) -> LivestatusResponse:
+    changed = copy.deepcopy(status_rows)
+    for row in changed:
+        row[5] = "new host output"
+        for service in row[9]:
+            service[3] = "new service output"
+    return changed
+
+
+def test_compute_aggregation_with_cache_ignores_outputs(
+    bi_packs_sample_config: BIAggregationPacks,
+    bi_structure_fetcher: BIStructureFetcher,
+    bi_searcher: BISearcher,
+    bi_status_fetcher: BIStatusFetcher,
+) -> None:
+    bi_structure_fetcher.add_site_data(SiteId("heute"), sample_config.bi_structure_states)
+    bi_searcher.set_hosts(bi_structure_fetcher.hosts)
+    bi_aggregation = bi_packs_sample_config.get_aggregation("default_aggregation")
+    assert bi_aggregation is not None
+    compiled_aggregation = bi_aggregation.compile(bi_searcher)
+    cache = BIComputationCache()
+
+    for status_rows in [
+        sample_config.bi_status_rows,
+        _with_changed_outputs(sample_config.bi_status_rows),
+    ]:
+        bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(status_rows)
+        cache.compute_branches(
+            compiled_aggregation, compiled_aggregation.branches, bi_status_fetcher
+        )
+    assert cache.statistics() == {"hits": 2, "misses": 2, "reused_subtrees": 0}
+
+
+def test_compute_aggregation_with_cache_same_titles(
+    bi_packs_sample_config: BIAggregationPacks,
+    bi_structure_fetcher: BIStructureFetcher,
+    bi_searcher: BISearcher,
+    bi_status_fetcher: BIStatusFetcher,
+) -> None:
+    bi_structure_fetcher.add_site_data(SiteId("heute"), sample_config.bi_structure_states)
+    bi_searcher.set_hosts(bi_structure_fetcher.hosts)
+    bi_aggregation = bi_packs_sample_config.get_aggregation("default_aggregation")
+    assert bi_aggregation is not None
+    compiled_aggregation = bi_aggregation.compile(bi_searcher)
+    first, second = compiled_aggregation.branches
+    second.properties.title = first.properties.title
+    bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(sample_config.bi_status_rows)
+    cache = BIComputationCache()
+
+    for _computation in range(2):
+        assert _results(
+            cache.compute_branches(
+                compiled_aggregation, compiled_aggregation.branches, bi_status_fetcher
+            )
+        ) == _results(
+            compiled_aggregation.compute_branches(compiled_aggregation.branches, bi_status_fetcher)
+        )
+    assert (cache.hits, cache.misses) == (2, 2)
@@ -768,3 +768,67 @@ def test_non_blocking_decorated_locking_while_already_locked(
         assert result is False
         assert store.have_lock(path) is False
     assert store.have_lock(path) is False
+
+
+def _exec_code(code: types.CodeType) -> dict[str, object]:
+    namespace: dict[str, object] = {}
+    exec(code, namespace, namespace)  # nosec B102 # BNS:aee528
+    return {k: v for k, v in namespace.items() if k != "__builtins__"}
+
+
+def test_load_code_from_file_caches_code(tmp_path: Path) -> None:
+    source = tmp_path / "root" / "etc" / "rules.mk"
+    source.parent.mkdir(parents=True)
+    source.write_text("x = 1\n")
+    os.utime(source, ns=(0, 0))
+    cached = tmp_path / "tmp" / "compiled_files_cache" / "etc" / "rules.mk.code"
+
+    code = store.load_code_from_file(source, temp_dir=tmp_path / "tmp", root_dir=tmp_path / "root")
+
+    assert _exec_code(code) == {"x": 1}
+    assert code.co_filename == str(source)
+    assert cached.exists()
+
+    # Size and modification time still match: the file is not even read.
+    source.write_text("x = 2\n")
+    os.utime(source, ns=(0, 0))
+    assert _exec_code(
+        store.load_code_from_file(source, temp_dir=tmp_path / "tmp", root_dir=tmp_path / "root")
+    ) == {"x": 1}
+
+
+def test_load_code_from_file_invalidates_cache(tmp_path: Path) -> None:
+    source = tmp_path / "root" / "rules.mk"
+    source.parent.mkdir(parents=True)
+    source.write_text("x = 1\n")
+    store.load_code_from_file(source, temp_dir=tmp_path / "tmp", root_dir=tmp_path / "root")
+
+    # Same size, modified right after it has been compiled
+    source.write_text("x = 2\n")
+
+    assert _exec_code(
+        store.load_code_from_file(source, temp_dir=tmp_path / "tmp", root_dir=tmp_path / "root")
+    ) == {"x": 2}
+
+
+def test_load_code_from_file_broken_cache(tmp_path: Path) -> None:
+    source = tmp_path / "root" / "rules.mk"
+    source.parent.mkdir(parents=True)
+    source.write_text("x = 1\n")
+    store.load_code_from_file(source, temp_dir=tmp_path / "tmp", root_dir=tmp_path / "root")
+    cached = tmp_path / "tmp" / "compiled_files_cache" / "rules.mk.code"
+    cached.write_bytes(cached.read_bytes()[:-4])
+
+    assert _exec_code(
+        store.load_code_from_file(source, temp_dir=tmp_path / "tmp", root_dir=tmp_path / "root")
+    ) == {"x": 1}
+
+
+def test_load_code_from_file_outside_root(tmp_path: Path) -> None:
+    source = tmp_path / "rules.mk"
+    source.write_text("x = 1\n")
+
+    assert _exec_code(
+        store.load_code_from_file(source, temp_dir=tmp_path / "tmp", root_dir=tmp_path / "root")
+    ) == {"x": 1}
+    assert not (tmp_path / "tmp").exists()
@@ -16,7 +16,17 @@ import cmk.utils.paths
 from cmk.utils.hostaddress import HostName
 
 from cmk.checkengine.checking import CheckPluginName
-from cmk.checkengine.discovery import AutocheckEntry, AutocheckServiceWithNodes, AutochecksStore
+from cmk.checkengine.discovery import (
+    AutocheckEntry,
+    AutocheckServiceWithNodes,
+    AutochecksIndex,
+    AutochecksManager,
+    AutochecksStore,
+    convert_autochecks,
+)
+from cmk.checkengine.discovery._autochecks import (
+    _AutochecksMarshalSerializer as AutochecksMarshalSerializer,
+)
 from cmk.checkengine.discovery._autochecks import _AutochecksSerializer as AutochecksSerializer
 from cmk.checkengine.discovery._autochecks import _consolidate_autochecks_of_real_hosts
 from cmk.checkengine.discovery._utils import DiscoveredItem
@@ -55,6 +65,18 @@ class TestAutochecksSerializer:
         assert AutochecksSerializer.deserialize(serial) == obj
 
 
+def test_marshal_serializer() -> None:
+    obj = [
+        AutocheckEntry(CheckPluginName("norris"), None, {}, {}),
+        AutocheckEntry(
+            CheckPluginName("chuck"), "abc", {"levels": (1.0, 2.0)}, {"kick": "round house"}
+        ),
+    ]
+    assert (
+        AutochecksMarshalSerializer.deserialize(AutochecksMarshalSerializer.serialize(obj)) == obj
+    )
+
+
 def _entries() -> Sequence[AutocheckEntry]:
     return [AutocheckEntry(CheckPluginName("norris"), "abc", {}, {})]
 
@@ -72,6 +94,81 @@ class TestAutochecksStore:
         store.write(_entries())
         assert store.read() == _entries()
 
+    def test_write_read_marshalled(self) -> None:
+        store = AutochecksStore(HostName("herbert"), marshalled=True)
+        store.write(_entries())
+        assert not store.path.read_bytes().startswith(b"[")
+        assert AutochecksStore(HostName("herbert")).read() == _entries()
+
+    def test_unmarshallable_parameters_stay_readable(self) -> None:
+        store = AutochecksStore(HostName("herbert"), marshalled=True)
+        entries = [AutocheckEntry(CheckPluginName("norris"), None, {"x": HostName("a")}, {})]
+        store.write(entries)
+        assert store.path.read_bytes().startswith(b"[")
+        assert store.read() == entries
+
+
+def test_convert_autochecks() -> None:
+    hostnames = [HostName("herbert"), HostName("erna")]
+    for hostname in hostnames:
+        AutochecksStore(hostname).write(_entries())
+
+    assert convert_autochecks(marshalled=True) == 2
+    assert AutochecksIndex().path.exists()
+    # New files are written in the marshal format, too.
+    AutochecksStore(HostName("new")).write(_entries())
+    for hostname in [*hostnames, HostName("new")]:
+        assert not AutochecksStore(hostname).path.read_bytes().startswith(b"[")
+        assert AutochecksStore(hostname).read() == _entries()
+
+    assert convert_autochecks(marshalled=False) == 3
+    assert not AutochecksIndex().path.exists()
+    for hostname in [*hostnames, HostName("new")]:
+        assert AutochecksStore(hostname).path.read_bytes().startswith(b"[")
+        assert AutochecksStore(hostname).read() == _entries()
+
+
+def test_manager_uses_index(monkeypatch: pytest.MonkeyPatch) -> None:
+    AutochecksStore(HostName("herbert")).write(_entries())
+    AutochecksStore(HostName("erna")).write(_entries())
+    convert_autochecks(marshalled=True)
+    changed = [AutocheckEntry(CheckPluginName("norris"), "changed", {}, {})]
+    AutochecksStore(HostName("erna")).path.write_text(
+        "[\n  {'check_plugin_name': 'norris', 'item': 'changed', 'parameters': {}, 'service_labels': {}},\n]\n"
+    )
+
+    def _read_fails(self: AutochecksStore) -> Sequence[AutocheckEntry]:
+        raise AssertionError("not read from the index")
+
+    read = AutochecksStore.read
+    monkeypatch.setattr(AutochecksStore, "read", _read_fails)
+    manager = AutochecksManager()
+    assert manager.get_autochecks(HostName("herbert")) == _entries()
+    assert manager.get_autochecks(HostName("unknown")) == []
+
+    # The autochecks of changed hosts are read from their file.
+    monkeypatch.setattr(AutochecksStore, "read", read)
+    assert manager.get_autochecks(HostName("erna")) == changed
+
+
+def test_index_is_updated_on_write(monkeypatch: pytest.MonkeyPatch) -> None:
+    AutochecksStore(HostName("herbert")).write(_entries())
+    AutochecksStore(HostName("erna")).write(_entries())
+    convert_autochecks(marshalled=True)
+    changed = [AutocheckEntry(CheckPluginName("norris"), "changed", {}, {})]
+    AutochecksStore(HostName("erna")).write(changed)
+    AutochecksStore(HostName("new")).write(changed)
+    AutochecksStore(HostName("herbert")).clear()
+
+    def _read_fails(self: AutochecksStore) -> Sequence[AutocheckEntry]:
+        raise AssertionError("not read from the index")
+
+    monkeypatch.setattr(AutochecksStore, "read", _read_fails)
+    manager = AutochecksManager()
+    assert manager.get_autochecks(HostName("erna")) == changed
+    assert manager.get_autochecks(HostName("new")) == changed
+    assert manager.get_autochecks(HostName("herbert")) == []
+
 
 @pytest.mark.usefixtures("agent_based_plugins")
 @pytest.mark.parametrize(
@@ -233,6 +233,36 @@ class TestAgentParser:
         assert ahs.piggybacked_raw_data == {}
         assert not store.load()
 
+    def test_blank_lines_and_carriage_returns(
+        self, parser: AgentParser, store: SectionStore[Sequence[AgentRawDataSectionElem]]
+    ) -> None:
+        raw_data = AgentRawData(
+            b"\r\n".join(
+                (
+                    b"<<<a_section>>>\r",
+                    b"  first line  ",
+                    b" \t ",
+                    b"\xc3\xa4 \xff",
+                    b"<<<nostrip_section:nostrip():sep(124)>>>",
+                    b"  first line  ",
+                    b"",
+                    b"\xc2\xa0",
+                    b"<<<unselected>>>",
+                    b"line",
+                )
+            )
+        )
+
+        ahs = parser.parse(
+            raw_data,
+            selection=frozenset({SectionName("a_section"), SectionName("nostrip_section")}),
+        )
+        assert ahs.sections == {
+            SectionName("a_section"): [["first", "line"], ["\xc3\xa4", "\xff"]],
+            SectionName("nostrip_section"): [["  first line  "], ["\xa0"]],
+        }
+        assert not store.load()
+
     def test_nameless_sections_are_skipped(
         self, parser: AgentParser, store: SectionStore[Sequence[AgentRawDataSectionElem]]
     ) -> None:
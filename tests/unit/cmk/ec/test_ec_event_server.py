@@ -3,7 +3,12 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+# pylint: disable=protected-access
+
 import logging
+from typing import Unpack
+
+import pytest
 
 from tests.unit.cmk.ec.helpers import new_event
 
@@ -11,7 +16,14 @@ from cmk.utils.hostaddress import HostName
 
 import cmk.ec.export as ec
 from cmk.ec.config import Config, MatchGroups, ServiceLevel
-from cmk.ec.main import create_history, EventServer, StatusTableEvents, StatusTableHistory
+from cmk.ec.main import (
+    create_history,
+    EventServer,
+    EventStatus,
+    StatusTableEvents,
+    StatusTableHistory,
+)
+from cmk.ec.perfcounters import Perfcounters
 
 RULE = ec.Rule(
     actions=[],
@@ -61,3 +73,103 @@ def test_event_rewrite(
 
     assert event["text"] == "SUPERWARN"
     assert event["state"] == 2
+
+
+def _rule(**options: Unpack[ec.Rule]) -> ec.Rule:
+    return RULE | ec.Rule(state=2) | options
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_process_syslog_messages(
+    event_server: EventServer,
+    event_status: EventStatus,
+    perfcounters: Perfcounters,
+    settings: ec.Settings,
+    config: Config,
+    workers: int,
+) -> None:
+    """The worker processes must not change the outcome of processing messages in order"""
+    rule_pack_skip = ec.default_rule_pack(
+        [
+            _rule(id="skip", match="ignore me", drop="skip_pack"),
+            _rule(id="skipped", match="ignore me"),
+        ]
+    ) | {"id": "skip"}
+    rule_pack_port = ec.default_rule_pack(
+        [_rule(id="port", match="ERROR on port (.*)", match_ok="OK on port (.*)")]
+    )
+    config_rule_packs: Config = config | {
+        "rule_packs": [rule_pack_skip, rule_pack_port],
+        "event_processing_workers": workers,
+        "archive_orphans": False,
+    }
+    event_server.reload_configuration(
+        config_rule_packs,
+        history=create_history(
+            settings,
+            config_rule_packs,
+            logging.getLogger("cmk.mkeventd"),
+            StatusTableEvents.columns,
+            StatusTableHistory.columns,
+        ),
+    )
+    messages = [
+        f"<11>Jan 1 00:00:00 host app: {text}".encode()
+        for num in range(20)
+        for text in (f"ERROR on port {num}", f"OK on port {num % 5}", "ignore me")
+    ]
+
+    try:
+        event_server.process_syslog_messages(messages, ("127.0.0.1", 514))
+    finally:
+        event_server.close_pipeline()
+
+    assert sorted(event["text"] for event in event_status.events()) == sorted(
+        f"ERROR on port {num}" for num in range(5, 20)
+    )
+    assert {event["rule_id"] for event in event_status.events()} == {"port"}
+    assert perfcounters._counters["messages"] == len(messages)
+    assert perfcounters._counters["parsed_messages"] == len(messages)
+    assert perfcounters._counters["matched_messages"] == len(messages)
+    assert perfcounters._counters["rule_hits"] == 60
+
+
+def test_absent_event_changing_host(event_server: EventServer, event_status: EventStatus) -> None:
+    """Merging an absent message into an event may rewrite its host, it stays deletable"""
+    event_status.new_event(
+        new_event(ec.Event(rule_id="expect", host=HostName("old"), core_host=HostName("old")))
+    )
+    rule = _rule(
+        id="expect",
+        set_host="new",
+        expect=ec.Expect(interval=3600, count=1, merge="open"),
+    )
+
+    event_server._handle_absent_event(rule, rule["expect"], 0, 0.0)
+
+    (event,) = event_status.events()
+    assert event["host"] == "new"
+    assert event["count"] == 2
+    event_status.delete_events_of_host(HostName("new"), "testuser")
+    assert not event_status.events()
+    assert not list(event_status.events_of_rule("expect"))
+    assert set(event_status.num_existing_events_by_host.values()) == {0}
+
+
+def test_remove_event_with_stale_host(
+    event_status: EventStatus, caplog: pytest.LogCaptureFixture
+) -> None:
+    """A host changed without reindex_host() is an error, the event is removed anyway"""
+    event = new_event(ec.Event(host=HostName("old"), core_host=HostName("old")))
+    event_status.new_event(event)
+    event["host"] = HostName("new")
+
+    with caplog.at_level(logging.ERROR):
+        event_status.remove_event(event, "DELETE")
+
+    assert [r.getMessage() for r in caplog.records] == [
+        f"Event {event['id']} is missing in the index of 'new'",
+        f"Event {event['id']} of host ('new', 'old') is not counted",
+    ]
+    assert not event_status.events()
+    assert not list(event_status.events_of_rule(event["rule_id"]))
@@ -6,25 +6,21 @@
 
 import datetime
 import logging
-import shlex
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
+import pytest
 import time_machine
 
 from cmk.utils.hostaddress import HostName
 
 import cmk.ec.export as ec
+from cmk.ec import history_file
 from cmk.ec.config import Config
 from cmk.ec.history import _current_history_period
-from cmk.ec.history_file import (
-    _grep_pipeline,
-    convert_history_line,
-    FileHistory,
-    parse_history_file,
-)
+from cmk.ec.history_file import _BlockFilter, convert_history_line, FileHistory, read_history_file
 from cmk.ec.main import StatusTableHistory
-from cmk.ec.query import QueryFilter, QueryGET, StatusTable
+from cmk.ec.query import OperatorName, QueryFilter, QueryGET, StatusTable
 
 
 def test_file_add_get(history: FileHistory) -> None:
@@ -95,17 +91,119 @@ def test_history_parse(tmp_path: Path) -> None:
         predicate=lambda x: True,
         argument="1",
     )
-    tac = f"nl -b a {shlex.quote(str(path))} | tac"
-    cmd = " | ".join([tac] + _grep_pipeline([filter_]))
-
-    new_entries = parse_history_file(
-        StatusTableHistory.columns,
-        path,
-        lambda x: True,
-        cmd,
-        None,
-        logging.getLogger("cmk.mkeventd"),
+
+    new_entries = list(
+        read_history_file(
+            StatusTableHistory.columns,
+            path,
+            _BlockFilter.from_filters([filter_]),
+            lambda x: True,
+            logging.getLogger("cmk.mkeventd"),
+        )
     )
 
     assert len(new_entries) == 4
     assert new_entries[0][1] == 1666942292.3000507
+    assert [entry[0] for entry in new_entries] == [4, 3, 2, 1]
+
+
+def _query(history: FileHistory, *headers: str) -> list[tuple[object, object]]:
+    logger = logging.getLogger("cmk.mkeventd")
+
+    def get_table(name: str) -> StatusTable:
+        assert name == "history"
+        return StatusTableHistory(logger, history)
+
+    query = QueryGET(get_table, ["GET history", *headers], logger)
+    column_index = get_table("history").column_names.index
+    return [
+        (row[column_index("history_line")], row[column_index("event_host")])
+        for row in history.get(query)
+    ]
+
+
+@pytest.fixture(name="small_blocks")
+def fixture_small_blocks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(history_file, "_BLOCK_LINES", 10)
+
+
+@pytest.mark.usefixtures("small_blocks")
+def test_file_get_indexed(history: FileHistory, settings: ec.Settings) -> None:
+    for num in range(35):
+        history.add(event=ec.Event(host=HostName(f"host-{num // 10}"), id=num), what="NEW")
+
+    (index_path,) = settings.paths.history_dir.value.glob("*.idx")
+    assert len(index_path.read_text().splitlines()) == 3
+
+    assert _query(history, "Filter: event_host =~ HOST-1") == [
+        (line, "host-1") for line in range(20, 10, -1)
+    ]
+    assert _query(history, "Filter: event_host = host-3") == [
+        (line, "host-3") for line in range(35, 30, -1)
+    ]
+    assert _query(history, "Filter: event_host in host-0 host-2", "Limit: 3") == [
+        (30, "host-2"),
+        (29, "host-2"),
+        (28, "host-2"),
+    ]
+    assert _query(history, "Filter: event_id = 4") == [(5, "host-0")]
+    assert not _query(history, "Filter: event_host = host-4")
+
+
+def test_block_filter_ignores_event_times() -> None:
+    def _filter(column_name: str, operator_name: OperatorName, argument: float) -> QueryFilter:
+        return QueryFilter(
+            column_name=column_name,
+            operator_name=operator_name,
+            predicate=lambda x: True,
+            argument=argument,
+        )
+
+    block_filter = _BlockFilter.from_filters(
+        [
+            _filter("history_time", ">=", 1000.0),
+            _filter("event_first", "<", 500.0),
+            _filter("event_last", ">", 2000.0),
+        ]
+    )
+    assert block_filter.time_range == (1000.0, None)
+
+
+@pytest.mark.usefixtures("small_blocks")
+def test_file_index_rebuilt(history: FileHistory, settings: ec.Settings) -> None:
+    for num in range(15):
+        history.add(event=ec.Event(host=HostName(f"host-{num // 10}"), id=num), what="NEW")
+    history.close()
+    (index_path,) = settings.paths.history_dir.value.glob("*.idx")
+    assert len(index_path.read_text().splitlines()) == 2
+
+    # Without an index, the whole file is read.
+    index_path.unlink()
+    assert _query(history, "Filter: event_host = host-1") == [
+        (line, "host-1") for line in range(15, 10, -1)
+    ]
+
+    # An index not matching the file is replaced.
+    index_path.write_text('{"offset": 0, "end": 100000000, "line": 1}\n')
+    history.add(event=ec.Event(host=HostName("host-1"), id=15), what="NEW")
+    history.close()
+    assert len(index_path.read_text().splitlines()) == 2
+    assert _query(history, "Filter: event_host = host-1", "Limit: 2") == [
+        (16, "host-1"),
+        (15, "host-1"),
+    ]
+
+
+def test_file_housekeeping_indexes_old_files(history: FileHistory, settings: ec.Settings) -> None:
+    history_dir = settings.paths.history_dir.value
+    history.add(event=ec.Event(host=HostName("host-1"), id=1), what="NEW")
+    (path,) = history_dir.glob("*.log")
+    old_path = path.with_name("1000.log")
+    path.rename(old_path)
+    path.with_suffix(".idx").unlink()
+    history.add(event=ec.Event(host=HostName("host-2"), id=2), what="NEW")
+
+    history.housekeeping()
+
+    assert old_path.with_suffix(".idx").exists()
+    assert _query(history, "Filter: event_host = host-1") == [(1, "host-1")]
@@ -7,14 +7,16 @@
 import logging
 import sqlite3
 from collections.abc import Iterator
+from pathlib import Path
 
 import pytest
 
 from cmk.utils.hostaddress import HostName
 
 import cmk.ec.export as ec
-from cmk.ec.history_sqlite import filters_to_sqlite_query, SQLiteHistory
-from cmk.ec.main import StatusTableHistory
+from cmk.ec.config import Config
+from cmk.ec.history_sqlite import filters_to_sqlite_query, SQLiteHistory, SQLiteSettings
+from cmk.ec.main import StatusTableEvents, StatusTableHistory
 from cmk.ec.query import QueryFilter, QueryGET, StatusTable
 
 
@@ -208,6 +210,7 @@ def test_housekeeping(history_sqlite: SQLiteHistory) -> None:
     event2 = ec.Event(host=HostName("ABC2"), text="Event2 text", core_host=HostName("ABC"))
     history_sqlite.add(event=event1, what="NEW")
     history_sqlite.add(event=event2, what="NEW")
+    history_sqlite.drain()
 
     with history_sqlite.conn as connection:
         cur = connection.cursor()
@@ -218,3 +221,69 @@ def test_housekeeping(history_sqlite: SQLiteHistory) -> None:
         history_sqlite.housekeeping()
         cur.execute("SELECT count(*) FROM history;")
         assert cur.fetchone()["count(*)"] == 1
+
+
+def _get(history: SQLiteHistory, *headers: str) -> list[sqlite3.Row]:
+    logger = logging.getLogger("cmk.mkeventd")
+
+    def get_table(name: str) -> StatusTable:
+        assert name == "history"
+        return StatusTableHistory(logger, history)
+
+    return list(history.get(QueryGET(get_table, ["GET history", *headers], logger)))  # type: ignore[arg-type]
+
+
+def test_add_many_get(history_sqlite: SQLiteHistory) -> None:
+    """Entries added in a burst are all written, in order."""
+
+    for num in range(2500):
+        history_sqlite.add(event=ec.Event(host=HostName(f"host{num % 2}"), id=num), what="NEW")
+
+    rows = _get(history_sqlite, "Filter: event_host = host1")
+    assert [row["id"] for row in rows] == list(range(1, 2500, 2))
+    assert _get(history_sqlite, "Filter: event_host = host1", "Limit: 10")[0]["id"] == 1
+
+
+def test_close_writes_queued_entries(settings: ec.Settings, config: Config, tmp_path: Path) -> None:
+    """Closing the history writes the entries which are still queued."""
+
+    def make_history() -> SQLiteHistory:
+        return SQLiteHistory(
+            SQLiteSettings.from_settings(settings, database=tmp_path / "history.sqlite"),
+            config | {"archive_mode": "sqlite"},
+            logging.getLogger("cmk.mkeventd"),
+            StatusTableEvents.columns,
+            StatusTableHistory.columns,
+        )
+
+    history = make_history()
+    for num in range(100):
+        history.add(event=ec.Event(host=HostName("ABC"), id=num), what="NEW")
+    history.close()
+
+    history = make_history()
+    assert len(_get(history, "Filter: event_host = ABC")) == 100
+    history.close()
+
+
+def test_close_twice(settings: ec.Settings, config: Config) -> None:
+    """The event daemon closes the history when shutting down, even if reloading did"""
+    history = SQLiteHistory(
+        SQLiteSettings.from_settings(settings, database=":memory:"),
+        config | {"archive_mode": "sqlite"},
+        logging.getLogger("cmk.mkeventd"),
+        StatusTableEvents.columns,
+        StatusTableHistory.columns,
+    )
+    history.add(event=ec.Event(host=HostName("ABC"), id=1), what="NEW")
+    history.close()
+    history.close()
+
+
+def test_drain_fails_without_writer(history_sqlite: SQLiteHistory) -> None:
+    """Entries which are queued while no writer is running would never be written."""
+    history_sqlite._queue.put((0,))  # pylint: disable=protected-access
+    with pytest.raises(RuntimeError, match="not running"):
+        history_sqlite.drain()
+    history_sqlite._queue.get_nowait()  # pylint: disable=protected-access
+    history_sqlite._queue.task_done()  # pylint: disable=protected-access
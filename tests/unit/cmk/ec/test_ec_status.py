@@ -129,3 +129,39 @@ def test_mkevent_query_filters(
     status_server.handle_client(status_socket, True, "127.0.0.1")
     response = status_socket.get_response()
     assert (len(response) == 2) is is_match
+
+
+def test_event_status_indexes(event_status: EventStatus) -> None:
+    for num, (rule_id, host) in enumerate(
+        [("a", "h1"), ("b", "h1"), ("a", "h2"), ("b", "h2"), ("a", "h1")]
+    ):
+        event_status.new_event(
+            new_event(
+                {
+                    "rule_id": rule_id,
+                    "host": HostName(host),
+                    "core_host": HostName(host),
+                    "text": str(num),
+                }
+            )
+        )
+
+    assert [e["id"] for e in event_status.events()] == [1, 2, 3, 4, 5]
+    assert (event := event_status.event(3)) is not None and event["text"] == "2"
+    assert event_status.event(42) is None
+
+    event_status.remove_oldest_event("by_rule", new_event({"rule_id": "a"}))
+    assert [e["id"] for e in event_status.events()] == [2, 3, 4, 5]
+
+    event_status.remove_oldest_event("by_host", new_event({"host": HostName("h2")}))
+    assert [e["id"] for e in event_status.events()] == [2, 4, 5]
+
+    event_status.remove_oldest_event("overall", new_event({}))
+    assert [e["id"] for e in event_status.events()] == [4, 5]
+
+    event_status.unpack_status(event_status.pack_status())
+    event_status.delete_events_of_host(HostName("h1"), "user")
+    assert [e["id"] for e in event_status.events()] == [4]
+
+    event_status.delete_events_by_ids([4, 42], "user")
+    assert not event_status.events()
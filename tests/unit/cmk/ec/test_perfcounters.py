@@ -135,3 +135,10 @@ def test_perfcounters_correct_status_values() -> None:
 
         else:
             raise NotImplementedError
+
+
+def test_perfcounters_count_many() -> None:
+    c = Perfcounters(logger)
+    c.count("rule_tries", 5)
+    c.count("rule_tries")
+    assert c._counters["rule_tries"] == 6
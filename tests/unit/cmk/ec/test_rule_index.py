@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import itertools
+import re
+
+import pytest
+
+from livestatus import SiteId
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.rule_index import literal_prefix, RuleIndex
+from cmk.ec.rule_matcher import compile_rule
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("^web", "web"),
+        ("^Web-0[1-9]", "web-0"),
+        ("^db1?", "db"),
+        ("^db+", "db"),
+        ("^db.*", "db"),
+        ("^a{0,2}", None),
+        ("^web|db", None),
+        ("^\\.web", None),
+        ("web", None),
+        ("^", None),
+    ],
+)
+def test_literal_prefix(pattern: str, expected: str | None) -> None:
+    assert literal_prefix(re.compile(pattern, re.IGNORECASE)) == expected
+
+
+def test_literal_prefix_needs_ignorecase() -> None:
+    assert literal_prefix(re.compile("^web")) is None
+
+
+def _rules() -> list[ec.Rule]:
+    rules = [
+        ec.Rule(id="any"),
+        ec.Rule(id="host", match_host="Web01"),
+        ec.Rule(id="host prefix", match_host="^web"),
+        ec.Rule(id="host regex", match_host="eb0[12]$"),
+        ec.Rule(id="inverted", match_host="web01", invert_matching=True),
+        ec.Rule(id="application", match_application="sshd"),
+        ec.Rule(id="application prefix", match_application="^cron"),
+        ec.Rule(id="application cancel", match_application="^cron", cancel_application="sshd"),
+        ec.Rule(id="message", match="failed"),
+        ec.Rule(id="message regex", match="port (\\d+) down"),
+        ec.Rule(id="message cancel", match="port (\\d+) down", match_ok="port (\\d+) up"),
+        ec.Rule(id="message backreference", match="(a)\\1"),
+        ec.Rule(id="message named group", match="(?P<num>\\d+) errors"),
+        ec.Rule(id="all", match_host="^db", match_application="^postgres", match="(?i)fatal"),
+        *(ec.Rule(id=f"message {num}", match=f"^error {num}$") for num in range(100)),
+    ]
+    for rule in rules:
+        rule["pack"] = "pack"
+        compile_rule(rule)
+    return rules
+
+
+@pytest.mark.parametrize(
+    "host, application, text",
+    itertools.product(
+        ["web01", "WEB02", "db1", "dB-master", "mail", ""],
+        ["sshd", "SSHD[123]", "crond", "postgres", "kernel"],
+        ["login failed", "port 42 down", "Port 42 UP", "aa", "17 errors", "FATAL", "error 42"],
+    ),
+)
+def test_candidates_cover_all_matching_rules(host: str, application: str, text: str) -> None:
+    rules = _rules()
+    event = ec.Event(
+        host=HostName(host),
+        application=application,
+        text=text,
+        ipaddress="10.0.0.1",
+        facility=1,
+        priority=3,
+    )
+    matcher = ec.RuleMatcher(None, SiteId("test_site"), lambda time_period_name: True)
+
+    candidates = RuleIndex(rules).candidates(rules, event)
+
+    assert candidates == [rule for rule in rules if rule in candidates]
+    for rule in rules:
+        if rule not in candidates:
+            assert isinstance(matcher.event_rule_matches(rule, event), ec.MatchFailure), rule["id"]
+
+
+def test_candidates_skip_rules() -> None:
+    rules = _rules()
+    event = ec.Event(
+        host=HostName("mail"), application="kernel", text="error 42", facility=1, priority=3
+    )
+    assert [rule["id"] for rule in RuleIndex(rules).candidates(rules, event)] == [
+        "any",
+        "host regex",
+        "inverted",
+        "application cancel",
+        "message backreference",
+        "message named group",
+        "message 42",
+    ]
@@ -5,11 +5,17 @@
 
 import json
 import logging
+from pathlib import Path
+
+from cmk.ccc import store
+
+from cmk.utils.sectionname import SectionName
 
 from cmk.fetchers import Mode
 from cmk.fetchers.filecache import MaxAge
 
 from cmk.checkengine.parser import SectionStore
+from cmk.checkengine.parser._sectionstore import _SECTION_HEADER
 
 
 class TestSectionStore:
@@ -24,6 +30,91 @@ class TestSectionStore:
             str,
         )
 
+    def test_store_and_load(self, tmp_path: Path) -> None:
+        section_store = SectionStore[str](tmp_path / "host", logger=logging.getLogger("test"))
+        section_store.store(
+            {SectionName("one"): (1, 10, "first"), SectionName("two"): (2, 20, "second")}
+        )
+        assert section_store.bytes_written > 0
+        assert sorted(p.name for p in (tmp_path / "host").iterdir()) == ["one", "two"]
+
+        section_store = SectionStore[str](tmp_path / "host", logger=logging.getLogger("test"))
+        assert section_store.load_persist_info() == {
+            SectionName("one"): (1, 10),
+            SectionName("two"): (2, 20),
+        }
+        persisted_sections = section_store.load()
+        bytes_read = section_store.bytes_read
+        assert persisted_sections[SectionName("one")] == (1, 10, "first")
+        # Only the requested section is read
+        assert section_store.bytes_read - bytes_read == (tmp_path / "host" / "one").stat().st_size
+
+    def test_store_changed_sections_only(self, tmp_path: Path) -> None:
+        section_store = SectionStore[str](tmp_path / "host", logger=logging.getLogger("test"))
+        section_store.store(
+            {SectionName("one"): (1, 10, "first"), SectionName("two"): (2, 20, "second")}
+        )
+
+        section_store = SectionStore[str](tmp_path / "host", logger=logging.getLogger("test"))
+        persisted_sections = section_store.load()
+        persisted_sections[SectionName("two")] = (3, 30, "third")
+        del persisted_sections[SectionName("one")]
+        section_store.store(persisted_sections)
+        assert section_store.bytes_written == (tmp_path / "host" / "two").stat().st_size
+        assert not (tmp_path / "host" / "one").exists()
+        assert section_store.load() == {SectionName("two"): (3, 30, "third")}
+
+        section_store.store({})
+        assert not (tmp_path / "host").exists()
+
+    def test_previous_format(self, tmp_path: Path) -> None:
+        store.save_object_to_pickle_file(tmp_path / "host", {"one": (1, 10, "first")})
+        section_store = SectionStore[str](tmp_path / "host", logger=logging.getLogger("test"))
+        assert section_store.load() == {SectionName("one"): (1, 10, "first")}
+
+        section_store.store({SectionName("one"): (1, 10, "first")})
+        assert (tmp_path / "host").is_dir()
+        assert section_store.load() == {SectionName("one"): (1, 10, "first")}
+
+    def test_update_drops_outdated_sections_unread(self, tmp_path: Path) -> None:
+        section_store = SectionStore[str](tmp_path / "host", logger=logging.getLogger("test"))
+        section_store.store(
+            {SectionName("one"): (1, 10, "first"), SectionName("two"): (2, 100, "second")}
+        )
+
+        section_store = SectionStore[str](tmp_path / "host", logger=logging.getLogger("test"))
+        cache_info: dict[SectionName, tuple[int, int]] = {}
+        assert section_store.update(
+            {},
+            cache_info,
+            lambda section_name: None,
+            lambda valid_until, now: valid_until < now,
+            now=50,
+            keep_outdated=False,
+        ) == {SectionName("two"): "second"}
+        assert cache_info == {SectionName("two"): (2, 98)}
+        assert not (tmp_path / "host" / "one").exists()
+        # Of the outdated section only the header is read
+        assert (
+            section_store.bytes_read
+            == 2 * _SECTION_HEADER.size + (tmp_path / "host" / "two").stat().st_size
+        )
+
+    def test_section_removed_concurrently(self, tmp_path: Path) -> None:
+        section_store = SectionStore[str](tmp_path / "host", logger=logging.getLogger("test"))
+        section_store.store(
+            {SectionName("one"): (1, 10, "first"), SectionName("two"): (2, 20, "second")}
+        )
+        persisted_sections = section_store.load()
+        (tmp_path / "host" / "two").unlink()
+
+        cache_info: dict[SectionName, tuple[int, int]] = {}
+        assert section_store._add_persisted_sections({}, cache_info, persisted_sections) == {
+            SectionName("one"): "first"
+        }
+        assert cache_info == {SectionName("one"): (1, 9)}
+        assert SectionName("two") not in persisted_sections.keys()
+
 
 class TestMaxAge:
     def test_repr(self) -> None:
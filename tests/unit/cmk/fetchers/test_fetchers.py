@@ -53,6 +53,7 @@ from cmk.fetchers._ipmi import IPMISensor
 from cmk.fetchers.filecache import (
     AgentFileCache,
     FileCache,
+    FileCacheEncoding,
     FileCacheMode,
     MaxAge,
     NoCache,
@@ -80,6 +81,7 @@ def clone_file_cache(file_cache: FileCache) -> FileCache:
         simulation=file_cache.simulation,
         use_only_cache=file_cache.use_only_cache,
         file_cache_mode=file_cache.file_cache_mode,
+        encoding=file_cache.encoding,
     )
 
 
@@ -148,6 +150,33 @@ class TestAgentFileCache_and_SNMPFileCache:
         assert clone.file_cache_mode is FileCacheMode.READ_WRITE
         assert clone.read(mode) == raw_data
 
+    @pytest.mark.parametrize("encoding", FileCacheEncoding)
+    def test_read_write_encoded(
+        self,
+        file_cache: FileCache,
+        path: Path,
+        raw_data: AgentRawData | SNMPRawData,
+        encoding: FileCacheEncoding,
+    ) -> None:
+        mode = Mode.DISCOVERY
+        file_cache.file_cache_mode = FileCacheMode.READ_WRITE
+        file_cache.encoding = encoding
+
+        file_cache.write(raw_data, mode)
+
+        assert path.read_bytes().startswith(b"\0cmk-file-cache:") is (
+            encoding is not FileCacheEncoding.NONE
+        )
+        assert file_cache.read(mode) == raw_data
+        assert clone_file_cache(file_cache).read(mode) == raw_data
+
+    def test_read_invalid(self, file_cache: FileCache, path: Path) -> None:
+        mode = Mode.DISCOVERY
+        file_cache.file_cache_mode = FileCacheMode.READ_WRITE
+        path.write_bytes(b"\0cmk-file-cache:zlib\nnot compressed")
+
+        assert file_cache.read(mode) is None
+
     def test_read_only(
         self,
         file_cache: FileCache,
@@ -186,7 +215,7 @@ class StubFileCache(Generic[_TRawData], FileCache[_TRawData]):
         self.cache: _TRawData | None = None
 
     @staticmethod
-    def _from_cache_file(raw_data: bytes) -> _TRawData:
+    def _from_cache_file(raw_data: bytes | memoryview) -> _TRawData:
         assert 0, "unreachable"
 
     @staticmethod
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import logging
+from collections.abc import Iterator, Mapping
+
+import pytest
+
+from tests.testlib.snmp_agent import SimulatedSNMPAgent
+
+from cmk.ccc.exceptions import MKSNMPError
+
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+
+from cmk.fetchers.snmp_backend import NativeSNMPBackend
+from cmk.fetchers.snmp_backend._ber import (
+    decode_oid,
+    decode_pdu,
+    decode_tlv,
+    encode_integer,
+    encode_octet_string,
+    encode_oid,
+    encode_pdu,
+    encode_sequence,
+    PDU,
+    PDUType,
+    Tag,
+    VarBind,
+)
+from cmk.fetchers.snmp_backend._usm import (
+    make_message_processor,
+    password_to_key,
+    UnknownEngine,
+    USMMessageProcessor,
+)
+
+MIB: Mapping[tuple[int, ...], tuple[int, bytes]] = {
+    (1, 3, 6, 1, 2, 1, 1, 1, 0): (Tag.OCTET_STRING, b"Test device"),
+    (1, 3, 6, 1, 2, 1, 1, 3, 0): (Tag.TIMETICKS, encode_integer(123456, Tag.TIMETICKS)[2:]),
+    **{
+        (1, 3, 6, 1, 2, 1, 2, 2, 1, 1, idx): (Tag.INTEGER, encode_integer(idx)[2:])
+        for idx in range(1, 26)
+    },
+    **{
+        (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, idx): (Tag.OCTET_STRING, f"eth{idx}".encode())
+        for idx in range(1, 26)
+    },
+    (1, 3, 6, 1, 2, 1, 4, 20, 1, 1, 10, 0, 0, 1): (Tag.IP_ADDRESS, bytes((10, 0, 0, 1))),
+}
+
+
+@pytest.mark.parametrize(
+    "oid",
+    [
+        (1, 3),
+        (1, 3, 6, 1, 2, 1, 1, 1, 0),
+        (1, 3, 6, 1, 4, 1, 2021, 4294967295),
+        (2, 999, 3),
+    ],
+)
+def test_oid_roundtrip(oid: tuple[int, ...]) -> None:
+    _tag, begin, end = decode_tlv(encoded := encode_oid(oid))
+    assert decode_oid(encoded[begin:end]) == oid
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 255, 256, -1, -129, 2**31 - 1, -(2**31)])
+def test_integer_encoding(value: int) -> None:
+    encoded = encode_integer(value)
+    assert int.from_bytes(encoded[2:], "big", signed=True) == value
+
+
+def test_pdu_roundtrip() -> None:
+    pdu = PDU(
+        PDUType.GET_BULK,
+        4711,
+        0,
+        10,
+        [VarBind((1, 3, 6, 1), Tag.NULL, b""), VarBind((1, 3, 6, 2), Tag.OCTET_STRING, b"x")],
+    )
+    assert decode_pdu(encode_pdu(pdu)) == pdu
+
+
+@pytest.mark.parametrize(
+    "hash_name, expected",
+    [
+        # RFC 3414, A.3.1 and A.3.2
+        ("md5", "526f5eed9fcce26f8964c2930787d82b"),
+        ("sha1", "6695febc9288e36282235fc7151f128497b38f3f"),
+    ],
+)
+def test_password_to_key(hash_name: str, expected: str) -> None:
+    engine_id = bytes.fromhex("000000000000000000000002")
+    assert password_to_key("maplesyrup", engine_id, hash_name).hex() == expected
+
+
+@pytest.mark.parametrize(
+    "credentials",
+    [
+        ("noAuthNoPriv", "user"),
+        ("authNoPriv", "md5", "user", "authpass"),
+        ("authPriv", "sha", "user", "authpass", "DES", "privpass"),
+        ("authPriv", "SHA-256", "user", "authpass", "AES", "privpass"),
+        ("authPriv", "SHA-512", "user", "authpass", "AES-256", "privpass"),
+    ],
+)
+def test_usm_roundtrip(credentials: tuple[str, ...]) -> None:
+    processor = make_message_processor(SNMPVersion.V3, credentials)
+    assert isinstance(processor, USMMessageProcessor)
+    assert processor.needs_discovery()
+    processor.process_discovery(
+        processor._encode_message(
+            1,
+            0,
+            security_parameters=processor._security_parameters(
+                bytes.fromhex("800000020109840301"), 3, 4711, b"", b"", b""
+            ),
+            scoped_pdu=encode_sequence(
+                encode_octet_string(b""),
+                encode_octet_string(b""),
+                encode_pdu(PDU(PDUType.REPORT, 1, 0, 0, [])),
+            ),
+        )
+    )
+    assert not processor.needs_discovery()
+
+    pdu = PDU(PDUType.GET, 42, 0, 0, [VarBind((1, 3, 6, 1, 2, 1, 1, 1, 0), Tag.NULL, b"")])
+    message = processor.encode(pdu, "context")
+    assert processor.message_id(message) == 42
+    assert processor.decode(message) == pdu
+
+
+def _discovered(credentials: tuple[str, ...]) -> USMMessageProcessor:
+    processor = make_message_processor(SNMPVersion.V3, credentials)
+    assert isinstance(processor, USMMessageProcessor)
+    processor.process_discovery(
+        processor._encode_message(
+            1,
+            0,
+            security_parameters=processor._security_parameters(
+                bytes.fromhex("800000020109840301"), 3, 4711, b"", b"", b""
+            ),
+            scoped_pdu=encode_sequence(
+                encode_octet_string(b""),
+                encode_octet_string(b""),
+                encode_pdu(PDU(PDUType.REPORT, 1, 0, 0, [])),
+            ),
+        )
+    )
+    return processor
+
+
+@pytest.mark.parametrize(
+    "configured, response",
+    [
+        (
+            ("authNoPriv", "md5", "user", "authpass"),
+            ("noAuthNoPriv", "user"),
+        ),
+        (
+            ("authPriv", "sha", "user", "authpass", "AES", "privpass"),
+            ("noAuthNoPriv", "user"),
+        ),
+        (
+            ("authPriv", "sha", "user", "authpass", "AES", "privpass"),
+            ("authNoPriv", "sha", "user", "authpass"),
+        ),
+    ],
+)
+def test_usm_rejects_downgraded_response(
+    configured: tuple[str, ...], response: tuple[str, ...]
+) -> None:
+    processor = _discovered(configured)
+    pdu = PDU(PDUType.RESPONSE, 42, 0, 0, [VarBind((1, 3, 6, 1, 2, 1, 1, 1, 0), Tag.NULL, b"")])
+    message = _discovered(response).encode(pdu, "context")
+    with pytest.raises(MKSNMPError, match="below the security level"):
+        processor.decode(message)
+
+
+def test_usm_accepts_unauthenticated_unknown_engine_report() -> None:
+    processor = _discovered(("authPriv", "sha", "user", "authpass", "AES", "privpass"))
+    report = PDU(
+        PDUType.REPORT,
+        42,
+        0,
+        0,
+        [VarBind((1, 3, 6, 1, 6, 3, 15, 1, 1, 4, 0), Tag.COUNTER32, b"\x01")],
+    )
+    with pytest.raises(UnknownEngine):
+        processor.decode(_discovered(("noAuthNoPriv", "user")).encode(report, "context"))
+    assert processor.needs_discovery()
+
+
+def test_usm_rejects_unauthenticated_time_window_report() -> None:
+    processor = _discovered(("authNoPriv", "md5", "user", "authpass"))
+    report = PDU(
+        PDUType.REPORT,
+        42,
+        0,
+        0,
+        [VarBind((1, 3, 6, 1, 6, 3, 15, 1, 1, 2, 0), Tag.COUNTER32, b"\x01")],
+    )
+    with pytest.raises(MKSNMPError, match="below the security level"):
+        processor.decode(_discovered(("noAuthNoPriv", "user")).encode(report, "context"))
+
+
+@pytest.fixture(name="agent", scope="module")
+def fixture_agent() -> Iterator[SimulatedSNMPAgent]:
+    with SimulatedSNMPAgent.running(MIB) as agent:
+        yield agent
+
+
+def _backend(
+    agent: SimulatedSNMPAgent,
+    *,
+    version: SNMPVersion = SNMPVersion.V2C,
+    bulkwalk: bool = True,
+    community: str = "public",
+) -> NativeSNMPBackend:
+    return NativeSNMPBackend(
+        SNMPHostConfig(
+            is_ipv6_primary=False,
+            hostname=HostName("unittest"),
+            ipaddress=HostAddress("127.0.0.1"),
+            credentials=community,
+            port=agent.port,
+            bulkwalk_enabled=bulkwalk,
+            snmp_version=version,
+            bulk_walk_size_of=10,
+            timing={"timeout": 0.2, "retries": 0},
+            oid_range_limits={},
+            snmpv3_contexts=[],
+            character_encoding=None,
+            snmp_backend=SNMPBackendEnum.NATIVE,
+        ),
+        logging.getLogger("test"),
+    )
+
+
+@pytest.mark.parametrize(
+    "version, bulkwalk",
+    [(SNMPVersion.V1, False), (SNMPVersion.V2C, False), (SNMPVersion.V2C, True)],
+)
+def test_walk(agent: SimulatedSNMPAgent, version: SNMPVersion, bulkwalk: bool) -> None:
+    rowinfo = _backend(agent, version=version, bulkwalk=bulkwalk).walk(
+        ".1.3.6.1.2.1.2.2.1.2", context=""
+    )
+    assert rowinfo == [
+        (f".1.3.6.1.2.1.2.2.1.2.{idx}", f"eth{idx}".encode()) for idx in range(1, 26)
+    ]
+
+
+def test_walk_values(agent: SimulatedSNMPAgent) -> None:
+    backend = _backend(agent)
+    assert backend.walk(".1.3.6.1.2.1.1", context="") == [
+        (".1.3.6.1.2.1.1.1.0", b"Test device"),
+        (".1.3.6.1.2.1.1.3.0", b"123456"),
+    ]
+    assert backend.walk(".1.3.6.1.2.1.4.20.1.1", context="") == [
+        (".1.3.6.1.2.1.4.20.1.1.10.0.0.1", b"10.0.0.1")
+    ]
+    # scalar fallback and walking past the end of the MIB
+    assert backend.walk(".1.3.6.1.2.1.1.1.0", context="") == [
+        (".1.3.6.1.2.1.1.1.0", b"Test device")
+    ]
+    assert not backend.walk(".1.3.6.1.2.1.99", context="")
+
+
+@pytest.mark.parametrize(
+    "version, bulkwalk",
+    [(SNMPVersion.V1, False), (SNMPVersion.V2C, False), (SNMPVersion.V2C, True)],
+)
+def test_walk_many(agent: SimulatedSNMPAgent, version: SNMPVersion, bulkwalk: bool) -> None:
+    oids = [
+        ".1.3.6.1.2.1.2.2.1.1",
+        ".1.3.6.1.2.1.2.2.1.2",
+        ".1.3.6.1.2.1.1.1.0",  # scalar
+        ".1.3.6.1.2.1.99",  # empty
+        ".1.3.6.1.2.1.4.20.1.1",  # end of the MIB
+    ]
+    backend = _backend(agent, version=version, bulkwalk=bulkwalk)
+    assert backend.walk_many(oids, context="") == [backend.walk(oid, context="") for oid in oids]
+
+
+def test_walk_many_multiplexes_columns(agent: SimulatedSNMPAgent) -> None:
+    oids = [f".1.3.6.1.2.1.2.2.1.{column}" for column in (1, 2)]
+    backend = _backend(agent)
+
+    before = agent.requests
+    first, second = backend.walk_many(oids, context="")
+    multiplexed = agent.requests - before
+
+    assert [value for _oid, value in first] == [str(idx).encode() for idx in range(1, 26)]
+    assert [value for _oid, value in second] == [f"eth{idx}".encode() for idx in range(1, 26)]
+
+    before = agent.requests
+    for oid in oids:
+        backend.walk(oid, context="")
+    assert multiplexed < agent.requests - before
+
+
+def test_get(agent: SimulatedSNMPAgent) -> None:
+    backend = _backend(agent)
+    assert backend.get(".1.3.6.1.2.1.1.1.0", context="") == b"Test device"
+    assert backend.get(".1.3.6.1.2.1.1.2.0", context="") is None
+    assert backend.get(".1.3.6.1.2.1.1.*", context="") == b"Test device"
+    assert backend.get(".1.3.6.1.2.1.3.*", context="") is None
+
+
+def test_timeout(agent: SimulatedSNMPAgent) -> None:
+    backend = _backend(agent, community="wrong")
+    assert backend.get(".1.3.6.1.2.1.1.1.0", context="") is None
+    with pytest.raises(Exception, match="Timeout"):
+        backend.walk(".1.3.6.1.2.1.1", context="")
@@ -10,8 +10,13 @@ from pathlib import Path
 
 import pytest
 
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+
 import cmk.fetchers.snmp_backend._utils as utils
 from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
+from cmk.fetchers.snmp_backend._walk_index import index_path_for, WalkIndex
 
 
 @pytest.mark.parametrize(
@@ -27,42 +32,88 @@ def test_strip_snmp_value(value: str, expected: bytes) -> None:
     assert utils.strip_snmp_value(value) == expected
 
 
-@pytest.mark.usefixtures("create_files")
-class TestStoredWalkSNMPBackend:
-    @pytest.mark.parametrize(
-        "a, b, result",
-        [
-            ("1.2.3", "1.2.3", 0),
-            ("1.2.3", ".1.2.3", 0),
-            (".1.2.3", "1.2.3", 0),
-            (".1.2.3", ".1.2.3", 0),
-            ("1.2.3", "1.2.3.4", 0),
-            ("1.2.3.4", "1.2.3", 1),
-            ("1.2.3", "4.5.6", -1),
-        ],
-    )
-    def test_compare_oids(self, a: str, b: str, result: int) -> None:
-        assert StoredWalkSNMPBackend._compare_oids(a, b) == result
-
-    def test_read_walk_data(self, tmpdir: Path) -> None:
-        assert StoredWalkSNMPBackend.read_walk_from_path(
-            tmpdir / "walkdata" / "1.txt", logging.getLogger("test")
-        ) == [
-            ".1.2.3 foo\n",
-            ".1.2.4 bar\nfoobar\n",
+SNMP_CONFIG = SNMPHostConfig(
+    is_ipv6_primary=False,
+    hostname=HostName("unittest"),
+    ipaddress=HostAddress("127.0.0.1"),
+    credentials="public",
+    port=161,
+    bulkwalk_enabled=True,
+    snmp_version=SNMPVersion.V2C,
+    bulk_walk_size_of=10,
+    timing={},
+    oid_range_limits={},
+    snmpv3_contexts=[],
+    character_encoding=None,
+    snmp_backend=SNMPBackendEnum.STORED_WALK,
+)
+
+
+class TestIndexedStoredWalk:
+    @pytest.fixture
+    def walk_path(self, tmp_path: Path) -> Path:
+        path = tmp_path / "unittest"
+        # Deliberately not sorted numerically
+        path.write_text(
+            ".1.2.10 ten\n"
+            ".1.2.3 three\n"
+            ".1.2.3.1 three.one\n"
+            '.1.2.4 "four\n'
+            'continued"\n'
+            '.1.2.30 "B2 E0 7D "\n'
+            ".1.3 other\n"
+        )
+        return path
+
+    def _backend(self, path: Path) -> StoredWalkSNMPBackend:
+        return StoredWalkSNMPBackend(SNMP_CONFIG, logging.getLogger("test"), path)
+
+    def test_walk(self, walk_path: Path) -> None:
+        backend = self._backend(walk_path)
+        assert backend.walk(".1.2.3", context="") == [
+            (".1.2.3", b"three"),
+            (".1.2.3.1", b"three.one"),
         ]
-        assert StoredWalkSNMPBackend.read_walk_from_path(
-            tmpdir / "walkdata" / "2.txt", logging.getLogger("test")
-        ) == [
-            ".1.2.3 foo\n\n\n",
-            ".1.2.5 test\n",
+        assert backend.walk(".1.2", context="") == [
+            (".1.2.3", b"three"),
+            (".1.2.3.1", b"three.one"),
+            (".1.2.4", b"four\ncontinued"),
+            (".1.2.10", b"ten"),
+            (".1.2.30", b"\xb2\xe0}"),
         ]
+        assert backend.walk(".1.2.5", context="") == []
+        assert backend.walk(".1.2.3.*", context="") == [(".1.2.3.1", b"three.one")]
+
+    def test_get(self, walk_path: Path) -> None:
+        backend = self._backend(walk_path)
+        assert backend.get(".1.3", context="") == b"other"
+        assert backend.get(".1.2.3", context="") is None  # not unique
+        assert backend.get(".1.2.*", context="") == b"three"
+        assert backend.get(".1.4", context="") is None
+
+    def test_index_is_persisted(self, walk_path: Path) -> None:
+        self._backend(walk_path).walk(".1", context="")
+        index_path = index_path_for(walk_path)
+        stat = walk_path.stat()
+        assert (index := WalkIndex.load(index_path, stat)) is not None
+        assert index.oids == [(1, 2, 3), (1, 2, 3, 1), (1, 2, 4), (1, 2, 10), (1, 2, 30), (1, 3)]
+        assert WalkIndex.deserialize(index.serialize()).oids == index.oids
 
+    def test_index_invalidated_on_change(self, walk_path: Path) -> None:
+        self._backend(walk_path).walk(".1", context="")
+        walk_path.write_text(".1.2.3 new\n")
+        assert WalkIndex.load(index_path_for(walk_path), walk_path.stat()) is None
+        assert self._backend(walk_path).walk(".1", context="") == [(".1.2.3", b"new")]
+
+    def test_walk_with_empty_lines(self, tmp_path: Path) -> None:
+        path = tmp_path / "unittest"
+        path.write_text(".1.2.3 foo\n\n\n.1.2.5 test\n")
+        assert self._backend(path).walk(".1", context="") == [
+            (".1.2.3", b"foo"),
+            (".1.2.5", b"test"),
+        ]
 
-@pytest.fixture
-def create_files(tmpdir):
-    tmpdir.mkdir("walkdata")
-    p1 = (tmpdir / "walkdata").join("1.txt")
-    p1.write(".1.2.3 foo\n.1.2.4 bar\nfoobar\n")
-    p2 = (tmpdir / "walkdata").join("2.txt")
-    p2.write(".1.2.3 foo\n\n\n.1.2.5 test\n")
+    def test_empty_walk(self, tmp_path: Path) -> None:
+        path = tmp_path / "unittest"
+        path.touch()
+        assert not self._backend(path).walk(".1", context="")
@@ -11,7 +11,7 @@ from pathlib import Path
 
 from cmk.snmplib import SNMPRowInfo
 
-from cmk.fetchers._snmp import WalkCache
+from cmk.fetchers._snmp import CompactWalkCache, WalkCache
 
 
 class MockWalkCache(WalkCache):
@@ -48,3 +48,105 @@ class TestWalkCache:
         assert (fetchoid, "12c3d4a", True) in cache
         cache.save()
         assert path in cache.mock_stored_on_fs
+
+
+class TestCompactWalkCache:
+    @staticmethod
+    def _cache(path: Path) -> CompactWalkCache:
+        return CompactWalkCache(path, logging.getLogger("test"))
+
+    def test_roundtrip(self, tmp_path: Path) -> None:
+        cache = self._cache(tmp_path)
+        cache[(".1.2.3", "abc", True)] = [(".1.2.3.1", b"one"), (".1.2.3.2", b"\xff\x00")]
+        cache[(".1.2.4", "abc", True)] = []
+        cache[(".1.2.5", "abc", False)] = [(".1.2.5.1", b"not saved")]
+        cache.save()
+
+        assert [p.name for p in tmp_path.iterdir()] == [CompactWalkCache.FILENAME]
+
+        cache = self._cache(tmp_path)
+        cache.load()
+        assert dict(cache) == {
+            (".1.2.3", "abc", True): [(".1.2.3.1", b"one"), (".1.2.3.2", b"\xff\x00")],
+            (".1.2.4", "abc", True): [],
+        }
+        assert (".1.2.3", "abc", False) not in cache
+
+    def test_save_appends_changed_walks_only(self, tmp_path: Path) -> None:
+        cache = self._cache(tmp_path)
+        cache[(".1.2.3", "abc", True)] = [(".1.2.3.1", b"one")]
+        cache[(".1.2.4", "abc", True)] = [(".1.2.4.1", b"x" * 100)]
+        cache.save()
+        size = (tmp_path / CompactWalkCache.FILENAME).stat().st_size
+
+        cache = self._cache(tmp_path)
+        cache.load()
+        assert cache[(".1.2.3", "abc", True)] == [(".1.2.3.1", b"one")]
+        cache.save()
+        assert (tmp_path / CompactWalkCache.FILENAME).stat().st_size == size
+
+        cache[(".1.2.3", "abc", True)] = [(".1.2.3.1", b"two")]
+        cache.save()
+        assert (tmp_path / CompactWalkCache.FILENAME).stat().st_size > size
+
+        cache = self._cache(tmp_path)
+        cache.load()
+        assert cache[(".1.2.3", "abc", True)] == [(".1.2.3.1", b"two")]
+        assert cache[(".1.2.4", "abc", True)] == [(".1.2.4.1", b"x" * 100)]
+
+    def test_outdated_records_are_compacted(self, tmp_path: Path) -> None:
+        cache = self._cache(tmp_path)
+        for value in range(10):
+            cache[(".1.2.3", "abc", True)] = [(".1.2.3.1", str(value).encode() * 50)]
+            cache.save()
+
+        assert (tmp_path / CompactWalkCache.FILENAME).stat().st_size < 2 * 100 + 100
+        cache = self._cache(tmp_path)
+        cache.load()
+        assert dict(cache) == {(".1.2.3", "abc", True): [(".1.2.3.1", b"9" * 50)]}
+
+    def test_deleted_walk_stays_deleted(self, tmp_path: Path) -> None:
+        cache = self._cache(tmp_path)
+        cache[(".1.2.3", "abc", True)] = [(".1.2.3.1", b"one")]
+        cache[(".1.2.4", "abc", True)] = [(".1.2.4.1", b"four")]
+        cache.save()
+
+        cache = self._cache(tmp_path)
+        cache.load()
+        del cache[(".1.2.3", "abc", True)]
+        cache.save()
+
+        cache = self._cache(tmp_path)
+        cache.load()
+        assert dict(cache) == {(".1.2.4", "abc", True): [(".1.2.4.1", b"four")]}
+
+    def test_truncated_record_is_ignored(self, tmp_path: Path) -> None:
+        cache = self._cache(tmp_path)
+        cache[(".1.2.3", "abc", True)] = [(".1.2.3.1", b"one")]
+        cache[(".1.2.4", "abc", True)] = [(".1.2.4.1", b"x" * 100)]
+        cache.save()
+        path = tmp_path / CompactWalkCache.FILENAME
+        path.write_bytes(path.read_bytes()[:-10])
+
+        cache = self._cache(tmp_path)
+        cache.load()
+        assert len(cache) == 1
+        cache[(".1.2.5", "abc", True)] = [(".1.2.5.1", b"five")]
+        cache.save()
+
+        cache = self._cache(tmp_path)
+        cache.load()
+        assert len(cache) == 2
+
+    def test_migrate_and_clear(self, tmp_path: Path) -> None:
+        legacy = WalkCache(tmp_path, logging.getLogger("test"))
+        legacy[(".1.2.3", "abc", True)] = [(".1.2.3.1", b"one")]
+        legacy.save()
+
+        cache = self._cache(tmp_path)
+        cache.load()
+        assert dict(cache) == {(".1.2.3", "abc", True): [(".1.2.3.1", b"one")]}
+        assert [p.name for p in tmp_path.iterdir()] == [CompactWalkCache.FILENAME]
+
+        cache.clear()
+        assert not list(tmp_path.iterdir())
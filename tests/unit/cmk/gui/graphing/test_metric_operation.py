@@ -28,3 +28,26 @@ def test__time_series_math_exc_symbol(args: tuple[Literal["%"], list[TimeSeries]
 def test__time_series_math_stable_singles(operator: Operators) -> None:
     test_ts = TimeSeries([0, 180, 60, 6, 5, 10, None, -2, -3.14])
     assert _time_series_math(operator, [test_ts]) == test_ts
+
+
+@pytest.mark.parametrize(
+    "operator, result",
+    [
+        pytest.param("+", [3, 2, 4, None], id="sum"),
+        pytest.param("*", [2, None, 0, None], id="product"),
+        pytest.param("-", [-1, None, 4, None], id="difference"),
+        pytest.param("/", [0.5, None, None, None], id="fraction"),
+        pytest.param("MAX", [2, 2, 4, None], id="maximum"),
+        pytest.param("MIN", [1, 2, 0, None], id="minimum"),
+        pytest.param("AVERAGE", [1.5, 2, 2, None], id="average"),
+        pytest.param("MERGE", [1, 2, 4, None], id="merge"),
+    ],
+)
+def test__time_series_math_missing_values(operator: Operators, result: list[float | None]) -> None:
+    assert _time_series_math(
+        operator,
+        [
+            TimeSeries([1, None, 4, None], (0, 40, 10)),
+            TimeSeries([2, 2, 0, None, 5], (0, 50, 10)),
+        ],
+    ) == TimeSeries(result, (0, 40, 10))
@@ -22,6 +22,8 @@ from cmk.gui.graphing._legacy import CheckMetricEntry
 from cmk.gui.graphing._metric_operation import MetricOpRRDSource, RRDDataKey
 from cmk.gui.graphing._rrd_fetch import (
     _reverse_translate_into_all_potentially_relevant_metrics,
+    _rrd_data_cache,
+    _rrd_data_query,
     fetch_rrd_data_for_graph,
     translate_and_merge_rrd_columns,
 )
@@ -31,6 +33,12 @@ from cmk.gui.time_series import TimeSeries, TimeSeriesValues
 from cmk.gui.utils.temperate_unit import TemperatureUnit
 
 
+@pytest.fixture(autouse=True)
+def _clear_rrd_data_cache() -> Iterator[None]:
+    yield
+    _rrd_data_cache.clear()
+
+
 @contextmanager
 def _setup_livestatus(mock_livestatus: MockLiveStatusConnection) -> Iterator[None]:
     with mock_livestatus(expect_status_query=True) as mock_live:
@@ -46,7 +54,7 @@ def _setup_livestatus(mock_livestatus: MockLiveStatusConnection) -> Iterator[Non
         )
         mock_live.expect_query(
             """GET services
-Columns: rrddata:temp:temp.max:1681985455:1681999855:20
+Columns: host_name service_description rrddata:temp:temp.max:1681985455:1681999855:20
 Filter: host_name = my-host
 Filter: service_description = Temperature Zone 6
 ColumnHeaders: off
@@ -136,6 +144,64 @@ def test_fetch_rrd_data_for_graph_with_conversion(
         }
 
 
+def test_fetch_rrd_data_for_graph_batched(
+    mock_livestatus: MockLiveStatusConnection,
+    request_context: None,
+) -> None:
+    services = ["Temperature Zone 6", "Temperature Zone 7"]
+    graph_recipe = _GRAPH_RECIPE.model_copy(
+        update={
+            "metrics": [
+                metric.model_copy(
+                    update={
+                        "operation": metric.operation.model_copy(update={"service_name": service})
+                    }
+                )
+                for metric in _GRAPH_RECIPE.metrics
+                for service in services
+            ]
+        }
+    )
+    with mock_livestatus(expect_status_query=True) as mock_live:
+        mock_live.add_table(
+            "services",
+            [
+                {
+                    "host_name": "my-host",
+                    "service_description": service,
+                    "rrddata:temp:temp.max:1681985455:1681999855:20": [1, 2, 3, 4, 5, value],
+                }
+                for service, value in zip([*services, "Temperature Zone 8"], [6, 7, 8])
+            ],
+        )
+        mock_live.expect_query(
+            """GET services
+Columns: host_name service_description rrddata:temp:temp.max:1681985455:1681999855:20
+Filter: host_name = my-host
+Filter: service_description = Temperature Zone 6
+And: 2
+Filter: host_name = my-host
+Filter: service_description = Temperature Zone 7
+And: 2
+Or: 2
+ColumnHeaders: off
+
+            """,
+            sites=["NO_SITE"],
+        )
+        rrd_data = fetch_rrd_data_for_graph(graph_recipe, _GRAPH_DATA_RANGE)
+        # The same data is fetched from the cache
+        assert fetch_rrd_data_for_graph(graph_recipe, _GRAPH_DATA_RANGE) == rrd_data
+
+    assert rrd_data == {
+        RRDDataKey(SiteId("NO_SITE"), HostName("my-host"), service, "temp", "max", 1): TimeSeries(
+            [4, 5, value],
+            time_window=(1, 2, 3),
+        )
+        for service, value in zip(services, [6, 7])
+    }
+
+
 def test_translate_and_merge_rrd_columns() -> None:
     assert translate_and_merge_rrd_columns(
         MetricName("my_metric"),
@@ -386,3 +452,20 @@ def test_reverse_translate_into_all_potentially_relevant_metrics(
         )
         == expected_result
     )
+
+
+def test_rrd_data_query_host_data() -> None:
+    assert _rrd_data_query(
+        ["rrddata:rta:rta.max:1:2:60"],
+        [
+            (SiteId("site_a"), HostName("host-b"), "_HOST_"),
+            (SiteId("site_b"), HostName("host-a"), "_HOST_"),
+        ],
+        host_data=True,
+    ) == (
+        "GET hosts\n"
+        "Columns: host_name rrddata:rta:rta.max:1:2:60\n"
+        "Filter: host_name = host-a\n"
+        "Filter: host_name = host-b\n"
+        "Or: 2\n"
+    )
@@ -389,7 +389,9 @@ def test_get_aggregation_state_empty(
 
     with live():
         with set_config(wato_enabled=wato_enabled):
-            clients.BiAggregation.get_aggregation_state_post(body={})
+            resp = clients.BiAggregation.get_aggregation_state_post(body={})
+
+    assert set(resp.json["computation_cache"]) == {"hits", "misses", "reused_subtrees"}
 
 
 @pytest.mark.parametrize("wato_enabled", [True, False])
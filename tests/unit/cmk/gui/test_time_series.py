@@ -101,3 +101,18 @@ class TestTimeseries:
             ).count(None)
             == 2
         )
+
+    def test_missing_values(self) -> None:
+        ts = TimeSeries([None, 1.5, None], time_window=(0, 30, 10))
+        assert ts.values == [None, 1.5, None]
+        assert list(ts) == [None, 1.5, None]
+        assert ts[0] is None
+        assert ts[1] == 1.5
+        assert ts == TimeSeries([None, 1.5, None], time_window=(0, 30, 10))
+        assert ts != TimeSeries([None, 1.5, 0], time_window=(0, 30, 10))
+
+    def test_set_values(self) -> None:
+        ts = TimeSeries([1, 2], time_window=(0, 20, 10))
+        ts.values = [None, 3]
+        assert ts.values == [None, 3]
+        assert ts.count(3) == 1
@@ -109,6 +109,7 @@ def test_registered_configvars() -> None:
         "enable_sounds",
         "escape_plugin_output",
         "event_limit",
+        "event_processing_workers",
         "eventsocket_queue_len",
         "failed_notification_horizon",
         "hard_query_limit",
@@ -130,6 +131,7 @@ def test_registered_configvars() -> None:
         "log_messages",
         "log_rulehits",
         "login_screen",
+        "max_concurrent_fetches",
         "mkeventd_connect_timeout",
         "mkeventd_notify_contactgroup",
         "mkeventd_notify_facility",
@@ -33,6 +33,7 @@ from cmk.snmplib import (
     SNMPContextConfig,
     SNMPContextTimeout,
     SNMPHostConfig,
+    SNMPRowInfo,
     SNMPTable,
     SNMPVersion,
     SpecialColumn,
@@ -262,3 +263,119 @@ def test_walk_raises_on_timeout_without_snmpv3_context_stop_on_timeout() -> None
         )
 
     assert type(excinfo.value) is SNMPContextTimeout  # pylint: disable=unidiomatic-typecheck
+
+
+def test_get_snmp_table_walks_all_columns_at_once() -> None:
+    class Backend(SNMPTestBackend):
+        def __init__(self, *args: object, **kwargs: object) -> None:
+            super().__init__(*args, **kwargs)  # type: ignore[arg-type]
+            self.requested: list[Sequence[str]] = []
+
+        def walk_many(self, /, oids, *, context, **kw):
+            self.requested.append(oids)
+            return super().walk_many(oids, context=context, **kw)
+
+    backend = Backend(SNMPConfig, logger)
+    walk_cache: dict[tuple[str, str, bool], SNMPRowInfo] = {}
+    tree = BackendSNMPTree(
+        base=".1.2.3",
+        oids=[
+            BackendOIDSpec(SpecialColumn.END, "string", False),
+            BackendOIDSpec("4", "string", False),
+            BackendOIDSpec("5", "string", True),
+        ],
+    )
+
+    table = get_snmp_table(
+        section_name=None, tree=tree, walk_cache=walk_cache, backend=backend, log=logger.debug
+    )
+
+    assert backend.requested == [[".1.2.3.4", ".1.2.3.5"]]
+    assert table == [[str(row), "C0FEFE", "C0FEFE"] for row in (1, 2, 3)]
+
+    # Everything is in the walk cache now
+    get_snmp_table(
+        section_name=None, tree=tree, walk_cache=walk_cache, backend=backend, log=logger.debug
+    )
+    assert len(backend.requested) == 1
+
+
+def test_get_snmpwalks_keeps_columns_walked_before_timeout() -> None:
+    class Backend(SNMPBackend):
+        def get(self, /, *args: object, **kw: object) -> NoReturn:
+            assert False
+
+        def walk(self, /, oid: str, *, context: str, **kw: object) -> SNMPRowInfo:
+            if context == "slow" and oid == ".1.2.3.5":
+                raise SNMPContextTimeout
+            return [(f"{oid}.{context}", b"value")]
+
+    section_name = SectionName("section")
+    walks = _snmp_table.get_snmpwalks(
+        section_name,
+        ".1.2.3",
+        [(".1.2.3.4", False), (".1.2.3.5", False)],
+        walk_cache={},
+        backend=Backend(
+            dataclasses.replace(
+                SNMPConfig,
+                snmp_version=SNMPVersion.V3,
+                snmpv3_contexts=[
+                    SNMPContextConfig(
+                        section=section_name,
+                        contexts=["slow", "fast"],
+                        timeout_policy="continue",
+                    )
+                ],
+            ),
+            logging.getLogger("test"),
+        ),
+        log=logger.debug,
+    )
+
+    assert walks == [
+        [(".1.2.3.4.slow", b"value"), (".1.2.3.4.fast", b"value")],
+        [(".1.2.3.5.fast", b"value")],
+    ]
+
+
+def test_get_snmpwalks_walks_only_the_rest_after_timeout() -> None:
+    walked: list[str] = []
+
+    class Backend(SNMPBackend):
+        def get(self, /, *args: object, **kw: object) -> NoReturn:
+            assert False
+
+        def walk(self, /, oid: str, *, context: str, **kw: object) -> SNMPRowInfo:
+            walked.append(oid)
+            return [(oid, b"value")]
+
+        def walk_many(self, /, oids, *, context, **kw):
+            # Walking concurrently, ".4" was finished and ".6" not even started.
+            raise SNMPContextTimeout(
+                walked={".1.2.3.4": [(".1.2.3.4", b"4")]}, not_started=[".1.2.3.6"]
+            )
+
+    section_name = SectionName("section")
+    walks = _snmp_table.get_snmpwalks(
+        section_name,
+        ".1.2.3",
+        [(".1.2.3.4", False), (".1.2.3.6", False)],
+        walk_cache={},
+        backend=Backend(
+            dataclasses.replace(
+                SNMPConfig,
+                snmp_version=SNMPVersion.V3,
+                snmpv3_contexts=[
+                    SNMPContextConfig(
+                        section=section_name, contexts=[""], timeout_policy="continue"
+                    )
+                ],
+            ),
+            logging.getLogger("test"),
+        ),
+        log=logger.debug,
+    )
+
+    assert walked == [".1.2.3.6"]
+    assert walks == [[(".1.2.3.4", b"4")], [(".1.2.3.6", b"value")]]
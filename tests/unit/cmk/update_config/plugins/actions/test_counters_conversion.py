@@ -24,6 +24,19 @@ def test_new_files_are_ignored(tmp_path: Path) -> None:
     assert new_file.read_text() == content
 
 
+def test_new_files_with_appended_changes_are_ignored(tmp_path: Path) -> None:
+    content = (
+        '[[["heute", "plugin", "item", "user-key"], "42"]]\n'
+        '[[["heute", "plugin", "item", "user-key"], "23"]]\n'
+    )
+
+    (new_file := tmp_path / "heute").write_text(content)
+
+    ConvertCounters.convert_counter_files(tmp_path)
+
+    assert new_file.read_text() == content
+
+
 def test_old_files_are_converted(tmp_path: Path) -> None:
     host = HostAddress("heute")
     service = ServiceID(CheckPluginName("plugin"), "item")
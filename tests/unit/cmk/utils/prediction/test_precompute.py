@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import os
+from pathlib import Path
+
+import pytest
+
+from livestatus import LocalConnection, MKLivestatusSocketError, RRDResponse
+
+from cmk.utils.livestatus_helpers.testing import MockLiveStatusConnection, SiteName
+from cmk.utils.prediction import (
+    _precompute,
+    make_updated_predictions,
+    precompute_predictions,
+    PredictionStore,
+)
+from cmk.utils.prediction._precompute import (
+    _due_time,
+    _next_day,
+    _PRECOMPUTE_WINDOW,
+    pending_predictions,
+    update_prediction,
+)
+
+from cmk.agent_based.prediction_backend import PredictionInfo, PredictionParameters
+
+
+def _meta() -> PredictionInfo:
+    return PredictionInfo.make(
+        "util",
+        "upper",
+        PredictionParameters(period="hour", horizon=2, levels=("absolute", (1.0, 2.0))),
+        1700000000,
+    )
+
+
+# Early in the day, long before the predictions of the next day are due
+_NOW = _meta().valid_interval[0] + 3600
+
+
+def _get_recorded_data(metric: str, start: int, end: int) -> RRDResponse:
+    assert metric == "util.max"
+    return RRDResponse(range(start, end, 3600), [float(n % 24) for n in range(start, end, 3600)])
+
+
+def test_requested_prediction_is_pending(tmp_path: Path) -> None:
+    store = PredictionStore(tmp_path)
+    meta = _meta()
+    store.save_info(meta)
+
+    assert pending_predictions(store, _NOW) == [meta]
+    assert make_updated_predictions(store, _NOW) == {hash(meta): (None, None)}
+
+    assert update_prediction(store, meta, _get_recorded_data) is not None
+    assert not pending_predictions(store, _NOW)
+    ((reference, levels),) = make_updated_predictions(store, _NOW).values()
+    assert reference is not None and levels is not None
+
+
+def test_next_day_is_pending_before_it_starts(tmp_path: Path) -> None:
+    store = PredictionStore(tmp_path)
+    meta = _meta()
+    store.save_info(meta)
+    update_prediction(store, meta, _get_recorded_data)
+    upcoming = _next_day(meta)
+    due = _due_time(store, upcoming)
+
+    assert upcoming.valid_interval[0] == meta.valid_interval[1]
+    assert upcoming.valid_interval[0] - _PRECOMPUTE_WINDOW <= due < upcoming.valid_interval[0]
+    assert not pending_predictions(store, due - 1)
+    assert pending_predictions(store, due) == [upcoming]
+
+    update_prediction(store, upcoming, _get_recorded_data)
+    assert not pending_predictions(store, due)
+    assert store.has_prediction(upcoming)
+    # At midnight the checks find the prediction of the new day.
+    assert list(store.iter_all_valid_predictions(upcoming.valid_interval[0]))[0][1] is not None
+
+
+def test_precomputed_prediction_is_refreshed_after_midnight(tmp_path: Path) -> None:
+    store = PredictionStore(tmp_path)
+    upcoming = _next_day(_meta())
+    due = _due_time(store, upcoming)
+    update_prediction(store, upcoming, _get_recorded_data)
+    # The day before, the youngest time slice of the period "hour", had not ended yet.
+    for path in store.path.rglob("*"):
+        os.utime(path, (due, due))
+
+    assert not pending_predictions(store, upcoming.valid_interval[0])
+    assert not pending_predictions(store, due + _PRECOMPUTE_WINDOW - 1)
+    assert pending_predictions(store, due + _PRECOMPUTE_WINDOW) == [upcoming]
+
+    update_prediction(store, upcoming, _get_recorded_data)
+    assert not pending_predictions(store, due + _PRECOMPUTE_WINDOW)
+
+
+def test_precompute_predictions(
+    tmp_path: Path,
+    patch_omd_site: None,
+    mock_livestatus: MockLiveStatusConnection,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        _precompute,
+        "get_rrd_data",
+        lambda _connection, host_name, description, metric, start, end: (
+            _get_recorded_data(metric, start, end)
+            if (host_name, description) == ("heute", "CPU utilization")
+            else None
+        ),
+    )
+    store = PredictionStore(tmp_path / "heute" / "CPU_utilization")
+    meta = _meta()
+    store.save_info(meta)
+    mock_livestatus.add_table(
+        "services",
+        [{"host_name": "heute", "description": "CPU utilization"}],
+        site=SiteName("local"),
+    )
+    mock_livestatus.expect_query("GET services\nColumns: host_name description")
+
+    assert precompute_predictions(tmp_path, LocalConnection, _NOW, max_workers=2) == 1
+    assert store.has_prediction(meta)
+    # Nothing is pending any more, so livestatus is not even asked for the services.
+    assert precompute_predictions(tmp_path, LocalConnection, _NOW, max_workers=2) == 0
+
+
+def test_precompute_predictions_livestatus_error(
+    tmp_path: Path,
+    patch_omd_site: None,
+    mock_livestatus: MockLiveStatusConnection,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def _get_rrd_data(
+        _connection: object, host_name: str, description: str, metric: str, start: int, end: int
+    ) -> RRDResponse:
+        if host_name == "gestern":
+            raise MKLivestatusSocketError("core reload")
+        return _get_recorded_data(metric, start, end)
+
+    monkeypatch.setattr(_precompute, "get_rrd_data", _get_rrd_data)
+    stores = [
+        PredictionStore(tmp_path / host_name / "CPU_utilization")
+        for host_name in ("gestern", "heute")
+    ]
+    meta = _meta()
+    for store in stores:
+        store.save_info(meta)
+    mock_livestatus.add_table(
+        "services",
+        [
+            {"host_name": "gestern", "description": "CPU utilization"},
+            {"host_name": "heute", "description": "CPU utilization"},
+        ],
+        site=SiteName("local"),
+    )
+    mock_livestatus.expect_query("GET services\nColumns: host_name description")
+
+    assert precompute_predictions(tmp_path, LocalConnection, _NOW, max_workers=2) == 1
+    assert [store.has_prediction(meta) for store in stores] == [False, True]
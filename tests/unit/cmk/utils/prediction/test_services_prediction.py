@@ -13,7 +13,7 @@ from tests.testlib.repo import repo_path
 
 from livestatus import RRDResponse
 
-from cmk.utils.prediction import _prediction
+from cmk.utils.prediction import _compute, _prediction
 
 
 def _load_fake_rrd_response(start: int, end: int) -> RRDResponse:
@@ -193,7 +193,7 @@ def test_calculate_data_for_prediction(
         for response in [_load_fake_rrd_response(start, end)]
     ]
 
-    data_for_pred = _prediction._calculate_data_for_prediction(raw_slices[0][0], raw_slices)
+    data_for_pred = _compute._calculate_data_for_prediction(raw_slices[0][0], raw_slices)
 
     expected_reference = _prediction.PredictionData.model_validate_json(
         (
@@ -10,8 +10,10 @@
 import errno
 import socket
 import ssl
+import threading
+import time
 from collections.abc import Sequence
-from contextlib import closing
+from contextlib import closing, suppress
 from pathlib import Path
 
 import pytest
@@ -25,6 +27,8 @@ from omdlib.certs import CertificateAuthority  # pylint: disable=wrong-import-or
 from cmk.utils.certs import root_cert_path, RootCA
 from cmk.utils.livestatus_helpers.testing import MockLiveStatusConnection
 
+from cmk.livestatus_client import _decode_rows
+
 
 # Override top level fixture to make livestatus connects possible here
 @pytest.fixture(autouse=True, scope="module")
@@ -341,3 +345,281 @@ def test_livestatus_lql(
     result: str,
 ) -> None:
     assert livestatus.livestatus_lql(*args) == result
+
+
+def _serve_one_query(sock_path: Path, response: bytes, delay: float) -> None:
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(str(sock_path))
+    server.listen(1)
+
+    def serve() -> None:
+        with closing(server), closing(server.accept()[0]) as conn:
+            data = b""
+            while not data.endswith(b"\n\n"):
+                data += conn.recv(4096)
+            time.sleep(delay)
+            # The client may go away before reading everything.
+            with suppress(OSError):
+                conn.sendall(b"200 %11d\n" % len(response) + response)
+                conn.recv(1)
+
+    threading.Thread(target=serve, daemon=True).start()
+
+
+def _sites(tmp_path: Path, delays: dict[str, float]) -> livestatus.SiteConfigurations:
+    sites = {}
+    for site_id, delay in delays.items():
+        _serve_one_query(tmp_path / site_id, f"[[{site_id!r}]]\n".encode(), delay)
+        sites[livestatus.SiteId(site_id)] = livestatus.SiteConfiguration(
+            socket=f"unix:{tmp_path / site_id}"
+        )
+    return livestatus.SiteConfigurations(sites)
+
+
+def test_query_parallel_keeps_order_of_sites(tmp_path: Path) -> None:
+    live = livestatus.MultiSiteConnection(_sites(tmp_path, {"slow": 0.2, "fast": 0.0}))
+    live.set_prepend_site(True)
+    assert live.query("GET status\nColumns: program_version\n") == [
+        ["slow", "slow"],
+        ["fast", "fast"],
+    ]
+    assert not live.dead_sites()
+    live.disconnect()
+
+
+def test_query_parallel_deadline(tmp_path: Path) -> None:
+    live = livestatus.MultiSiteConnection(_sites(tmp_path, {"slow": 2.0, "fast": 0.0}))
+    live.set_prepend_site(True)
+    live.set_deadline(0.2)
+
+    start = time.monotonic()
+    assert live.query("GET status\nColumns: program_version\n") == [["fast", "fast"]]
+    assert time.monotonic() - start < 2.0
+
+    assert list(live.dead_sites()) == ["slow"]
+    assert live.alive_sites() == ["fast"]
+    live.disconnect()
+
+
+@pytest.mark.parametrize(
+    "raw_response, json_format, rows",
+    [
+        (b"[]\n", True, []),
+        (b'[["a", 1],\n["b", [2, 3]]]\n', True, [["a", 1], ["b", [2, 3]]]),
+        (b"[['a', 1],\n['b]', {'c': (2, 3)}]]\n", False, [["a", 1], ["b]", {"c": (2, 3)}]]),
+        (b"[['a\\'[', u\"\\\"]\"]]\n", False, [["a'[", '"]']]),
+    ],
+)
+def test_decode_rows_in_pieces(raw_response: bytes, json_format: bool, rows: list[object]) -> None:
+    for size in (1, 3, len(raw_response)):
+        chunks = [raw_response[pos : pos + size] for pos in range(0, len(raw_response), size)]
+        assert list(_decode_rows(chunks, json_format)) == rows
+
+
+@pytest.mark.parametrize("raw_response", [b"", b"[", b'[["a"]', b'[["a"] ["b"]]', b'[["a"]] x'])
+def test_decode_rows_malformed(raw_response: bytes) -> None:
+    with pytest.raises(livestatus.MKLivestatusQueryError):
+        list(_decode_rows([raw_response], json_format=True))
+
+
+def test_query_iter(tmp_path: Path) -> None:
+    rows = [[f"host{num}", num] for num in range(10000)]
+    _serve_one_query(tmp_path / "live", repr(rows).encode(), 0.0)
+    live = livestatus.SingleSiteConnection(f"unix:{tmp_path / 'live'}")
+
+    assert list(live.query_iter("GET hosts\nColumns: name state\n")) == rows
+    assert live.socket is not None
+
+
+def test_query_iter_stopped_early(tmp_path: Path) -> None:
+    rows = [[f"host{num}", num] for num in range(10000)]
+    _serve_one_query(tmp_path / "live", repr(rows).encode(), 0.0)
+    live = livestatus.SingleSiteConnection(f"unix:{tmp_path / 'live'}")
+
+    with closing(live.query_iter("GET hosts\nColumns: name state\n")) as received:
+        assert next(received) == rows[0]
+    # The rest of the response can't be skipped.
+    assert live.socket is None
+
+
+def test_multisite_query_iter(tmp_path: Path) -> None:
+    live = livestatus.MultiSiteConnection(_sites(tmp_path, {"slow": 2.0, "a": 0.0, "b": 0.0}))
+    live.set_prepend_site(True)
+    live.set_deadline(0.2)
+
+    # The rows of the sites come in the order the sites answer.
+    assert sorted(live.query_iter("GET status\nColumns: program_version\n")) == [
+        ["a", "a"],
+        ["b", "b"],
+    ]
+    assert list(live.dead_sites()) == ["slow"]
+    assert live.alive_sites() == ["a", "b"]
+    live.disconnect()
+
+
+def test_multisite_query_iter_slow_site_first(tmp_path: Path) -> None:
+    live = livestatus.MultiSiteConnection(_sites(tmp_path, {"slow": 0.5, "fast": 0.0}))
+    live.set_prepend_site(True)
+
+    assert list(live.query_iter("GET status\nColumns: program_version\n")) == [
+        ["fast", "fast"],
+        ["slow", "slow"],
+    ]
+    assert not live.dead_sites()
+    assert live.alive_sites() == ["slow", "fast"]
+    live.disconnect()
+
+
+def _serve_queries(sock_path: Path, answers: Sequence[tuple[str, bytes]]) -> list[bytes]:
+    """Answer the queries of a single connection, return the data received at once"""
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(str(sock_path))
+    server.listen(1)
+    received: list[bytes] = []
+
+    def serve() -> None:
+        with closing(server), closing(server.accept()[0]) as conn:
+            data = b""
+            for code, response in answers:
+                while b"\n\n" not in data:
+                    received.append(conn.recv(4096))
+                    data += received[-1]
+                data = data.split(b"\n\n", 1)[1]
+                conn.sendall(b"%s %11d\n" % (code.encode(), len(response)) + response)
+            with suppress(OSError):
+                conn.recv(1)
+
+    threading.Thread(target=serve, daemon=True).start()
+    return received
+
+
+def test_query_many(tmp_path: Path) -> None:
+    received = _serve_queries(
+        tmp_path / "live",
+        [("200", b"[['a']]\n"), ("404", b"Table 'nope' not found"), ("200", b"[['b'], ['c']]\n")],
+    )
+    live = livestatus.SingleSiteConnection(f"unix:{tmp_path / 'live'}")
+
+    with livestatus.intercept_queries() as queries:
+        assert live.query_many(
+            [
+                "GET hosts\nColumns: name\n",
+                livestatus.Query(
+                    "GET nope\nColumns: name\n",
+                    suppress_exceptions=(livestatus.MKLivestatusTableNotFoundError,),
+                ),
+                "GET services\nColumns: description\n",
+            ]
+        ) == [[["a"]], [], [["b"], ["c"]]]
+
+    assert len(queries) == 3
+    # All queries are sent before the first response is read.
+    assert received[0].count(b"\n\n") == 3
+
+
+def test_query_many_error_in_batch(tmp_path: Path) -> None:
+    sock_path = tmp_path / "live"
+    _serve_queries(
+        sock_path,
+        [("200", b"[['a']]\n"), ("400", b"bad column"), ("200", b"[['b']]\n")],
+    )
+    live = livestatus.SingleSiteConnection(f"unix:{sock_path}")
+
+    with pytest.raises(livestatus.MKLivestatusSocketError):
+        live.query_many(
+            [
+                "GET hosts\nColumns: name\n",
+                "GET hosts\nColumns: nope\n",
+                "GET hosts\nColumns: alias\n",
+            ]
+        )
+
+    # The response to the last query of the batch is not taken as the next response.
+    sock_path.unlink()
+    _serve_queries(sock_path, [("200", b"[['c']]\n")])
+    assert live.query("GET hosts\nColumns: address\n") == [["c"]]
+    live.disconnect()
+
+
+def test_multisite_query_many(tmp_path: Path) -> None:
+    sites = {}
+    for site_id in ["a", "b"]:
+        _serve_queries(
+            tmp_path / site_id,
+            [("200", f"[[{num}]]\n".encode()) for num in range(2)],
+        )
+        sites[livestatus.SiteId(site_id)] = livestatus.SiteConfiguration(
+            socket=f"unix:{tmp_path / site_id}"
+        )
+    live = livestatus.MultiSiteConnection(livestatus.SiteConfigurations(sites))
+    live.set_prepend_site(True)
+
+    assert live.query_many(["GET status\nColumns: a\n", "GET status\nColumns: b\n"]) == [
+        [["a", 0], ["b", 0]],
+        [["a", 1], ["b", 1]],
+    ]
+    assert live.alive_sites() == ["a", "b"]
+    live.disconnect()
+
+
+def test_multisite_query_many_deadline(tmp_path: Path) -> None:
+    live = livestatus.MultiSiteConnection(_sites(tmp_path, {"slow": 2.0, "fast": 0.0}))
+    live.set_prepend_site(True)
+    live.set_deadline(0.2)
+
+    start = time.monotonic()
+    assert live.query_many(["GET status\nColumns: program_version\n"]) == [[["fast", "fast"]]]
+    assert time.monotonic() - start < 2.0
+    assert list(live.dead_sites()) == ["slow"]
+    live.disconnect()
+
+
+def test_connection_pool_reuses_connections(tmp_path: Path) -> None:
+    _serve_queries(tmp_path / "live", [("200", b"[['a']]\n"), ("200", b"[['b']]\n")])
+    socketurl = f"unix:{tmp_path / 'live'}"
+    key = (socketurl, False, True, None)
+
+    first = livestatus.SingleSiteConnection(socketurl, persist=True)
+    assert first.query("GET hosts\nColumns: name\n") == [["a"]]
+    first.disconnect()
+    assert livestatus.connection_pool.num_idle(key) == 1
+
+    # The server accepts only one connection.
+    second = livestatus.SingleSiteConnection(socketurl, persist=True)
+    assert second.query("GET hosts\nColumns: name\n") == [["b"]]
+    assert second.successfully_persisted()
+    second.disconnect()
+    livestatus.connection_pool.clear()
+
+
+def test_connection_pool_drops_connections_with_pending_responses(tmp_path: Path) -> None:
+    rows = [[f"host{num}"] for num in range(10000)]
+    _serve_one_query(tmp_path / "live", repr(rows).encode(), 0.0)
+    socketurl = f"unix:{tmp_path / 'live'}"
+
+    live = livestatus.SingleSiteConnection(socketurl, persist=True)
+    with closing(live.query_iter("GET hosts\nColumns: name\n")) as received:
+        assert next(received) == rows[0]
+    live.disconnect()
+
+    assert livestatus.connection_pool.num_idle((socketurl, False, True, None)) == 0
+
+
+def test_connection_pool_health_check_and_idle_eviction() -> None:
+    pool = livestatus.ConnectionPool(max_idle=60.0)
+    key = ("unix:/nowhere", False, True, None)
+    closed_by_site, site_end = socket.socketpair()
+    site_end.close()
+    healthy, other_end = socket.socketpair()
+
+    pool.put(key, healthy)
+    pool.put(key, closed_by_site)
+    assert pool.get(key) is healthy
+    assert closed_by_site.fileno() == -1
+
+    pool.max_idle = 0.0
+    pool.put(key, healthy)
+    time.sleep(0.01)
+    assert pool.get(key) is None
+    assert healthy.fileno() == -1
+    other_end.close()